@@ -39,6 +39,8 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import KMeans
 import joblib
 
+from elite_options_system.core.sdag_engine import SDAGEngine
+
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
@@ -540,8 +542,12 @@ class EliteImpactCalculator:
     incorporating all elite features for maximum accuracy and performance.
     """
     
-    def __init__(self, config: EliteConfig = None):
+    def __init__(self, config: EliteConfig = None, sdag_engine: Optional[SDAGEngine] = None):
         self.config = config or EliteConfig()
+        # Shared with IntegratedTradingSystem when provided, so SDAG is computed once per snapshot while the
+        # strategy config uses the legacy elite parameters; otherwise the private legacy engine is used
+        self._legacy_sdag_engine = SDAGEngine()
+        self.sdag_engine = sdag_engine or self._legacy_sdag_engine
         self.regime_detector = EliteMarketRegimeDetector(self.config)
         self.flow_classifier = EliteFlowClassifier(self.config)
         self.volatility_surface = EliteVolatilitySurface(self.config)
@@ -765,56 +771,18 @@ class EliteImpactCalculator:
         return df
     
     def _calculate_sdag_metrics(self, df: pd.DataFrame, current_price: float) -> pd.DataFrame:
-        """Calculate Skew and Delta Adjusted GEX (SDAG) metrics"""
-        
-        # Get base gamma exposure (using GXOI as proxy for skew-adjusted GEX)
-        if ConvexValueColumns.GXOI in df.columns:
-            skew_adjusted_gex = pd.to_numeric(df[ConvexValueColumns.GXOI], errors='coerce').fillna(0)
-        else:
-            skew_adjusted_gex = pd.Series(0, index=df.index)
-        
-        # Get delta exposure
-        if ConvexValueColumns.DXOI in df.columns:
-            delta_exposure = pd.to_numeric(df[ConvexValueColumns.DXOI], errors='coerce').fillna(0)
-        else:
-            delta_exposure = pd.Series(0, index=df.index)
-        
-        # Normalize delta for weighting (between -1 and 1)
-        delta_normalized = np.tanh(delta_exposure / (abs(delta_exposure).mean() + 1e-9))
-        
-        # SDAG Multiplicative Approach
-        df[EliteImpactColumns.SDAG_MULTIPLICATIVE] = (
-            skew_adjusted_gex * (1 + abs(delta_normalized) * 0.5)
-        )
+        """Calculate Skew and Delta Adjusted GEX (SDAG) metrics via the batched SDAG engine"""
         
-        # SDAG Directional Approach
-        directional_factor = np.sign(skew_adjusted_gex * delta_normalized) * (1 + abs(delta_normalized))
-        df[EliteImpactColumns.SDAG_DIRECTIONAL] = skew_adjusted_gex * directional_factor
+        # GXOI as proxy for skew-adjusted GEX; all methods, consensus and conviction in one pass
+        sdag_engine = self.sdag_engine if self.sdag_engine.parameters_key == self._legacy_sdag_engine.parameters_key else self._legacy_sdag_engine
+        sdag_result = sdag_engine.compute_frame(df, ConvexValueColumns.GXOI, ConvexValueColumns.DXOI, ConvexValueColumns.VOLATILITY)
+        sdag_result.assign_to(df)
         
-        # SDAG Weighted Approach
-        w1, w2 = 0.7, 0.3  # Weights favoring gamma over delta
-        df[EliteImpactColumns.SDAG_WEIGHTED] = (
-            (w1 * skew_adjusted_gex + w2 * delta_exposure) / (w1 + w2)
-        )
-        
-        # SDAG Volatility-Focused Approach
-        vol_factor = 1.0
-        if ConvexValueColumns.VOLATILITY in df.columns:
-            volatility = pd.to_numeric(df[ConvexValueColumns.VOLATILITY], errors='coerce').fillna(0.2)
-            vol_factor = 1.0 + volatility * 2.0  # Amplify during high vol
-        
-        df[EliteImpactColumns.SDAG_VOLATILITY_FOCUSED] = (
-            skew_adjusted_gex * (1 + delta_normalized * np.sign(skew_adjusted_gex)) * vol_factor
-        )
-        
-        # SDAG Consensus (average of all methods)
-        sdag_methods = [
-            EliteImpactColumns.SDAG_MULTIPLICATIVE,
-            EliteImpactColumns.SDAG_DIRECTIONAL,
-            EliteImpactColumns.SDAG_WEIGHTED,
-            EliteImpactColumns.SDAG_VOLATILITY_FOCUSED
-        ]
-        df[EliteImpactColumns.SDAG_CONSENSUS] = df[sdag_methods].mean(axis=1)
+        # Every SDAG column exists for the downstream composites, even if a method was not produced
+        for sdag_col in (EliteImpactColumns.SDAG_MULTIPLICATIVE, EliteImpactColumns.SDAG_DIRECTIONAL,
+                         EliteImpactColumns.SDAG_WEIGHTED, EliteImpactColumns.SDAG_VOLATILITY_FOCUSED):
+            if sdag_col not in df.columns:
+                df[sdag_col] = 0.0
         
         return df
     
@@ -1136,18 +1104,17 @@ class EliteImpactCalculator:
             logger.warning("Elite impact scores not calculated")
             return df.head(n_levels)
         
-        # Sort by elite impact score and signal strength
-        df_sorted = df.copy()
-        df_sorted['combined_score'] = (
-            abs(df_sorted[EliteImpactColumns.ELITE_IMPACT_SCORE]) * 
-            df_sorted.get(EliteImpactColumns.SIGNAL_STRENGTH, 1.0) *
-            df_sorted.get(EliteImpactColumns.PREDICTION_CONFIDENCE, 1.0)
-        )
+        # Rank by elite impact score and signal strength; only the selected rows are materialized
+        combined_score = (
+            abs(df[EliteImpactColumns.ELITE_IMPACT_SCORE]) * 
+            df.get(EliteImpactColumns.SIGNAL_STRENGTH, 1.0) *
+            df.get(EliteImpactColumns.PREDICTION_CONFIDENCE, 1.0)
+        ).reset_index(drop=True)
         
-        top_levels = df_sorted.nlargest(n_levels, 'combined_score')
+        top_levels = df.iloc[combined_score.nlargest(n_levels).index]
         
         logger.info(f"Identified top {len(top_levels)} impact levels")
-        return top_levels.drop('combined_score', axis=1)
+        return top_levels
     
     def get_performance_stats(self) -> Dict[str, Any]:
         """Get performance statistics"""
@@ -2,6 +2,7 @@
 # (Elite Version 2.0.7 - Greek Flow Integration & Refined Pressure Metrics)
 
 # Standard Library Imports
+import atexit
 import os
 import json
 import traceback
@@ -14,6 +15,8 @@ from dataclasses import fields # Added import
 import pandas as pd
 import numpy as np
 
+from elite_options_system.utils.volatility_state import VolatilityStateRegistry
+
 # --- Global Logger Setup ---
 if not logging.getLogger().hasHandlers():
     logging.basicConfig(
@@ -142,6 +145,13 @@ class EnhancedDataProcessor:
         self.trading_system_instance: Union[ImportedITS, IntegratedTradingSystemDummy] # type: ignore
         self._initialize_trading_system_instance()
         self._ensure_processed_output_dir_exists()
+        # Write-behind trade logging is owned by ITS; the processor starts it here and stops it in shutdown()
+        start_trade_logging = getattr(self.trading_system_instance, "start_trade_logging", None)
+        if callable(start_trade_logging) and start_trade_logging():
+            atexit.register(self.shutdown)
+            init_logger.info("Trade performance logging started.")
+        # Shared with ITS when available so ATR and historical vol are maintained once per symbol
+        self.volatility_states: VolatilityStateRegistry = getattr(self.trading_system_instance, "volatility_states", None) or VolatilityStateRegistry()
 
         if elite_impact_module_available and EliteImpactCalculator and EliteConfig:
             try:
@@ -151,8 +161,9 @@ class EnhancedDataProcessor:
                 elite_cfg_params_from_config = {k: v for k, v in calc_settings.items() if k in elite_config_fields}
                 init_logger.info(f"EliteImpactCalculator: Initializing EliteConfig with params: {elite_cfg_params_from_config}")
                 current_elite_config = EliteConfig(**elite_cfg_params_from_config)
-                self.elite_calculator = EliteImpactCalculator(config=current_elite_config)
-                init_logger.info("EliteImpactCalculator instance created successfully with custom configuration.")
+                shared_sdag_engine = getattr(self.trading_system_instance, "sdag_engine", None) # Reused while its parameters match the elite (legacy) ones
+                self.elite_calculator = EliteImpactCalculator(config=current_elite_config, sdag_engine=shared_sdag_engine)
+                init_logger.info(f"EliteImpactCalculator instance created successfully with custom configuration (shared SDAG engine: {shared_sdag_engine is not None}).")
             except Exception as e_init_elite_calc:
                 self.elite_calculator = None
                 init_logger.error(f"Failed to instantiate EliteImpactCalculator with custom configuration: {e_init_elite_calc}", exc_info=True)
@@ -161,6 +172,11 @@ class EnhancedDataProcessor:
             init_logger.warning("EliteImpactCalculator not available or not imported. Elite calculations will be skipped.")
         init_logger.info("EnhancedDataProcessor V2.0.7 Initialized.")
 
+    def shutdown(self) -> None:
+        """Flushes and stops the trading system's trade logger. Safe to call more than once."""
+        stop_trade_logging = getattr(self.trading_system_instance, "stop_trade_logging", None)
+        if callable(stop_trade_logging): stop_trade_logging()
+
     def _load_main_config_for_processor(self) -> Dict[str, Any]:
         load_cfg_logger = logger.getChild("ProcessorConfigLoad"); load_cfg_logger.debug(f"Loading FULL application configuration from: {self.config_path}")
         # config_path is now expected to be relative to project root, or absolute
@@ -477,16 +493,11 @@ class EnhancedDataProcessor:
                 market_data_for_elite_calc = None
                 if isinstance(historical_ohlc_df, pd.DataFrame) and not historical_ohlc_df.empty and 'close' in historical_ohlc_df.columns:
                     if len(historical_ohlc_df) >= 21:
-                        market_data_for_elite_calc = pd.DataFrame({
-                            'price': historical_ohlc_df['close'],
-                            'volatility': historical_ohlc_df['close'].pct_change().rolling(window=20).std() * np.sqrt(252)
-                        })
-                        market_data_for_elite_calc.fillna(method='bfill', inplace=True)
-                        market_data_for_elite_calc.fillna(method='ffill', inplace=True)
-                        market_data_for_elite_calc.dropna(inplace=True)
-                        if market_data_for_elite_calc.empty:
-                            logger.warning(f"Processor ({sym_proc}): Market data for elite calc became empty after processing NaNs. Proceeding without it.")
-                            market_data_for_elite_calc = None
+                        # Price / 20d historical vol series served from the incremental per-symbol state (only new bars are folded in)
+                        vol_state = self.volatility_states.sync(sym_proc, historical_ohlc_df)
+                        market_data_for_elite_calc = vol_state.market_frame()
+                        if market_data_for_elite_calc is None:
+                            logger.warning(f"Processor ({sym_proc}): Market data for elite calc has no historical volatility yet ({vol_state.bar_count} bars). Proceeding without it.")
                     else:
                         logger.warning(f"Processor ({sym_proc}): Not enough historical OHLC data ({len(historical_ohlc_df)} rows) for market regime input to Elite Calculator. Proceeding without it.")
 
@@ -0,0 +1,159 @@
+# key_levels.py
+"""
+Strike-indexed key-level detection.
+
+A StrikeLevelIndex holds one snapshot of strike-aggregated metrics (the output of
+IntegratedTradingSystem._aggregate_for_levels) sorted by strike, with its columns available as
+numpy arrays. Everything derived from it is a vectorized pass over the strike axis:
+- support / resistance: local MSPI peaks / troughs (in strike order) whose |MSPI| clears the
+  key-level threshold;
+- high conviction: SAI at or above its threshold on strikes with a non-zero MSPI;
+- structure changes: SSI at or below its threshold, or an MSPI sign flip against the previous
+  snapshot of the same symbol (strikes aligned by position when the grid is unchanged, else by
+  searchsorted over the previous sorted strikes).
+
+KeyLevelTracker keeps the current and previous index per symbol. The aggregated frame is built once
+per distinct input (keyed by a digest of the aggregated columns), so the three identify_* calls of a
+refresh share one aggregation, and results are memoized on the index until thresholds change. The digest
+covers every aggregated column in full, so a frame edited in place is never served a stale snapshot.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from elite_options_system.utils.threshold_cache import series_digest
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+STRIKE_COL: str = "strike"
+PREV_MSPI_COL: str = "prev_mspi"
+SSI_CHANGE_COL: str = "ssi_change"
+STRUCTURE_CHANGE_TYPE_COL: str = "structure_change_type"
+DEFAULT_MAX_INPUTS: int = 8
+
+
+def frame_digest(df: pd.DataFrame, columns: Iterable[str]) -> bytes:
+    """Content digest of the given columns of a frame (absent columns are skipped)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(len(df)).encode("utf-8"))
+    for col in columns:
+        if col not in df.columns: continue
+        hasher.update(str(col).encode("utf-8")); hasher.update(series_digest(df[col]) or b"\x00")
+    return hasher.digest()
+
+
+def local_extrema_mask(values: np.ndarray, find: str = "max") -> np.ndarray:
+    """
+    Local maxima ('max') or minima ('min') of a strike-ordered array. End points compare against their
+    single neighbour; on a plateau only its last strike is marked.
+    """
+    signed = np.asarray(values, dtype=float) * (1.0 if find == "max" else -1.0)
+    if len(signed) == 0: return np.zeros(0, dtype=bool)
+    left = np.concatenate(([-np.inf], signed[:-1])); right = np.concatenate((signed[1:], [-np.inf]))
+    return (signed >= left) & (signed > right)
+
+
+class StrikeLevelIndex:
+    """One snapshot of strike-aggregated metrics, sorted by strike, plus the results derived from it."""
+    __slots__ = ("digest", "frame", "strikes", "_arrays", "results")
+
+    def __init__(self, digest: bytes, aggregated_df: pd.DataFrame):
+        frame = aggregated_df.reset_index(drop=True)
+        strikes = pd.to_numeric(frame[STRIKE_COL], errors='coerce').to_numpy(dtype=float) if STRIKE_COL in frame.columns else np.zeros(0)
+        if len(strikes) > 1 and not (np.diff(strikes) > 0).all(): # _aggregate_for_levels sorts already; only reorder if needed
+            order = np.argsort(strikes, kind="stable"); frame = frame.iloc[order].reset_index(drop=True); strikes = strikes[order]
+        self.digest = digest; self.frame = frame; self.strikes = strikes
+        self._arrays: Dict[str, np.ndarray] = {}
+        self.results: Dict[Any, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self.strikes)
+
+    def values(self, col: str, default_val: float = 0.0) -> np.ndarray:
+        """Float array of a column (NaN -> default_val), converted once per snapshot."""
+        key = f"{col}|{default_val}"
+        arr = self._arrays.get(key)
+        if arr is None:
+            arr = pd.to_numeric(self.frame[col], errors='coerce').fillna(default_val).to_numpy(dtype=float) if col in self.frame.columns else np.full(len(self.frame), default_val)
+            self._arrays[key] = arr
+        return arr
+
+    def series(self, col: str, default_val: float = 0.0) -> pd.Series:
+        return pd.Series(self.values(col, default_val), name=col)
+
+    def lookup(self, col: str, query_strikes: np.ndarray, default_val: float = np.nan) -> np.ndarray:
+        """Column value at each queried strike (default_val where the strike is not in this snapshot)."""
+        query_strikes = np.asarray(query_strikes, dtype=float)
+        if len(self) == 0: return np.full(len(query_strikes), default_val)
+        positions = np.clip(np.searchsorted(self.strikes, query_strikes), 0, len(self) - 1)
+        return np.where(self.strikes[positions] == query_strikes, self.values(col)[positions], default_val)
+
+    def rows(self, mask: np.ndarray) -> pd.DataFrame:
+        """Copy of the rows selected by a boolean mask (cached frames are never handed out)."""
+        return self.frame.loc[mask].reset_index(drop=True)
+
+    def align_previous(self, previous: Optional["StrikeLevelIndex"], col: str, default_val: float = 0.0) -> np.ndarray:
+        """Previous snapshot's column at each current strike (NaN where the strike did not exist)."""
+        if previous is None or len(previous) == 0: return np.full(len(self), np.nan)
+        prev_values = previous.values(col, default_val)
+        if len(previous) == len(self) and np.array_equal(previous.strikes, self.strikes): return prev_values.copy()
+        positions = np.clip(np.searchsorted(previous.strikes, self.strikes), 0, len(previous) - 1)
+        return np.where(previous.strikes[positions] == self.strikes, prev_values[positions], np.nan)
+
+
+class KeyLevelTracker:
+    """Current and previous StrikeLevelIndex per symbol, with input-digest memoization of the aggregation."""
+
+    def __init__(self, max_inputs: int = DEFAULT_MAX_INPUTS):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.max_inputs = int(max_inputs)
+        self._current: Dict[str, StrikeLevelIndex] = {}
+        self._previous: Dict[str, StrikeLevelIndex] = {}
+        self._by_input: "OrderedDict[Tuple[str, bytes], StrikeLevelIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def index_for(self, symbol: str, input_df: pd.DataFrame, aggregate: Callable[[], pd.DataFrame], aggregated_columns: Iterable[str]) -> Optional[StrikeLevelIndex]:
+        """
+        Index for an input frame. 'aggregate' runs only for an input not seen recently; a new aggregated
+        snapshot for the symbol becomes current and the old current becomes the previous snapshot.
+        """
+        aggregated_columns = tuple(aggregated_columns)
+        key = (symbol, frame_digest(input_df, aggregated_columns))
+        with self._lock:
+            index = self._by_input.get(key)
+            if index is not None:
+                self._by_input.move_to_end(key); return index
+            aggregated_df = aggregate()
+            if not isinstance(aggregated_df, pd.DataFrame) or aggregated_df.empty or STRIKE_COL not in aggregated_df.columns: return None
+            agg_digest = frame_digest(aggregated_df, aggregated_columns)
+            current = self._current.get(symbol)
+            if current is None or current.digest != agg_digest:
+                index = StrikeLevelIndex(agg_digest, aggregated_df)
+                if current is not None: self._previous[symbol] = current
+                self._current[symbol] = index
+                self.instance_logger.debug(f"{symbol or '<unknown>'}: new level snapshot over {len(index)} strikes.")
+            else:
+                index = current # Same strike metrics reached through a different input (e.g. an already aggregated frame)
+            self._by_input[key] = index
+            while len(self._by_input) > self.max_inputs: self._by_input.popitem(last=False)
+            return index
+
+    def previous_for(self, symbol: str, index: StrikeLevelIndex) -> Optional[StrikeLevelIndex]:
+        """Snapshot preceding 'index' (None unless 'index' is the symbol's current snapshot)."""
+        with self._lock:
+            return self._previous.get(symbol) if self._current.get(symbol) is index else None
+
+    def clear_results(self) -> None:
+        """Drops memoized level results (thresholds changed); the indexes themselves stay valid."""
+        with self._lock:
+            for index in list(self._current.values()) + list(self._previous.values()): index.results.clear()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._current.clear(); self._previous.clear(); self._by_input.clear()
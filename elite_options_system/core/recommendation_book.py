@@ -0,0 +1,246 @@
+# recommendation_book.py
+"""
+Struct-of-arrays book of directional strategy recommendations.
+
+Every recommendation is one row across a set of parallel numpy columns (strike, direction, entry,
+stop, targets, conviction, timestamps, ...), keyed by (symbol, direction, strike). A snapshot update is
+a handful of whole-column operations, independent of how many recommendations are open:
+- exits: stop / target 2 hits, an MSPI flip at the strike and contradicting, structure-change or
+  flow-divergence signals at the strike strong enough per the 'exits' settings, combined with np.select.
+  A recommendation is never exited on the level snapshot that issued it;
+- adjustments: once price trades through target 1 the stop moves to break-even and the targets roll
+  forward by ATR multiples from the 'targets' settings (initial brackets come from the target engine);
+- entries: candidate keys are matched against the book with searchsorted, so active keys and keys
+  exited within the reissue window are suppressed without a per-item lookup.
+
+The book checkpoints to a compressed .npz (numeric columns, text columns and the symbol table), written
+atomically, and can be restored on start-up.
+"""
+import logging
+import os
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+STATUS_ACTIVE: int = 0
+STATUS_EXITED: int = 1
+DIRECTIONAL_CATEGORY: str = "Directional Trades"
+DIRECTION_LABELS: Dict[int, str] = {1: "Bullish", -1: "Bearish"}
+CHECKPOINT_FORMAT_VERSION: int = 1
+_STRIKE_KEY_SCALE: float = 100.0 # Strikes keyed in cents
+
+NUMERIC_FIELDS: Dict[str, Any] = {
+    "rec_id": np.int64, "symbol_code": np.int32, "strike": np.float64, "direction": np.int8, "status": np.int8,
+    "entry": np.float64, "stop": np.float64, "target_1": np.float64, "target_2": np.float64, "atr": np.float64,
+    "conviction_score": np.float64, "conviction_stars": np.int8, "mspi": np.float64, "sai": np.float64, "ssi": np.float64,
+    "issued_at": "datetime64[us]", "updated_at": "datetime64[us]", "adjusted_at": "datetime64[us]",
+    "issued_snapshot": np.int64 # snapshot_id() of the level snapshot that issued the row (0 = unknown)
+}
+TEXT_FIELDS: Tuple[str, ...] = ("signal_type", "rationale", "target_rationale", "exit_reason")
+
+
+def recommendation_keys(symbol_codes: np.ndarray, directions: np.ndarray, strikes: np.ndarray) -> np.ndarray:
+    """int64 (symbol, direction, strike) keys: symbol code in the high bits, then direction, then strike in cents."""
+    strike_cents = np.round(np.asarray(strikes, dtype=float) * _STRIKE_KEY_SCALE).astype(np.int64)
+    return (np.asarray(symbol_codes, dtype=np.int64) << 40) | ((np.asarray(directions, dtype=np.int64) + 1) << 36) | strike_cents
+
+
+def snapshot_id(digest: Optional[bytes]) -> int:
+    """Non-zero int64 id of a level snapshot digest (0 when there is none)."""
+    if not digest: return 0
+    return int.from_bytes(digest[:8], "little", signed=True) or 1
+
+
+def max_stars_at(query_strikes: np.ndarray, signal_strikes: np.ndarray, signal_stars: np.ndarray) -> np.ndarray:
+    """Strongest signal rating at each queried strike (0 where no signal sits on that strike)."""
+    query_strikes = np.asarray(query_strikes, dtype=float)
+    if len(signal_strikes) == 0 or len(query_strikes) == 0: return np.zeros(len(query_strikes), dtype=int)
+    order = np.argsort(signal_strikes, kind="stable")
+    sorted_strikes = np.asarray(signal_strikes, dtype=float)[order]; sorted_stars = np.asarray(signal_stars, dtype=int)[order]
+    unique_strikes, starts = np.unique(sorted_strikes, return_index=True)
+    per_strike_max = np.maximum.reduceat(sorted_stars, starts)
+    positions = np.clip(np.searchsorted(unique_strikes, query_strikes), 0, len(unique_strikes) - 1)
+    return np.where(unique_strikes[positions] == query_strikes, per_strike_max[positions], 0)
+
+
+def exit_reasons(direction: np.ndarray, stop: np.ndarray, target_2: np.ndarray, price: float, strike_mspi: np.ndarray,
+                 contradiction_stars: np.ndarray, structure_stars: np.ndarray, flow_stars: np.ndarray, exits_settings: Dict[str, Any]) -> np.ndarray:
+    """Exit reason per recommendation ('' = hold); the first matching condition wins."""
+    sign = np.asarray(direction, dtype=float)
+    signed_move_to_stop = sign * (price - stop); signed_move_to_t2 = sign * (price - target_2)
+    flip_threshold = float(exits_settings.get("mspi_flip_threshold", 0.7))
+    conditions = [
+        np.isfinite(stop) & (signed_move_to_stop <= 0),
+        np.isfinite(target_2) & (signed_move_to_t2 >= 0),
+        sign * np.nan_to_num(strike_mspi) <= -flip_threshold,
+        contradiction_stars >= int(exits_settings.get("contradiction_stars_threshold", 4)),
+        structure_stars >= int(exits_settings.get("ssi_exit_stars_threshold", 3)),
+        flow_stars >= int(exits_settings.get("arfi_exit_stars_threshold", 4)),
+    ]
+    choices = ["Stop loss hit", "Target 2 reached", f"MSPI flipped against position (|MSPI| >= {flip_threshold:g})",
+               "Contradicting signal", "Structure change at strike", "Flow divergence at strike"]
+    return np.select(conditions, np.asarray(choices, dtype=object), default="")
+
+
+def trail_targets(direction: np.ndarray, entry: np.ndarray, stop: np.ndarray, target_1: np.ndarray, target_2: np.ndarray,
+                  price: float, atr: np.ndarray, targets_settings: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Once price trades through target 1: stop to break-even (never loosened), target 1 -> target 2 and target 2
+    extended by 'target_atr_target2_multiplier_from_t1' ATRs. Returns (stop, target_1, target_2, adjusted mask).
+    """
+    sign = np.asarray(direction, dtype=float)
+    reached_t1 = np.isfinite(target_1) & (sign * (price - target_1) >= 0)
+    extension = float(targets_settings.get("target_atr_target2_multiplier_from_t1", 2.0)) * atr
+    breakeven_stop = np.where(sign > 0, np.fmax(stop, entry), np.fmin(stop, entry))
+    new_stop = np.where(reached_t1, breakeven_stop, stop)
+    new_t1 = np.where(reached_t1, target_2, target_1)
+    new_t2 = np.where(reached_t1, target_2 + sign * extension, target_2)
+    return new_stop, new_t1, new_t2, reached_t1
+
+
+def _iso_seconds(stamps: np.ndarray) -> np.ndarray:
+    """'YYYY-MM-DDTHH:MM:SS' strings (None for NaT)."""
+    text = np.datetime_as_string(stamps.astype("datetime64[s]"), unit="s").astype(object)
+    text[np.isnat(stamps)] = None
+    return text
+
+
+class RecommendationBook:
+    """Parallel-column store of recommendations with (symbol, direction, strike) keys and an .npz checkpoint."""
+
+    def __init__(self, id_prefix: str = "DREC"):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.id_prefix = id_prefix
+        self.symbols: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self.columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype=dtype) for name, dtype in NUMERIC_FIELDS.items()}
+        self.columns.update({name: np.empty(0, dtype=object) for name in TEXT_FIELDS})
+        self.next_id: int = 1
+        self.version: int = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.columns["rec_id"])
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def symbol_code(self, symbol: str) -> int:
+        key = str(symbol).upper()
+        code = self._symbol_codes.get(key)
+        if code is None:
+            code = self._symbol_codes[key] = len(self.symbols); self.symbols.append(key)
+        return code
+
+    def keys(self) -> np.ndarray:
+        return recommendation_keys(self.columns["symbol_code"], self.columns["direction"], self.columns["strike"])
+
+    def find(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key in the book (-1 if absent). Keys are unique in the book, see compact()."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(self) == 0 or len(keys) == 0: return np.full(len(keys), -1, dtype=np.int64)
+        book_keys = self.keys(); order = np.argsort(book_keys, kind="stable"); sorted_keys = book_keys[order]
+        positions = np.clip(np.searchsorted(sorted_keys, keys), 0, len(sorted_keys) - 1)
+        return np.where(sorted_keys[positions] == keys, order[positions], -1)
+
+    def append(self, values: Dict[str, np.ndarray]) -> np.ndarray:
+        """Adds rows (missing fields get NaN / NaT / 0 / ''); assigns ids. Returns the new row positions."""
+        n_new = len(next(iter(values.values()))) if values else 0
+        if n_new == 0: return np.empty(0, dtype=np.int64)
+        start = len(self)
+        values = dict(values); values["rec_id"] = np.arange(self.next_id, self.next_id + n_new, dtype=np.int64)
+        for name, column in self.columns.items():
+            if name in values: new_values = np.asarray(values[name]).astype(column.dtype, copy=False)
+            elif column.dtype == object: new_values = np.full(n_new, "", dtype=object)
+            elif column.dtype.kind == "M": new_values = np.full(n_new, np.datetime64("NaT"), dtype=column.dtype)
+            elif column.dtype.kind == "f": new_values = np.full(n_new, np.nan)
+            else: new_values = np.zeros(n_new, dtype=column.dtype)
+            self.columns[name] = np.concatenate((column, new_values))
+        self.next_id += n_new; self.version += 1
+        return np.arange(start, start + n_new)
+
+    def compact(self, now: np.datetime64, retention_seconds: float) -> int:
+        """Drops exited rows older than the retention window (they no longer block a reissue). Returns rows dropped."""
+        if len(self) == 0: return 0
+        age_seconds = (now - self.columns["updated_at"]) / np.timedelta64(1, "s")
+        drop = (self.columns["status"] == STATUS_EXITED) & (age_seconds >= retention_seconds)
+        if not drop.any(): return 0
+        keep = ~drop
+        for name in self.columns: self.columns[name] = self.columns[name][keep]
+        self.version += 1
+        return int(drop.sum())
+
+    def rows_for(self, symbol_code: int, status: Optional[int] = None) -> np.ndarray:
+        mask = self.columns["symbol_code"] == symbol_code
+        if status is not None: mask &= self.columns["status"] == status
+        return np.flatnonzero(mask)
+
+    def to_records(self, rows: np.ndarray, now: np.datetime64) -> List[Dict[str, Any]]:
+        """Dashboard records (the recommendations-table schema) for the given rows; NaN / NaT become None."""
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0: return []
+        col = {name: values[rows] for name, values in self.columns.items()}
+        direction = col["direction"].astype(int); is_exited = col["status"] == STATUS_EXITED
+        symbols = np.asarray(self.symbols, dtype=object)[col["symbol_code"]]
+        issued_ts = _iso_seconds(col["issued_at"])
+        strike_text = np.char.mod("%.2f", col["strike"]).astype(object)
+        fields: Dict[str, np.ndarray] = {
+            "id": self.id_prefix + "_" + symbols + "_" + col["rec_id"].astype(str).astype(object),
+            "symbol": symbols, "Category": np.full(len(rows), DIRECTIONAL_CATEGORY, dtype=object),
+            "direction_label": np.where(direction > 0, DIRECTION_LABELS[1], DIRECTION_LABELS[-1]).astype(object),
+            "strike": col["strike"],
+            "strategy": np.where(direction > 0, "Consider Longs near ", "Consider Shorts near ").astype(object) + strike_text,
+            "conviction_stars": col["conviction_stars"].astype(int), "raw_conviction_score": col["conviction_score"],
+            "status": np.where(is_exited, "EXITED", np.where(col["issued_at"] == now, "ACTIVE_NEW", "ACTIVE")).astype(object),
+            "entry_ideal": col["entry"], "target_1": col["target_1"], "target_2": col["target_2"], "stop_loss": col["stop"],
+            "rationale": col["rationale"], "target_rationale": col["target_rationale"],
+            "mspi": col["mspi"], "sai": col["sai"], "ssi": col["ssi"], "atr_at_entry": col["atr"],
+            "timestamp": issued_ts, "issued_ts": issued_ts, "last_updated_ts": _iso_seconds(col["updated_at"]), "last_adjusted_ts": _iso_seconds(col["adjusted_at"]),
+            "exit_reason": np.where(is_exited, col["exit_reason"], None), "type": col["signal_type"]
+        }
+        names = list(fields)
+        values = []
+        for arr in fields.values():
+            obj = arr.astype(object)
+            if arr.dtype.kind == "f": obj[np.isnan(arr)] = None
+            values.append(obj)
+        return [dict(zip(names, record)) for record in zip(*values)]
+
+    # --- Checkpointing ---
+
+    def save(self, path: str) -> None:
+        """Atomic compressed checkpoint: numeric columns as-is, text columns as unicode arrays, plus the symbol table."""
+        with self._lock:
+            payload: Dict[str, np.ndarray] = {f"n_{name}": values for name, values in self.columns.items() if values.dtype != object}
+            payload.update({f"t_{name}": self.columns[name].astype(str) for name in TEXT_FIELDS})
+            payload["symbols"] = np.asarray(self.symbols, dtype=str)
+            payload["meta"] = np.asarray([CHECKPOINT_FORMAT_VERSION, self.next_id], dtype=np.int64)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, **payload)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, id_prefix: str = "DREC") -> "RecommendationBook":
+        book = cls(id_prefix=id_prefix)
+        with np.load(path, allow_pickle=False) as data:
+            format_version, next_id = (int(v) for v in data["meta"])
+            if format_version != CHECKPOINT_FORMAT_VERSION: raise ValueError(f"Unsupported recommendation checkpoint format {format_version}.")
+            for name, dtype in NUMERIC_FIELDS.items():
+                if f"n_{name}" in data: book.columns[name] = data[f"n_{name}"].astype(dtype, copy=False)
+            for name in TEXT_FIELDS:
+                if f"t_{name}" in data: book.columns[name] = data[f"t_{name}"].astype(object)
+            book.symbols = [str(s) for s in data["symbols"]]
+        book._symbol_codes = {sym: i for i, sym in enumerate(book.symbols)}
+        n_rows = len(book.columns["rec_id"])
+        for name in ("issued_snapshot",): # Added after the first checkpoints were written
+            if len(book.columns[name]) == 0 and n_rows: book.columns[name] = np.zeros(n_rows, dtype=NUMERIC_FIELDS[name])
+        if any(len(values) != n_rows for values in book.columns.values()): raise ValueError("Recommendation checkpoint columns have inconsistent lengths.")
+        book.next_id = max(next_id, int(book.columns["rec_id"].max()) + 1 if n_rows else 1)
+        return book
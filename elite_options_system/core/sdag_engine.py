@@ -0,0 +1,196 @@
+# sdag_engine.py
+"""
+Batched SDAG (Skew and Delta Adjusted GEX) methodology engine.
+
+Every enabled methodology is expressed as one column of a (basis x methods) coefficient matrix,
+so all of them are produced by a single matrix product over the per-contract basis
+[G, G*|Dn|, G*Dn*sign(G), D], followed by the directional sign and volatility scaling:
+
+    multiplicative:      G * (1 + k*|Dn|)
+    directional:         G * (1 + k*|Dn|) * sign(G*Dn)
+    weighted:            (w1*G + w2*D) / (w1 + w2)
+    volatility_focused:  G * (1 + k*Dn*sign(G)) * (1 + f*vol)
+
+G is gamma exposure, D delta exposure and Dn = tanh(D / mean|D|). The consensus is the mean
+over methods. Several methods always carry sign(G) (multiplicative for k > -1, weighted without a
+delta weight, volatility_focused for |k| <= 1 and f >= 0), so agreement and conviction are counted
+over sign groups rather than raw methods: methods that structurally share sign(G) form a single
+'gamma' group (represented by their mean), every other method is its own group. Conviction
+(+1 / -1 / 0) requires at least 'conviction_threshold_pct' of the groups, and at least
+'min_agreement' of them, to share the consensus sign.
+
+The last result is memoized by input digest, so the elite calculator and the strategy layer
+share one computation per snapshot when they are handed the same engine.
+"""
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+SDAG_METHODS: Tuple[str, ...] = ("multiplicative", "directional", "weighted", "volatility_focused")
+SDAG_CONSENSUS_COL: str = "sdag_consensus"
+SDAG_AGREEMENT_COL: str = "sdag_agreement"
+SDAG_CONVICTION_COL: str = "sdag_conviction"
+DEFAULT_VOLATILITY_FILL: float = 0.2
+DEFAULT_CONVICTION_THRESHOLD_PCT: float = 0.70
+DEFAULT_MIN_AGREEMENT: int = 2
+DELTA_NORMALIZATION_EPSILON: float = 1e-9
+GAMMA_SIGN_GROUP: str = "gamma"
+
+# Parameters of the original EliteImpactCalculator formulas, used when no strategy config is shared
+LEGACY_ELITE_METHODOLOGIES: Dict[str, Any] = {
+    "enabled": list(SDAG_METHODS),
+    "multiplicative": {"delta_weight_factor": 0.5},
+    "directional": {"delta_weight_factor": 1.0},
+    "weighted": {"w1_gamma": 0.7, "w2_delta": 0.3},
+    "volatility_focused": {"delta_weight_factor": 1.0, "volatility_factor": 2.0}
+}
+
+
+def sdag_column(method_name: str) -> str:
+    return f"sdag_{method_name}"
+
+
+def sdag_inputs_from_frame(df: pd.DataFrame, gamma_col: str, delta_col: str, volatility_col: Optional[str] = "volatility") -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Gamma, delta and (optional) volatility arrays as every SDAG caller must build them (missing/NaN gamma and delta -> 0)."""
+    def _values(col: str) -> np.ndarray:
+        if col not in df.columns: return np.zeros(len(df))
+        return pd.to_numeric(df[col], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+    volatility = None
+    if volatility_col and volatility_col in df.columns:
+        volatility = pd.to_numeric(df[volatility_col], errors='coerce').fillna(DEFAULT_VOLATILITY_FILL).to_numpy(dtype=float)
+    return _values(gamma_col), _values(delta_col), volatility
+
+
+class SDAGResult:
+    """Method matrix (contracts x methods) plus consensus, agreement share and conviction per contract."""
+    __slots__ = ("methods", "values", "consensus", "agreement", "conviction")
+
+    def __init__(self, methods: Tuple[str, ...], values: np.ndarray, consensus: np.ndarray, agreement: np.ndarray, conviction: np.ndarray):
+        self.methods = methods; self.values = values; self.consensus = consensus; self.agreement = agreement; self.conviction = conviction
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Column name -> copied values (the result itself may be cached and shared between callers)."""
+        out = {sdag_column(name): self.values[:, i].copy() for i, name in enumerate(self.methods)}
+        out[SDAG_CONSENSUS_COL] = self.consensus.copy(); out[SDAG_AGREEMENT_COL] = self.agreement.copy(); out[SDAG_CONVICTION_COL] = self.conviction.copy()
+        return out
+
+    def assign_to(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Writes all SDAG columns into df (in place) and returns it."""
+        for col, values in self.columns().items(): df[col] = values
+        return df
+
+
+class SDAGEngine:
+    """Computes all enabled SDAG methodologies for a snapshot in one batched pass."""
+
+    def __init__(self, methodologies_config: Optional[Dict[str, Any]] = None, conviction_threshold_pct: float = DEFAULT_CONVICTION_THRESHOLD_PCT, min_agreement: Optional[int] = None):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self.configure(methodologies_config, conviction_threshold_pct, min_agreement)
+
+    @classmethod
+    def from_strategy_settings(cls, strategy_settings: Dict[str, Any]) -> "SDAGEngine":
+        strategy_settings = strategy_settings if isinstance(strategy_settings, dict) else {}
+        return cls(strategy_settings.get("dag_methodologies"), strategy_settings.get("sdag_conviction_threshold_pct", DEFAULT_CONVICTION_THRESHOLD_PCT))
+
+    def configure(self, methodologies_config: Optional[Dict[str, Any]] = None, conviction_threshold_pct: float = DEFAULT_CONVICTION_THRESHOLD_PCT, min_agreement: Optional[int] = None) -> None:
+        """(Re)compiles the methodology matrix in place and drops the memoized result."""
+        methodologies_config = methodologies_config if isinstance(methodologies_config, dict) else LEGACY_ELITE_METHODOLOGIES
+        methods, coefficients, directional_mask, volatility_factors, sign_groups = self._compile(methodologies_config)
+        group_names = list(dict.fromkeys(sign_groups))
+        membership = np.zeros((len(methods), len(group_names)))
+        for i, group in enumerate(sign_groups): membership[i, group_names.index(group)] = 1.0
+        membership /= np.maximum(membership.sum(axis=0, keepdims=True), 1.0) # Column j averages the methods of group j
+        with self._lock:
+            self.methods, self.coefficients, self.directional_mask, self.volatility_factors = methods, coefficients, directional_mask, volatility_factors
+            self.sign_groups: Tuple[str, ...] = tuple(group_names); self.group_membership = membership
+            self.conviction_threshold_pct = float(conviction_threshold_pct)
+            self.min_agreement = int(min_agreement if min_agreement is not None else methodologies_config.get("min_agreement_for_conviction_signal", DEFAULT_MIN_AGREEMENT))
+            self._last_digest: Optional[bytes] = None
+            self._last_result: Optional[SDAGResult] = None
+        self.instance_logger.debug(f"SDAGEngine compiled methods {list(self.methods)} in sign groups {list(self.sign_groups)} (conviction >= {self.conviction_threshold_pct:.0%}, min agreement {self.min_agreement}).")
+
+    @property
+    def parameters_key(self) -> Tuple[Any, ...]:
+        """Hashable summary of the compiled parameters; engines with equal keys produce identical results."""
+        return (self.methods, self.coefficients.tobytes(), self.directional_mask.tobytes(), self.volatility_factors.tobytes(), self.conviction_threshold_pct, self.min_agreement)
+
+    def configure_from_strategy_settings(self, strategy_settings: Dict[str, Any]) -> None:
+        strategy_settings = strategy_settings if isinstance(strategy_settings, dict) else {}
+        self.configure(strategy_settings.get("dag_methodologies"), strategy_settings.get("sdag_conviction_threshold_pct", DEFAULT_CONVICTION_THRESHOLD_PCT))
+
+    def _compile(self, methodologies_config: Dict[str, Any]) -> Tuple[Tuple[str, ...], np.ndarray, np.ndarray, np.ndarray, List[str]]:
+        """Builds the (4 x methods) coefficient matrix over the basis [G, G*|Dn|, G*Dn*sign(G), D] and the sign group of each method."""
+        methods: List[str] = []; columns: List[List[float]] = []; directional: List[bool] = []; vol_factors: List[float] = []; sign_groups: List[str] = []
+        for name in methodologies_config.get("enabled", []):
+            method_cfg = methodologies_config.get(name, {})
+            method_cfg = method_cfg if isinstance(method_cfg, dict) else {}
+            if name not in SDAG_METHODS:
+                self.instance_logger.warning(f"Unknown SDAG methodology '{name}' in config. Skipping."); continue
+            if method_cfg.get("enabled") is False or name in methods: continue
+            k = float(method_cfg.get("delta_weight_factor", 0.5))
+            vol_factor = float(method_cfg.get("volatility_factor", 2.0)) if name == "volatility_focused" else 0.0
+            if name == "weighted":
+                w1 = float(method_cfg.get("w1_gamma", 0.7)); w2 = float(method_cfg.get("w2_delta", 0.3)); w_sum = (w1 + w2) if (w1 + w2) != 0 else 1.0
+                columns.append([w1 / w_sum, 0.0, 0.0, w2 / w_sum]); carries_gamma_sign = w2 == 0.0 and w1 / w_sum > 0
+            elif name == "volatility_focused":
+                columns.append([1.0, 0.0, k, 0.0]); carries_gamma_sign = abs(k) <= 1.0 and vol_factor >= 0.0
+            else:
+                columns.append([1.0, k, 0.0, 0.0]); carries_gamma_sign = name == "multiplicative" and k > -1.0
+            methods.append(name); directional.append(name == "directional"); vol_factors.append(vol_factor)
+            sign_groups.append(GAMMA_SIGN_GROUP if carries_gamma_sign else name)
+        coefficients = np.array(columns, dtype=float).T if columns else np.zeros((4, 0))
+        return tuple(methods), coefficients, np.array(directional, dtype=bool), np.array(vol_factors, dtype=float), sign_groups
+
+    @staticmethod
+    def _digest(*arrays: Optional[np.ndarray]) -> bytes:
+        hasher = hashlib.blake2b(digest_size=16)
+        for arr in arrays:
+            hasher.update(b"\x00" if arr is None else np.ascontiguousarray(arr, dtype=float).tobytes() + b"\x01")
+        return hasher.digest()
+
+    def compute(self, gamma: np.ndarray, delta: np.ndarray, volatility: Optional[np.ndarray] = None) -> SDAGResult:
+        """All methodologies, consensus and conviction for one snapshot (reuses the previous result for identical inputs)."""
+        gamma = np.asarray(gamma, dtype=float); delta = np.asarray(delta, dtype=float)
+        digest = self._digest(gamma, delta, volatility)
+        with self._lock:
+            if digest == self._last_digest and self._last_result is not None: return self._last_result
+        n_rows, n_methods = len(gamma), len(self.methods)
+        delta_norm = np.tanh(delta / (np.abs(delta).mean() + DELTA_NORMALIZATION_EPSILON)) if n_rows else delta
+        gamma_sign = np.sign(gamma)
+        basis = np.column_stack((gamma, gamma * np.abs(delta_norm), gamma * delta_norm * gamma_sign, delta)) if n_rows else np.zeros((0, 4))
+        values = basis @ self.coefficients
+        if self.directional_mask.any(): values[:, self.directional_mask] *= np.sign(gamma * delta_norm)[:, None]
+        if volatility is not None and self.volatility_factors.any():
+            values *= 1.0 + np.asarray(volatility, dtype=float)[:, None] * self.volatility_factors[None, :]
+        consensus = values.mean(axis=1) if n_methods else np.zeros(n_rows)
+        _, agreement, conviction = self.conviction(values)
+        result = SDAGResult(self.methods, values, consensus, agreement, conviction)
+        with self._lock:
+            self._last_digest = digest; self._last_result = result
+        return result
+
+    def conviction(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (agreeing group count, agreement share, conviction) for a (rows x methods) matrix in self.methods order.
+        Methods are first averaged within their sign group; the consensus sign is that of the mean over methods.
+        """
+        values = np.asarray(values, dtype=float); n_rows = len(values)
+        if not len(self.methods) or values.ndim != 2 or values.shape[1] != len(self.methods):
+            return np.zeros(n_rows, dtype=int), np.zeros(n_rows), np.zeros(n_rows)
+        consensus_sign = np.sign(values.mean(axis=1))
+        group_values = values @ self.group_membership
+        agreeing = ((np.sign(group_values) == consensus_sign[:, None]) & (consensus_sign[:, None] != 0)).sum(axis=1)
+        agreement = agreeing / group_values.shape[1]
+        conviction = np.where((agreement >= self.conviction_threshold_pct) & (agreeing >= self.min_agreement), consensus_sign, 0.0)
+        return agreeing, agreement, conviction
+
+    def compute_frame(self, df: pd.DataFrame, gamma_col: str, delta_col: str, volatility_col: Optional[str] = "volatility") -> SDAGResult:
+        return self.compute(*sdag_inputs_from_frame(df, gamma_col, delta_col, volatility_col))
@@ -0,0 +1,235 @@
+# signal_engine.py
+"""
+Vectorized trading signal generation over the strike-level snapshot.
+
+Every signal family is one evaluator that turns the StrikeLevelIndex columns into boolean masks
+and a raw conviction score per strike in a single numpy pass; stars come from the system's
+conviction map. Families switched off in system_settings.signal_activation are never evaluated
+(no thresholds resolved, no arrays touched), and each evaluated family's wall time is recorded
+into the profiler as 'signals.<activation flag>'.
+
+Families (activation flag -> output family / kinds):
+- directional -> directional / bullish, bearish: |MSPI| clears 'key_level_mspi' and SAI reaches
+  'sai_high_conviction'; the MSPI sign gives the side;
+- volatility_expansion -> volatility / expansion: |VRI| and VFI at or above their expansion triggers;
+- volatility_contraction -> volatility / contraction: |VRI| and VFI at or below their contraction
+  triggers on a stable structure (SSI at or above 'ssi_vol_contraction');
+- time_decay_pin_risk -> time_decay / pin_risk: |TDPI| at or above 'pin_risk_tdpi_trigger';
+- time_decay_charm_cascade -> time_decay / charm_cascade: CTR and TDFI at or above their triggers;
+- complex_structure_change -> complex / structure_change: the strikes of the structure change
+  detection (SSI breakdown or MSPI flip against the previous snapshot);
+- complex_flow_divergence -> complex / flow_divergence: flow intensity (CFI) at or above the first
+  'cfi_flow_divergence' tier while the net delta flow opposes the MSPI sign;
+- complex_sdag_conviction -> complex / sdag_conviction: enough strike-level SDAG sign groups share
+  the consensus sign (SDAGEngine.conviction, the rule behind the per-contract conviction).
+
+Raw scores add one trigger ratio per condition, each capped at RATIO_CAP, so a strike that just
+meets two triggers scores 2.0 and a clear outlier on both scores 2 x RATIO_CAP.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Any, Optional, Tuple, Union
+
+import numpy as np
+
+from elite_options_system.core.key_levels import StrikeLevelIndex
+from elite_options_system.utils.perf_profiler import SectionProfiler
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+RATIO_CAP: float = 2.0
+RATIO_EPSILON: float = 1e-9
+STRIKE_COL: str = "strike"
+CONTEXT_COLUMNS: Tuple[str, ...] = ("mspi", "sai", "ssi")
+# Strike-level net delta flow used for flow divergence, first available wins
+FLOW_DIRECTION_COLUMNS: Tuple[str, ...] = ("net_delta_flow_total", "heuristic_net_delta_pressure", "net_value_pressure")
+PROFILER_PREFIX: str = "signals."
+# (activation flag, output family, output kinds) in evaluation order
+SIGNAL_FAMILIES: Tuple[Tuple[str, str, Tuple[str, ...]], ...] = (
+    ("directional", "directional", ("bullish", "bearish")),
+    ("volatility_expansion", "volatility", ("expansion",)),
+    ("volatility_contraction", "volatility", ("contraction",)),
+    ("time_decay_pin_risk", "time_decay", ("pin_risk",)),
+    ("time_decay_charm_cascade", "time_decay", ("charm_cascade",)),
+    ("complex_structure_change", "complex", ("structure_change",)),
+    ("complex_flow_divergence", "complex", ("flow_divergence",)),
+    ("complex_sdag_conviction", "complex", ("sdag_conviction",)),
+)
+
+# kind -> (mask, raw score, extra record columns, type label or per-strike labels)
+SignalHits = Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], Union[str, np.ndarray]]
+
+
+def trigger_ratio(values: np.ndarray, trigger: float) -> np.ndarray:
+    """values / trigger clipped to [0, RATIO_CAP] (how far a value clears an 'at or above' trigger)."""
+    return np.clip(values / max(abs(float(trigger)), RATIO_EPSILON), 0.0, RATIO_CAP)
+
+
+def inverse_trigger_ratio(values: np.ndarray, trigger: float) -> np.ndarray:
+    """trigger / values clipped to [0, RATIO_CAP] (how far a value stays under an 'at or below' trigger)."""
+    return np.clip(abs(float(trigger)) / np.maximum(np.abs(values), RATIO_EPSILON), 0.0, RATIO_CAP)
+
+
+class SignalContext:
+    """What the evaluators need from the trading system for one snapshot."""
+    __slots__ = ("index", "threshold", "stars", "structure_change", "sdag_engine")
+
+    def __init__(
+        self,
+        index: StrikeLevelIndex,
+        threshold: Callable[[str, Optional[np.ndarray], str], Optional[Union[float, List[float]]]],
+        stars: Callable[[np.ndarray], np.ndarray],
+        structure_change: Optional[Callable[[], Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]]] = None,
+        sdag_engine: Optional[Any] = None
+    ):
+        self.index = index; self.threshold = threshold; self.stars = stars
+        self.structure_change = structure_change; self.sdag_engine = sdag_engine
+
+    def scalar_threshold(self, name: str, values: Optional[np.ndarray], mode: str = 'above') -> Optional[float]:
+        threshold = self.threshold(name, values, mode)
+        return float(threshold) if isinstance(threshold, (int, float)) and np.isfinite(threshold) else None
+
+
+class SignalEngine:
+    """Evaluates the enabled signal families over a StrikeLevelIndex, memoized on the index per activation set."""
+
+    def __init__(self, signal_activation: Optional[Dict[str, Any]] = None, profiler: Optional[SectionProfiler] = None):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.profiler = profiler if profiler is not None else SectionProfiler()
+        self._lock = threading.Lock()
+        self._evaluators: Dict[str, Callable[[SignalContext], Dict[str, SignalHits]]] = {
+            "directional": self._directional, "volatility_expansion": self._volatility_expansion,
+            "volatility_contraction": self._volatility_contraction, "time_decay_pin_risk": self._pin_risk,
+            "time_decay_charm_cascade": self._charm_cascade, "complex_structure_change": self._structure_change,
+            "complex_flow_divergence": self._flow_divergence, "complex_sdag_conviction": self._sdag_conviction
+        }
+        self.configure(signal_activation)
+
+    def configure(self, signal_activation: Optional[Dict[str, Any]] = None) -> None:
+        """Compiles the activation flags once (missing flags count as enabled)."""
+        activation = signal_activation if hasattr(signal_activation, "get") else {}
+        enabled = tuple(flag for flag, _, _ in SIGNAL_FAMILIES if bool(activation.get(flag, True)))
+        with self._lock: self.enabled = enabled
+        disabled = [flag for flag, _, _ in SIGNAL_FAMILIES if flag not in enabled]
+        self.instance_logger.debug(f"Signal families enabled: {list(enabled)}; disabled: {disabled or 'none'}.")
+
+    @staticmethod
+    def empty_signals() -> Dict[str, Dict[str, list]]:
+        signals: Dict[str, Dict[str, list]] = {}
+        for _, family, kinds in SIGNAL_FAMILIES:
+            for kind in kinds: signals.setdefault(family, {})[kind] = []
+        return signals
+
+    def generate(self, context: SignalContext) -> Dict[str, Dict[str, list]]:
+        """Signal records per family / kind for one snapshot (disabled kinds stay empty lists)."""
+        enabled = self.enabled
+        memo_key = ("trading_signals", enabled)
+        cached = context.index.results.get(memo_key)
+        if cached is None:
+            cached = self.empty_signals(); total_start = time.perf_counter()
+            for flag, family, _ in SIGNAL_FAMILIES:
+                if flag not in enabled: continue
+                start = time.perf_counter()
+                try:
+                    for kind, hits in self._evaluators[flag](context).items(): cached[family][kind] = self._records(context, hits)
+                except Exception as e_family:
+                    self.instance_logger.error(f"Signal family '{flag}' failed: {e_family}", exc_info=True)
+                self.profiler.record(PROFILER_PREFIX + flag, time.perf_counter() - start)
+            self.profiler.record(PROFILER_PREFIX + "total", time.perf_counter() - total_start)
+            context.index.results[memo_key] = cached
+            self.instance_logger.debug(f"Signals over {len(context.index)} strikes: " + ", ".join(f"{family}.{kind}={len(recs)}" for family, kinds in cached.items() for kind, recs in kinds.items() if recs))
+        return {family: {kind: [dict(rec) for rec in recs] for kind, recs in kinds.items()} for family, kinds in cached.items()}
+
+    def _records(self, context: SignalContext, hits: SignalHits) -> List[Dict[str, Any]]:
+        mask, score, extras, type_label = hits
+        if not mask.any(): return []
+        index = context.index; selected_score = score[mask]
+        columns: Dict[str, List[Any]] = {
+            STRIKE_COL: index.strikes[mask].tolist(),
+            "type": np.broadcast_to(np.asarray(type_label, dtype=object), mask.shape)[mask].tolist(),
+            "conviction_stars": context.stars(selected_score).tolist(),
+            "raw_conviction_score": selected_score.tolist()
+        }
+        for col in CONTEXT_COLUMNS:
+            if col in index.frame.columns: columns[col] = index.values(col, 0.5 if col == 'ssi' else 0.0)[mask].tolist()
+        for col, values in extras.items(): columns[col] = values[mask].tolist()
+        names = list(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+    # --- Family evaluators (each returns kind -> hits; an empty dict when a required threshold is unavailable) ---
+
+    def _directional(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; mspi = index.values('mspi'); sai = index.values('sai')
+        mspi_threshold = context.scalar_threshold("key_level_mspi", np.abs(mspi), 'above')
+        sai_threshold = context.scalar_threshold("sai_high_conviction", sai, 'above')
+        if mspi_threshold is None or sai_threshold is None: return {}
+        active = (np.abs(mspi) >= mspi_threshold) & (sai >= sai_threshold) & (mspi != 0)
+        score = trigger_ratio(np.abs(mspi), mspi_threshold) + trigger_ratio(sai, sai_threshold)
+        return {"bullish": (active & (mspi > 0), score, {}, "directional_bullish"), "bearish": (active & (mspi < 0), score, {}, "directional_bearish")}
+
+    def _volatility_expansion(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; vri = index.values('vri'); vfi = index.values('vfi')
+        vri_trigger = context.scalar_threshold("vol_expansion_vri_trigger", vri, 'above_abs')
+        vfi_trigger = context.scalar_threshold("vol_expansion_vfi_trigger", vfi, 'above')
+        if vri_trigger is None or vfi_trigger is None: return {}
+        mask = (np.abs(vri) >= abs(vri_trigger)) & (vfi >= vfi_trigger) & (vri != 0)
+        return {"expansion": (mask, trigger_ratio(np.abs(vri), vri_trigger) + trigger_ratio(vfi, vfi_trigger), {"vri": vri, "vfi": vfi}, "volatility_expansion")}
+
+    def _volatility_contraction(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; vri = index.values('vri'); vfi = index.values('vfi'); ssi = index.values('ssi', 0.5)
+        vri_trigger = context.scalar_threshold("vol_contraction_vri_trigger", np.abs(vri), 'below')
+        vfi_trigger = context.scalar_threshold("vol_contraction_vfi_trigger", vfi, 'below')
+        ssi_trigger = context.scalar_threshold("ssi_vol_contraction", ssi, 'above')
+        if vri_trigger is None or vfi_trigger is None or ssi_trigger is None: return {}
+        mask = (np.abs(vri) <= abs(vri_trigger)) & (vfi <= vfi_trigger) & (ssi >= ssi_trigger)
+        score = inverse_trigger_ratio(vfi, vfi_trigger) + trigger_ratio(ssi, ssi_trigger)
+        return {"contraction": (mask, score, {"vri": vri, "vfi": vfi}, "volatility_contraction")}
+
+    def _pin_risk(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; tdpi = index.values('tdpi'); ssi = index.values('ssi', 0.5)
+        tdpi_trigger = context.scalar_threshold("pin_risk_tdpi_trigger", tdpi, 'above_abs')
+        if tdpi_trigger is None: return {}
+        mask = (np.abs(tdpi) >= abs(tdpi_trigger)) & (tdpi != 0)
+        return {"pin_risk": (mask, trigger_ratio(np.abs(tdpi), tdpi_trigger) + np.clip(ssi, 0.0, 1.0), {"tdpi": tdpi}, "time_decay_pin_risk")}
+
+    def _charm_cascade(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; ctr = index.values('ctr'); tdfi = index.values('tdfi')
+        ctr_trigger = context.scalar_threshold("charm_cascade_ctr_trigger", ctr, 'above')
+        tdfi_trigger = context.scalar_threshold("charm_cascade_tdfi_trigger", tdfi, 'above')
+        if ctr_trigger is None or tdfi_trigger is None: return {}
+        mask = (ctr >= ctr_trigger) & (tdfi >= tdfi_trigger)
+        return {"charm_cascade": (mask, trigger_ratio(ctr, ctr_trigger) + trigger_ratio(tdfi, tdfi_trigger), {"ctr": ctr, "tdfi": tdfi}, "time_decay_charm_cascade")}
+
+    def _structure_change(self, context: SignalContext) -> Dict[str, SignalHits]:
+        detected = context.structure_change() if context.structure_change is not None else None
+        if detected is None: return {}
+        mask, flipped, reasons = detected
+        ssi = context.index.values('ssi', 0.5)
+        score = np.clip(2.0 * (1.0 - ssi), 0.0, RATIO_CAP) + np.where(flipped, 1.0, 0.0)
+        return {"structure_change": (mask, score, {"structure_change_type": reasons}, "complex_structure_change")}
+
+    def _flow_divergence(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index
+        flow_col = next((col for col in FLOW_DIRECTION_COLUMNS if col in index.frame.columns), None)
+        if flow_col is None: return {}
+        cfi = index.values('cfi'); ssi = index.values('ssi', 0.5)
+        tiers = context.threshold("cfi_flow_divergence", cfi, 'above')
+        tiers = sorted(float(t) for t in (tiers if isinstance(tiers, list) else [tiers]) if isinstance(t, (int, float)) and np.isfinite(t))
+        if not tiers: return {}
+        mask = (cfi >= tiers[0]) & (np.sign(index.values(flow_col)) * np.sign(index.values('mspi')) < 0)
+        tiers_cleared = (cfi[:, None] >= np.asarray(tiers)[None, :]).sum(axis=1)
+        return {"flow_divergence": (mask, tiers_cleared + np.clip(1.0 - ssi, 0.0, 1.0), {"cfi": cfi}, "complex_flow_divergence")}
+
+    def _sdag_conviction(self, context: SignalContext) -> Dict[str, SignalHits]:
+        index = context.index; engine = context.sdag_engine
+        if engine is None: return {}
+        columns = [f"sdag_{method}" for method in engine.methods]
+        if not columns or not all(col in index.frame.columns for col in columns): return {}
+        values = np.column_stack([index.values(col) for col in columns])
+        consensus_sign = np.sign(values.mean(axis=1))
+        agreeing, agreement, conviction = engine.conviction(values) # Counted over sign groups, as in SDAGEngine.compute
+        mask = conviction != 0
+        type_labels = np.where(consensus_sign > 0, "sdag_conviction_bullish", "sdag_conviction_bearish").astype(object)
+        return {"sdag_conviction": (mask, agreeing * agreement, {"agree_count": agreeing, "sdag_agreement": agreement}, type_labels)}
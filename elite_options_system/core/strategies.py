@@ -7,11 +7,22 @@ import traceback
 import logging
 import os
 from datetime import datetime, time, date, timedelta
-from typing import Dict, Optional, Tuple, Any, List, Union, Deque
+import time as pytime # Alias to avoid conflict with datetime.time
+from typing import Dict, Iterable, Optional, Tuple, Any, List, Union, Deque
 from collections import deque
 import pandas as pd
 import numpy as np
 
+from elite_options_system.core.sdag_engine import SDAGEngine
+from elite_options_system.core.recommendation_book import RecommendationBook, DIRECTIONAL_CATEGORY, STATUS_ACTIVE, STATUS_EXITED, recommendation_keys, max_stars_at, snapshot_id, exit_reasons, trail_targets
+from elite_options_system.core.target_engine import TargetEngine, TargetLevels
+from elite_options_system.core.signal_engine import SignalEngine, SignalContext
+from elite_options_system.core.key_levels import KeyLevelTracker, StrikeLevelIndex, local_extrema_mask, PREV_MSPI_COL, SSI_CHANGE_COL, STRUCTURE_CHANGE_TYPE_COL
+from elite_options_system.utils.compiled_config import CompiledConfig, ConfigDependencyRegistry, FrozenSettings
+from elite_options_system.utils.volatility_state import VolatilityStateRegistry
+from elite_options_system.utils.threshold_cache import SnapshotThresholdCache, series_digest
+from elite_options_system.utils.perf_profiler import SectionProfiler
+
 # --- Module-Specific Logger ---
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +38,13 @@ DEFAULT_ATR_FALLBACK_PERCENTAGE: float = 0.005
 NET_VOLUME_PRESSURE_COL: str = "net_volume_pressure"
 NET_VALUE_PRESSURE_COL: str = "net_value_pressure"
 DEFAULT_CONFIG_PATH_STRATEGIES: str = "config.json" # Corrected default path
+STRIKE_COL: str = "strike"
+# Open-interest exposure columns of the greeks without a configurable source column (ConvexValue naming)
+VEGA_EXPOSURE_COL: str = "vxoi"
+THETA_EXPOSURE_COL: str = "txoi"
+CHARM_EXPOSURE_COL: str = "charmxoi"
+VANNA_EXPOSURE_COL: str = "vannaxoi"
+VOMMA_EXPOSURE_COL: str = "vommaxoi"
 
 # --- Default Configuration (Fully Written Out) ---
 DEFAULT_CONFIG: Dict[str, Any] = {
@@ -39,6 +57,19 @@ DEFAULT_CONFIG: Dict[str, Any] = {
       "time_decay_pin_risk": True, "time_decay_charm_cascade": True,
       "complex_structure_change": True, "complex_flow_divergence": True,
       "complex_sdag_conviction": True
+    },
+    "trade_logging": {
+      "enabled": False,
+      "connection": {"host": "localhost", "port": "5432", "dbname": "postgres", "user": "postgres"},
+      "password_env_var": "SUPABASE_DB_PASSWORD",
+      "spill_file_path": "data/trade_log_spill.jsonl", "dead_letter_file_path": "data/trade_log_dead_letter.jsonl",
+      "max_batch_size": 200, "flush_interval_sec": 2.0, "max_queue_size": 10000, "reconnect_interval_sec": 15.0
+    },
+    "metric_distributions": {
+      "enabled": False,
+      "connection": {"host": "localhost", "port": "5432", "dbname": "postgres", "user": "postgres"},
+      "password_env_var": "SUPABASE_DB_PASSWORD",
+      "lookback_days": 365, "refresh_interval_sec": 3600.0
     }
   },
   "data_processor_settings": {
@@ -63,8 +94,8 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     },
     "coefficients": {
       "dag_alpha": {"aligned": 1.3, "opposed": 0.7, "neutral": 1.0},
-      "tdpi_beta": {"aligned": 1.3, "opposed": 0.7, "neutral": 1.0},
-      "vri_gamma": {"aligned": 1.3, "opposed": 0.7, "neutral": 1.0}
+      "tdpi_beta": 0.3,
+      "vri_gamma": 0.3
     },
     "factors": {
         "tdpi_gaussian_width": -0.5,
@@ -96,6 +127,7 @@ DEFAULT_CONFIG: Dict[str, Any] = {
     "proxy_vanna_flow_col": "vannaxvolm",
     "proxy_vomma_flow_col": "vommaxvolm",
     "thresholds": {
+        "key_level_mspi": {"type": "relative_percentile", "percentile": 75, "fallback_value": 0.3},
         "sai_high_conviction": {"type": "fixed", "value": 0.7, "fallback_value": 0.7},
         "ssi_structure_change": {"type": "relative_percentile", "percentile": 15, "fallback_value": 0.3},
         "ssi_vol_contraction": {"type": "relative_percentile", "percentile": 85, "fallback_value": 0.7},
@@ -120,6 +152,7 @@ DEFAULT_CONFIG: Dict[str, Any] = {
       "volatility_focused": {"enabled": True, "weight_in_mspi": 0.1, "delta_weight_factor": 0.5},
       "min_agreement_for_conviction_signal": 2
     },
+    "sdag_conviction_threshold_pct": 0.70,
     "recommendations": {
         "min_directional_stars_to_issue": 2,
         "min_volatility_stars_to_issue": 2,
@@ -135,7 +168,8 @@ DEFAULT_CONFIG: Dict[str, Any] = {
         "conv_mod_ssi_high": 0.25,
         "conv_mod_vol_expansion": -0.5,
         "conv_mod_sdag_align": 0.75,
-        "conv_mod_sdag_oppose": -1.0
+        "conv_mod_sdag_oppose": -1.0,
+        "checkpoint_path": "processed_market_data/recommendation_book.npz"
     },
     "exits": {
         "contradiction_stars_threshold": 4,
@@ -174,49 +208,40 @@ class IntegratedTradingSystem:
         self.instance_logger = logger.getChild(self.__class__.__name__)
         self.instance_logger.info(f"Initializing IntegratedTradingSystem (Version 2.4.1 - Init & Config Refined)...")
 
+        self.config_path: str = config_path
         self.config: Dict[str, Any] = self._load_and_validate_config(config_path)
-
-        log_level_str = self._get_config_value(["system_settings", "log_level"], "INFO")
-        try:
-            log_level_val = getattr(logging, log_level_str.upper())
-            self.instance_logger.setLevel(log_level_val)
-            self.instance_logger.info(f"Instance logger level set to: {log_level_str} ({logging.getLevelName(self.instance_logger.getEffectiveLevel())})")
-        except AttributeError:
-            log_level_val = logging.INFO
-            self.instance_logger.setLevel(log_level_val)
-            self.instance_logger.warning(f"Invalid log level '{log_level_str}' in config. ITS instance logger defaulting to INFO.")
-
-        self.gamma_exposure_col: str = self._get_config_value(["strategy_settings", "gamma_exposure_source_col"], "gxoi")
-        self.delta_exposure_col: str = self._get_config_value(["strategy_settings", "delta_exposure_source_col"], "dxoi")
-        self.use_skew_adjusted_for_sdag: bool = self._get_config_value(["strategy_settings", "use_skew_adjusted_for_sdag"], False)
-        self.skew_adjusted_gamma_col: str = self._get_config_value(["strategy_settings", "skew_adjusted_gamma_source_col"], "sgxoi")
-        self.gamma_col_for_sdag_final: str = self.skew_adjusted_gamma_col if self.use_skew_adjusted_for_sdag else self.gamma_exposure_col
-
-        self.direct_delta_buy_col: str = self._get_config_value(["strategy_settings", "direct_delta_buy_col"], "deltas_buy")
-        self.direct_delta_sell_col: str = self._get_config_value(["strategy_settings", "direct_delta_sell_col"], "deltas_sell")
-        self.direct_gamma_buy_col: str = self._get_config_value(["strategy_settings", "direct_gamma_buy_col"], "gammas_buy")
-        self.direct_gamma_sell_col: str = self._get_config_value(["strategy_settings", "direct_gamma_sell_col"], "gammas_sell")
-        self.direct_vega_buy_col: str = self._get_config_value(["strategy_settings", "direct_vega_buy_col"], "vegas_buy")
-        self.direct_vega_sell_col: str = self._get_config_value(["strategy_settings", "direct_vega_sell_col"], "vegas_sell")
-        self.direct_theta_buy_col: str = self._get_config_value(["strategy_settings", "direct_theta_buy_col"], "thetas_buy")
-        self.direct_theta_sell_col: str = self._get_config_value(["strategy_settings", "direct_theta_sell_col"], "thetas_sell")
-
-        self.proxy_delta_flow_col: str = self._get_config_value(["strategy_settings", "proxy_delta_flow_col"], "dxvolm")
-        self.proxy_gamma_flow_col: str = self._get_config_value(["strategy_settings", "proxy_gamma_flow_col"], "gxvolm")
-        self.proxy_vega_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vega_flow_col"], "vxvolm")
-        self.proxy_theta_flow_col: str = self._get_config_value(["strategy_settings", "proxy_theta_flow_col"], "txvolm")
-        self.proxy_charm_flow_col: str = self._get_config_value(["strategy_settings", "proxy_charm_flow_col"], "charmxvolm")
-        self.proxy_vanna_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vanna_flow_col"], "vannaxvolm")
-        self.proxy_vomma_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vomma_flow_col"], "vommaxvolm")
+        self._compile_config()
+        self.config_dependencies = ConfigDependencyRegistry()
+
+        self._apply_log_level()
+        self.sdag_engine: SDAGEngine = SDAGEngine.from_strategy_settings(self._get_config_value(["strategy_settings"], {}))
+        self._configure_strategy_columns()
+        self.config_dependencies.register("system_settings", self._apply_log_level)
+        self.config_dependencies.register("strategy_settings", self._configure_strategy_columns)
+        self.config_dependencies.register("strategy_settings", self._reconfigure_sdag_engine)
+        self.threshold_cache = SnapshotThresholdCache() # Relative thresholds for the current snapshot (cleared per MSPI run)
+        self.config_dependencies.register("strategy_settings", self.threshold_cache.invalidate)
+        self.key_level_tracker = KeyLevelTracker() # Strike-sorted level index per symbol (current + previous snapshot)
+        self.config_dependencies.register("strategy_settings", self.key_level_tracker.clear_results)
+        self.target_engine = TargetEngine(self._get_config_value(["strategy_settings", "targets"], {}))
+        self.config_dependencies.register("strategy_settings", lambda: self.target_engine.configure(self._get_config_value(["strategy_settings", "targets"], {})))
+        self.profiler = SectionProfiler() # Section timings (signal families report as 'signals.<flag>')
+        self.signal_engine = SignalEngine(self._get_config_value(["system_settings", "signal_activation"], {}), profiler=self.profiler)
+        self.config_dependencies.register("system_settings", lambda: self.signal_engine.configure(self._get_config_value(["system_settings", "signal_activation"], {})))
 
         df_history_maxlen_cfg_val: Any = self._get_config_value(["system_settings", "df_history_maxlen"], 5)
         if not (isinstance(df_history_maxlen_cfg_val, int) and df_history_maxlen_cfg_val > 0):
             self.instance_logger.warning(f"Invalid df_history_maxlen '{df_history_maxlen_cfg_val}' in config. Defaulting to 5.")
             df_history_maxlen_cfg_val = 5
         self.processed_df_history: Deque[pd.DataFrame] = deque(maxlen=df_history_maxlen_cfg_val)
-        self.active_recommendations: List[Dict] = []
-        self.recommendation_id_counter: int = 0
+        self.volatility_states = VolatilityStateRegistry() # Incremental ATR / historical vol per symbol, shared with the data processor
+        self.recommendation_checkpoint_path: Optional[str] = self._resolve_config_relative_path(self._get_config_value(["strategy_settings", "recommendations", "checkpoint_path"], None))
+        self.recommendation_book: RecommendationBook = self._load_recommendation_book() # Active directional recommendations (struct-of-arrays)
         self.current_symbol_being_managed: Optional[str] = None
+        self.trade_logger = None # WriteBehindTradeLogger while trade logging is started (see start_trade_logging)
+        self.metric_distributions = self._create_metric_distribution_service() # Daily-aggregate history for 'historical_percentile' thresholds
+        self.threshold_symbol: str = "" # Symbol of the snapshot being evaluated (historical thresholds are per symbol)
+        self.migrated_flow_coefficients: Dict[str, float] = {} # Legacy aligned/opposed tdpi_beta/vri_gamma dicts -> scalar (warned once each)
 
         self.instance_logger.info(
             f"ITS (V2.4.1) Initialized. LogLvl: {logging.getLevelName(self.instance_logger.getEffectiveLevel())}, "
@@ -229,6 +254,13 @@ class IntegratedTradingSystem:
         self.instance_logger.debug(f"  Direct Vega Flow Cols:  Buy='{self.direct_vega_buy_col}', Sell='{self.direct_vega_sell_col}' (Proxy: '{self.proxy_vega_flow_col}')")
         self.instance_logger.debug(f"  Direct Theta Flow Cols: Buy='{self.direct_theta_buy_col}', Sell='{self.direct_theta_sell_col}' (Proxy: '{self.proxy_theta_flow_col}')")
 
+    def _resolve_config_relative_path(self, path_value: Any) -> Optional[str]:
+        """Absolute, normalized path for a config path setting; relative paths are relative to the config file's directory."""
+        if not isinstance(path_value, str) or not path_value: return None
+        if os.path.isabs(path_value): return os.path.normpath(path_value)
+        config_dir = os.path.dirname(self.config_path) if os.path.isabs(self.config_path) else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        return os.path.normpath(os.path.join(config_dir, path_value))
+
     def _load_and_validate_config(self, config_path: str) -> Dict[str, Any]:
         load_logger = self.instance_logger.getChild("ConfigLoader")
         load_logger.info(f"Attempting to load configuration from: {config_path}")
@@ -300,10 +332,73 @@ class IntegratedTradingSystem:
             return default_val_override
 
     def _get_config_value(self, path: List[str], default_override: Any = None) -> Any:
-        value = self._get_config_value_from_loaded_config(self.config, path, None)
-        if value is not None:
-            return value
-        return self._get_config_value_from_loaded_config(DEFAULT_CONFIG, path, default_override)
+        # O(1): paths were flattened (user config over DEFAULT_CONFIG) when the config was compiled
+        return self.compiled_config.get(path, default_override)
+
+    def _compile_config(self) -> None:
+        self.compiled_config: CompiledConfig = CompiledConfig(self.config, DEFAULT_CONFIG)
+        self.settings: FrozenSettings = self.compiled_config.settings
+
+    @property
+    def config_hash(self) -> str:
+        return self.compiled_config.config_hash
+
+    def reload_config(self, config_path: Optional[str] = None) -> List[str]:
+        """
+        Hot-reloads the configuration file. Only the caches registered in 'config_dependencies' for the
+        top-level sections that actually changed are invalidated. Returns the changed section names.
+        """
+        reload_logger = self.instance_logger.getChild("ReloadConfig")
+        if config_path: self.config_path = config_path
+        previous_compiled = self.compiled_config
+        new_config = self._load_and_validate_config(self.config_path)
+        new_compiled = CompiledConfig(new_config, DEFAULT_CONFIG)
+        changed_sections = previous_compiled.changed_sections(new_compiled)
+        if not changed_sections:
+            reload_logger.info(f"Config unchanged (hash {new_compiled.config_hash}). Nothing to invalidate."); return []
+        self.config = new_config; self.compiled_config = new_compiled; self.settings = new_compiled.settings
+        invalidated_count = self.config_dependencies.invalidate(changed_sections)
+        reload_logger.info(f"Config reloaded (hash {previous_compiled.config_hash} -> {new_compiled.config_hash}). Changed sections: {sorted(changed_sections)}; {invalidated_count} dependent caches refreshed.")
+        return sorted(changed_sections)
+
+    def _apply_log_level(self) -> None:
+        log_level_str = self._get_config_value(["system_settings", "log_level"], "INFO")
+        try:
+            log_level_val = getattr(logging, log_level_str.upper())
+            self.instance_logger.setLevel(log_level_val)
+            self.instance_logger.info(f"Instance logger level set to: {log_level_str} ({logging.getLevelName(self.instance_logger.getEffectiveLevel())})")
+        except AttributeError:
+            log_level_val = logging.INFO
+            self.instance_logger.setLevel(log_level_val)
+            self.instance_logger.warning(f"Invalid log level '{log_level_str}' in config. ITS instance logger defaulting to INFO.")
+
+    def _configure_strategy_columns(self) -> None:
+        self.gamma_exposure_col: str = self._get_config_value(["strategy_settings", "gamma_exposure_source_col"], "gxoi")
+        self.delta_exposure_col: str = self._get_config_value(["strategy_settings", "delta_exposure_source_col"], "dxoi")
+        self.use_skew_adjusted_for_sdag: bool = self._get_config_value(["strategy_settings", "use_skew_adjusted_for_sdag"], False)
+        self.skew_adjusted_gamma_col: str = self._get_config_value(["strategy_settings", "skew_adjusted_gamma_source_col"], "sgxoi")
+        self.gamma_col_for_sdag_final: str = self.skew_adjusted_gamma_col if self.use_skew_adjusted_for_sdag else self.gamma_exposure_col
+
+        self.direct_delta_buy_col: str = self._get_config_value(["strategy_settings", "direct_delta_buy_col"], "deltas_buy")
+        self.direct_delta_sell_col: str = self._get_config_value(["strategy_settings", "direct_delta_sell_col"], "deltas_sell")
+        self.direct_gamma_buy_col: str = self._get_config_value(["strategy_settings", "direct_gamma_buy_col"], "gammas_buy")
+        self.direct_gamma_sell_col: str = self._get_config_value(["strategy_settings", "direct_gamma_sell_col"], "gammas_sell")
+        self.direct_vega_buy_col: str = self._get_config_value(["strategy_settings", "direct_vega_buy_col"], "vegas_buy")
+        self.direct_vega_sell_col: str = self._get_config_value(["strategy_settings", "direct_vega_sell_col"], "vegas_sell")
+        self.direct_theta_buy_col: str = self._get_config_value(["strategy_settings", "direct_theta_buy_col"], "thetas_buy")
+        self.direct_theta_sell_col: str = self._get_config_value(["strategy_settings", "direct_theta_sell_col"], "thetas_sell")
+
+        self.proxy_delta_flow_col: str = self._get_config_value(["strategy_settings", "proxy_delta_flow_col"], "dxvolm")
+        self.proxy_gamma_flow_col: str = self._get_config_value(["strategy_settings", "proxy_gamma_flow_col"], "gxvolm")
+        self.proxy_vega_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vega_flow_col"], "vxvolm")
+        self.proxy_theta_flow_col: str = self._get_config_value(["strategy_settings", "proxy_theta_flow_col"], "txvolm")
+        self.proxy_charm_flow_col: str = self._get_config_value(["strategy_settings", "proxy_charm_flow_col"], "charmxvolm")
+        self.proxy_vanna_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vanna_flow_col"], "vannaxvolm")
+        self.proxy_vomma_flow_col: str = self._get_config_value(["strategy_settings", "proxy_vomma_flow_col"], "vommaxvolm")
+
+    def _reconfigure_sdag_engine(self) -> None:
+        # Reconfigured in place: the engine object is shared with the elite calculator
+        self.sdag_engine.configure_from_strategy_settings(self._get_config_value(["strategy_settings"], {}))
 
     # --- C. Data Processing & Utility Methods ---
 
@@ -343,6 +438,89 @@ class IntegratedTradingSystem:
         norm_logger.debug(f"Series '{series_name}' normalized successfully. Output head: {final_normalized_series.head().to_string() if not final_normalized_series.empty else 'Empty Series'}")
         return final_normalized_series
 
+    def _normalize_columns(self, matrix: np.ndarray) -> np.ndarray:
+        """Column-wise _normalize_series on a 2-D array: non-finite -> 0, each column divided by its max |value| (near-zero columns -> 0)."""
+        cleaned = np.where(np.isfinite(matrix), matrix, 0.0)
+        max_abs = np.abs(cleaned).max(axis=0, initial=0.0)
+        return cleaned / np.where(max_abs >= MIN_NORMALIZATION_DENOMINATOR, max_abs, np.inf)
+
+    def _column_values(self, df: pd.DataFrame, col_name: Optional[str], default_val: float = 0.0) -> np.ndarray:
+        """Float array of a column (non-numeric/NaN/inf -> default_val); a missing column yields a constant array."""
+        if not col_name or col_name not in df.columns: return np.full(len(df), default_val)
+        series = df[col_name]
+        values = (series if pd.api.types.is_numeric_dtype(series) else pd.to_numeric(series, errors='coerce')).to_numpy(dtype=float, na_value=np.nan)
+        return np.where(np.isfinite(values), values, default_val)
+
+    def _net_flow_values(self, df: pd.DataFrame, buy_col: Optional[str], sell_col: Optional[str], proxy_col: Optional[str]) -> Optional[np.ndarray]:
+        """Net flow per contract: direct buy - sell when both columns exist, else the proxy column, else None."""
+        if buy_col and sell_col and buy_col in df.columns and sell_col in df.columns:
+            return self._column_values(df, buy_col) - self._column_values(df, sell_col)
+        if proxy_col and proxy_col in df.columns: return self._column_values(df, proxy_col)
+        return None
+
+    def _flow_alignment_factor(self, exposure: np.ndarray, flow: Optional[np.ndarray], coefficient_key: str) -> np.ndarray:
+        """Per-contract multiplier from data_processor_settings.coefficients[coefficient_key]: 'aligned' when flow and exposure share a sign, 'opposed' when they differ, else 'neutral'."""
+        coefficients = self._get_config_value(["data_processor_settings", "coefficients", coefficient_key], {})
+        aligned_val = float(coefficients.get("aligned", 1.0)); opposed_val = float(coefficients.get("opposed", 1.0)); neutral_val = float(coefficients.get("neutral", 1.0))
+        if flow is None: return np.full(len(exposure), neutral_val)
+        direction = np.sign(exposure) * np.sign(flow)
+        return np.select([direction > 0, direction < 0], [aligned_val, opposed_val], default=neutral_val)
+
+    def _flow_coefficient(self, coefficient_key: str, default_val: float = 0.3) -> float:
+        """
+        Scalar flow/OI coefficient from data_processor_settings.coefficients[coefficient_key].
+        Legacy configs stored tdpi_beta / vri_gamma as {'aligned', 'opposed', 'neutral'} multipliers; those migrate to
+        aligned - neutral (the old 1.3 / 1.0 pair -> 0.3), with a one-time warning asking for the scalar form.
+        """
+        value = self._get_config_value(["data_processor_settings", "coefficients", coefficient_key], default_val)
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value): return float(value)
+        if isinstance(value, dict) and "aligned" in value:
+            if coefficient_key not in self.migrated_flow_coefficients:
+                try: migrated = float(value["aligned"]) - float(value.get("neutral", 1.0))
+                except (TypeError, ValueError): migrated = float('nan')
+                if not np.isfinite(migrated): migrated = default_val
+                self.migrated_flow_coefficients[coefficient_key] = migrated
+                self.instance_logger.warning(f"Coefficient '{coefficient_key}' uses the legacy aligned/opposed form {value!r}; it is now a scalar flow/OI coefficient. Using aligned - neutral = {migrated}. Set \"{coefficient_key}\": {migrated} in data_processor_settings.coefficients.")
+            return self.migrated_flow_coefficients[coefficient_key]
+        self.instance_logger.warning(f"Coefficient '{coefficient_key}' must be a number (got {value!r}). Using {default_val}.")
+        return default_val
+
+    def _flow_to_oi_ratio(self, flow: np.ndarray, exposure: np.ndarray) -> np.ndarray:
+        """flow / OI exposure per row; rows without exposure -> 0."""
+        return np.divide(flow, exposure, out=np.zeros(len(exposure)), where=np.abs(exposure) > MIN_NORMALIZATION_DENOMINATOR)
+
+    def _normalized_abs(self, values: np.ndarray) -> np.ndarray:
+        """|values| divided by their chain max (near-zero columns -> 0)."""
+        return np.abs(self._normalize_columns(values[:, None])[:, 0])
+
+    def _session_progress(self, current_time: Optional[time] = None) -> float:
+        """Fraction of the regular session elapsed at current_time (0 before the open, 1 after the close)."""
+        time_definitions = self._get_config_value(["data_processor_settings", "weights", "time_based_definitions"], {})
+        current_time_obj = current_time if current_time is not None else datetime.now().time()
+        if isinstance(current_time_obj, datetime): current_time_obj = current_time_obj.time()
+        try:
+            open_time = datetime.strptime(str(time_definitions.get("market_open", "09:30:00")), "%H:%M:%S")
+            close_time = datetime.strptime(str(time_definitions.get("market_close", "16:00:00")), "%H:%M:%S")
+        except ValueError:
+            self.instance_logger.warning("Invalid market_open/market_close in time_based_definitions. Using 09:30-16:00.")
+            open_time, close_time = datetime.strptime("09:30:00", "%H:%M:%S"), datetime.strptime("16:00:00", "%H:%M:%S")
+        session_sec = (close_time - open_time).total_seconds()
+        if not isinstance(current_time_obj, time) or session_sec <= 0: return 0.0
+        elapsed_sec = (datetime.combine(open_time.date(), current_time_obj) - open_time).total_seconds()
+        return float(min(max(elapsed_sec / session_sec, 0.0), 1.0))
+
+    def _greek_flow_columns(self) -> List[Tuple[Optional[str], Optional[str], Optional[str], str]]:
+        """(direct buy col, direct sell col, proxy flow col, OI exposure col) per greek, for flow-intensity (CFI) ratios."""
+        return [
+            (self.direct_delta_buy_col, self.direct_delta_sell_col, self.proxy_delta_flow_col, self.delta_exposure_col),
+            (self.direct_gamma_buy_col, self.direct_gamma_sell_col, self.proxy_gamma_flow_col, self.gamma_exposure_col),
+            (self.direct_vega_buy_col, self.direct_vega_sell_col, self.proxy_vega_flow_col, VEGA_EXPOSURE_COL),
+            (self.direct_theta_buy_col, self.direct_theta_sell_col, self.proxy_theta_flow_col, THETA_EXPOSURE_COL),
+            (None, None, self.proxy_charm_flow_col, CHARM_EXPOSURE_COL),
+            (None, None, self.proxy_vanna_flow_col, VANNA_EXPOSURE_COL),
+            (None, None, self.proxy_vomma_flow_col, VOMMA_EXPOSURE_COL),
+        ]
+
     def _ensure_columns(self, df: pd.DataFrame, required_cols: List[str], calculation_name: str) -> Tuple[pd.DataFrame, bool]:
         ensure_logger = self.instance_logger.getChild("EnsureColumns")
         ensure_logger.debug(f"Ensuring columns for '{calculation_name}'. Required: {required_cols}")
@@ -523,75 +701,28 @@ class IntegratedTradingSystem:
         return final_component_weights_map
 
     def _get_atr(self, symbol: str, price: Optional[float], history_df: Optional[pd.DataFrame] = None) -> float:
+        """
+        ATR14 for 'symbol' from the shared incremental volatility state. 'history_df' (daily OHLC) only feeds bars newer
+        than the ones already in the state; without it the state's existing ATR is served. Falls back to the configured
+        approximation while fewer than 14 true ranges are known.
+        """
         atr_logger = self.instance_logger.getChild("GetATR")
-        atr_logger.debug(f"ATR calculation started for symbol '{symbol}'. Current price for fallback: {price}. History DF provided: {history_df is not None and not history_df.empty}")
+        atr_logger.debug(f"ATR requested for symbol '{symbol}'. Current price for fallback: {price}. History DF rows: {len(history_df) if isinstance(history_df, pd.DataFrame) else None}")
 
-        atr_period: int = 14
         min_value_from_config = float(self._get_config_value(["data_processor_settings", "approximations", "tdpi_atr_fallback", "min_value"], DEFAULT_ATR_FALLBACK_MIN_VALUE))
-        calculated_atr_value: float = min_value_from_config
-
-        if history_df is not None and isinstance(history_df, pd.DataFrame) and not history_df.empty:
-            atr_logger.debug(f"ATR ({symbol}): Processing history_df with shape {history_df.shape}.")
-            hist_df_copy = history_df.copy()
-
-            date_col, high_col, low_col, close_col = 'date', 'high', 'low', 'close'
-            required_ohlc_cols_for_atr_calc = [high_col, low_col, close_col, date_col]
-
-            hist_df_copy, cols_ok = self._ensure_columns(hist_df_copy, required_ohlc_cols_for_atr_calc, f"ATR_History_Input_For_{symbol}")
-
-            if not cols_ok:
-                atr_logger.warning(f"ATR ({symbol}): history_df missing or has invalid required OHLC columns after _ensure_columns. Using fallback ATR.")
-            elif hist_df_copy.empty:
-                atr_logger.warning(f"ATR ({symbol}): history_df became empty after data type coercion or NaN handling. Using fallback ATR.")
-            else:
-                try:
-                    hist_df_copy[date_col] = pd.to_datetime(hist_df_copy[date_col], errors='coerce')
-                    hist_df_copy.dropna(subset=required_ohlc_cols_for_atr_calc, inplace=True)
-
-                    if len(hist_df_copy) >= atr_period:
-                        hist_df_copy.sort_values(by=date_col, inplace=True, ascending=True)
-                        hist_df_copy.reset_index(drop=True, inplace=True)
-
-                        high_low_range = hist_df_copy[high_col] - hist_df_copy[low_col]
-                        prev_close_shifted = hist_df_copy[close_col].shift(1)
-                        high_prev_close_range = abs(hist_df_copy[high_col] - prev_close_shifted)
-                        low_prev_close_range = abs(hist_df_copy[low_col] - prev_close_shifted)
-
-                        true_ranges_concat_df = pd.concat([high_low_range, high_prev_close_range, low_prev_close_range], axis=1)
-                        true_range_series_calc = true_ranges_concat_df.max(axis=1, skipna=False)
-
-                        if not true_range_series_calc.empty and not high_low_range.empty and pd.notna(high_low_range.iloc[0]):
-                            true_range_series_calc.iloc[0] = high_low_range.iloc[0]
-                        elif not true_range_series_calc.empty:
-                            true_range_series_calc.iloc[0] = np.nan
-
-                        true_range_series_calc.dropna(inplace=True)
-
-                        if not true_range_series_calc.empty and len(true_range_series_calc) >= atr_period:
-                            atr_logger.debug(f"ATR ({symbol}): Calculating Exponential Moving Average over {len(true_range_series_calc)} True Range values for ATR{atr_period}.")
-                            atr_calculated_series_ewm = true_range_series_calc.ewm(span=atr_period, adjust=False, min_periods=atr_period).mean()
-
-                            if not atr_calculated_series_ewm.empty and pd.notna(atr_calculated_series_ewm.iloc[-1]):
-                                atr_from_historical_data = atr_calculated_series_ewm.iloc[-1]
-                                if atr_from_historical_data > MIN_NORMALIZATION_DENOMINATOR:
-                                    calculated_atr_value = max(atr_from_historical_data, min_value_from_config)
-                                    atr_logger.info(f"ATR for {symbol} calculated successfully from history_df: {calculated_atr_value:.4f} (Raw EMA: {atr_from_historical_data:.4f}, Config Min Floor: {min_value_from_config:.4f})")
-                                    return calculated_atr_value
-                                else:
-                                    atr_logger.warning(f"ATR ({symbol}): Calculated ATR from history_df is invalid or too small ({atr_from_historical_data:.4f}). Using fallback ATR.")
-                            else:
-                                atr_logger.warning(f"ATR ({symbol}): ATR EMA calculation resulted in NaN or empty series. Using fallback ATR.")
-                        else:
-                             atr_logger.warning(f"ATR ({symbol}): Insufficient True Range values ({len(true_range_series_calc)}) after processing for ATR{atr_period}. Using fallback ATR.")
-                    else:
-                        atr_logger.warning(f"ATR ({symbol}): Insufficient valid data rows ({len(hist_df_copy)}) in history_df for ATR{atr_period} (need at least {atr_period} periods). Using fallback ATR.")
-                except Exception as e_atr_hist_calc:
-                    atr_logger.error(f"ATR ({symbol}): Error during ATR calculation from history_df: {e_atr_hist_calc}. Using fallback ATR.", exc_info=True)
-        else:
-            if history_df is None:
-                atr_logger.debug(f"ATR ({symbol}): history_df not provided by caller. Using fallback ATR.")
-            else:
-                atr_logger.warning(f"ATR ({symbol}): history_df provided was invalid (e.g., empty, wrong type: {type(history_df)}). Using fallback ATR.")
+        if history_df is not None and not isinstance(history_df, pd.DataFrame):
+            atr_logger.warning(f"ATR ({symbol}): history_df provided was invalid (type: {type(history_df)}). Ignoring it.")
+            history_df = None
+        try:
+            vol_state = self.volatility_states.sync(symbol, history_df, price if price is not None and pd.notna(price) else None)
+            state_atr = vol_state.atr
+            if state_atr is not None and state_atr > MIN_NORMALIZATION_DENOMINATOR:
+                calculated_atr_value = max(state_atr, min_value_from_config)
+                atr_logger.debug(f"ATR for {symbol} from volatility state: {calculated_atr_value:.4f} (Raw EMA: {state_atr:.4f}, Bars: {vol_state.bar_count}, Config Min Floor: {min_value_from_config:.4f})")
+                return calculated_atr_value
+            atr_logger.warning(f"ATR ({symbol}): Volatility state has no usable ATR yet ({vol_state.bar_count} bars, value: {state_atr}). Using fallback ATR.")
+        except Exception as e_atr_state:
+            atr_logger.error(f"ATR ({symbol}): Error updating volatility state: {e_atr_state}. Using fallback ATR.", exc_info=True)
 
         atr_fallback_config = self._get_config_value(["data_processor_settings", "approximations", "tdpi_atr_fallback"], {})
         fallback_type = str(atr_fallback_config.get("type", "percentage_of_price"))
@@ -619,28 +750,32 @@ class IntegratedTradingSystem:
         else:
             map_logger.debug(f"Invalid or non-finite score input ({score}, type: {type(score)}). Defaulting to 0.0 for star mapping.")
 
-        recommendations_config = self._get_config_value(["strategy_settings", "recommendations"], {})
-        conviction_map_high_thresh = float(recommendations_config.get("conviction_map_high", 4.0))
-        conviction_map_high_medium_thresh = float(recommendations_config.get("conviction_map_high_medium", 3.0))
-        conviction_map_medium_thresh = float(recommendations_config.get("conviction_map_medium", 2.0))
-        conviction_map_medium_low_thresh = float(recommendations_config.get("conviction_map_medium_low", 1.0))
-        conviction_map_base_one_star_thresh = float(recommendations_config.get("conviction_map_base_one_star", 0.5))
-
+        # Highest star count whose threshold is met (thresholds ordered 1..5 stars)
         stars_calculated: int = 0
-        if score_val >= conviction_map_high_thresh:
-            stars_calculated = 5
-        elif score_val >= conviction_map_high_medium_thresh:
-            stars_calculated = 4
-        elif score_val >= conviction_map_medium_thresh:
-            stars_calculated = 3
-        elif score_val >= conviction_map_medium_low_thresh:
-            stars_calculated = 2
-        elif score_val >= conviction_map_base_one_star_thresh:
-            stars_calculated = 1
+        for star_count, threshold in enumerate(self._get_star_thresholds(), start=1):
+            if score_val >= threshold: stars_calculated = star_count
 
         map_logger.debug(f"Mapped score {score_val:.3f} to {stars_calculated} stars.")
         return stars_calculated
 
+    def _get_star_thresholds(self) -> np.ndarray:
+        """Conviction score thresholds for 1..5 stars (index 0 = one star)."""
+        recommendations_config = self._get_config_value(["strategy_settings", "recommendations"], {})
+        return np.array([
+            float(recommendations_config.get("conviction_map_base_one_star", 0.5)),
+            float(recommendations_config.get("conviction_map_medium_low", 1.0)),
+            float(recommendations_config.get("conviction_map_medium", 2.0)),
+            float(recommendations_config.get("conviction_map_high_medium", 3.0)),
+            float(recommendations_config.get("conviction_map_high", 4.0)),
+        ])
+
+    def map_scores_to_stars(self, scores: Union[pd.Series, np.ndarray, List[Any]]) -> np.ndarray:
+        """Vectorized map_score_to_stars: int star counts (0-5) for a whole score column; invalid/non-finite scores map like 0.0."""
+        score_arr = pd.to_numeric(pd.Series(scores).reset_index(drop=True), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        score_arr = np.where(np.isfinite(score_arr), score_arr, 0.0)
+        star_levels = np.arange(1, 6)
+        return (np.where(score_arr[:, None] >= self._get_star_thresholds()[None, :], star_levels, 0)).max(axis=1, initial=0).astype(int)
+
     def _calculate_dynamic_threshold_wrapper(self, config_path_suffix: List[str], data_series: Optional[pd.Series], comparison_mode: str = 'above') -> Optional[Union[float, List[float]]]:
         dt_wrap_logger = self.instance_logger.getChild("DynamicThresholdWrapper")
         full_config_path = ["strategy_settings", "thresholds"] + config_path_suffix
@@ -652,7 +787,23 @@ class IntegratedTradingSystem:
             dt_wrap_logger.error(f"Invalid or empty threshold configuration at '{'/'.join(full_config_path)}'. Cannot calculate threshold; no fallback specified in this structure.")
             return None
 
-        calculated_result = self._calculate_dynamic_threshold(threshold_config_dict, data_series, comparison_mode)
+        # Memoized per (threshold, mode, series content) for the current snapshot; fixed thresholds ignore the series
+        threshold_type = str(threshold_config_dict.get('type', 'fixed'))
+        if threshold_type.startswith('relative_'): data_digest = series_digest(data_series)
+        elif threshold_type == 'historical_percentile': data_digest = str(threshold_config_dict.get('symbol') or self.threshold_symbol).upper().encode() # Per-symbol history
+        else: data_digest = None
+        result_cache_key = (tuple(config_path_suffix), comparison_mode, data_digest)
+        cached_result = self.threshold_cache.get_result(result_cache_key)
+        if not self.threshold_cache.is_missing(cached_result):
+            return list(cached_result) if isinstance(cached_result, list) else cached_result
+
+        calculated_result = self._resolve_dynamic_threshold(config_path_suffix, threshold_config_dict, data_series, comparison_mode, data_digest)
+        self.threshold_cache.store_result(result_cache_key, calculated_result)
+        return list(calculated_result) if isinstance(calculated_result, list) else calculated_result
+
+    def _resolve_dynamic_threshold(self, config_path_suffix: List[str], threshold_config_dict: Dict, data_series: Optional[pd.Series], comparison_mode: str, data_digest: Optional[bytes]) -> Optional[Union[float, List[float]]]:
+        dt_wrap_logger = self.instance_logger.getChild("DynamicThresholdWrapper")
+        calculated_result = self._calculate_dynamic_threshold(threshold_config_dict, data_series, comparison_mode, data_digest)
 
         if calculated_result is None:
             fixed_fallback_value_from_cfg = threshold_config_dict.get('fallback_value')
@@ -673,7 +824,7 @@ class IntegratedTradingSystem:
         dt_wrap_logger.debug(f"Successfully determined threshold for '{'.'.join(config_path_suffix)}': {calculated_result}")
         return calculated_result
 
-    def _calculate_dynamic_threshold(self, threshold_config: Dict, data_series: Optional[pd.Series], comparison_mode: str = 'above') -> Optional[Union[float, List[float]]]:
+    def _calculate_dynamic_threshold(self, threshold_config: Dict, data_series: Optional[pd.Series], comparison_mode: str = 'above', data_digest: Optional[bytes] = None) -> Optional[Union[float, List[float]]]:
         dyn_thresh_logger = self.instance_logger.getChild("DynamicThresholdCalc")
         threshold_type = str(threshold_config.get('type', 'fixed'))
         calculated_threshold_value: Optional[Union[float, List[float]]] = None
@@ -695,28 +846,37 @@ class IntegratedTradingSystem:
                     dyn_thresh_logger.debug(f"Cannot calculate relative threshold of type '{threshold_type}' because the provided data_series is None or empty.")
                     return None
 
-                cleaned_numeric_series = pd.to_numeric(data_series, errors='coerce').replace([np.inf, -np.inf], np.nan).dropna()
-                if cleaned_numeric_series.empty:
+                # Cleaned once per distinct series content; percentiles via partition/sort-once order statistics
+                series_stats = self.threshold_cache.series_stats(data_series, data_digest)
+                if series_stats is None:
                     dyn_thresh_logger.debug(f"Data series for relative threshold type '{threshold_type}' became empty after cleaning (all values were NaN or Inf). Cannot calculate threshold.")
                     return None
 
-                dyn_thresh_logger.debug(f"Relative threshold '{threshold_type}': Using cleaned series (Length: {len(cleaned_numeric_series)}, Mean: {cleaned_numeric_series.mean():.3f}, StdDev: {cleaned_numeric_series.std():.3f})")
+                dyn_thresh_logger.debug(f"Relative threshold '{threshold_type}': Using cleaned series (Length: {len(series_stats)}, Mean: {series_stats.mean:.3f})")
 
                 if threshold_type == 'relative_percentile':
                     percentile_config_val = float(threshold_config.get('percentile', 50.0))
                     percentile_config_val = max(0.0, min(100.0, percentile_config_val))
-                    calculated_threshold_value = np.percentile(cleaned_numeric_series, percentile_config_val)
+                    calculated_threshold_value = series_stats.percentile(percentile_config_val)
                 elif threshold_type == 'relative_mean_factor':
                     factor_config_val = float(threshold_config.get('factor', 1.0))
-                    series_for_mean_calc = cleaned_numeric_series.abs() if comparison_mode == 'above_abs' else cleaned_numeric_series
-                    if series_for_mean_calc.empty:
-                        dyn_thresh_logger.warning(f"Series for mean calculation (Mode: {comparison_mode}) became empty unexpectedly. Cannot calculate threshold.")
-                        return None
-                    mean_val_of_series = series_for_mean_calc.mean()
+                    mean_val_of_series = series_stats.abs_mean if comparison_mode == 'above_abs' else series_stats.mean
                     calculated_threshold_value = factor_config_val * mean_val_of_series
                 else:
                     dyn_thresh_logger.error(f"Unknown 'relative_' threshold type specified: '{threshold_type}'.")
                     return None
+            elif threshold_type == 'historical_percentile':
+                # Percentile of the symbol's daily aggregate history (MetricDistributionService), not of this snapshot
+                metric_name = threshold_config.get('metric'); symbol = str(threshold_config.get('symbol') or self.threshold_symbol).upper()
+                if self.metric_distributions is None or not metric_name or not symbol:
+                    dyn_thresh_logger.debug(f"'historical_percentile' threshold needs metric distributions, a 'metric' and a symbol (service: {self.metric_distributions is not None}, metric: {metric_name}, symbol: '{symbol}').")
+                    return None
+                percentiles_cfg = threshold_config.get('percentiles')
+                if isinstance(percentiles_cfg, list) and percentiles_cfg:
+                    calculated_threshold_value = self.metric_distributions.percentiles(symbol, str(metric_name), [float(p) for p in percentiles_cfg])
+                    if any(tier_val is None for tier_val in calculated_threshold_value): calculated_threshold_value = None
+                else:
+                    calculated_threshold_value = self.metric_distributions.percentile(symbol, str(metric_name), float(threshold_config.get('percentile', 50.0)))
             else:
                 dyn_thresh_logger.error(f"Unsupported threshold type configured: '{threshold_type}'.")
                 return None
@@ -739,27 +899,9 @@ class IntegratedTradingSystem:
             dyn_thresh_logger.error(f"Error during dynamic threshold calculation (Type: '{threshold_type}', Config: {threshold_config}): {e_dyn_thresh_calc}", exc_info=True)
             return None
 
-    def _aggregate_for_levels(self, df: pd.DataFrame, group_col: str = 'strike') -> pd.DataFrame:
-        agg_logger = self.instance_logger.getChild("AggregateForLevels")
-        agg_logger.debug(f"Aggregating DataFrame by '{group_col}'. Input shape: {df.shape if isinstance(df, pd.DataFrame) else 'N/A'}")
-
-        if not isinstance(df, pd.DataFrame) or df.empty:
-            agg_logger.warning("Input DataFrame for aggregation is empty or invalid. Returning an empty DataFrame.")
-            return pd.DataFrame()
-        if group_col not in df.columns:
-            agg_logger.error(f"Grouping column '{group_col}' not found in DataFrame. Cannot aggregate. Available columns: {df.columns.tolist()}")
-            return pd.DataFrame()
-
-        df_copy_for_aggregation = df.copy()
-
-        if pd.api.types.is_numeric_dtype(df_copy_for_aggregation[group_col]):
-            df_copy_for_aggregation[group_col] = pd.to_numeric(df_copy_for_aggregation[group_col], errors='coerce')
-        df_copy_for_aggregation.dropna(subset=[group_col], inplace=True)
-
-        if df_copy_for_aggregation.empty:
-            agg_logger.warning(f"DataFrame became empty after ensuring valid grouping column '{group_col}'. Returning an empty DataFrame.")
-            return pd.DataFrame()
-
+    def _level_aggregation_logic(self, available_columns: Iterable[str]) -> Dict[str, str]:
+        """Column -> aggregation function used by _aggregate_for_levels, restricted to the available columns."""
+        available_columns = set(available_columns)
         aggregation_logic_base: Dict[str, str] = {
             'mspi':'sum', 'sai':'first', 'ssi':'first', 'cfi':'first',
             'dag_custom':'sum', 'tdpi':'sum', 'vri':'sum',
@@ -777,16 +919,39 @@ class IntegratedTradingSystem:
         for sdag_method_name_agg in enabled_sdag_methods_agg:
             sdag_column_name_agg = f"sdag_{sdag_method_name_agg}"
             sdag_norm_column_name_agg = f"sdag_{sdag_method_name_agg}_norm"
-            if sdag_column_name_agg in df_copy_for_aggregation.columns:
+            if sdag_column_name_agg in available_columns:
                 aggregation_logic_base[sdag_column_name_agg] = 'sum'
-            if sdag_norm_column_name_agg in df_copy_for_aggregation.columns:
+            if sdag_norm_column_name_agg in available_columns:
                 aggregation_logic_base[sdag_norm_column_name_agg] = 'first'
 
-        valid_aggregation_logic_final = {
+        return {
             col_key: agg_func for col_key, agg_func in aggregation_logic_base.items()
-            if col_key in df_copy_for_aggregation.columns
+            if col_key in available_columns
         }
 
+    def _aggregate_for_levels(self, df: pd.DataFrame, group_col: str = 'strike') -> pd.DataFrame:
+        agg_logger = self.instance_logger.getChild("AggregateForLevels")
+        agg_logger.debug(f"Aggregating DataFrame by '{group_col}'. Input shape: {df.shape if isinstance(df, pd.DataFrame) else 'N/A'}")
+
+        if not isinstance(df, pd.DataFrame) or df.empty:
+            agg_logger.warning("Input DataFrame for aggregation is empty or invalid. Returning an empty DataFrame.")
+            return pd.DataFrame()
+        if group_col not in df.columns:
+            agg_logger.error(f"Grouping column '{group_col}' not found in DataFrame. Cannot aggregate. Available columns: {df.columns.tolist()}")
+            return pd.DataFrame()
+
+        df_copy_for_aggregation = df.copy()
+
+        if pd.api.types.is_numeric_dtype(df_copy_for_aggregation[group_col]):
+            df_copy_for_aggregation[group_col] = pd.to_numeric(df_copy_for_aggregation[group_col], errors='coerce')
+        df_copy_for_aggregation.dropna(subset=[group_col], inplace=True)
+
+        if df_copy_for_aggregation.empty:
+            agg_logger.warning(f"DataFrame became empty after ensuring valid grouping column '{group_col}'. Returning an empty DataFrame.")
+            return pd.DataFrame()
+
+        valid_aggregation_logic_final = self._level_aggregation_logic(df_copy_for_aggregation.columns)
+
         if not valid_aggregation_logic_final:
             agg_logger.warning("No valid columns found for aggregation after filtering based on DataFrame's columns. Returning an empty DataFrame.")
             return pd.DataFrame()
@@ -837,32 +1002,142 @@ class IntegratedTradingSystem:
     # This is just to ensure the create_file_with_block has the full class structure.
 
     def calculate_custom_flow_dag(self, options_df: pd.DataFrame) -> pd.DataFrame:
-        # (Existing implementation)
-        return options_df
+        """
+        Adds 'dag_custom' (Delta Adjusted Gamma): gamma exposure x normalized delta exposure, scaled by the
+        dag_alpha coefficient depending on whether net delta flow is aligned with or opposed to the delta exposure.
+        """
+        return self._assign_columns(options_df, self._dag_columns(options_df))
+
+    def _assign_columns(self, df: pd.DataFrame, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """Writes 'columns' into df (in place) and returns it; the public per-metric calculators' output step."""
+        for col_name, values in columns.items(): df[col_name] = values
+        return df
+
+    def _with_columns(self, df: pd.DataFrame, columns: Dict[str, np.ndarray]) -> pd.DataFrame:
+        """New frame with df's columns plus 'columns' (replacing same-named ones), built in one concat; df is left untouched."""
+        replaced = [c for c in columns if c in df.columns]
+        return pd.concat([df.drop(columns=replaced) if replaced else df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+    def _dag_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        gamma_exposure = self._column_values(df, self.gamma_exposure_col)
+        delta_exposure = self._column_values(df, self.delta_exposure_col)
+        delta_exposure_norm = self._normalize_columns(delta_exposure[:, None])[:, 0]
+        net_delta_flow = self._net_flow_values(df, self.direct_delta_buy_col, self.direct_delta_sell_col, self.proxy_delta_flow_col)
+        return {'dag_custom': gamma_exposure * delta_exposure_norm * self._flow_alignment_factor(delta_exposure, net_delta_flow, "dag_alpha")}
+
+    def calculate_tdpi(self, options_df: pd.DataFrame, current_time: Optional[time] = None, historical_ohlc_df_for_atr: Optional[pd.DataFrame] = None, underlying_price: Optional[float] = None) -> pd.DataFrame:
+        """
+        Adds Time Decay Pressure columns, per contract:
+        - 'tdpi': charmxoi x sign(txoi) x (1 + tdpi_beta x net charm flow / charmxoi) x normalized net theta flow
+          x (1 + session progress) x strike proximity, proximity = exp(tdpi_gaussian_width * ((strike - price) / ATR)^2).
+        - 'ctr': |net charm flow| / (|net theta flow| + eps).
+        - 'tdfi': normalized |net theta flow| / (normalized |txoi| + eps).
+        Net theta flow is thetas_sell - thetas_buy (proxy txvolm), net charm flow the charm flow column. When either
+        flow is missing the three columns are 0.
+        """
+        return self._assign_columns(options_df, self._tdpi_columns(options_df, current_time, historical_ohlc_df_for_atr, underlying_price))
+
+    def _tdpi_columns(self, df: pd.DataFrame, current_time: Optional[time], historical_ohlc_df_for_atr: Optional[pd.DataFrame], underlying_price: Optional[float]) -> Dict[str, np.ndarray]:
+        tdpi_logger = self.instance_logger.getChild("CalculateTDPI")
+        charm_flow = self._net_flow_values(df, None, None, self.proxy_charm_flow_col)
+        theta_flow = self._net_flow_values(df, self.direct_theta_sell_col, self.direct_theta_buy_col, self.proxy_theta_flow_col) # sell - buy
+        if charm_flow is None or theta_flow is None:
+            tdpi_logger.warning(f"TDPI needs charm and theta flow (charm: {charm_flow is not None}, theta: {theta_flow is not None}). Setting tdpi/ctr/tdfi to 0.")
+            return {'tdpi': np.zeros(len(df)), 'ctr': np.zeros(len(df)), 'tdfi': np.zeros(len(df))}
+        charm_exposure = self._column_values(df, CHARM_EXPOSURE_COL)
+        theta_exposure = self._column_values(df, THETA_EXPOSURE_COL)
+
+        price = underlying_price
+        if (price is None or not np.isfinite(price) or price <= 0) and 'price' in df.columns:
+            valid_prices = self._column_values(df, 'price', np.nan); valid_prices = valid_prices[np.isfinite(valid_prices) & (valid_prices > 0)]
+            price = float(valid_prices[0]) if len(valid_prices) else None
+        proximity = np.ones(len(df))
+        if price is not None and STRIKE_COL in df.columns:
+            symbol = str(df['underlying_symbol'].iloc[0]) if 'underlying_symbol' in df.columns else "N/A"
+            atr_value = self._get_atr(symbol, price, historical_ohlc_df_for_atr)
+            gaussian_width = float(self._get_config_value(["data_processor_settings", "factors", "tdpi_gaussian_width"], -0.5))
+            strike_distance_atr = (self._column_values(df, STRIKE_COL, np.nan) - price) / max(atr_value, MIN_NORMALIZATION_DENOMINATOR)
+            proximity = np.nan_to_num(np.exp(gaussian_width * strike_distance_atr ** 2), nan=0.0)
+        else:
+            tdpi_logger.debug("No valid underlying price/strikes for TDPI proximity. Using unit proximity.")
+
+        charm_flow_term = 1.0 + self._flow_coefficient("tdpi_beta") * self._flow_to_oi_ratio(charm_flow, charm_exposure)
+        theta_flow_norm = self._normalize_columns(theta_flow[:, None])[:, 0]
+        return {
+            'tdpi': charm_exposure * np.sign(theta_exposure) * charm_flow_term * theta_flow_norm * (1.0 + self._session_progress(current_time)) * proximity,
+            'ctr': np.abs(charm_flow) / (np.abs(theta_flow) + MIN_NORMALIZATION_DENOMINATOR),
+            'tdfi': self._normalized_abs(theta_flow) / (self._normalized_abs(theta_exposure) + MIN_NORMALIZATION_DENOMINATOR)
+        }
 
-    def calculate_tdpi(self, options_df: pd.DataFrame, current_time: Optional[time] = None, historical_ohlc_df_for_atr: Optional[pd.DataFrame] = None ) -> pd.DataFrame:
-        # (Existing implementation)
-        return options_df
+    def _skew_factor(self, df: pd.DataFrame) -> float:
+        """
+        Global skew factor from call / put vega OI: 1 + (|put_vxoi| - |call_vxoi|) / (|put_vxoi| + |call_vxoi|), in [0, 2].
+        Uses the underlying 'call_vxoi' / 'put_vxoi' columns when present, else sums vxoi by opt_kind; 1.0 without data.
+        """
+        if 'call_vxoi' in df.columns and 'put_vxoi' in df.columns and len(df):
+            call_vxoi = float(self._column_values(df, 'call_vxoi')[0]); put_vxoi = float(self._column_values(df, 'put_vxoi')[0])
+        elif 'opt_kind' in df.columns:
+            kind_codes, kind_uniques = pd.factorize(df['opt_kind']) # Lower-case the few distinct kinds, not every row
+            kinds = np.array([str(kind).lower() for kind in kind_uniques] + [""], dtype=object)[kind_codes] # Missing (-1) -> ""
+            vega_exposure = self._column_values(df, VEGA_EXPOSURE_COL)
+            call_vxoi = float(vega_exposure[kinds == 'call'].sum()); put_vxoi = float(vega_exposure[kinds == 'put'].sum())
+        else:
+            return 1.0
+        total = abs(call_vxoi) + abs(put_vxoi)
+        return 1.0 + (abs(put_vxoi) - abs(call_vxoi)) / total if total > MIN_NORMALIZATION_DENOMINATOR else 1.0
 
     def calculate_vri(self, options_df: pd.DataFrame, current_iv: Optional[float] = None, avg_iv_5day: Optional[float] = None) -> pd.DataFrame:
-        # (Existing implementation)
-        return options_df
+        """
+        Adds Volatility Regime columns, per contract:
+        - 'vri': vannaxoi x sign(vxoi) x (1 + vri_gamma x net vanna flow / vannaxoi) x normalized net vomma flow
+          x skew factor (see _skew_factor) x volatility trend (current IV / 5-day average IV, vri_vol_trend_fallback_factor
+          when unavailable).
+        - 'vvr': |net vanna flow| / (|net vomma flow| + eps).
+        - 'vfi': normalized |net vomma flow| / (normalized |vxoi| + eps).
+        When the vanna or vomma flow is missing the three columns are 0.
+        """
+        return self._assign_columns(options_df, self._vri_columns(options_df, current_iv, avg_iv_5day))
+
+    def _vri_columns(self, df: pd.DataFrame, current_iv: Optional[float], avg_iv_5day: Optional[float]) -> Dict[str, np.ndarray]:
+        vri_logger = self.instance_logger.getChild("CalculateVRI")
+        vanna_flow = self._net_flow_values(df, None, None, self.proxy_vanna_flow_col)
+        vomma_flow = self._net_flow_values(df, None, None, self.proxy_vomma_flow_col)
+        if vanna_flow is None or vomma_flow is None:
+            vri_logger.warning(f"VRI needs vanna and vomma flow (vanna: {vanna_flow is not None}, vomma: {vomma_flow is not None}). Setting vri/vvr/vfi to 0.")
+            return {'vri': np.zeros(len(df)), 'vvr': np.zeros(len(df)), 'vfi': np.zeros(len(df))}
+        vanna_exposure = self._column_values(df, VANNA_EXPOSURE_COL)
+        vega_exposure = self._column_values(df, VEGA_EXPOSURE_COL)
+
+        try: vol_trend = float(current_iv) / float(avg_iv_5day)
+        except (TypeError, ValueError, ZeroDivisionError): vol_trend = float('nan')
+        if not np.isfinite(vol_trend) or vol_trend <= 0:
+            vol_trend = float(self._get_config_value(["data_processor_settings", "factors", "vri_vol_trend_fallback_factor"], 0.95))
+
+        vanna_flow_term = 1.0 + self._flow_coefficient("vri_gamma") * self._flow_to_oi_ratio(vanna_flow, vanna_exposure)
+        vomma_flow_norm = self._normalize_columns(vomma_flow[:, None])[:, 0]
+        return {
+            'vri': vanna_exposure * np.sign(vega_exposure) * vanna_flow_term * vomma_flow_norm * self._skew_factor(df) * vol_trend,
+            'vvr': np.abs(vanna_flow) / (np.abs(vomma_flow) + MIN_NORMALIZATION_DENOMINATOR),
+            'vfi': self._normalized_abs(vomma_flow) / (self._normalized_abs(vega_exposure) + MIN_NORMALIZATION_DENOMINATOR)
+        }
+
+    def _sdag_method_series(self, df: pd.DataFrame, method_name: str) -> pd.Series:
+        """One methodology column from the shared batched SDAG engine (0.0 when the method is not enabled)."""
+        result = self.sdag_engine.compute_frame(df, self.gamma_col_for_sdag_final, self.delta_exposure_col)
+        if method_name not in result.methods: return pd.Series(0.0, index=df.index)
+        return pd.Series(result.values[:, result.methods.index(method_name)], index=df.index)
 
-    def calculate_sdag_multiplicative(self, df: pd.DataFrame, gamma_exposure: pd.Series, delta_exposure_norm: pd.Series) -> pd.Series:
-        # (Existing implementation)
-        return pd.Series(0.0, index=df.index) # Placeholder
+    def calculate_sdag_multiplicative(self, df: pd.DataFrame) -> pd.Series:
+        return self._sdag_method_series(df, "multiplicative")
 
-    def calculate_sdag_directional(self, df: pd.DataFrame, gamma_exposure: pd.Series, delta_exposure_norm: pd.Series) -> pd.Series:
-        # (Existing implementation)
-        return pd.Series(0.0, index=df.index)
+    def calculate_sdag_directional(self, df: pd.DataFrame) -> pd.Series:
+        return self._sdag_method_series(df, "directional")
 
-    def calculate_sdag_weighted(self, df: pd.DataFrame, gamma_exposure: pd.Series, delta_exposure_raw: pd.Series) -> pd.Series:
-        # (Existing implementation)
-        return pd.Series(0.0, index=df.index)
+    def calculate_sdag_weighted(self, df: pd.DataFrame) -> pd.Series:
+        return self._sdag_method_series(df, "weighted")
 
-    def calculate_sdag_volatility_focused(self, df: pd.DataFrame, gamma_exposure: pd.Series, delta_exposure_norm: pd.Series) -> pd.Series:
-        # (Existing implementation)
-        return pd.Series(0.0, index=df.index)
+    def calculate_sdag_volatility_focused(self, df: pd.DataFrame) -> pd.Series:
+        return self._sdag_method_series(df, "volatility_focused")
 
     def calculate_mspi(
         self,
@@ -874,33 +1149,247 @@ class IntegratedTradingSystem:
         underlying_price: Optional[float] = None,
         historical_ohlc_df_for_atr: Optional[pd.DataFrame] = None
     ) -> pd.DataFrame:
-        # (Existing implementation - call other calculation methods)
-        df = options_df.copy()
-        df = self.calculate_custom_flow_dag(df)
-        df = self.calculate_tdpi(df, current_time, historical_ohlc_df_for_atr)
-        df = self.calculate_vri(df, current_iv, avg_iv_5day)
-        # ... call SDAG methods and combine ...
-        df['mspi'] = 0.0 # Placeholder
-        df['sai'] = 0.0
-        df['ssi'] = 0.5
-        df['cfi'] = 0.0
+        """
+        Per-contract MSPI plus strike-level SAI / SSI / CFI.
+
+        Component calculators (DAG, TDPI, VRI, SDAG methodologies) produce their column arrays first; the weighted
+        combination is then done on one (contracts x components) array by _combine_mspi_components, and every new
+        column is attached to the returned frame in a single step (options_df itself is not modified).
+        """
+        mspi_logger = self.instance_logger.getChild("CalculateMSPI")
+        if not isinstance(options_df, pd.DataFrame) or options_df.empty:
+            mspi_logger.warning("Input options DataFrame is empty or invalid. Returning it unchanged.")
+            return options_df.copy() if isinstance(options_df, pd.DataFrame) else pd.DataFrame()
+        start_perf = pytime.perf_counter()
+        self.threshold_cache.invalidate() # New snapshot: relative thresholds are recomputed lazily
+        self.threshold_symbol = self._level_symbol(options_df)
+        columns = self._dag_columns(options_df)
+        columns.update(self._tdpi_columns(options_df, current_time, historical_ohlc_df_for_atr, underlying_price))
+        columns.update(self._vri_columns(options_df, current_iv, avg_iv_5day))
+        columns.update(self._sdag_columns(options_df))
+        columns.update(self._combine_mspi_components(options_df, self.get_weights(current_time, iv_context), columns))
+        df = self._with_columns(options_df, columns)
+        mspi_logger.debug(f"MSPI computed for {len(df)} contracts in {(pytime.perf_counter() - start_perf) * 1000.0:.2f} ms.")
         return df
 
+    def _sdag_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """
+        'sdag_<method>' for every enabled methodology plus sdag_consensus / sdag_agreement / sdag_conviction.
+        All methods come from one batched SDAGEngine pass; the engine reuses its last result when the elite
+        calculator already ran it on the same snapshot (only while dag_methodologies matches the legacy elite parameters).
+        """
+        return self.sdag_engine.compute_frame(df, self.gamma_col_for_sdag_final, self.delta_exposure_col).columns()
+
+    def _combine_mspi_components(self, df: pd.DataFrame, weights: Dict[str, float], components: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, np.ndarray]:
+        """
+        Vectorized MSPI engine; returns the new columns. Component values come from 'components' (arrays already
+        computed for this snapshot) and otherwise from df's columns.
+
+        - '<component>_norm': each weighted component normalized over the chain (see _normalize_columns).
+        - 'mspi': weighted sum of the normalized components, per contract.
+        - 'sai' (Sentiment Alignment Indicator, [-1, 1]): mean pairwise sign comparison of the strike's weighted, normalized
+          components (+1 same sign, -1 opposite, 0 when either is zero).
+        - 'ssi' (Structural Stability Index, [0, 1]): 1 - std of the strike's weighted, normalized components, scaled by the
+          largest std those components can reach (sqrt(mean(w^2)) for components in [-|w|, |w|]).
+        SAI and SSI need >= 2 active components; with fewer they stay at their neutral defaults (0.0 / 0.5).
+        - 'cfi' (Cumulative Flow Index, shown as ARFI): mean over greeks of the strike's |net flow| / |OI exposure| ratio,
+          relative to that ratio's chain average (1.0 = average flow intensity).
+        SAI/SSI/CFI are computed once per strike and broadcast to every contract of the strike.
+        """
+        combine_logger = self.instance_logger.getChild("CombineMSPI")
+        n_rows = len(df)
+        component_keys = [k for k, w in weights.items() if w != 0.0]
+        source_cols = [k[:-len("_norm")] if k.endswith("_norm") else k for k in component_keys]
+        components = components if components is not None else {}
+        missing_cols = [c for c in source_cols if c not in components and c not in df.columns]
+        if missing_cols: combine_logger.debug(f"MSPI components missing from frame (treated as 0): {missing_cols}")
+        weight_vec = np.array([weights[k] for k in component_keys], dtype=float)
+        tolerance = float(self._get_config_value(["validation", "weights_sum_tolerance"], 0.01))
+        if component_keys and abs(weight_vec.sum() - 1.0) > tolerance:
+            combine_logger.warning(f"MSPI component weights sum to {weight_vec.sum():.3f} (tolerance {tolerance}). Using them as given.")
+
+        raw_matrix = np.column_stack([components[c] if c in components else self._column_values(df, c) for c in source_cols]) if source_cols else np.zeros((n_rows, 0))
+        norm_matrix = self._normalize_columns(raw_matrix)
+        mspi_values = norm_matrix @ weight_vec
+        new_cols: Dict[str, np.ndarray] = {f"{c}_norm": norm_matrix[:, j] for j, c in enumerate(source_cols)}
+        new_cols['mspi'] = mspi_values
+
+        # Strike axis: codes map every contract to its strike row
+        if STRIKE_COL in df.columns:
+            strike_codes, strike_uniques = pd.factorize(df[STRIKE_COL])
+        else:
+            strike_codes, strike_uniques = np.zeros(n_rows, dtype=np.intp), np.zeros(1)
+        n_strikes = len(strike_uniques); has_strike = strike_codes >= 0; codes_valid = strike_codes[has_strike]
+        strike_sum = lambda values: np.bincount(codes_valid, weights=values[has_strike], minlength=n_strikes)
+
+        # Strike-level components: per-strike sums renormalized over the strikes to [-1, 1], then weighted
+        n_components = len(component_keys)
+        strike_components = self._normalize_columns(np.column_stack([strike_sum(norm_matrix[:, j]) for j in range(n_components)])) * weight_vec if n_components else np.zeros((n_strikes, 0))
+        if n_components >= 2:
+            signs = np.sign(strike_components)
+            # Sum over pairs i<j of sign_i * sign_j == ((sum sign)^2 - sum sign^2) / 2
+            pair_sum = (signs.sum(axis=1) ** 2 - (signs ** 2).sum(axis=1)) / 2.0
+            strike_sai = pair_sum / (n_components * (n_components - 1) / 2.0)
+            std_scale = float(np.sqrt(np.mean(weight_vec ** 2)))
+            strike_ssi = np.clip(1.0 - strike_components.std(axis=1) / std_scale, 0.0, 1.0) if std_scale > MIN_NORMALIZATION_DENOMINATOR else np.full(n_strikes, 0.5)
+        else:
+            combine_logger.debug(f"SAI/SSI need >= 2 active MSPI components ({n_components} active). Using neutral defaults.")
+            strike_sai = np.zeros(n_strikes); strike_ssi = np.full(n_strikes, 0.5)
+
+        ratio_sum = np.zeros(n_strikes); ratio_count = np.zeros(n_strikes)
+        for buy_col, sell_col, proxy_col, exposure_col in self._greek_flow_columns():
+            net_flow = self._net_flow_values(df, buy_col, sell_col, proxy_col)
+            if net_flow is None or exposure_col not in df.columns: continue
+            strike_exposure = np.abs(strike_sum(self._column_values(df, exposure_col)))
+            has_exposure = strike_exposure > MIN_NORMALIZATION_DENOMINATOR
+            if not has_exposure.any(): continue
+            ratio = np.abs(strike_sum(net_flow))[has_exposure] / strike_exposure[has_exposure]
+            ratio_mean = ratio.mean()
+            if ratio_mean <= MIN_NORMALIZATION_DENOMINATOR: continue
+            ratio_sum[has_exposure] += ratio / ratio_mean; ratio_count[has_exposure] += 1
+        strike_cfi = np.divide(ratio_sum, ratio_count, out=np.zeros(n_strikes), where=ratio_count > 0)
+
+        for col_name, strike_values, default_val in (('sai', strike_sai, 0.0), ('ssi', strike_ssi, 0.5), ('cfi', strike_cfi, 0.0)):
+            row_values = np.full(n_rows, default_val); row_values[has_strike] = strike_values[codes_valid]
+            new_cols[col_name] = row_values
+        combine_logger.debug(f"MSPI combined: {len(component_keys)} components over {n_strikes} strikes ({n_rows} contracts).")
+        return new_cols
+
     def generate_trading_signals(self, mspi_df: pd.DataFrame) -> Dict[str, Dict[str, list]]:
-        # (Existing implementation)
-        return {'directional':{'bullish':[],'bearish':[]}}
+        """
+        Signals of every family enabled in system_settings.signal_activation, evaluated as masks over the strike-level
+        snapshot (see SignalEngine). Disabled families are skipped and come back as empty lists; per-family timings go
+        to self.profiler. Memoized per snapshot and activation set.
+        """
+        signals_logger = self.instance_logger.getChild("GenerateSignals")
+        level_index = self._level_index(mspi_df)
+        if level_index is None:
+            signals_logger.warning("No strike-aggregated data available for signal generation."); return self.signal_engine.empty_signals()
+        symbol = self._level_symbol(mspi_df)
+        self.threshold_symbol = symbol
+        context = SignalContext(
+            level_index,
+            threshold=lambda name, values, mode: self._calculate_dynamic_threshold_wrapper([name], pd.Series(values) if values is not None else None, mode),
+            stars=self.map_scores_to_stars,
+            structure_change=lambda: self._structure_change_arrays(level_index, symbol),
+            sdag_engine=self.sdag_engine
+        )
+        return self.signal_engine.generate(context)
+
+    def _level_symbol(self, mspi_df: pd.DataFrame) -> str:
+        if 'underlying_symbol' in mspi_df.columns and len(mspi_df) and pd.notna(mspi_df['underlying_symbol'].iloc[0]): return str(mspi_df['underlying_symbol'].iloc[0]).upper()
+        return str(self.current_symbol_being_managed or "").upper()
+
+    def _level_index(self, mspi_df: pd.DataFrame) -> Optional[StrikeLevelIndex]:
+        """Strike-sorted index of the aggregated metrics for a per-contract (or already aggregated) frame; aggregated once per distinct input."""
+        if not isinstance(mspi_df, pd.DataFrame) or mspi_df.empty or STRIKE_COL not in mspi_df.columns: return None
+        digest_columns = [STRIKE_COL] + list(self._level_aggregation_logic(mspi_df.columns))
+        return self.key_level_tracker.index_for(self._level_symbol(mspi_df), mspi_df, lambda: self._aggregate_for_levels(mspi_df, group_col=STRIKE_COL), digest_columns)
+
+    def _key_level_mspi_threshold(self, level_index: StrikeLevelIndex) -> Optional[float]:
+        if "key_level_mspi_threshold" not in level_index.results:
+            threshold = self._calculate_dynamic_threshold_wrapper(["key_level_mspi"], pd.Series(np.abs(level_index.values('mspi'))), 'above')
+            level_index.results["key_level_mspi_threshold"] = threshold if isinstance(threshold, (int, float)) else None
+        return level_index.results["key_level_mspi_threshold"]
+
+    def _key_level_masks(self, level_index: StrikeLevelIndex) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """(support, resistance) boolean masks over the index's strikes, memoized per snapshot. None without a threshold."""
+        masks = level_index.results.get("key_levels")
+        if masks is None:
+            mspi = level_index.values('mspi'); threshold = self._key_level_mspi_threshold(level_index)
+            if threshold is None: return None
+            strong = np.abs(mspi) >= threshold
+            masks = level_index.results["key_levels"] = ((mspi > 0) & strong & local_extrema_mask(mspi, "max"), (mspi < 0) & strong & local_extrema_mask(mspi, "min"))
+            self.instance_logger.getChild("IdentifyKeyLevels").debug(f"Key levels over {len(level_index)} strikes (|MSPI| >= {threshold:.3f}): {int(masks[0].sum())} support, {int(masks[1].sum())} resistance.")
+        return masks
 
     def identify_key_levels(self, mspi_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-        # (Existing implementation)
-        return pd.DataFrame(), pd.DataFrame()
+        """Support (local MSPI peaks > 0) and resistance (local MSPI troughs < 0) strikes whose |MSPI| clears 'key_level_mspi'."""
+        kl_logger = self.instance_logger.getChild("IdentifyKeyLevels")
+        level_index = self._level_index(mspi_df)
+        if level_index is None:
+            kl_logger.warning("No strike-aggregated data available for key level identification."); return pd.DataFrame(), pd.DataFrame()
+        masks = self._key_level_masks(level_index)
+        if masks is None:
+            kl_logger.warning("Key level MSPI threshold unavailable. No key levels identified."); return pd.DataFrame(), pd.DataFrame()
+        return level_index.rows(masks[0]), level_index.rows(masks[1])
 
     def identify_high_conviction_levels(self, mspi_df: pd.DataFrame) -> pd.DataFrame:
-        # (Existing implementation)
-        return pd.DataFrame()
+        """Strikes with a non-zero MSPI whose SAI reaches 'sai_high_conviction'."""
+        hc_logger = self.instance_logger.getChild("IdentifyHighConviction")
+        level_index = self._level_index(mspi_df)
+        if level_index is None:
+            hc_logger.warning("No strike-aggregated data available for high conviction levels."); return pd.DataFrame()
+        mask = level_index.results.get("high_conviction")
+        if mask is None:
+            sai = level_index.values('sai')
+            threshold = self._calculate_dynamic_threshold_wrapper(["sai_high_conviction"], level_index.series('sai'), 'above')
+            if not isinstance(threshold, (int, float)):
+                hc_logger.warning("SAI high conviction threshold unavailable. No high conviction levels identified."); return pd.DataFrame()
+            mask = level_index.results["high_conviction"] = (sai >= threshold) & (level_index.values('mspi') != 0)
+            hc_logger.debug(f"High conviction levels (SAI >= {threshold:.3f}): {int(mask.sum())} of {len(level_index)} strikes.")
+        return level_index.rows(mask)
 
     def identify_potential_structure_changes(self, mspi_df: pd.DataFrame) -> pd.DataFrame:
-        # (Existing implementation)
-        return pd.DataFrame()
+        """
+        Strikes whose SSI is at or below 'ssi_structure_change', plus strikes whose MSPI flipped sign against the
+        previous snapshot while clearing the key level threshold. Adds the previous MSPI, the SSI change and the reason.
+        """
+        sc_logger = self.instance_logger.getChild("IdentifyStructureChanges")
+        level_index = self._level_index(mspi_df)
+        if level_index is None:
+            sc_logger.warning("No strike-aggregated data available for structure change detection."); return pd.DataFrame()
+        mask, _, reasons = self._structure_change_arrays(level_index, self._level_symbol(mspi_df))
+        _, prev_mspi, ssi_change = level_index.results["structure_change"]
+        changes_df = level_index.rows(mask)
+        changes_df[PREV_MSPI_COL] = prev_mspi[mask]; changes_df[SSI_CHANGE_COL] = ssi_change[mask]; changes_df[STRUCTURE_CHANGE_TYPE_COL] = reasons[mask]
+        return changes_df
+
+    def _structure_change_arrays(self, level_index: StrikeLevelIndex, symbol: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(change mask, MSPI-flip mask, reason per strike) over the index's strikes, memoized per snapshot."""
+        cached = level_index.results.get("structure_change")
+        if cached is None:
+            sc_logger = self.instance_logger.getChild("IdentifyStructureChanges")
+            mspi = level_index.values('mspi'); ssi = level_index.values('ssi', 0.5)
+            ssi_threshold = self._calculate_dynamic_threshold_wrapper(["ssi_structure_change"], level_index.series('ssi', 0.5), 'below')
+            low_ssi = (ssi <= ssi_threshold) if isinstance(ssi_threshold, (int, float)) else np.zeros(len(level_index), dtype=bool)
+            previous_index = self.key_level_tracker.previous_for(symbol, level_index)
+            prev_mspi = level_index.align_previous(previous_index, 'mspi'); prev_ssi = level_index.align_previous(previous_index, 'ssi', 0.5)
+            key_threshold = self._key_level_mspi_threshold(level_index)
+            flipped = np.isfinite(prev_mspi) & (np.sign(mspi) * np.sign(np.nan_to_num(prev_mspi)) < 0)
+            flipped &= (np.abs(mspi) >= key_threshold) if key_threshold is not None else False
+            reasons = np.where(low_ssi & flipped, "ssi_breakdown+mspi_flip", np.where(flipped, "mspi_flip", "ssi_breakdown")).astype(object)
+            cached = level_index.results["structure_change"] = ((low_ssi | flipped, flipped, reasons), prev_mspi, ssi - prev_ssi)
+            sc_logger.debug(f"Structure changes: {int(low_ssi.sum())} SSI breakdowns (SSI <= {ssi_threshold}), {int(flipped.sum())} MSPI flips vs previous snapshot ({'none' if previous_index is None else len(previous_index)} strikes).")
+        return cached[0]
+
+    def _target_levels(self, level_index: Optional[StrikeLevelIndex]) -> TargetLevels:
+        """Sorted support / resistance arrays of a snapshot for the target engine (NVP-filtered per 'targets'), memoized per snapshot."""
+        if level_index is None: return TargetLevels()
+        target_levels = level_index.results.get("target_levels")
+        if target_levels is None:
+            masks = self._key_level_masks(level_index)
+            if masks is None: target_levels = TargetLevels()
+            else:
+                nvp = level_index.values(NET_VALUE_PRESSURE_COL, np.nan) if NET_VALUE_PRESSURE_COL in level_index.frame.columns else None
+                target_levels = TargetLevels.from_arrays(
+                    level_index.strikes[masks[0]], level_index.strikes[masks[1]],
+                    nvp[masks[0]] if nvp is not None else None, nvp[masks[1]] if nvp is not None else None,
+                    self.target_engine.settings
+                )
+            level_index.results["target_levels"] = target_levels
+        return target_levels
+
+    def _shared_atr(self, symbol: Optional[str], price: Optional[float], atr_val: Optional[float] = None) -> float:
+        """A usable ATR: the given value, else the symbol's incremental (intraday) ATR, else the configured price-percentage fallback."""
+        if atr_val is not None and np.isfinite(atr_val) and atr_val > 0: return float(atr_val)
+        state = self.volatility_states.get(symbol, create=False) if symbol else None
+        state_atr = state.intraday_atr if state is not None else None
+        if state_atr is not None and np.isfinite(state_atr) and state_atr > 0: return float(state_atr)
+        fallback_cfg = self._get_config_value(["data_processor_settings", "approximations", "tdpi_atr_fallback"], {})
+        fallback_pct = float(fallback_cfg.get("percentage", DEFAULT_ATR_FALLBACK_PERCENTAGE)) if isinstance(fallback_cfg, dict) else DEFAULT_ATR_FALLBACK_PERCENTAGE
+        fallback_min = float(fallback_cfg.get("min_value", DEFAULT_ATR_FALLBACK_MIN_VALUE)) if isinstance(fallback_cfg, dict) else DEFAULT_ATR_FALLBACK_MIN_VALUE
+        return max(fallback_min, float(price or 0.0) * fallback_pct)
 
     def get_enhanced_targets(
         self,
@@ -910,8 +1399,268 @@ class IntegratedTradingSystem:
         support_levels_df: Optional[pd.DataFrame] = None,
         resistance_levels_df: Optional[pd.DataFrame] = None
     ) -> Dict[str, Optional[float]]:
-        # (Existing implementation)
-        return {'stop_loss': None, 'target_1': None, 'target_2': None}
+        """Stop and two targets for one long ('bullish'/'long') or short ('bearish'/'short') idea; other types get None values."""
+        rec_type = str(recommendation_type).lower()
+        direction = 1.0 if ("bull" in rec_type or "long" in rec_type) else (-1.0 if ("bear" in rec_type or "short" in rec_type) else 0.0)
+        if direction == 0.0 or entry_price is None or not np.isfinite(entry_price) or entry_price <= 0:
+            return {'stop_loss': None, 'target_1': None, 'target_2': None}
+        atr_value = self._shared_atr(self.current_symbol_being_managed, entry_price, atr_val)
+        levels = TargetLevels.from_frames(support_levels_df, resistance_levels_df, self.target_engine.settings)
+        result = self.target_engine.compute(np.array([direction]), np.array([float(entry_price)]), np.array([atr_value]), levels)
+        return {'stop_loss': float(result.stop[0]), 'target_1': float(result.target_1[0]), 'target_2': float(result.target_2[0])}
+
+    # --- G. Stateful Recommendation Engine ---
+
+    def _load_recommendation_book(self) -> RecommendationBook:
+        """Restores the recommendation book from its checkpoint (a fresh book if there is none or it is unreadable)."""
+        book_logger = self.instance_logger.getChild("RecommendationBook")
+        checkpoint_path = self.recommendation_checkpoint_path
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            try:
+                book = RecommendationBook.load(checkpoint_path)
+                book_logger.info(f"Restored {len(book)} recommendations ({int((book.columns['status'] == STATUS_ACTIVE).sum())} active) from '{checkpoint_path}'.")
+                return book
+            except Exception as e_load_book:
+                book_logger.error(f"Could not restore recommendation checkpoint '{checkpoint_path}': {e_load_book}. Starting with an empty book.", exc_info=True)
+        return RecommendationBook()
+
+    def _save_recommendation_checkpoint(self) -> None:
+        if not self.recommendation_checkpoint_path: return
+        try: self.recommendation_book.save(self.recommendation_checkpoint_path)
+        except Exception as e_save_book:
+            self.instance_logger.getChild("RecommendationBook").error(f"Failed to write recommendation checkpoint '{self.recommendation_checkpoint_path}': {e_save_book}", exc_info=True)
+
+    # --- Database-Backed Services ---
+
+    @staticmethod
+    def _database_connection_details(section_cfg: Dict[str, Any]) -> Dict[str, Any]:
+        """get_db_connection() details from a config section's 'connection', with the password read from 'password_env_var'."""
+        connection_details = dict(section_cfg.get("connection") or {})
+        password_env_var = section_cfg.get("password_env_var")
+        if password_env_var and "password" not in connection_details: connection_details["password"] = os.environ.get(password_env_var)
+        return connection_details
+
+    def _create_metric_distribution_service(self):
+        """MetricDistributionService over Daily_EOTS_Metrics_Aggregates if 'system_settings.metric_distributions' is enabled, else None."""
+        dist_cfg = self._get_config_value(["system_settings", "metric_distributions"], {})
+        if not isinstance(dist_cfg, dict) or not dist_cfg.get("enabled", False): return None
+        try:
+            from elite_options_system.utils.database import get_db_connection
+            from elite_options_system.utils.metric_distribution import MetricDistributionService
+        except ImportError as e_import_dist:
+            self.instance_logger.error(f"Metric distributions enabled but unavailable: {e_import_dist}")
+            return None
+        connection_details = self._database_connection_details(dist_cfg)
+        connection_holder: List[Any] = [None]
+        def connection_provider():
+            # One lazily (re)opened connection; only used when a distribution is stale
+            if connection_holder[0] is None or getattr(connection_holder[0], "closed", 1): connection_holder[0] = get_db_connection(connection_details)
+            return connection_holder[0]
+        return MetricDistributionService(connection_provider, lookback_days=dist_cfg.get("lookback_days", 365), refresh_interval_sec=dist_cfg.get("refresh_interval_sec", 3600.0))
+
+    # --- Trade Performance Logging ---
+
+    def start_trade_logging(self) -> bool:
+        """Creates and starts the write-behind trade logger if 'system_settings.trade_logging' is enabled. Returns True if running."""
+        if self.trade_logger is not None: return True
+        log_cfg = self._get_config_value(["system_settings", "trade_logging"], {})
+        if not isinstance(log_cfg, dict) or not log_cfg.get("enabled", False): return False
+        try:
+            from elite_options_system.utils.trade_log_writer import WriteBehindTradeLogger
+        except ImportError as e_import_writer:
+            self.instance_logger.error(f"Trade logging enabled but the writer is unavailable: {e_import_writer}")
+            return False
+        self.trade_logger = WriteBehindTradeLogger(
+            self._database_connection_details(log_cfg),
+            spill_file_path=self._resolve_config_relative_path(log_cfg.get("spill_file_path")),
+            dead_letter_file_path=self._resolve_config_relative_path(log_cfg.get("dead_letter_file_path")),
+            max_batch_size=log_cfg.get("max_batch_size", 200), flush_interval_sec=log_cfg.get("flush_interval_sec", 2.0),
+            max_queue_size=log_cfg.get("max_queue_size", 10000), reconnect_interval_sec=log_cfg.get("reconnect_interval_sec", 15.0)
+        )
+        self.trade_logger.start()
+        return True
+
+    def stop_trade_logging(self, timeout: float = 10.0) -> None:
+        """Drains and stops the trade logger (no-op when it is not running)."""
+        if self.trade_logger is None: return
+        self.trade_logger.stop(timeout=timeout)
+        self.trade_logger = None
+
+    def _log_trade_records(self, records: List[Dict[str, Any]], current_price: float) -> None:
+        """Queues newly issued recommendations and this pass's exits for the trade performance tables."""
+        if self.trade_logger is None: return
+        from elite_options_system.utils.trade_log_writer import recommendation_log_row, outcome_log_row
+        for record in records:
+            if record.get("Category") != DIRECTIONAL_CATEGORY: continue
+            if record.get("status") == "ACTIVE_NEW": self.trade_logger.enqueue_recommendation(recommendation_log_row(record))
+            elif record.get("status") == "EXITED": self.trade_logger.enqueue_outcome(outcome_log_row(record, float(current_price)))
+
+    @staticmethod
+    def _snapshot_timestamp(current_time: Optional[time] = None) -> np.datetime64:
+        snapshot_dt = datetime.combine(date.today(), current_time) if current_time is not None else datetime.now()
+        return np.datetime64(snapshot_dt.replace(microsecond=0), "us")
+
+    def _signal_frame(self, trading_signals: Optional[Dict[str, Dict[str, list]]], family: str, kind: str) -> pd.DataFrame:
+        """One signal list as a frame with numeric 'strike' and int 'conviction_stars' (empty if absent or malformed)."""
+        records = trading_signals.get(family, {}).get(kind, []) if isinstance(trading_signals, dict) and isinstance(trading_signals.get(family), dict) else []
+        signal_df = pd.DataFrame.from_records(records) if isinstance(records, list) and records else pd.DataFrame()
+        if signal_df.empty or STRIKE_COL not in signal_df.columns: return pd.DataFrame({STRIKE_COL: np.zeros(0), "conviction_stars": np.zeros(0, dtype=int)})
+        signal_df[STRIKE_COL] = pd.to_numeric(signal_df[STRIKE_COL], errors='coerce')
+        signal_df["conviction_stars"] = pd.to_numeric(signal_df.get("conviction_stars", 0), errors='coerce').fillna(0).astype(int)
+        return signal_df.dropna(subset=[STRIKE_COL]).reset_index(drop=True)
+
+    def _signal_stars_at(self, trading_signals: Optional[Dict[str, Dict[str, list]]], family: str, kind: str, strikes: np.ndarray) -> np.ndarray:
+        signal_df = self._signal_frame(trading_signals, family, kind)
+        return max_stars_at(strikes, signal_df[STRIKE_COL].to_numpy(dtype=float), signal_df["conviction_stars"].to_numpy(dtype=int))
+
+    def _directional_candidates(self, level_index: Optional[StrikeLevelIndex], trading_signals: Optional[Dict[str, Dict[str, list]]]) -> Dict[str, np.ndarray]:
+        """
+        Directional entry candidates from the bullish / bearish signals: base score from the signal (or the conviction map
+        at its star rating), adjusted by the SSI, volatility-expansion and SDAG-conviction modifiers, then re-rated.
+        """
+        rec_cfg = self._get_config_value(["strategy_settings", "recommendations"], {})
+        bullish_df = self._signal_frame(trading_signals, "directional", "bullish"); bearish_df = self._signal_frame(trading_signals, "directional", "bearish")
+        strikes = np.concatenate((bullish_df[STRIKE_COL].to_numpy(dtype=float), bearish_df[STRIKE_COL].to_numpy(dtype=float)))
+        direction = np.concatenate((np.ones(len(bullish_df), dtype=np.int8), -np.ones(len(bearish_df), dtype=np.int8)))
+        if len(strikes) == 0: return {}
+        signal_stars = np.concatenate((bullish_df["conviction_stars"].to_numpy(dtype=int), bearish_df["conviction_stars"].to_numpy(dtype=int)))
+        signal_scores = np.concatenate([pd.to_numeric(sig_df.get("raw_conviction_score", np.nan), errors='coerce') * np.ones(len(sig_df)) for sig_df in (bullish_df, bearish_df)])
+        star_floor = np.concatenate(([0.0], self._get_star_thresholds()))[np.clip(signal_stars, 0, 5)]
+        score = np.where(np.isfinite(signal_scores), signal_scores, star_floor)
+
+        ssi = level_index.lookup('ssi', strikes, 0.5) if level_index is not None else np.full(len(strikes), 0.5)
+        ssi_split = self._calculate_dynamic_threshold_wrapper(["ssi_conviction_split"], None, 'below')
+        if isinstance(ssi_split, (int, float)):
+            score += np.where(ssi < ssi_split, float(rec_cfg.get("conv_mod_ssi_low", -1.0)), 0.0) + np.where(ssi > 1.0 - ssi_split, float(rec_cfg.get("conv_mod_ssi_high", 0.25)), 0.0)
+        score += np.where(self._signal_stars_at(trading_signals, "volatility", "expansion", strikes) > 0, float(rec_cfg.get("conv_mod_vol_expansion", -0.5)), 0.0)
+        sdag_df = self._signal_frame(trading_signals, "complex", "sdag_conviction")
+        if not sdag_df.empty:
+            sdag_is_bearish = sdag_df.get("type", pd.Series("", index=sdag_df.index)).astype(str).str.contains("bear", case=False, regex=False).to_numpy()
+            sdag_strikes = sdag_df[STRIKE_COL].to_numpy(dtype=float)
+            sdag_direction = (max_stars_at(strikes, sdag_strikes[~sdag_is_bearish], np.ones((~sdag_is_bearish).sum(), dtype=int)) > 0).astype(int) - (max_stars_at(strikes, sdag_strikes[sdag_is_bearish], np.ones(sdag_is_bearish.sum(), dtype=int)) > 0).astype(int)
+            score += np.where(sdag_direction * direction > 0, float(rec_cfg.get("conv_mod_sdag_align", 0.75)), np.where(sdag_direction * direction < 0, float(rec_cfg.get("conv_mod_sdag_oppose", -1.0)), 0.0))
+
+        stars = self.map_scores_to_stars(score)
+        keep = stars >= int(rec_cfg.get("min_directional_stars_to_issue", 2))
+        mspi = level_index.lookup('mspi', strikes) if level_index is not None else np.full(len(strikes), np.nan)
+        sai = level_index.lookup('sai', strikes) if level_index is not None else np.full(len(strikes), np.nan)
+        rationale = np.where(direction > 0, "Bullish directional signal", "Bearish directional signal").astype(object) + " (" + pd.Series(signal_stars).astype(str).to_numpy(dtype=object) + "★ signal, score " + pd.Series(score).map("{:.2f}".format).to_numpy(dtype=object) + ")"
+        return {"strike": strikes[keep], "direction": direction[keep], "conviction_score": score[keep], "conviction_stars": stars[keep],
+                "mspi": mspi[keep], "sai": sai[keep], "ssi": ssi[keep], "rationale": rationale[keep], "signal_type": np.full(int(keep.sum()), "directional", dtype=object)}
+
+    def _recommendation_notes(self, symbol: str, trading_signals: Optional[Dict[str, Dict[str, list]]], now: np.datetime64) -> List[Dict[str, Any]]:
+        """Snapshot-only (non-directional) notes for volatility, pin risk and caution signals above their star minimums."""
+        rec_cfg = self._get_config_value(["strategy_settings", "recommendations"], {})
+        note_specs = (
+            ("volatility", "expansion", "Volatility Plays", "Expansion", "min_volatility_stars_to_issue"),
+            ("volatility", "contraction", "Volatility Plays", "Contraction", "min_volatility_stars_to_issue"),
+            ("time_decay", "pin_risk", "Range Bound Ideas", "Pin Risk", "min_pinrisk_stars_to_issue"),
+            ("time_decay", "charm_cascade", "Cautionary Notes", "Caution: Charm Cascade", "min_caution_stars_to_issue"),
+            ("complex", "structure_change", "Cautionary Notes", "Caution: Structure Change", "min_caution_stars_to_issue"),
+            ("complex", "flow_divergence", "Cautionary Notes", "Caution: Flow Divergence", "min_caution_stars_to_issue"),
+        )
+        note_frames = []
+        for family, kind, category, label, min_stars_key in note_specs:
+            signal_df = self._signal_frame(trading_signals, family, kind)
+            signal_df = signal_df[signal_df["conviction_stars"] >= int(rec_cfg.get(min_stars_key, 2))]
+            if signal_df.empty: continue
+            note_frames.append(pd.DataFrame({"strike": signal_df[STRIKE_COL].to_numpy(), "conviction_stars": signal_df["conviction_stars"].to_numpy(),
+                                             "Category": category, "direction_label": label, "type": f"{family}_{kind}",
+                                             **{col: signal_df[col].to_numpy() for col in ('mspi', 'sai', 'ssi', 'raw_conviction_score') if col in signal_df.columns}}))
+        if not note_frames: return []
+        notes_df = pd.concat(note_frames, ignore_index=True)
+        now_iso = pd.Timestamp(now).strftime("%Y-%m-%dT%H:%M:%S")
+        notes_df["id"] = "NOTE_" + str(symbol).upper() + "_" + notes_df["type"] + "_" + notes_df["strike"].map("{:.2f}".format)
+        notes_df["symbol"] = str(symbol).upper(); notes_df["status"] = "NOTE"; notes_df["timestamp"] = now_iso; notes_df["issued_ts"] = now_iso
+        notes_df["strategy"] = notes_df["direction_label"] + " near " + notes_df["strike"].map("{:.2f}".format)
+        notes_df["rationale"] = notes_df["direction_label"] + " signal (" + notes_df["conviction_stars"].astype(str) + "★)"
+        notes_df = notes_df.astype(object).where(notes_df.notna(), None)
+        return notes_df.to_dict("records")
+
+    def _manage_recommendations(
+        self,
+        book: RecommendationBook,
+        symbol: str,
+        level_index: Optional[StrikeLevelIndex],
+        trading_signals: Optional[Dict[str, Dict[str, list]]],
+        current_price: float,
+        atr: float,
+        now: np.datetime64,
+        target_levels: Optional[TargetLevels] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        One vectorized pass over a book for a symbol: exits, then target trailing of the survivors, then new entries.
+        Returns the symbol's active recommendations, those exited in this pass and the snapshot notes.
+        """
+        manage_logger = self.instance_logger.getChild("ManageRecommendations")
+        rec_cfg = self._get_config_value(["strategy_settings", "recommendations"], {})
+        exits_cfg = self._get_config_value(["strategy_settings", "exits"], {})
+        targets_cfg = self._get_config_value(["strategy_settings", "targets"], {})
+        price_ok = current_price is not None and np.isfinite(current_price) and current_price > 0
+        atr_value = self._shared_atr(symbol, current_price, atr)
+
+        with book.lock:
+            book.compact(now, float(rec_cfg.get("min_reissue_time_seconds", 300)))
+            symbol_code = book.symbol_code(symbol)
+            cols = book.columns
+            active_rows = book.rows_for(symbol_code, STATUS_ACTIVE)
+            exited_rows = np.empty(0, dtype=np.int64); holding_rows = active_rows
+            current_snapshot = snapshot_id(level_index.digest if level_index is not None else None)
+
+            if len(active_rows) and price_ok:
+                strikes = cols["strike"][active_rows]; direction = cols["direction"][active_rows].astype(float)
+                strike_mspi = level_index.lookup('mspi', strikes) if level_index is not None else np.full(len(strikes), np.nan)
+                reasons = exit_reasons(
+                    direction, cols["stop"][active_rows], cols["target_2"][active_rows], current_price, strike_mspi,
+                    np.where(direction > 0, self._signal_stars_at(trading_signals, "directional", "bearish", strikes), self._signal_stars_at(trading_signals, "directional", "bullish", strikes)),
+                    self._signal_stars_at(trading_signals, "complex", "structure_change", strikes),
+                    self._signal_stars_at(trading_signals, "complex", "flow_divergence", strikes), exits_cfg
+                )
+                issuing_snapshot = (current_snapshot != 0) & (cols["issued_snapshot"][active_rows] == current_snapshot)
+                exiting = (reasons != "") & ~issuing_snapshot # Never exit on the snapshot that issued the recommendation
+                exited_rows = active_rows[exiting]; holding_rows = active_rows[~exiting]
+                cols["status"][exited_rows] = STATUS_EXITED; cols["exit_reason"][exited_rows] = reasons[exiting]; cols["updated_at"][exited_rows] = now
+
+                if len(holding_rows):
+                    new_stop, new_t1, new_t2, adjusted = trail_targets(
+                        cols["direction"][holding_rows].astype(float), cols["entry"][holding_rows], cols["stop"][holding_rows],
+                        cols["target_1"][holding_rows], cols["target_2"][holding_rows], current_price, cols["atr"][holding_rows], targets_cfg
+                    )
+                    cols["stop"][holding_rows] = new_stop; cols["target_1"][holding_rows] = new_t1; cols["target_2"][holding_rows] = new_t2
+                    adjusted_rows = holding_rows[adjusted]
+                    cols["adjusted_at"][adjusted_rows] = now; cols["updated_at"][adjusted_rows] = now
+                    cols["target_rationale"][adjusted_rows] = "T1 reached: stop to break-even, targets rolled forward"
+                    if level_index is not None:
+                        held_strikes = cols["strike"][holding_rows]
+                        for metric in ('mspi', 'sai', 'ssi'): cols[metric][holding_rows] = level_index.lookup(metric, held_strikes, np.nan)
+                    if len(exited_rows) or adjusted.any(): book.version += 1
+                manage_logger.debug(f"{symbol}: {len(active_rows)} active -> {len(exited_rows)} exited, {len(holding_rows)} held.")
+
+            new_rows = np.empty(0, dtype=np.int64)
+            candidates = self._directional_candidates(level_index, trading_signals) if price_ok else {}
+            if candidates and len(candidates["strike"]):
+                keys = recommendation_keys(np.full(len(candidates["strike"]), symbol_code), candidates["direction"], candidates["strike"])
+                order = np.lexsort((-candidates["conviction_score"], keys)) # Best-scored candidate per key first
+                _, first_of_key = np.unique(keys[order], return_index=True)
+                chosen = order[first_of_key]
+                chosen = chosen[book.find(keys[chosen]) < 0] # Active, or exited within the reissue window
+                if len(chosen):
+                    n_new = len(chosen); entry = np.full(n_new, float(current_price)); atr_arr = np.full(n_new, atr_value)
+                    direction = candidates["direction"][chosen]
+                    brackets = self.target_engine.compute(direction, entry, atr_arr, target_levels if target_levels is not None else self._target_levels(level_index))
+                    new_rows = book.append({
+                        "symbol_code": np.full(n_new, symbol_code), "strike": candidates["strike"][chosen], "direction": direction,
+                        "status": np.full(n_new, STATUS_ACTIVE), "entry": brackets.entry, "stop": brackets.stop, "target_1": brackets.target_1, "target_2": brackets.target_2, "atr": atr_arr,
+                        "conviction_score": candidates["conviction_score"][chosen], "conviction_stars": candidates["conviction_stars"][chosen],
+                        "mspi": candidates["mspi"][chosen], "sai": candidates["sai"][chosen], "ssi": candidates["ssi"][chosen],
+                        "issued_at": np.full(n_new, now), "updated_at": np.full(n_new, now), "issued_snapshot": np.full(n_new, current_snapshot),
+                        "signal_type": candidates["signal_type"][chosen], "rationale": candidates["rationale"][chosen],
+                        "target_rationale": brackets.rationale()
+                    })
+                    manage_logger.info(f"{symbol}: issued {n_new} new directional recommendations.")
+
+            records = book.to_records(np.concatenate((holding_rows, exited_rows, new_rows)), now)
+        return records + self._recommendation_notes(symbol, trading_signals, now)
 
     def get_strategy_recommendations(
         self,
@@ -926,16 +1675,42 @@ class IntegratedTradingSystem:
         current_time: Optional[time] = None,
         iv_context: Optional[Dict] = None
     ) -> List[Dict[str, Any]]:
-        # (Existing implementation)
-        return []
+        """Updates the stateful book for this snapshot (exits, trailing, entries) and checkpoints it. Returns the symbol's recommendations."""
+        self.current_symbol_being_managed = str(symbol).upper()
+        book_version_before = self.recommendation_book.version
+        try:
+            level_index = self._level_index(mspi_df)
+            target_levels = None if level_index is not None else TargetLevels.from_frames(*(tuple(key_levels) if isinstance(key_levels, (tuple, list)) and len(key_levels) == 2 else (None, None)), self.target_engine.settings)
+            records = self._manage_recommendations(self.recommendation_book, symbol, level_index, trading_signals, current_price, atr, self._snapshot_timestamp(current_time), target_levels)
+        except Exception as e_manage:
+            self.instance_logger.error(f"Recommendation management failed for {symbol}: {e_manage}", exc_info=True)
+            return []
+        if self.recommendation_book.version != book_version_before: self._save_recommendation_checkpoint()
+        self._log_trade_records(records, current_price)
+        return records
+
+    def _single_recommendation_arrays(self, recommendation: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        direction = np.array([-1.0 if "bear" in str(recommendation.get("direction_label", "")).lower() else 1.0])
+        def _num(key: str) -> np.ndarray: return pd.to_numeric(pd.Series([recommendation.get(key)]), errors='coerce').to_numpy(dtype=float)
+        return direction, _num("strike"), _num("entry_ideal"), _num("stop_loss"), _num("target_1"), _num("target_2")
 
     def _is_immediate_exit_warranted(self, recommendation: Dict[str, Any], current_aggregated_mspi_df: pd.DataFrame, current_price: float) -> Optional[str]:
-        # (Existing implementation)
-        return None
+        """Exit reason for one recommendation record (same rules as the book's vectorized pass, without signal-based exits)."""
+        direction, strike, _, stop, _, target_2 = self._single_recommendation_arrays(recommendation)
+        level_index = self._level_index(current_aggregated_mspi_df)
+        strike_mspi = level_index.lookup('mspi', strike) if level_index is not None else np.full(1, np.nan)
+        no_stars = np.zeros(1, dtype=int)
+        reason = exit_reasons(direction, stop, target_2, float(current_price), strike_mspi, no_stars, no_stars, no_stars, self._get_config_value(["strategy_settings", "exits"], {}))[0]
+        return reason or None
 
     def _adjust_active_recommendation_parameters(self, recommendation: Dict[str, Any], support_df: pd.DataFrame, resistance_df: pd.DataFrame, current_price: float, current_atr: float) -> bool:
-        # (Existing implementation)
-        return False
+        """Trails one recommendation record in place (stop to break-even and targets rolled once T1 is reached). Returns True if adjusted."""
+        direction, _, entry, stop, target_1, target_2 = self._single_recommendation_arrays(recommendation)
+        atr_value = float(current_atr) if current_atr is not None and np.isfinite(current_atr) and current_atr > 0 else max(DEFAULT_ATR_FALLBACK_MIN_VALUE, float(current_price) * DEFAULT_ATR_FALLBACK_PERCENTAGE)
+        new_stop, new_t1, new_t2, adjusted = trail_targets(direction, entry, stop, target_1, target_2, float(current_price), np.full(1, atr_value), self._get_config_value(["strategy_settings", "targets"], {}))
+        if not adjusted[0]: return False
+        recommendation.update({"stop_loss": float(new_stop[0]), "target_1": float(new_t1[0]), "target_2": float(new_t2[0]), "last_adjusted_ts": datetime.now().isoformat(timespec="seconds"), "target_rationale": "T1 reached: stop to break-even, targets rolled forward"})
+        return True
 
     def update_active_recommendations_and_manage_state(
         self,
@@ -946,8 +1721,14 @@ class IntegratedTradingSystem:
         current_time: Optional[time] = None,
         iv_context: Optional[Dict] = None
     ) -> List[Dict[str, Any]]:
-        # (Existing implementation)
-        return []
+        """Levels and signals for a processed (MSPI) frame, then one stateful book update. Returns the symbol's recommendations."""
+        support_df, resistance_df = self.identify_key_levels(latest_processed_df)
+        return self.get_strategy_recommendations(
+            symbol=symbol, mspi_df=latest_processed_df, trading_signals=self.generate_trading_signals(latest_processed_df),
+            key_levels=(support_df, resistance_df), conviction_levels=self.identify_high_conviction_levels(latest_processed_df),
+            structure_changes=self.identify_potential_structure_changes(latest_processed_df),
+            current_price=current_underlying_price, atr=current_atr, current_time=current_time, iv_context=iv_context
+        )
 
     def get_strategy_recommendations_stateless_snapshot(
         self,
@@ -960,8 +1741,15 @@ class IntegratedTradingSystem:
         iv_context: Optional[Dict] = None,
         historical_ohlc_df_for_atr: Optional[pd.DataFrame] = None
     ) -> List[Dict[str, Any]]:
-        # (Existing implementation)
-        return []
+        """What would be issued for this chain right now: the same pass against an empty, throwaway book (the live book is untouched)."""
+        snapshot_logger = self.instance_logger.getChild("StatelessSnapshot")
+        try:
+            mspi_df = self.calculate_mspi(options_df, current_time=current_time, current_iv=current_iv, avg_iv_5day=avg_iv_5day, iv_context=iv_context, underlying_price=current_price, historical_ohlc_df_for_atr=historical_ohlc_df_for_atr)
+            atr_value = self._get_atr(symbol, current_price, history_df=historical_ohlc_df_for_atr)
+            return self._manage_recommendations(RecommendationBook(), symbol, self._level_index(mspi_df), self.generate_trading_signals(mspi_df), current_price, atr_value, self._snapshot_timestamp(current_time))
+        except Exception as e_snapshot:
+            snapshot_logger.error(f"Stateless recommendation snapshot failed for {symbol}: {e_snapshot}", exc_info=True)
+            return []
 
 if __name__ == '__main__':
     if not logging.getLogger().hasHandlers() or not any(isinstance(h, logging.StreamHandler) for h in logging.getLogger().handlers):
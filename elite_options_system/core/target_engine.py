@@ -0,0 +1,154 @@
+# target_engine.py
+"""
+Vectorized entry / stop / target calculator for directional recommendations.
+
+All candidates of a snapshot are priced in one pass from the 'targets' section of strategy_settings:
+- stop: 'target_atr_stop_loss_multiplier' ATRs against the position;
+- target 1: the nearest key level in the trade direction at least 'min_target_atr_distance' ATRs away
+  (resistance for longs, support for shorts), else 'target_atr_target1_multiplier_no_sr' ATRs;
+- target 2: the next such level at least the minimum distance beyond a level-based target 1, else
+  'target_atr_target2_multiplier_from_t1' ATRs beyond it; without any level it is
+  'target_atr_target2_multiplier_no_sr' ATRs from the entry.
+
+Levels are held as sorted strike arrays, so the nearest-level snap is one np.searchsorted per tier and
+the cost per candidate is constant. When the level frames carry net value pressure, only supports at or
+above the 'nvp_support_quantile' and resistances at or below the 'nvp_resistance_quantile' of that
+pressure are used (all levels if the filter would leave none).
+"""
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+STRIKE_COL: str = "strike"
+NET_VALUE_PRESSURE_COL: str = "net_value_pressure"
+DEFAULT_TARGETS_SETTINGS: Dict[str, float] = {
+    "min_target_atr_distance": 0.75,
+    "nvp_support_quantile": 0.90,
+    "nvp_resistance_quantile": 0.10,
+    "target_atr_stop_loss_multiplier": 1.5,
+    "target_atr_target1_multiplier_no_sr": 2.0,
+    "target_atr_target2_multiplier_no_sr": 3.5,
+    "target_atr_target2_multiplier_from_t1": 2.0
+}
+
+
+class TargetLevels:
+    """Sorted support and resistance strike arrays for one snapshot."""
+    __slots__ = ("support", "resistance")
+
+    def __init__(self, support: Optional[np.ndarray] = None, resistance: Optional[np.ndarray] = None):
+        self.support = self._sorted(support); self.resistance = self._sorted(resistance)
+
+    @staticmethod
+    def _sorted(strikes: Optional[np.ndarray]) -> np.ndarray:
+        if strikes is None: return np.zeros(0)
+        strikes = np.asarray(strikes, dtype=float); strikes = strikes[np.isfinite(strikes)]
+        return strikes if len(strikes) < 2 or (np.diff(strikes) >= 0).all() else np.sort(strikes)
+
+    @staticmethod
+    def _filter_by_pressure(strikes: np.ndarray, pressure: Optional[np.ndarray], quantile: float, keep_above: bool) -> np.ndarray:
+        if pressure is None or len(strikes) == 0: return strikes
+        pressure = np.asarray(pressure, dtype=float); finite = np.isfinite(pressure)
+        if not finite.any(): return strikes
+        cutoff = np.quantile(pressure[finite], min(1.0, max(0.0, quantile)))
+        keep = finite & ((pressure >= cutoff) if keep_above else (pressure <= cutoff))
+        return strikes[keep] if keep.any() else strikes
+
+    @classmethod
+    def from_arrays(cls, support: np.ndarray, resistance: np.ndarray, support_pressure: Optional[np.ndarray] = None,
+                    resistance_pressure: Optional[np.ndarray] = None, targets_settings: Optional[Dict[str, Any]] = None) -> "TargetLevels":
+        settings = targets_settings if isinstance(targets_settings, dict) else DEFAULT_TARGETS_SETTINGS
+        return cls(
+            cls._filter_by_pressure(np.asarray(support, dtype=float), support_pressure, float(settings.get("nvp_support_quantile", 0.90)), keep_above=True),
+            cls._filter_by_pressure(np.asarray(resistance, dtype=float), resistance_pressure, float(settings.get("nvp_resistance_quantile", 0.10)), keep_above=False)
+        )
+
+    @classmethod
+    def from_frames(cls, support_df: Optional[pd.DataFrame], resistance_df: Optional[pd.DataFrame], targets_settings: Optional[Dict[str, Any]] = None) -> "TargetLevels":
+        def _column(df: Optional[pd.DataFrame], col: str) -> Optional[np.ndarray]:
+            if not isinstance(df, pd.DataFrame) or col not in df.columns: return None
+            return pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=float)
+        support = _column(support_df, STRIKE_COL); resistance = _column(resistance_df, STRIKE_COL)
+        return cls.from_arrays(support if support is not None else np.zeros(0), resistance if resistance is not None else np.zeros(0),
+                               _column(support_df, NET_VALUE_PRESSURE_COL), _column(resistance_df, NET_VALUE_PRESSURE_COL), targets_settings)
+
+
+class TargetResult:
+    """Per-candidate entry, stop and targets plus which targets came from key levels."""
+    __slots__ = ("entry", "stop", "target_1", "target_2", "t1_from_level", "t2_from_level")
+
+    def __init__(self, entry: np.ndarray, stop: np.ndarray, target_1: np.ndarray, target_2: np.ndarray, t1_from_level: np.ndarray, t2_from_level: np.ndarray):
+        self.entry = entry; self.stop = stop; self.target_1 = target_1; self.target_2 = target_2
+        self.t1_from_level = t1_from_level; self.t2_from_level = t2_from_level
+
+    def rationale(self) -> np.ndarray:
+        """Short text per candidate describing how its targets were set."""
+        return np.select(
+            [self.t1_from_level & self.t2_from_level, self.t1_from_level],
+            np.asarray(["T1/T2 at key levels, ATR stop", "T1 at key level, T2 ATR extension, ATR stop"], dtype=object),
+            default="ATR multiples (no S/R)"
+        )
+
+
+class TargetEngine:
+    """Computes brackets for many candidates at once from the configured ATR multiples and sorted key levels."""
+
+    def __init__(self, targets_settings: Optional[Dict[str, Any]] = None):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self._lock = threading.Lock()
+        self.configure(targets_settings)
+
+    def configure(self, targets_settings: Optional[Dict[str, Any]] = None) -> None:
+        settings = dict(DEFAULT_TARGETS_SETTINGS)
+        if isinstance(targets_settings, dict): settings.update({k: v for k, v in targets_settings.items() if v is not None})
+        with self._lock:
+            self.settings = settings
+            self.min_distance_atr = float(settings["min_target_atr_distance"])
+            self.stop_atr = float(settings["target_atr_stop_loss_multiplier"])
+            self.t1_atr_no_sr = float(settings["target_atr_target1_multiplier_no_sr"])
+            self.t2_atr_no_sr = float(settings["target_atr_target2_multiplier_no_sr"])
+            self.t2_atr_from_t1 = float(settings["target_atr_target2_multiplier_from_t1"])
+
+    @staticmethod
+    def _next_level(levels: np.ndarray, beyond: np.ndarray, upward: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest level at or beyond 'beyond' in each candidate's direction (upward: first level >= beyond; downward:
+        last level <= beyond). Returns (level or NaN, found mask).
+        """
+        if len(levels) == 0: return np.full(len(beyond), np.nan), np.zeros(len(beyond), dtype=bool)
+        up_pos = np.searchsorted(levels, beyond, side="left"); down_pos = np.searchsorted(levels, beyond, side="right") - 1
+        position = np.where(upward, up_pos, down_pos)
+        found = (position >= 0) & (position < len(levels))
+        return np.where(found, levels[np.clip(position, 0, len(levels) - 1)], np.nan), found
+
+    def compute(self, direction: np.ndarray, entry: np.ndarray, atr: np.ndarray, levels: Optional[TargetLevels] = None) -> TargetResult:
+        """Brackets for candidates with direction +1 (long) / -1 (short); entry and atr broadcast per candidate."""
+        direction = np.asarray(direction, dtype=float)
+        entry = np.broadcast_to(np.asarray(entry, dtype=float), direction.shape).astype(float)
+        atr = np.broadcast_to(np.asarray(atr, dtype=float), direction.shape).astype(float)
+        levels = levels if levels is not None else TargetLevels()
+        upward = direction > 0
+        min_distance = self.min_distance_atr * atr
+
+        stop = entry - direction * self.stop_atr * atr
+        # Longs target resistance above the entry, shorts support below; both snapped with one searchsorted per tier
+        level_t1_long, found_t1_long = self._next_level(levels.resistance, entry + min_distance, upward)
+        level_t1_short, found_t1_short = self._next_level(levels.support, entry - min_distance, upward)
+        level_t1 = np.where(upward, level_t1_long, level_t1_short); t1_from_level = np.where(upward, found_t1_long, found_t1_short)
+        target_1 = np.where(t1_from_level, level_t1, entry + direction * self.t1_atr_no_sr * atr)
+
+        level_t2_long, found_t2_long = self._next_level(levels.resistance, target_1 + min_distance, upward)
+        level_t2_short, found_t2_short = self._next_level(levels.support, target_1 - min_distance, upward)
+        t2_from_level = t1_from_level & np.where(upward, found_t2_long, found_t2_short)
+        target_2 = np.select(
+            [t2_from_level, t1_from_level],
+            [np.where(upward, level_t2_long, level_t2_short), target_1 + direction * self.t2_atr_from_t1 * atr],
+            default=entry + direction * self.t2_atr_no_sr * atr
+        )
+        return TargetResult(entry, stop, target_1, target_2, t1_from_level, t2_from_level)
@@ -18,12 +18,17 @@ from plotly.subplots import make_subplots # Keep for type hints
 from dateutil import parser as date_parser # Keep for type hints
 import plotly.colors # Keep for _parse_color_string
 
+from elite_options_system.utils.component_history import ComponentHistoryIndex, ComponentSnapshot
+from elite_options_system.utils.figure_exporter import AsyncFigureExporter
+from elite_options_system.utils.compiled_config import CompiledConfig, ConfigDependencyRegistry, FrozenSettings
+
 # --- Default Visualizer Configuration (Full Version from your script) ---
 DEFAULT_VISUALIZER_CONFIG: Dict[str, Any] = {
     "log_level": "INFO",
     "output_dir": "mspi_visualizations_v2_default",
     "save_charts_as_html": False,
     "save_charts_as_png": False,
+    "export_settings": {"max_workers": 2, "max_pending": 64, "retention_max_files": 500, "retention_max_age_hours": 72},
     "default_chart_height": 600,
     "plotly_template": "plotly_dark",
     "plot_order_history": ["T-5", "T-4", "T-3", "T-2", "T-1", "T-B", "T-A", "Now"],
@@ -128,6 +133,7 @@ DEFAULT_VISUALIZER_CONFIG: Dict[str, Any] = {
             "sdag_weighted_norm": { "pos": "#98FB98", "neg": "#FF6347" }, "sdag_volatility_focused_norm": { "pos": "#AFEEEE", "neg": "#DA70D6" }
         },
         "show_net_sdag_trace": True, "net_sdag_trace_default_visibility": "legendonly",
+        "lod_settings": { "enabled": True, "min_px_per_strike": 4, "assumed_plot_width_px": 1200, "context_budget_fraction": 0.25 },
         "net_sdag_marker_style": { "symbol": "diamond", "color": "rgba(255, 255, 255, 0.7)", "size": 8, "line": { "color": "white", "width": 1 } },
         "component_comparison_height": 600, "volval_comparison_height": 600, "key_levels_height": 600, "trading_signals_height": 600, "recommendations_table_height": 650,
         "recommendations_table_column_display_map": {
@@ -160,6 +166,27 @@ if not logging.getLogger().hasHandlers():
     )
 logger = logging.getLogger(__name__)
 
+# Per-strike net metric heatmaps rendered by MSPIVisualizerV2._create_net_metric_heatmap (keyed by chart/hover type)
+NET_METRIC_HEATMAP_SPECS: Dict[str, Dict[str, str]] = {
+    "net_value_heatmap": {"chart_name": "Net Value Pressure Heatmap", "metric_attr": "col_net_val_p", "x_label": "Net Value Pressure (H)", "colorbar_title": "Net Val P (Heuristic)", "default_colorscale": "RdYlGn"},
+    "net_volume_pressure_heatmap": {"chart_name": "Net Volume Pressure Heatmap", "metric_attr": "col_net_vol_p", "x_label": "Net Volume Pressure (H)", "colorbar_title": "Net Vol P (Heuristic)", "default_colorscale": "coolwarm"},
+}
+
+# Strike axis of each level-of-detail (LOD) enabled chart method; relayoutData ranges on this axis refine the LOD viewport
+LOD_STRIKE_AXIS_BY_METHOD: Dict[str, str] = {
+    "create_time_decay_visualization": "y", "create_volatility_regime_visualization": "y",
+    "plot_sdag_multiplicative": "y", "plot_sdag_directional": "y", "plot_sdag_weighted": "y", "plot_sdag_volatility_focused": "y",
+}
+
+# Strategy table lookups: star strings and font colours indexed by star count (0-5); keyword colour rules match in order (first wins)
+STAR_RATING_STRINGS: Tuple[str, ...] = tuple("★" * n + "☆" * (5 - n) for n in range(6))
+STAR_RATING_COLORS: Tuple[str, ...] = ('darkgrey', 'darkgrey', 'lightgreen', 'lightskyblue', '#FFD700', 'gold')
+DIRECTION_LABEL_COLORS: Tuple[Tuple[str, str], ...] = (
+    ('bullish', 'lime'), ('bearish', 'red'), ('expansion', 'cyan'), ('contraction', '#DA70D6'),
+    ('caution', 'orange'), ('pin risk', 'yellow'), ('neutral', 'lightgrey'),
+)
+TABLE_DEFAULT_FONT_COLOR: str = '#EAEAEA'
+
 class MSPIVisualizerV2:
     def __init__(self, config_path: Optional[str] = None, config_data: Optional[Dict[str, Any]] = None):
         self.instance_logger = logger.getChild(self.__class__.__name__)
@@ -170,7 +197,10 @@ class MSPIVisualizerV2:
             self.full_app_config = json.loads(json.dumps(config_data))
             self.instance_logger.debug("Visualizer initialized with provided 'config_data' (full app config).")
 
+        self.config_path: Optional[str] = config_path
         self.config = self._load_visualizer_specific_config(config_path, self.full_app_config)
+        self._compile_config()
+        self.config_dependencies = ConfigDependencyRegistry()
 
         self._setup_logging()
 
@@ -197,6 +227,26 @@ class MSPIVisualizerV2:
             self.instance_logger.info("No output directory specified or configured for visualizer. Charts will not be saved to disk.")
             self.output_dir = None
 
+        # Chart files are written by a background export queue so rendering never waits on disk/kaleido
+        self._figure_exporter: Optional[AsyncFigureExporter] = None
+        if self.output_dir and (self.config.get("save_charts_as_html", False) or self.config.get("save_charts_as_png", False)):
+            export_cfg = self.config.get("export_settings", {})
+            self._figure_exporter = AsyncFigureExporter(
+                self.output_dir, max_workers=export_cfg.get("max_workers", 2), max_pending=export_cfg.get("max_pending", 64),
+                retention_max_files=export_cfg.get("retention_max_files", 500), retention_max_age_hours=export_cfg.get("retention_max_age_hours", 72)
+            )
+
+        self._configure_column_names()
+        # Shared per-refresh aggregate for the net metric heatmaps: one (processed_data, {key: aggregate}) tuple,
+        # replaced as a whole (never mutated) so concurrent callbacks cannot pair one refresh's source with another's entries
+        self._net_metric_agg_cache: Tuple[Optional[pd.DataFrame], Dict[Tuple, pd.DataFrame]] = (None, {})
+        self.config_dependencies.register("visualization_settings", self._setup_logging)
+        self.config_dependencies.register("visualization_settings", self._configure_column_names)
+        self.config_dependencies.register("visualization_settings", self._clear_net_metric_agg_cache)
+
+        self.instance_logger.info("MSPIVisualizerV2 Initialized successfully.")
+
+    def _configure_column_names(self) -> None:
         column_names_config = self.config.get("column_names", {}) # From viz-specific config
         if not isinstance(column_names_config, dict):
             column_names_config = DEFAULT_VISUALIZER_CONFIG.get("column_names", {})
@@ -217,7 +267,9 @@ class MSPIVisualizerV2:
             f"HeuristicNetDeltaP='{self.col_heuristic_net_delta_pressure}', NetGammaF='{self.col_net_gamma_flow}', "
             f"NetVegaF='{self.col_net_vega_flow}', NetThetaExp='{self.col_net_theta_exposure}'"
         )
-        self.instance_logger.info("MSPIVisualizerV2 Initialized successfully.")
+
+    def _clear_net_metric_agg_cache(self) -> None:
+        self._net_metric_agg_cache = (None, {})
 
     def _deep_merge_dicts(self, base: Dict, updates: Dict) -> Dict:
         merged = base.copy()
@@ -275,46 +327,41 @@ class MSPIVisualizerV2:
         return final_visualizer_config
 
     def _get_config_value(self, path: List[str], default_override: Any = None) -> Any:
-        config_get_logger = self.instance_logger.getChild("GetConfigValue")
-
-        current_level_full = self.full_app_config
-        try:
-            for key_item in path:
-                if isinstance(current_level_full, dict):
-                    current_level_full = current_level_full[key_item]
-                else:
-                    raise KeyError(f"Path broken at '{key_item}' during traversal in full_app_config")
-            config_get_logger.debug(f"Found path '{'.'.join(path)}' in self.full_app_config.")
-            return current_level_full
-        except (KeyError, TypeError):
-            config_get_logger.debug(f"Path '{'.'.join(path)}' not found or TypeError in self.full_app_config. Trying self.config (visualizer-specific).")
-            current_level_viz = self.config
-            try:
-                relative_path_for_viz_config = path
-                if path and path[0] == "visualization_settings":
-                    if len(path) > 1 and path[1] == "mspi_visualizer":
-                        relative_path_for_viz_config = path[2:]
-                    else:
-                        config_get_logger.debug(f"Path '{'.'.join(path)}' is too general for self.config. Returning default.")
-                        return default_override
-
-                if not relative_path_for_viz_config:
-                    if path == ["visualization_settings", "mspi_visualizer"]:
-                        return current_level_viz
-                    else:
-                         config_get_logger.debug(f"Path '{'.'.join(path)}' became empty or too general for self.config. Returning default.")
-                         return default_override
-
-                for key_item_viz in relative_path_for_viz_config:
-                    if isinstance(current_level_viz, dict):
-                        current_level_viz = current_level_viz[key_item_viz]
-                    else:
-                         raise KeyError(f"Path broken at '{key_item_viz}' during traversal in self.config")
-                config_get_logger.debug(f"Found relative path '{'.'.join(relative_path_for_viz_config if 'relative_path_for_viz_config' in locals() else path)}' in self.config.")
-                return current_level_viz
-            except (KeyError, TypeError):
-                config_get_logger.debug(f"Path '{'.'.join(path)}' (relative: '{'.'.join(relative_path_for_viz_config if 'relative_path_for_viz_config' in locals() else path)}') also not found or TypeError in self.config. Returning default: {default_override}")
-                return default_override
+        # O(1): full app config (with the merged visualizer section) was flattened by _compile_config
+        return self.compiled_config.get(path, default_override)
+
+    def _compile_config(self) -> None:
+        """Compiles full_app_config, with 'visualization_settings.mspi_visualizer' replaced by the merged visualizer config."""
+        compiled_root = dict(self.full_app_config)
+        viz_settings = compiled_root.get("visualization_settings")
+        viz_settings = dict(viz_settings) if isinstance(viz_settings, dict) else {}
+        viz_settings["mspi_visualizer"] = self.config
+        compiled_root["visualization_settings"] = viz_settings
+        self.compiled_config: CompiledConfig = CompiledConfig(compiled_root)
+        self.settings: FrozenSettings = self.compiled_config.settings
+
+    @property
+    def config_hash(self) -> str:
+        return self.compiled_config.config_hash
+
+    def reload_config(self, config_data: Optional[Dict[str, Any]] = None, config_path: Optional[str] = None) -> List[str]:
+        """
+        Hot-reloads from 'config_data' (full app config) or the config file. Only the caches registered in
+        'config_dependencies' for changed top-level sections are invalidated. Returns the changed section names.
+        """
+        reload_logger = self.instance_logger.getChild("ReloadConfig")
+        if config_path: self.config_path = config_path
+        previous_compiled = self.compiled_config
+        if isinstance(config_data, dict): self.full_app_config = json.loads(json.dumps(config_data))
+        elif self.config_path: self.full_app_config = {} # Re-read the file
+        self.config = self._load_visualizer_specific_config(self.config_path, self.full_app_config)
+        self._compile_config()
+        changed_sections = previous_compiled.changed_sections(self.compiled_config)
+        if not changed_sections:
+            reload_logger.info(f"Visualizer config unchanged (hash {self.config_hash})."); return []
+        invalidated_count = self.config_dependencies.invalidate(changed_sections)
+        reload_logger.info(f"Visualizer config reloaded (hash {previous_compiled.config_hash} -> {self.config_hash}). Changed sections: {sorted(changed_sections)}; {invalidated_count} dependent caches refreshed.")
+        return sorted(changed_sections)
 
     def _setup_logging(self):
         log_level_str_from_viz_config = self.config.get("log_level", "INFO").upper()
@@ -361,12 +408,75 @@ class MSPIVisualizerV2:
             return f"{prefix}{{num:,.{final_precision}f}}{{suffix}}".format(num=val_f / divisor, suffix=suffix)
         except (ValueError, TypeError, OverflowError): return str(value)
 
+    def _format_hover_values(self, values: Union[pd.Series, np.ndarray, List[Any]], precision: int = 0, is_currency: bool = False) -> np.ndarray:
+        """Column-wise equivalent of _format_hover_value: same tiers (B/M/k), precisions and 'N/A' handling."""
+        raw = values if isinstance(values, pd.Series) else pd.Series(values, dtype=object if not isinstance(values, np.ndarray) else None)
+        raw = raw.reset_index(drop=True)
+        num = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        out = np.full(len(num), "N/A", dtype=object)
+        finite = np.isfinite(num)
+        if raw.dtype == object:
+            # Non-numeric, non-empty values fall back to their string form, as in _format_hover_value.
+            fallback_mask = np.isnan(num) & raw.notna().to_numpy() & (raw.astype(str) != '').to_numpy()
+            if fallback_mask.any(): out[fallback_mask] = raw[fallback_mask].astype(str).to_numpy()
+        abs_num = np.abs(np.where(finite, num, 0.0))
+        prefix = "$" if is_currency else ""
+        small_precision = 2 if (precision == 0 and is_currency) else precision
+        tiers = [
+            (finite & (abs_num >= 1_000_000_000), 1_000_000_000.0, 2, "B"),
+            (finite & (abs_num >= 1_000_000) & (abs_num < 1_000_000_000), 1_000_000.0, 2, "M"),
+            (finite & (abs_num >= 1_000) & (abs_num < 1_000_000), 1_000.0, 1, "k"),
+            (finite & (abs_num < 10) & (precision == 0) & (not is_currency), 1.0, 2, ""),
+            (finite & (abs_num < 1_000) & ~((abs_num < 10) & (precision == 0) & (not is_currency)), 1.0, small_precision, ""),
+        ]
+        for tier_mask, divisor, tier_precision, suffix in tiers:
+            if tier_mask.any():
+                fmt_str = f"{prefix}{{:,.{tier_precision}f}}{suffix}"
+                out[tier_mask] = [fmt_str.format(v) for v in num[tier_mask] / divisor]
+        return out
+
+    def _format_fixed_values(self, values: Union[pd.Series, np.ndarray, List[Any]], precision: int = 2, na_text: str = "N/A") -> np.ndarray:
+        """Fixed-precision strings for a whole column (f"{x:.2f}" semantics); non-numeric/NaN cells become na_text."""
+        num = pd.to_numeric(pd.Series(values).reset_index(drop=True), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        out = np.full(len(num), na_text, dtype=object)
+        valid = ~np.isnan(num)
+        if valid.any(): out[valid] = np.char.mod(f"%.{int(precision)}f", num[valid]).astype(object)
+        return out
+
+    def _format_iso_times(self, values: Union[pd.Series, np.ndarray, List[Any]], na_text: str = "N/A") -> np.ndarray:
+        """'%H:%M:%S' of ISO timestamp strings (wall-clock time as written, like datetime.fromisoformat). Invalid/empty -> na_text."""
+        raw = pd.Series(values, dtype=object).reset_index(drop=True)
+        is_str = raw.map(lambda v: isinstance(v, str) and v != '').to_numpy(dtype=bool)
+        out = np.full(len(raw), na_text, dtype=object)
+        if not is_str.any(): return out
+        parts = raw[is_str].str.extract(r'^\d{4}-\d{2}-\d{2}[T ](\d{2}):(\d{2})(?::(\d{2}))?')
+        fast = parts[0].notna().to_numpy()
+        str_positions = np.flatnonzero(is_str)
+        if fast.any():
+            out[str_positions[fast]] = (parts[0][fast] + ":" + parts[1][fast] + ":" + parts[2][fast].fillna("00")).to_numpy(dtype=object)
+        for pos in str_positions[~fast]: # Uncommon layouts (e.g. date only): per-value parse
+            try: out[pos] = datetime.fromisoformat(raw.iat[pos]).strftime('%H:%M:%S')
+            except ValueError: pass
+        return out
+
     def _create_hover_text(self, row: Union[pd.Series, Dict[str, Any]], chart_type: str = "default", extra_context: Optional[Dict[str, Any]] = None) -> str:
-        hover_logger = self.instance_logger.getChild("CreateHoverText")
+        """Hover text of a single row: one-row wrapper over _create_hover_texts."""
         if not isinstance(row, (pd.Series, dict)):
-            hover_logger.warning(f"Cannot create hover text for non-Series/dict input: {type(row)}. Returning empty hover.")
+            self.instance_logger.getChild("CreateHoverText").warning(f"Cannot create hover text for non-Series/dict input: {type(row)}. Returning empty hover.")
             return "<extra></extra>"
+        row_dict = row.to_dict() if isinstance(row, pd.Series) else row
+        return str(self._create_hover_texts(pd.DataFrame({key: pd.Series([value], dtype=object) for key, value in row_dict.items()}), chart_type=chart_type, extra_context=extra_context)[0])
 
+    def _create_hover_texts(self, frame: pd.DataFrame, chart_type: str = "default", extra_context: Optional[Dict[str, Any]] = None, option_types: Optional[Union[pd.Series, np.ndarray, List[str]]] = None) -> np.ndarray:
+        """
+        One hover string per row of 'frame', assembled column by column (_create_hover_text wraps it for a
+        single row). A key is shown when its column exists and the cell is not None
+        (object columns may carry None to mark "absent" per row). 'option_types' gives a per-row
+        'Type:' line, otherwise extra_context['Option Type'] applies to all rows.
+        """
+        n_rows = len(frame)
+        if n_rows == 0: return np.empty(0, dtype=object)
+        frame = frame.reset_index(drop=True)
         hover_main_config = self.config.get("hover_settings", {})
         overview_metrics_config_list = hover_main_config.get("overview_metrics_config", [])
         oi_structure_config_list = hover_main_config.get("oi_structure_metrics_config", [])
@@ -374,122 +484,110 @@ class MSPIVisualizerV2:
         chart_specific_hover_config = hover_main_config.get("chart_specific_hover", {})
         current_chart_hover_rules = chart_specific_hover_config.get(chart_type, chart_specific_hover_config.get("default", {}))
         sections_to_display = current_chart_hover_rules.get("sections", ["base_info"])
-
-        def safe_get_from_row(key: str, default_val: Any = None) -> Any:
-            if isinstance(row, pd.Series): return row.get(key, default_val)
-            elif isinstance(row, dict): return row.get(key, default_val)
-            return default_val
-
-        strike_value_raw = safe_get_from_row(self.col_strike)
-        strike_display_text = self._format_hover_value(strike_value_raw, 2)
-
-        hover_text_parts: List[str] = [f"<b>Strike: {strike_display_text}</b>"]
-        if pd.notna(strike_value_raw) and strike_display_text != str(strike_value_raw):
-            hover_text_parts[0] += f" <i style='font-size:0.8em; color:grey'>(Raw: {strike_value_raw})</i>"
-
-        option_type_from_context = extra_context.get('Option Type') if extra_context else None
-        if option_type_from_context:
-            hover_text_parts.append(f"Type: {str(option_type_from_context).capitalize()}")
+        all_rows = np.ones(n_rows, dtype=bool)
+
+        def present(key: Optional[str]) -> np.ndarray:
+            if not key or key not in frame.columns: return np.zeros(n_rows, dtype=bool)
+            col = frame[key]
+            return np.fromiter((v is not None for v in col), dtype=bool, count=n_rows) if col.dtype == object else all_rows.copy()
+
+        def notna(key: Optional[str]) -> np.ndarray:
+            return present(key) & frame[key].notna().to_numpy() if key and key in frame.columns else np.zeros(n_rows, dtype=bool)
+
+        def fmt(key: Optional[str], precision: int = 0, is_currency: bool = False) -> np.ndarray:
+            if not key or key not in frame.columns: return np.full(n_rows, "N/A", dtype=object)
+            return self._format_hover_values(frame[key], precision, is_currency)
+
+        if self.col_strike in frame.columns:
+            strike_raw = frame[self.col_strike]
+            strike_display = fmt(self.col_strike, 2)
+            strike_raw_str = strike_raw.astype(str).to_numpy(dtype=object)
+            header = "<b>Strike: " + strike_display + "</b>"
+            raw_note_mask = strike_raw.notna().to_numpy() & (strike_display != strike_raw_str)
+            header = np.where(raw_note_mask, header + " <i style='font-size:0.8em; color:grey'>(Raw: " + strike_raw_str + ")</i>", header)
+        else:
+            header = np.full(n_rows, "<b>Strike: N/A</b>", dtype=object)
+        result = header.astype(object)
+
+        def append(lines: np.ndarray, mask: np.ndarray) -> None:
+            nonlocal result
+            if mask.any(): result = np.where(mask, result + "<br>" + lines, result)
+
+        if option_types is not None:
+            type_arr = pd.Series(option_types).reset_index(drop=True).astype(str).str.capitalize().to_numpy(dtype=object)
+            append("Type: " + type_arr, all_rows)
+        elif extra_context and extra_context.get('Option Type'):
+            append(np.full(n_rows, f"Type: {str(extra_context.get('Option Type')).capitalize()}", dtype=object), all_rows)
+
+        def append_titled_section(title: str, line_specs: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+            any_mask = np.zeros(n_rows, dtype=bool)
+            for _, m in line_specs: any_mask |= m
+            if not any_mask.any(): return
+            append(np.full(n_rows, title, dtype=object), any_mask)
+            for lines, m in line_specs: append(lines, m)
 
         for section_key_name in sections_to_display:
-            current_section_text_parts: List[str] = []
             if section_key_name == "base_info": continue
             elif section_key_name == "mspi_value":
-                mspi_value_data = safe_get_from_row(self.col_mspi)
-                if mspi_value_data is not None: current_section_text_parts.append(f"<b>{self.col_mspi.upper()}: {self._format_hover_value(mspi_value_data, 3)}</b>")
+                append("<b>" + self.col_mspi.upper() + ": " + fmt(self.col_mspi, 3) + "</b>", present(self.col_mspi))
             elif section_key_name == "core_indices":
-                core_indices_keys_to_show = current_chart_hover_rules.get("core_indices_keys", ['sai', 'ssi', 'cfi'])
-                for core_key in core_indices_keys_to_show:
+                for core_key in current_chart_hover_rules.get("core_indices_keys", ['sai', 'ssi', 'cfi']):
                     label_text = core_key.upper() if core_key != 'cfi' else 'ARFI'
-                    value_data = safe_get_from_row(core_key)
-                    if value_data is not None: current_section_text_parts.append(f"{label_text}: {self._format_hover_value(value_data, 3)}")
+                    append(f"{label_text}: " + fmt(core_key, 3), present(core_key))
             elif section_key_name == "net_pressures":
-                if safe_get_from_row(self.col_net_vol_p) is not None: current_section_text_parts.append(f"Net Vol P (H): {self._format_hover_value(safe_get_from_row(self.col_net_vol_p), 0)}")
-                if safe_get_from_row(self.col_net_val_p) is not None: current_section_text_parts.append(f"<b>Net Val P (H): {self._format_hover_value(safe_get_from_row(self.col_net_val_p), 0, True)}</b>")
+                append("Net Vol P (H): " + fmt(self.col_net_vol_p, 0), present(self.col_net_vol_p))
+                append("<b>Net Val P (H): " + fmt(self.col_net_val_p, 0, True) + "</b>", present(self.col_net_val_p))
             elif section_key_name == "overview_metrics" and hover_main_config.get("show_overview_metrics_default", True):
-                temp_overview_list = []
+                specs = []
                 for metric_item_config in overview_metrics_config_list:
-                    key_name = metric_item_config.get("key"); label_text = metric_item_config.get("label", key_name.upper() if key_name else "N/A"); precision_val = metric_item_config.get("precision", 0); is_curr_val = metric_item_config.get("is_currency", False)
-                    value_data = safe_get_from_row(key_name) if key_name else None
-                    if value_data is not None and pd.notna(value_data):
-                        display_label = f"<b>{label_text}</b>" if key_name == self.col_mspi else label_text
-                        temp_overview_list.append(f"{display_label}: {self._format_hover_value(value_data, precision_val, is_curr_val)}")
-                if temp_overview_list: current_section_text_parts = ["--- Overview Metrics ---"] + temp_overview_list
+                    key_name = metric_item_config.get("key")
+                    if not key_name: continue
+                    label_text = metric_item_config.get("label", key_name.upper())
+                    display_label = f"<b>{label_text}</b>" if key_name == self.col_mspi else label_text
+                    specs.append((f"{display_label}: " + fmt(key_name, metric_item_config.get("precision", 0), metric_item_config.get("is_currency", False)), notna(key_name)))
+                append_titled_section("--- Overview Metrics ---", specs)
             elif section_key_name == "oi_structure" and hover_main_config.get("show_oi_structure_default", True):
-                temp_oi_list = []
+                specs = []
                 for oi_metric_item_config in oi_structure_config_list:
-                     base_key_name = oi_metric_item_config.get("base_key"); label_text = oi_metric_item_config.get("label", base_key_name.upper() if base_key_name else "N/A")
-                     if not base_key_name: continue
-                     call_val_data = safe_get_from_row(f"call_{base_key_name}"); put_val_data = safe_get_from_row(f"put_{base_key_name}")
-                     if (call_val_data is not None and pd.notna(call_val_data)) or \
-                        (put_val_data is not None and pd.notna(put_val_data)):
-                         temp_oi_list.append(f"{label_text}: {self._format_hover_value(call_val_data,0)} | {self._format_hover_value(put_val_data,0)}")
-                if temp_oi_list: current_section_text_parts = ["--- OI Structure (Call | Put) ---"] + temp_oi_list
+                    base_key_name = oi_metric_item_config.get("base_key")
+                    if not base_key_name: continue
+                    label_text = oi_metric_item_config.get("label", base_key_name.upper())
+                    call_key, put_key = f"call_{base_key_name}", f"put_{base_key_name}"
+                    specs.append((f"{label_text}: " + fmt(call_key, 0) + " | " + fmt(put_key, 0), notna(call_key) | notna(put_key)))
+                append_titled_section("--- OI Structure (Call | Put) ---", specs)
             elif section_key_name == "sdag_specific_value" and extra_context:
-                sdag_method_display_name = extra_context.get("SDAG Method", "SDAG Value")
-                sdag_column_name_actual = extra_context.get("sdag_col_name")
-                sdag_value_data = safe_get_from_row(sdag_column_name_actual) if sdag_column_name_actual else None
-                if sdag_value_data is not None: current_section_text_parts.append(f"<b>{sdag_method_display_name}: {self._format_hover_value(sdag_value_data, 0)}</b>")
+                sdag_col = extra_context.get("sdag_col_name")
+                append(f"<b>{extra_context.get('SDAG Method', 'SDAG Value')}: " + fmt(sdag_col, 0) + "</b>", present(sdag_col))
             elif section_key_name == "selected_greek_flow" and extra_context:
-                metric_label = extra_context.get("metric_label", "Selected Flow")
                 metric_col_name = extra_context.get("metric_col_name")
-                metric_value = safe_get_from_row(metric_col_name) if metric_col_name else None
-                is_currency_flag = extra_context.get("is_currency", False)
-                precision_val = extra_context.get("precision", 0)
-                if metric_value is not None:
-                    current_section_text_parts.append(f"<b>{metric_label}: {self._format_hover_value(metric_value, precision_val, is_currency_flag)}</b>")
+                append(f"<b>{extra_context.get('metric_label', 'Selected Flow')}: " + fmt(metric_col_name, extra_context.get("precision", 0), extra_context.get("is_currency", False)) + "</b>", present(metric_col_name))
             elif section_key_name == "tdpi_specific_values":
-                if safe_get_from_row('tdpi') is not None: current_section_text_parts.append(f"<b>TDPI: {self._format_hover_value(safe_get_from_row('tdpi'), 0)}</b>")
-                if safe_get_from_row('ctr') is not None: current_section_text_parts.append(f"CTR: {self._format_hover_value(safe_get_from_row('ctr'), 3)}")
-                if safe_get_from_row('tdfi') is not None: current_section_text_parts.append(f"TDFI: {self._format_hover_value(safe_get_from_row('tdfi'), 3)}")
+                append("<b>TDPI: " + fmt('tdpi', 0) + "</b>", present('tdpi')); append("CTR: " + fmt('ctr', 3), present('ctr')); append("TDFI: " + fmt('tdfi', 3), present('tdfi'))
             elif section_key_name == "vri_specific_values":
-                if safe_get_from_row('vri') is not None: current_section_text_parts.append(f"<b>VRI: {self._format_hover_value(safe_get_from_row('vri'), 0)}</b>")
-                if safe_get_from_row('vvr') is not None: current_section_text_parts.append(f"VVR: {self._format_hover_value(safe_get_from_row('vvr'), 3)}")
-                if safe_get_from_row('vfi') is not None: current_section_text_parts.append(f"VFI: {self._format_hover_value(safe_get_from_row('vfi'), 3)}")
+                append("<b>VRI: " + fmt('vri', 0) + "</b>", present('vri')); append("VVR: " + fmt('vvr', 3), present('vvr')); append("VFI: " + fmt('vfi', 3), present('vfi'))
             elif section_key_name == "core_metrics_context":
-                temp_core_list = []
-                for core_key, display_label in [(self.col_mspi, 'MSPI'), ('sai', 'SAI'), ('ssi', 'SSI'), ('cfi', 'ARFI')]:
-                     value_data = safe_get_from_row(core_key)
-                     if value_data is not None: temp_core_list.append(f"{display_label}: {self._format_hover_value(value_data, 3)}")
-                if temp_core_list: current_section_text_parts = ["--- Context ---"] + temp_core_list
-
+                append_titled_section("--- Context ---", [(f"{display_label}: " + fmt(core_key, 3), present(core_key)) for core_key, display_label in [(self.col_mspi, 'MSPI'), ('sai', 'SAI'), ('ssi', 'SSI'), ('cfi', 'ARFI')]])
             elif section_key_name == "elite_score_details":
-                temp_elite_details_list = []
-                # Get the keys from the chart-specific config
-                elite_keys_to_show = current_chart_hover_rules.get("elite_score_details_keys", [])
-                for key_name in elite_keys_to_show:
-                    # Find the metric's config from the global overview_metrics_config for label, precision etc.
+                specs = []
+                for key_name in current_chart_hover_rules.get("elite_score_details_keys", []):
                     metric_config = next((m_cfg for m_cfg in overview_metrics_config_list if m_cfg.get("key") == key_name), None)
-
                     default_label = key_name.replace('_',' ').title()
                     label_text = metric_config.get("label", default_label) if metric_config else default_label
-                    precision_val = metric_config.get("precision", 2) if metric_config else 2
-                    is_curr_val = metric_config.get("is_currency", False) if metric_config else False
-
-                    value_data = safe_get_from_row(key_name) # safe_get_from_row is already defined in the method
-                    if value_data is not None and pd.notna(value_data):
-                        # Make the main score bold
-                        display_label = f"<b>{label_text}</b>" if key_name == "elite_impact_score" else label_text
-                        temp_elite_details_list.append(f"{display_label}: {self._format_hover_value(value_data, precision_val, is_curr_val)}")
-                if temp_elite_details_list:
-                    # Add a section title if there are details
-                    current_section_text_parts = ["--- Elite Impact ---"] + temp_elite_details_list
-
+                    display_label = f"<b>{label_text}</b>" if key_name == "elite_impact_score" else label_text
+                    specs.append((f"{display_label}: " + fmt(key_name, metric_config.get("precision", 2) if metric_config else 2, metric_config.get("is_currency", False) if metric_config else False), notna(key_name)))
+                append_titled_section("--- Elite Impact ---", specs)
             elif section_key_name == "details_section" and hover_main_config.get("show_details_section_default", True):
-                temp_details_list = []
+                specs = []
                 for detail_key in details_keys_config_list:
-                      value_data = safe_get_from_row(detail_key)
-                      if value_data is not None and pd.notna(value_data) and str(value_data).strip() != '':
-                           label_text = detail_key.replace('_', ' ').title()
-                           temp_details_list.append(f"{label_text}: {str(value_data).title() if detail_key=='conviction' else str(value_data)}")
-                if temp_details_list: current_section_text_parts = ["--- Details ---"] + temp_details_list
-
-            if current_section_text_parts:
-                hover_text_parts.extend(current_section_text_parts)
+                    mask = notna(detail_key)
+                    if not mask.any(): continue
+                    text_vals = frame[detail_key].astype(str)
+                    mask &= (text_vals.str.strip() != '').to_numpy()
+                    if detail_key == 'conviction': text_vals = text_vals.str.title()
+                    specs.append((f"{detail_key.replace('_', ' ').title()}: " + text_vals.to_numpy(dtype=object), mask))
+                append_titled_section("--- Details ---", specs)
 
-        final_hover_text = "<br>".join(hover_text_parts) + "<extra></extra>"
-        hover_logger.debug(f"Generated Hover (Chart Type: {chart_type}) for Strike {strike_value_raw}: {final_hover_text[:350]}...")
-        return final_hover_text
+        return result + "<extra></extra>"
 
     def _add_timestamp_annotation(self, fig: go.Figure, fetch_timestamp: Optional[Union[str, datetime]]) -> go.Figure:
         if fetch_timestamp:
@@ -579,25 +677,107 @@ class MSPIVisualizerV2:
         template_str += "<extra></extra>"
         return template_str
 
+    # --- Level-of-Detail (LOD) Helpers ---
+
+    def _lod_max_points(self, axis_px: Optional[float] = None) -> Optional[int]:
+        """Strike budget for one axis: pixel length / min px per strike. None when LOD is disabled."""
+        lod_cfg = self.config.get("chart_specific_params", {}).get("lod_settings", {})
+        if not lod_cfg.get("enabled", True): return None
+        px = axis_px if isinstance(axis_px, (int, float)) and axis_px > 0 else lod_cfg.get("assumed_plot_width_px", 1200)
+        return max(8, int(px // max(1, lod_cfg.get("min_px_per_strike", 4))))
+
+    def _select_lod_indices(self, strikes: np.ndarray, value_arrays: List[np.ndarray], max_points: Optional[int], viewport: Optional[Tuple[float, float]] = None, keep_strikes: Optional[List[float]] = None) -> np.ndarray:
+        """
+        Picks the rows (indices into 'strikes', original order) to plot. Strikes are bucketed by position,
+        and each bucket keeps the min and max of every value array, so peaks survive downsampling. Strikes inside
+        'viewport' get the full budget; those outside keep a coarse context budget. The strikes nearest to each of
+        'keep_strikes' (price, key levels) are always kept. Chains with at most max_points strikes are returned whole.
+        """
+        strikes = np.asarray(strikes, dtype=float); n = len(strikes)
+        if max_points is None or n <= max_points: return np.arange(n) # Already within budget: nothing to drop, viewport or not
+        per_bucket = max(1, 2 * len(value_arrays))
+        values_matrix = [np.nan_to_num(np.asarray(v, dtype=float)) for v in value_arrays]
+
+        def bucket_extrema(idx: np.ndarray, budget: int) -> np.ndarray:
+            if len(idx) <= budget: return idx
+            order = idx[np.argsort(strikes[idx], kind="stable")]
+            n_buckets = max(1, budget // per_bucket)
+            bucket_ids = (np.arange(len(order)) * n_buckets) // len(order)
+            picks = []
+            for vals in values_matrix:
+                srt = np.lexsort((vals[order], bucket_ids)); sorted_buckets = bucket_ids[srt]
+                boundaries = np.flatnonzero(np.diff(sorted_buckets))
+                picks.append(order[srt[np.r_[0, boundaries + 1]]]); picks.append(order[srt[np.r_[boundaries, len(srt) - 1]]])
+            return np.concatenate(picks) if picks else order[:: max(1, len(order) // budget)]
+
+        if viewport is not None:
+            lo, hi = min(viewport), max(viewport); in_view = (strikes >= lo) & (strikes <= hi)
+            context_fraction = self.config.get("chart_specific_params", {}).get("lod_settings", {}).get("context_budget_fraction", 0.25)
+            selected = [bucket_extrema(np.flatnonzero(in_view), max_points), bucket_extrema(np.flatnonzero(~in_view), max(per_bucket, int(max_points * context_fraction)))]
+        else:
+            selected = [bucket_extrema(np.arange(n), max_points)]
+        valid_keep = np.asarray([k for k in (keep_strikes or []) if isinstance(k, (int, float)) and pd.notna(k)], dtype=float)
+        if valid_keep.size and n:
+            sort_idx = np.argsort(strikes, kind="stable"); sorted_strikes = strikes[sort_idx]
+            pos = np.clip(np.searchsorted(sorted_strikes, valid_keep), 1, max(1, n - 1)) if n > 1 else np.zeros(len(valid_keep), dtype=int)
+            if n > 1: pos = np.where(np.abs(sorted_strikes[pos - 1] - valid_keep) <= np.abs(sorted_strikes[pos] - valid_keep), pos - 1, pos)
+            selected.append(sort_idx[pos])
+        return np.unique(np.concatenate(selected).astype(int))
+
+    def lod_viewport_from_relayout(self, method_name: str, relayout_data: Optional[Dict[str, Any]], previous_figure: Optional[Dict[str, Any]] = None) -> Optional[Tuple[float, float]]:
+        """
+        Converts a zoom (relayoutData) on a LOD chart into a strike viewport. Axis ranges on index-based strike axes
+        (raw greek charts) are mapped to strikes through the previous figure's tick labels. Returns None on autorange/reset.
+        """
+        axis = LOD_STRIKE_AXIS_BY_METHOD.get(method_name)
+        if not axis or not isinstance(relayout_data, dict) or relayout_data.get(f"{axis}axis.autorange"): return None
+        axis_range = relayout_data.get(f"{axis}axis.range")
+        if not (isinstance(axis_range, (list, tuple)) and len(axis_range) == 2): axis_range = [relayout_data.get(f"{axis}axis.range[0]"), relayout_data.get(f"{axis}axis.range[1]")]
+        try: lo, hi = float(axis_range[0]), float(axis_range[1])
+        except (TypeError, ValueError): return None
+        if axis == "x": return (min(lo, hi), max(lo, hi))
+        tick_text = ((previous_figure or {}).get("layout", {}).get("yaxis", {}) or {}).get("ticktext")
+        if not isinstance(tick_text, list) or not tick_text: return None
+        try: tick_strikes = [float(t) for t in tick_text]
+        except (TypeError, ValueError): return None
+        lo_idx, hi_idx = (int(np.clip(round(v), 0, len(tick_strikes) - 1)) for v in (min(lo, hi), max(lo, hi)))
+        window = tick_strikes[lo_idx:hi_idx + 1]
+        return (min(window), max(window)) if window else None
+
+    def compute_figure_update(self, previous_figure: Optional[Dict[str, Any]], new_figure: Union[go.Figure, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Diffs two serialized figures for incremental (dash.Patch) updates. 'previous_figure' must be the
+        figure the client currently holds (e.g. the graph's 'figure' State), since the patch is applied to it.
+        Returns {"data": {trace_idx: {attr: value}}, "layout": {key: value}} holding only changed
+        top-level trace attributes / layout keys (value None = removed), or None when the trace
+        structure (count, type, name) differs and the full figure must be sent.
+        """
+        diff_logger = self.instance_logger.getChild("FigureDiff")
+        if not isinstance(previous_figure, dict): return None
+        new_fig_dict = json.loads(new_figure.to_json()) if isinstance(new_figure, go.Figure) else new_figure
+        if not isinstance(new_fig_dict, dict): return None
+        prev_traces = previous_figure.get("data") or []; new_traces = new_fig_dict.get("data") or []
+        if len(prev_traces) != len(new_traces): return None
+        for prev_trace, new_trace in zip(prev_traces, new_traces):
+            if prev_trace.get("type") != new_trace.get("type") or prev_trace.get("name") != new_trace.get("name"): return None
+
+        def changed_keys(prev_obj: Dict[str, Any], new_obj: Dict[str, Any]) -> Dict[str, Any]:
+            return {k: new_obj.get(k) for k in set(prev_obj) | set(new_obj) if prev_obj.get(k) != new_obj.get(k)}
+
+        data_changes = {idx: changes for idx, (prev_trace, new_trace) in enumerate(zip(prev_traces, new_traces)) if (changes := changed_keys(prev_trace, new_trace))}
+        layout_changes = changed_keys(previous_figure.get("layout") or {}, new_fig_dict.get("layout") or {})
+        diff_logger.debug(f"Figure diff: {len(data_changes)}/{len(new_traces)} traces changed, layout keys changed: {sorted(layout_changes)}")
+        return {"data": data_changes, "layout": layout_changes}
+
     def _save_figure(self, fig: go.Figure, chart_name: str, symbol: str):
-        if not self.output_dir:
-            self.instance_logger.debug(f"Chart '{chart_name}' for '{symbol}' not saved as output_dir is not configured.")
+        if not self.output_dir or self._figure_exporter is None:
+            self.instance_logger.debug(f"Chart '{chart_name}' for '{symbol}' not saved (output_dir not configured or saving disabled).")
             return
         safe_symbol_name = "".join(c if c.isalnum() else "_" for c in str(symbol).strip())
         safe_chart_filename_part = "".join(c if c.isalnum() else "_" for c in str(chart_name).lower().replace(' ', '_'))
         timestamp_filename_str = datetime.now().strftime('%Y%m%d_%H%M%S')
         base_output_filename = f"{safe_symbol_name}_{safe_chart_filename_part}_{timestamp_filename_str}"
-        if self.config.get("save_charts_as_html", False):
-            html_file_path = os.path.join(self.output_dir, f"{base_output_filename}.html")
-            try: fig.write_html(html_file_path, full_html=False, include_plotlyjs='cdn'); self.instance_logger.info(f"Chart saved as HTML: {html_file_path}")
-            except Exception as e_html_save: self.instance_logger.error(f"Failed to save chart as HTML to '{html_file_path}': {e_html_save}", exc_info=True)
-        if self.config.get("save_charts_as_png", False):
-            png_file_path = os.path.join(self.output_dir, f"{base_output_filename}.png")
-            try: fig.write_image(png_file_path, scale=2) ; self.instance_logger.info(f"Chart saved as PNG: {png_file_path}")
-            except ValueError as ve_png:
-                 if "kaleido" in str(ve_png).lower() or "orca" in str(ve_png).lower(): self.instance_logger.error(f"PNG save failed for '{png_file_path}': Plotly image export engine (Kaleido/Orca) is missing. Please install 'kaleido'. Error: {ve_png}")
-                 else: self.instance_logger.error(f"PNG save failed for '{png_file_path}' with ValueError: {ve_png}", exc_info=True)
-            except Exception as e_png_save: self.instance_logger.error(f"Failed to save chart as PNG to '{png_file_path}': {e_png_save}", exc_info=True)
+        self._figure_exporter.submit(fig, base_output_filename, save_html=self.config.get("save_charts_as_html", False), save_png=self.config.get("save_charts_as_png", False))
 
     def _parse_color_string(self, color_str: str, default_opacity: float = 1.0) -> str:
         NAMED_COLORS_MAP = {
@@ -652,18 +832,18 @@ class MSPIVisualizerV2:
             if pivot_df.empty: return self._create_empty_figure(f"{symbol}-{chart_name}: No Pivot Data", height=fig_height, reason="Pivot table empty")
 
             hover_context_keys_cfg = self._get_config_value(["visualization_settings", "mspi_visualizer", "hover_settings","chart_specific_hover","mspi_heatmap","core_indices_keys"], ['sai', 'ssi', 'cfi'])
-            agg_hover_logic = {hc: 'first' for hc in hover_context_keys_cfg if hc in df.columns}; df_agg_for_hover = df.groupby([self.col_strike, self.col_opt_kind], as_index=False).agg(agg_hover_logic) if agg_hover_logic else pd.DataFrame(columns=[self.col_strike, self.col_opt_kind])
-            for hc in hover_context_keys_cfg:
-                if hc not in df_agg_for_hover.columns: df_agg_for_hover[hc] = np.nan
-            hover_matrix = []
-            for strike_val_iter in pivot_df.index:
-                row_hovers = []
-                for opt_type_iter in pivot_df.columns:
-                    hover_dict_content: Dict[str, Any] = {self.col_strike: strike_val_iter, self.col_mspi: pivot_df.loc[strike_val_iter, opt_type_iter]}
-                    context_data = df_agg_for_hover[(df_agg_for_hover[self.col_strike] == strike_val_iter) & (df_agg_for_hover[self.col_opt_kind] == opt_type_iter)]
-                    if not context_data.empty: hover_dict_content.update(context_data.iloc[0].to_dict())
-                    row_hovers.append(self._create_hover_text(hover_dict_content, chart_type="mspi_heatmap", extra_context={'Option Type': opt_type_iter.capitalize()}))
-                hover_matrix.append(row_hovers)
+            context_cols = [hc for hc in hover_context_keys_cfg if hc in df.columns]
+            # One pass over the grid: flatten the pivot row-major (matching z) and align per-cell context by index.
+            grid_index = pd.MultiIndex.from_arrays([np.repeat(pivot_df.index.to_numpy(), pivot_df.shape[1]), np.tile(pivot_df.columns.to_numpy(), pivot_df.shape[0])], names=[self.col_strike, self.col_opt_kind])
+            hover_frame = pd.DataFrame({self.col_strike: grid_index.get_level_values(0), self.col_mspi: pivot_df.to_numpy().ravel()})
+            if context_cols:
+                grouped_for_hover = df.groupby([self.col_strike, self.col_opt_kind])
+                df_agg_for_hover = grouped_for_hover.agg({hc: 'first' for hc in context_cols}).reindex(grid_index)
+                cell_has_rows = grouped_for_hover.size().reindex(grid_index).notna().to_numpy()
+                for hc in hover_context_keys_cfg:
+                    cell_values = df_agg_for_hover[hc].astype(object).to_numpy() if hc in context_cols else np.full(len(grid_index), np.nan, dtype=object)
+                    hover_frame[hc] = np.where(cell_has_rows, cell_values, None)
+            hover_matrix = self._create_hover_texts(hover_frame, chart_type="mspi_heatmap", option_types=grid_index.get_level_values(1)).reshape(pivot_df.shape)
             cs = self._get_config_value(["visualization_settings", "mspi_visualizer", "colorscales", "mspi_heatmap"], "RdBu")
             fig = go.Figure(data=[go.Heatmap(z=pivot_df.values,x=pivot_df.columns.str.capitalize(),y=pivot_df.index.astype(str),colorscale=cs,zmid=0,colorbar=dict(title=self.col_mspi.upper()),hovertext=hover_matrix,hoverinfo='text')])
             fig.update_layout(title=chart_title, xaxis_title='Option Type', yaxis_title='Strike', yaxis=dict(type='category', autorange='reversed', tickfont=dict(size=10)), template=self._get_config_value(["visualization_settings", "mspi_visualizer", "plotly_template"],"plotly_dark"),height=fig_height)
@@ -671,52 +851,60 @@ class MSPIVisualizerV2:
         except Exception as e: chart_logger.error(f"Error during MSPI Heatmap creation: {e}", exc_info=True); return self._create_empty_figure(f"{symbol}-{chart_name}: Error", height=fig_height, reason=str(e))
         chart_logger.info(f"Chart {chart_name} created successfully for {symbol}."); return fig
 
-    def create_net_value_heatmap(self, processed_data: pd.DataFrame, symbol: str = "N/A", fetch_timestamp: Optional[str] = None, **kwargs) -> go.Figure:
-        chart_name = "Net Value Pressure Heatmap"; chart_title = f"<b>{symbol.upper()}</b> - {chart_name} (Heuristic)"
+    def _get_net_metric_strike_aggregate(self, processed_data: pd.DataFrame, required_cols: List[str], chart_name: str) -> pd.DataFrame:
+        """
+        Per-strike aggregate ('first') of the net pressure metrics plus overview hover keys.
+        Computed once per processed_data object and required-column set, so every net-metric heatmap
+        rendered from the same refresh reuses it.
+        """
+        overview_metrics_cfg = self._get_config_value(["visualization_settings", "mspi_visualizer", "hover_settings", "overview_metrics_config"], [])
+        cache_key = (tuple(sorted(required_cols)), tuple(m_cfg.get("key") for m_cfg in overview_metrics_cfg if m_cfg.get("key")))
+        cached_source, cached_entries = self._net_metric_agg_cache
+        if cached_source is processed_data and cache_key in cached_entries:
+            self.instance_logger.debug(f"{chart_name}: Reusing shared net-metric strike aggregate.")
+            return cached_entries[cache_key]
+
+        df, _ = self._ensure_columns(processed_data, required_cols, chart_name)
+        agg_logic = {col: 'first' for col in required_cols if col != self.col_strike and col in df.columns}
+        for hc in dict.fromkeys(cache_key[1]):
+            if hc in df.columns and hc not in agg_logic and hc not in required_cols: agg_logic[hc] = 'first'
+        agg_data = df.groupby(self.col_strike, as_index=False).agg(agg_logic) if agg_logic else pd.DataFrame()
+        self._net_metric_agg_cache = (processed_data, {**(cached_entries if cached_source is processed_data else {}), cache_key: agg_data})
+        return agg_data
+
+    def _create_net_metric_heatmap(self, chart_type: str, processed_data: pd.DataFrame, symbol: str = "N/A", fetch_timestamp: Optional[str] = None) -> go.Figure:
+        """Shared engine for the single-column, per-strike net metric heatmaps (see NET_METRIC_HEATMAP_SPECS)."""
+        spec = NET_METRIC_HEATMAP_SPECS[chart_type]
+        chart_name = spec["chart_name"]; chart_title = f"<b>{symbol.upper()}</b> - {chart_name} (Heuristic)"
         chart_logger = self.instance_logger.getChild(chart_name)
         chart_logger.info(f"Creating {chart_title}...")
         fig_height = self._get_config_value(["visualization_settings", "mspi_visualizer", "default_chart_height"], 600)
+        metric_col: str = getattr(self, spec["metric_attr"])
         try:
             if not isinstance(processed_data, pd.DataFrame) or processed_data.empty:
                 return self._create_empty_figure(f"{symbol}-{chart_name}: No Data", height=fig_height, reason="Input DataFrame empty/invalid")
 
-            required_cols = [self.col_strike, self.col_net_val_p]
-            if self.col_net_vol_p not in required_cols and self.col_net_vol_p in processed_data.columns:
-                 required_cols.append(self.col_net_vol_p)
-
-            df_cleaned, _ = self._ensure_columns(processed_data.copy(), required_cols, chart_name)
-            if not all(c in df_cleaned.columns for c in [self.col_strike, self.col_net_val_p]):
-                missing=[c for c in [self.col_strike, self.col_net_val_p] if c not in df_cleaned.columns]
-                chart_logger.error(f"Net Value Heatmap: Missing required columns: {missing}. Available: {list(df_cleaned.columns)}")
-                return self._create_empty_figure(f"{symbol}-{chart_name}: Missing Core Data ({', '.join(missing)})", height=fig_height, reason=f"Missing: {', '.join(missing)}")
+            required_cols = [self.col_strike, metric_col]
+            for companion_col in (self.col_net_val_p, self.col_net_vol_p):
+                if companion_col not in required_cols and companion_col in processed_data.columns: required_cols.append(companion_col)
 
-            df = df_cleaned
-            agg_logic_nvp = {col: 'first' for col in required_cols if col != self.col_strike and col in df.columns}
-            if not agg_logic_nvp :
+            shared_agg = self._get_net_metric_strike_aggregate(processed_data, required_cols, chart_name)
+            if shared_agg.empty or metric_col not in shared_agg.columns:
                 return self._create_empty_figure(f"{symbol}-{chart_name}: No metrics to aggregate", height=fig_height, reason="No valid agg logic")
 
-            overview_metrics_cfg_nvp = self._get_config_value(["visualization_settings", "mspi_visualizer", "hover_settings", "overview_metrics_config"], [])
-            hover_context_keys_nvp = [m_cfg.get("key") for m_cfg in overview_metrics_cfg_nvp if m_cfg.get("key") and m_cfg.get("key") not in required_cols]
-            for hc_nvp in list(set(hover_context_keys_nvp)):
-                 if hc_nvp in df.columns and hc_nvp not in agg_logic_nvp: agg_logic_nvp[hc_nvp] = 'first'
-
-            agg_data = df.groupby(self.col_strike, as_index=False).agg(agg_logic_nvp)
+            agg_data = shared_agg.copy()
             agg_data[self.col_strike] = pd.to_numeric(agg_data[self.col_strike], errors='coerce')
-            agg_data[self.col_net_val_p] = pd.to_numeric(agg_data[self.col_net_val_p], errors='coerce')
-            agg_data = agg_data.dropna(subset=[self.col_strike, self.col_net_val_p]).sort_values(self.col_strike, ascending=False)
-
+            agg_data[metric_col] = pd.to_numeric(agg_data[metric_col], errors='coerce')
+            agg_data = agg_data.dropna(subset=[self.col_strike, metric_col]).sort_values(self.col_strike, ascending=False)
             if agg_data.empty:
-                return self._create_empty_figure(f"{symbol}-{chart_name}: No Aggregated Data", height=fig_height, reason="Aggregated data for Net Value Heatmap is empty")
-
-            hovers_nvp = [self._create_hover_text(r_dict.to_dict(), chart_type="net_value_heatmap") for _, r_dict in agg_data.iterrows()]
-            z_values_nvp = agg_data[[self.col_net_val_p]].values
-            hover_matrix_nvp = [[h] for h in hovers_nvp]
+                return self._create_empty_figure(f"{symbol}-{chart_name}: No Aggregated Data", height=fig_height, reason=f"Aggregated data for {chart_name} is empty")
 
-            colorscale_nvp = self._get_config_value(["visualization_settings", "mspi_visualizer", "colorscales", "net_value_heatmap"], "RdYlGn")
+            hover_matrix = self._create_hover_texts(agg_data, chart_type=chart_type).reshape(-1, 1)
+            colorscale = self._get_config_value(["visualization_settings", "mspi_visualizer", "colorscales", chart_type], spec["default_colorscale"])
             fig = go.Figure(data=[go.Heatmap(
-                z=z_values_nvp, x=['Net Value Pressure (H)'], y=agg_data[self.col_strike].astype(str),
-                colorscale=colorscale_nvp, zmid=0, colorbar=dict(title='Net Val P (Heuristic)'),
-                hovertext=hover_matrix_nvp, hoverinfo='text'
+                z=agg_data[[metric_col]].values, x=[spec["x_label"]], y=agg_data[self.col_strike].astype(str),
+                colorscale=colorscale, zmid=0, colorbar=dict(title=spec["colorbar_title"]),
+                hovertext=hover_matrix, hoverinfo='text'
             )])
             fig.update_layout(
                 title=chart_title, yaxis_title='Strike',
@@ -726,75 +914,19 @@ class MSPIVisualizerV2:
             )
             fig = self._add_timestamp_annotation(fig, fetch_timestamp)
             self._save_figure(fig, chart_name, symbol)
-        except Exception as e_nvp_hm:
-            chart_logger.error(f"Error during {chart_name} creation for {symbol}: {e_nvp_hm}", exc_info=True)
-            return self._create_empty_figure(f"{symbol}-{chart_name}: Plotting Error", height=fig_height, reason=str(e_nvp_hm))
+        except Exception as e_net_hm:
+            chart_logger.error(f"Error during {chart_name} creation for {symbol}: {e_net_hm}", exc_info=True)
+            return self._create_empty_figure(f"{symbol}-{chart_name}: Plotting Error", height=fig_height, reason=str(e_net_hm))
         chart_logger.info(f"Chart '{chart_name}' created successfully for {symbol}.")
         return fig
 
+    def create_net_value_heatmap(self, processed_data: pd.DataFrame, symbol: str = "N/A", fetch_timestamp: Optional[str] = None, **kwargs) -> go.Figure:
+        """Creates a heatmap for Net Value Pressure (Heuristic)."""
+        return self._create_net_metric_heatmap("net_value_heatmap", processed_data, symbol=symbol, fetch_timestamp=fetch_timestamp)
+
     def create_net_volume_pressure_heatmap(self, processed_data: pd.DataFrame, symbol: str = "N/A", fetch_timestamp: Optional[str] = None, **kwargs) -> go.Figure:
         """Creates a heatmap for Net Volume Pressure (Heuristic)."""
-        chart_name = "Net Volume Pressure Heatmap"; chart_title = f"<b>{symbol.upper()}</b> - {chart_name} (Heuristic)"
-        chart_logger = self.instance_logger.getChild(chart_name)
-        chart_logger.info(f"Creating {chart_title}...")
-        fig_height = self._get_config_value(["visualization_settings", "mspi_visualizer", "default_chart_height"], 600)
-
-        try:
-            if not isinstance(processed_data, pd.DataFrame) or processed_data.empty:
-                return self._create_empty_figure(f"{symbol}-{chart_name}: No Data", height=fig_height, reason="Input DataFrame empty/invalid")
-
-            required_cols = [self.col_strike, self.col_net_vol_p]
-            if self.col_net_val_p not in required_cols and self.col_net_val_p in processed_data.columns:
-                 required_cols.append(self.col_net_val_p)
-
-            df_cleaned, _ = self._ensure_columns(processed_data.copy(), required_cols, chart_name)
-            if not all(c in df_cleaned.columns for c in [self.col_strike, self.col_net_vol_p]):
-                missing=[c for c in [self.col_strike, self.col_net_vol_p] if c not in df_cleaned.columns]
-                chart_logger.error(f"{chart_name}: Missing required columns: {missing}. Available: {list(df_cleaned.columns)}")
-                return self._create_empty_figure(f"{symbol}-{chart_name}: Missing Core Data ({', '.join(missing)})", height=fig_height, reason=f"Missing: {', '.join(missing)}")
-
-            df = df_cleaned
-            agg_logic_nvp = {col: 'first' for col in required_cols if col != self.col_strike and col in df.columns}
-            if not agg_logic_nvp :
-                return self._create_empty_figure(f"{symbol}-{chart_name}: No metrics to aggregate", height=fig_height, reason="No valid agg logic")
-
-            overview_metrics_cfg_nvp = self._get_config_value(["visualization_settings", "mspi_visualizer", "hover_settings", "overview_metrics_config"], [])
-            hover_context_keys_nvp = [m_cfg.get("key") for m_cfg in overview_metrics_cfg_nvp if m_cfg.get("key") and m_cfg.get("key") not in required_cols]
-            for hc_nvp in list(set(hover_context_keys_nvp)):
-                 if hc_nvp in df.columns and hc_nvp not in agg_logic_nvp: agg_logic_nvp[hc_nvp] = 'first'
-
-            agg_data = df.groupby(self.col_strike, as_index=False).agg(agg_logic_nvp)
-            agg_data[self.col_strike] = pd.to_numeric(agg_data[self.col_strike], errors='coerce')
-            agg_data[self.col_net_vol_p] = pd.to_numeric(agg_data[self.col_net_vol_p], errors='coerce')
-            agg_data = agg_data.dropna(subset=[self.col_strike, self.col_net_vol_p]).sort_values(self.col_strike, ascending=False)
-
-            if agg_data.empty:
-                return self._create_empty_figure(f"{symbol}-{chart_name}: No Aggregated Data", height=fig_height, reason=f"Aggregated data for {chart_name} is empty")
-
-            hovers_nvp = [self._create_hover_text(r_dict.to_dict(), chart_type="net_volume_pressure_heatmap") for _, r_dict in agg_data.iterrows()]
-            z_values_nvp = agg_data[[self.col_net_vol_p]].values
-            hover_matrix_nvp = [[h] for h in hovers_nvp]
-
-            colorscale_key = "net_volume_pressure_heatmap" # Key for colorscales config
-            colorscale_nvp = self._get_config_value(["visualization_settings", "mspi_visualizer", "colorscales", colorscale_key], "coolwarm")
-            fig = go.Figure(data=[go.Heatmap(
-                z=z_values_nvp, x=['Net Volume Pressure (H)'], y=agg_data[self.col_strike].astype(str),
-                colorscale=colorscale_nvp, zmid=0, colorbar=dict(title='Net Vol P (Heuristic)'),
-                hovertext=hover_matrix_nvp, hoverinfo='text'
-            )])
-            fig.update_layout(
-                title=chart_title, yaxis_title='Strike',
-                yaxis=dict(type='category', autorange='reversed', tickfont=dict(size=10)),
-                xaxis=dict(showticklabels=False, showline=False, zeroline=False),
-                template=self._get_config_value(["visualization_settings", "mspi_visualizer", "plotly_template"], "plotly_dark"), height=fig_height
-            )
-            fig = self._add_timestamp_annotation(fig, fetch_timestamp)
-            self._save_figure(fig, chart_name, symbol)
-        except Exception as e_nvp_hm:
-            chart_logger.error(f"Error during {chart_name} creation for {symbol}: {e_nvp_hm}", exc_info=True)
-            return self._create_empty_figure(f"{symbol}-{chart_name}: Plotting Error", height=fig_height, reason=str(e_nvp_hm))
-        chart_logger.info(f"Chart '{chart_name}' created successfully for {symbol}.")
-        return fig
+        return self._create_net_metric_heatmap("net_volume_pressure_heatmap", processed_data, symbol=symbol, fetch_timestamp=fetch_timestamp)
 
     def create_component_comparison(
         self,
@@ -863,7 +995,7 @@ class MSPIVisualizerV2:
                 return self._create_empty_figure(f"{symbol}-{chart_name}: No Aggregated Data", height=fig_height, reason="Aggregated data for components is empty")
 
             fig = go.Figure()
-            mspi_hovers = [self._create_hover_text(r.to_dict(), chart_type="mspi_components") for _, r in agg_data.iterrows()]
+            mspi_hovers = self._create_hover_texts(agg_data, chart_type="mspi_components")
             mspi_col_name_actual = self.col_mspi
 
             if mspi_col_name_actual in agg_data.columns:
@@ -932,7 +1064,7 @@ class MSPIVisualizerV2:
                     bar_values = pd.to_numeric(agg_data[y_col_bar], errors='coerce').fillna(0.0)
                     pos_color_str = str(bar_color_map_cfg.get('pos', default_bar_color_map['pos']))
                     neg_color_str = str(bar_color_map_cfg.get('neg', default_bar_color_map['neg']))
-                    current_bar_colors = [self._parse_color_string(pos_color_str, 0.7) if v >= 0 else self._parse_color_string(neg_color_str, 0.7) for v in bar_values]
+                    current_bar_colors = np.where(bar_values.to_numpy() >= 0, self._parse_color_string(pos_color_str, 0.7), self._parse_color_string(neg_color_str, 0.7)).tolist()
 
                     bar_plot_args: Dict[str, Any] = {'x': agg_data[self.col_strike], 'y': bar_values, 'name': trace_name_bar_display, 'visible': visibility_for_bar, 'hoverinfo': 'skip'}
                     if group_name_for_offset:
@@ -1040,7 +1172,9 @@ class MSPIVisualizerV2:
         symbol: str,
         current_price: Optional[float], # This is the underlying price
         selected_price_range_pct_override: Optional[float], # This comes from the slider
-        fetch_timestamp: Optional[str]
+        fetch_timestamp: Optional[str],
+        lod_viewport: Optional[Tuple[float, float]] = None, # Zoomed strike window (from relayoutData)
+        lod_keep_strikes: Optional[List[float]] = None # Strikes always kept by LOD (e.g., key levels)
     ) -> go.Figure:
         chart_name = f"Raw {chart_title_part.split('(')[0].strip()} Chart"
         chart_title = f"<b>{symbol.upper()}</b> - {chart_title_part}"
@@ -1146,38 +1280,35 @@ class MSPIVisualizerV2:
             # Reindex hover data lookup to match the strike order
             hover_data_for_lookup = hover_data_for_lookup.reindex(unique_strikes_desc).fillna(np.nan) # Fill with NaN so _create_hover_text shows N/A
 
+            # Level-of-detail: bound the number of plotted strikes by the chart's pixel height (and zoom viewport)
+            lod_keep = list(lod_keep_strikes or []) + ([current_price] if current_price is not None and pd.notna(current_price) else [])
+            lod_idx = self._select_lod_indices(np.asarray(unique_strikes_desc, dtype=float), [puts_agg.values, calls_agg.values], self._lod_max_points(fig_height), lod_viewport, lod_keep)
+            if len(lod_idx) < len(unique_strikes_desc):
+                chart_logger.debug(f"{chart_name}: LOD kept {len(lod_idx)}/{len(unique_strikes_desc)} strikes (viewport: {lod_viewport}).")
+                filter_suffix += f" [LOD {len(lod_idx)}/{len(unique_strikes_desc)}]"
+                unique_strikes_desc = [unique_strikes_desc[i] for i in lod_idx]
+                puts_agg = puts_agg.iloc[lod_idx]; calls_agg = calls_agg.iloc[lod_idx]
+                hover_data_for_lookup = hover_data_for_lookup.iloc[lod_idx]
+
             fig = go.Figure()
             y_indices = list(range(len(unique_strikes_desc))) # Integer indices for y-axis
             y_labels = [f"{s:.2f}" for s in unique_strikes_desc] # String labels for y-axis ticks
 
             strike_map_for_hline = {float(f"{s:.2f}"): i for i, s in enumerate(unique_strikes_desc)} # Map numeric strike to y-index for HLINE
 
-            puts_hovers, calls_hovers = [], []
             hover_chart_type = "default"
             if metric_col == 'tdpi': hover_chart_type = "tdpi"
             elif metric_col == 'vri': hover_chart_type = "vri"
             elif metric_col.startswith('sdag_'): hover_chart_type = "sdag"
 
-            for strike_numeric_val in unique_strikes_desc:
-                # Base dict for hover, always include the strike value
-                base_hover_info = {self.col_strike: strike_numeric_val}
-                if strike_numeric_val in hover_data_for_lookup.index:
-                    # Add other aggregated metrics for this strike
-                    base_hover_info.update(hover_data_for_lookup.loc[strike_numeric_val].dropna().to_dict())
-
-                put_val_specific = puts_agg.get(strike_numeric_val, 0.0)
-                put_hover_data_final = base_hover_info.copy()
-                put_hover_data_final[metric_col] = put_val_specific # Add the specific put value for this strike
-                extra_ctx_put = {'Option Type': 'Put'}
-                if hover_chart_type == "sdag": extra_ctx_put.update({"SDAG Method": metric_col.upper(), "sdag_col_name": metric_col})
-                puts_hovers.append(self._create_hover_text(put_hover_data_final, chart_type=hover_chart_type, extra_context=extra_ctx_put))
-
-                call_val_specific = calls_agg.get(strike_numeric_val, 0.0)
-                call_hover_data_final = base_hover_info.copy()
-                call_hover_data_final[metric_col] = call_val_specific # Add the specific call value
-                extra_ctx_call = {'Option Type': 'Call'}
-                if hover_chart_type == "sdag": extra_ctx_call.update({"SDAG Method": metric_col.upper(), "sdag_col_name": metric_col})
-                calls_hovers.append(self._create_hover_text(call_hover_data_final, chart_type=hover_chart_type, extra_context=extra_ctx_call))
+            # Per-strike hover frame: NaN cells become None so the key is omitted from the hover (as a dropped dict key would be)
+            hover_base = hover_data_for_lookup.reset_index(drop=True)
+            hover_base = hover_base.astype(object).where(hover_base.notna(), None)
+            if self.col_strike in hover_base.columns: hover_base[self.col_strike] = [s if v is None else v for v, s in zip(hover_base[self.col_strike], unique_strikes_desc)]
+            else: hover_base[self.col_strike] = unique_strikes_desc
+            sdag_ctx = {"SDAG Method": metric_col.upper(), "sdag_col_name": metric_col} if hover_chart_type == "sdag" else {}
+            puts_hovers = self._create_hover_texts(hover_base.assign(**{metric_col: puts_agg.values}), chart_type=hover_chart_type, extra_context={'Option Type': 'Put', **sdag_ctx})
+            calls_hovers = self._create_hover_texts(hover_base.assign(**{metric_col: calls_agg.values}), chart_type=hover_chart_type, extra_context={'Option Type': 'Call', **sdag_ctx})
 
             fig.add_trace(go.Bar(y=y_indices, x=puts_agg.values, name=f'Puts {metric_col.upper()}', orientation='h', marker_color=put_color, hovertext=puts_hovers, hoverinfo='text'))
             fig.add_trace(go.Bar(y=y_indices, x=calls_agg.values, name=f'Calls {metric_col.upper()}', orientation='h', marker_color=call_color, hovertext=calls_hovers, hoverinfo='text'))
@@ -1185,16 +1316,7 @@ class MSPIVisualizerV2:
             show_net_trace_cfg = self.config.get("chart_specific_params", {}).get("show_net_sdag_trace", False)
             if show_net_trace_cfg and metric_col.startswith('sdag_'):
                 net_aggregated_values = puts_agg + calls_agg
-                net_hovers_for_trace = []
-                for strike_numeric_val_net in unique_strikes_desc:
-                    net_metric_value = net_aggregated_values.get(strike_numeric_val_net, 0.0)
-                    net_hover_data_base_ctx = {self.col_strike: strike_numeric_val_net, metric_col: net_metric_value}
-                    if strike_numeric_val_net in hover_data_for_lookup.index:
-                        row_series_net_ctx = hover_data_for_lookup.loc[strike_numeric_val_net]
-                        net_hover_data_base_ctx.update({k:v for k,v in row_series_net_ctx.dropna().to_dict().items() if k != metric_col})
-
-                    hover_text_for_net_trace = self._create_hover_text(net_hover_data_base_ctx, chart_type="sdag_net", extra_context={"SDAG Method": f"Net {metric_col.upper()}", "sdag_col_name": metric_col})
-                    net_hovers_for_trace.append(hover_text_for_net_trace)
+                net_hovers_for_trace = self._create_hover_texts(hover_base.assign(**{metric_col: net_aggregated_values.values}), chart_type="sdag_net", extra_context={"SDAG Method": f"Net {metric_col.upper()}", "sdag_col_name": metric_col})
 
                 net_style_cfg = self.config.get("chart_specific_params", {}).get("net_sdag_marker_style", {})
                 net_visibility_cfg = self.config.get("chart_specific_params", {}).get("net_sdag_trace_default_visibility", 'legendonly')
@@ -1227,6 +1349,9 @@ class MSPIVisualizerV2:
                 ),
                 hovermode="y unified"
             )
+            if lod_viewport is not None: # Keep the zoomed window on screen after a LOD refinement re-render
+                in_view_idx = [i for i, s in enumerate(unique_strikes_desc) if min(lod_viewport) <= s <= max(lod_viewport)]
+                if in_view_idx: fig.update_yaxes(range=[max(in_view_idx) + 0.5, min(in_view_idx) - 0.5], autorange=False)
 
             if current_price is not None and pd.notna(current_price) and current_price > 0:
                 # Find the closest *numeric* strike value that is actually plotted
@@ -1256,35 +1381,35 @@ class MSPIVisualizerV2:
         chart_logger.info(f"{chart_name} for {symbol} created successfully.")
         return fig
 
-    def create_time_decay_visualization(self, processed_data:pd.DataFrame, symbol:str="N/A", current_price:Optional[float]=None, selected_price_range_pct_override:Optional[float]=None, fetch_timestamp:Optional[str]=None, **kwargs) -> go.Figure:
-        return self._create_raw_greek_chart( processed_data=processed_data, metric_col='tdpi', chart_title_part="Time Decay (TDPI by Strike)", xaxis_title="Time Decay Pressure Index (TDPI)", call_color='green', put_color='red', symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp )
+    def create_time_decay_visualization(self, processed_data:pd.DataFrame, symbol:str="N/A", current_price:Optional[float]=None, selected_price_range_pct_override:Optional[float]=None, fetch_timestamp:Optional[str]=None, lod_viewport:Optional[Tuple[float,float]]=None, lod_keep_strikes:Optional[List[float]]=None, **kwargs) -> go.Figure:
+        return self._create_raw_greek_chart( processed_data=processed_data, metric_col='tdpi', chart_title_part="Time Decay (TDPI by Strike)", xaxis_title="Time Decay Pressure Index (TDPI)", call_color='green', put_color='red', symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes )
 
-    def create_volatility_regime_visualization(self, processed_data:pd.DataFrame, symbol:str="N/A", current_price:Optional[float]=None, selected_price_range_pct_override:Optional[float]=None, fetch_timestamp:Optional[str]=None, **kwargs) -> go.Figure:
-        return self._create_raw_greek_chart( processed_data=processed_data, metric_col='vri', chart_title_part="Volatility Regime (VRI by Strike)", xaxis_title="Volatility Regime Indicator (VRI)", call_color='cyan', put_color='magenta', symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp )
+    def create_volatility_regime_visualization(self, processed_data:pd.DataFrame, symbol:str="N/A", current_price:Optional[float]=None, selected_price_range_pct_override:Optional[float]=None, fetch_timestamp:Optional[str]=None, lod_viewport:Optional[Tuple[float,float]]=None, lod_keep_strikes:Optional[List[float]]=None, **kwargs) -> go.Figure:
+        return self._create_raw_greek_chart( processed_data=processed_data, metric_col='vri', chart_title_part="Volatility Regime (VRI by Strike)", xaxis_title="Volatility Regime Indicator (VRI)", call_color='cyan', put_color='magenta', symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes )
 
-    def plot_sdag_multiplicative(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, **kwargs) -> go.Figure:
+    def plot_sdag_multiplicative(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, lod_viewport: Optional[Tuple[float, float]] = None, lod_keep_strikes: Optional[List[float]] = None, **kwargs) -> go.Figure:
         metric = 'sdag_multiplicative';
         if metric not in processed_data.columns: return self._create_empty_figure(f"{symbol} - SDAG Multiplicative: Data Not Available", reason=f"{metric} col missing")
         colors = self.config.get("chart_specific_params",{}).get("mspi_components_bar_colors",{}).get(f"{metric}_norm", {"pos": "#FFA07A", "neg": "#6A5ACD"})
-        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Multiplicative", xaxis_title="SDAG (Multiplicative)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp)
+        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Multiplicative", xaxis_title="SDAG (Multiplicative)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes)
 
-    def plot_sdag_directional(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, **kwargs) -> go.Figure:
+    def plot_sdag_directional(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, lod_viewport: Optional[Tuple[float, float]] = None, lod_keep_strikes: Optional[List[float]] = None, **kwargs) -> go.Figure:
         metric = 'sdag_directional';
         if metric not in processed_data.columns: return self._create_empty_figure(f"{symbol} - SDAG Directional: Data Not Available", reason=f"{metric} col missing")
         colors = self.config.get("chart_specific_params",{}).get("mspi_components_bar_colors",{}).get(f"{metric}_norm", {"pos": "#FFD700", "neg": "#8A2BE2"})
-        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Directional", xaxis_title="SDAG (Directional)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp)
+        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Directional", xaxis_title="SDAG (Directional)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes)
 
-    def plot_sdag_weighted(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, **kwargs) -> go.Figure:
+    def plot_sdag_weighted(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, lod_viewport: Optional[Tuple[float, float]] = None, lod_keep_strikes: Optional[List[float]] = None, **kwargs) -> go.Figure:
         metric = 'sdag_weighted';
         if metric not in processed_data.columns: return self._create_empty_figure(f"{symbol} - SDAG Weighted: Data Not Available", reason=f"{metric} col missing")
         colors = self.config.get("chart_specific_params",{}).get("mspi_components_bar_colors",{}).get(f"{metric}_norm", {"pos": "#98FB98", "neg": "#FF6347"})
-        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Weighted", xaxis_title="SDAG (Weighted)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp)
+        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Weighted", xaxis_title="SDAG (Weighted)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes)
 
-    def plot_sdag_volatility_focused(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, **kwargs) -> go.Figure:
+    def plot_sdag_volatility_focused(self, processed_data: pd.DataFrame, symbol: str = "N/A", current_price: Optional[float] = None, fetch_timestamp: Optional[str] = None, selected_price_range_pct_override: Optional[float]=None, lod_viewport: Optional[Tuple[float, float]] = None, lod_keep_strikes: Optional[List[float]] = None, **kwargs) -> go.Figure:
         metric = 'sdag_volatility_focused';
         if metric not in processed_data.columns: return self._create_empty_figure(f"{symbol} - SDAG Volatility Focused: Data Not Available", reason=f"{metric} col missing")
         colors = self.config.get("chart_specific_params",{}).get("mspi_components_bar_colors",{}).get(f"{metric}_norm", {"pos": "#AFEEEE", "neg": "#DA70D6"})
-        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Volatility Focused", xaxis_title="SDAG (Volatility Focused)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp)
+        return self._create_raw_greek_chart(processed_data=processed_data, metric_col=metric, chart_title_part="SDAG Volatility Focused", xaxis_title="SDAG (Volatility Focused)", call_color=colors['pos'], put_color=colors['neg'], symbol=symbol, current_price=current_price, selected_price_range_pct_override=selected_price_range_pct_override, fetch_timestamp=fetch_timestamp, lod_viewport=lod_viewport, lod_keep_strikes=lod_keep_strikes)
 
     def create_volval_comparison( self, processed_data: pd.DataFrame, component_history: Optional[Deque[Tuple[float, pd.DataFrame]]]=None, symbol: str="N/A", current_price: Optional[float]=None, fetch_timestamp: Optional[str]=None, trace_visibility: Optional[Dict[str,Any]]=None, **kwargs ) -> go.Figure:
         chart_name = "Net Volume vs Value Pressure Comparison"; chart_title = f"<b>{symbol.upper()}</b> - {chart_name}";
@@ -1300,37 +1425,29 @@ class MSPIVisualizerV2:
             if agg_data.empty: return self._create_empty_figure(f"{symbol} - {chart_name}: No Aggregated Current Data", height=fig_height, reason="Agg current data empty")
             net_val_p_series = pd.to_numeric(agg_data[self.col_net_val_p], errors='coerce').fillna(0); net_val_p_pos = net_val_p_series.where(net_val_p_series >= 0, 0); net_val_p_neg = net_val_p_series.where(net_val_p_series < 0, 0)
             plot_order_history_cfg = self.config.get("plot_order_history", DEFAULT_VISUALIZER_CONFIG.get("plot_order_history", []))
-            history_found: Dict[str, Optional[pd.DataFrame]] = {lbl: None for lbl in plot_order_history_cfg}
+            history_found: Dict[str, Optional[ComponentSnapshot]] = {lbl: None for lbl in plot_order_history_cfg}
             current_unix_ts: Optional[float] = None; current_dt_date: Optional[date] = None
             if fetch_timestamp:
                 try: dto = date_parser.isoparse(fetch_timestamp); current_unix_ts = dto.timestamp(); current_dt_date = dto.date()
                 except Exception as parse_err: chart_logger.warning(f"TS parse fail '{fetch_timestamp}': {parse_err}")
             if component_history and current_unix_ts and current_dt_date:
-                chart_logger.debug(f"Processing {len(component_history)} history entries...")
-                target_times_dt: Dict[str, time] = {"T-1":time(9,55),"T-2":time(10,55),"T-3":time(12,35),"T-4":time(13,30),"T-5":time(15,0)}; target_times_ts: Dict[str, float] = {lbl:datetime.combine(current_dt_date, t).timestamp() for lbl, t in target_times_dt.items()}
-                lookback_A_sec, lookback_B_sec = 5*60, 15*60; tolerance_fixed_sec, tolerance_relative_sec = 15*60, 2*60
-                best_matches: Dict[str, Tuple[float, int, Optional[Tuple[float, pd.DataFrame]]]] = {lbl: (float('inf'), -1, None) for lbl in plot_order_history_cfg}; history_list = list(component_history)
-                for idx, entry in enumerate(history_list):
-                    if not (isinstance(entry, tuple) and len(entry)==2 and isinstance(entry[1], pd.DataFrame) and all(c in entry[1].columns for c in [self.col_strike, self.col_net_vol_p, self.col_net_val_p])) : continue
-                    hist_ts, hist_df = entry
-                    try:
-                        delta_now = current_unix_ts - hist_ts; diff_A = abs(delta_now - lookback_A_sec); diff_B = abs(delta_now - lookback_B_sec)
-                        if diff_A < tolerance_relative_sec and diff_A < best_matches.get("T-A",(float('inf'),-1,None))[0]: best_matches["T-A"]=(diff_A, idx, entry)
-                        if diff_B < tolerance_relative_sec and diff_B < best_matches.get("T-B",(float('inf'),-1,None))[0]: best_matches["T-B"]=(diff_B, idx, entry)
-                        for slot, target_ts_iter in target_times_ts.items():
-                            if slot in best_matches: diff_fixed = abs(hist_ts - target_ts_iter);
-                            if diff_fixed < tolerance_fixed_sec and diff_fixed < best_matches[slot][0]: best_matches[slot] = (diff_fixed, idx, entry)
-                    except Exception as calc_e: chart_logger.warning(f"Hist Err calc time diff {idx}: {calc_e}")
-                found_indices = set()
-                for label_iter, match_tuple in best_matches.items():
-                    diff_val, idx_val, entry_val = match_tuple
-                    if diff_val != float('inf') and idx_val != -1 and idx_val not in found_indices and entry_val is not None:
-                        _, hist_df_match = entry_val; hist_agg = hist_df_match.groupby(self.col_strike, as_index=False).agg({self.col_net_vol_p:'first', self.col_net_val_p:'first'}); hist_agg[self.col_strike] = pd.to_numeric(hist_agg[self.col_strike], errors='coerce'); hist_agg = hist_agg.dropna(subset=[self.col_strike]); history_found[label_iter] = hist_agg; found_indices.add(idx_val)
+                # Snapshots are pre-aggregated by strike in the history index; lookbacks are binary searches on its timestamps.
+                history_index = component_history if isinstance(component_history, ComponentHistoryIndex) else ComponentHistoryIndex.from_entries(component_history, self.col_strike, self.col_net_vol_p, self.col_net_val_p)
+                chart_logger.debug(f"Resolving lookbacks over {len(history_index)} history snapshots...")
+                target_times_dt: Dict[str, time] = {"T-1":time(9,55),"T-2":time(10,55),"T-3":time(12,35),"T-4":time(13,30),"T-5":time(15,0)}
+                lookback_targets: List[Tuple[str, float, float]] = []
+                for lbl in plot_order_history_cfg:
+                    if lbl in target_times_dt: lookback_targets.append((lbl, datetime.combine(current_dt_date, target_times_dt[lbl]).timestamp(), 15*60))
+                    elif lbl == "T-A": lookback_targets.append((lbl, current_unix_ts - 5*60, 2*60))
+                    elif lbl == "T-B": lookback_targets.append((lbl, current_unix_ts - 15*60, 2*60))
+                for lbl, snap in history_index.match_lookbacks(lookback_targets): history_found[lbl] = snap
                 chart_logger.debug(f"Found hist matches: {[lbl for lbl, e in history_found.items() if e is not None]}")
+            current_strikes_arr = agg_data[self.col_strike].to_numpy(dtype=float)
             hover_df = agg_data[[self.col_strike, self.col_net_vol_p, self.col_net_val_p]].copy(); hover_df.columns = [self.col_strike, 'vol_Now', 'val_Now']; plotted_labels = ["Now"]
             for label_hist in plot_order_history_cfg:
-                hist_agg_df = history_found.get(label_hist)
-                if hist_agg_df is not None and isinstance(hist_agg_df, pd.DataFrame): temp_hist = hist_agg_df[[self.col_strike, self.col_net_vol_p, self.col_net_val_p]].copy(); temp_hist.columns = [self.col_strike, f'vol_{label_hist}', f'val_{label_hist}']; hover_df = pd.merge(hover_df, temp_hist, on=self.col_strike, how='left'); plotted_labels.append(label_hist)
+                hist_snap = history_found.get(label_hist)
+                if hist_snap is not None:
+                    hover_df[f'vol_{label_hist}'], hover_df[f'val_{label_hist}'] = hist_snap.aligned_to(current_strikes_arr); plotted_labels.append(label_hist)
             hover_df = hover_df.fillna(0); hovertemplate_str = self._build_volval_hovertemplate(hover_df, plotted_labels)
             fig = make_subplots(specs=[[{"secondary_y": True}]])
             fig.add_trace(go.Scatter( x=agg_data[self.col_strike], y=net_val_p_pos, name='Net Val P (+)', mode='lines', line=dict(width=0.6, color='rgba(0, 150, 0, 0.9)'), fillcolor='rgba(0, 240, 0, 0.05)', fill='tozeroy', visible=trace_visibility.get('Net Val P (+)',True), showlegend=True, hoverinfo='skip' ), secondary_y=True)
@@ -1340,7 +1457,7 @@ class MSPIVisualizerV2:
             for label_plot_order in plot_order_history_cfg:
                 settings = ghost_settings_from_config.get(label_plot_order); plot_df_bar: Optional[pd.DataFrame] = None
                 if label_plot_order == "Now": plot_df_bar = agg_data
-                elif label_plot_order in history_found and history_found[label_plot_order] is not None: plot_df_bar = history_found[label_plot_order]
+                elif history_found.get(label_plot_order) is not None: hist_snap_bar = history_found[label_plot_order]; plot_df_bar = pd.DataFrame({self.col_strike: hist_snap_bar.strikes, self.col_net_vol_p: hist_snap_bar.net_vol})
                 if settings is None or plot_df_bar is None: continue
                 if not isinstance(plot_df_bar, pd.DataFrame) or self.col_net_vol_p not in plot_df_bar or self.col_strike not in plot_df_bar: continue
                 df_trace = plot_df_bar[[self.col_strike, self.col_net_vol_p]].copy(); df_trace[self.col_strike] = pd.to_numeric(df_trace[self.col_strike], errors='coerce'); df_trace[self.col_net_vol_p] = pd.to_numeric(df_trace[self.col_net_vol_p], errors='coerce').fillna(0); df_trace = df_trace.dropna(subset=[self.col_strike])
@@ -1439,7 +1556,7 @@ class MSPIVisualizerV2:
         except Exception as e: chart_logger.error(f"Error during {chart_name} creation: {e}",exc_info=True); return self._create_empty_figure(f"{symbol}-{chart_name}: Plot Error",height=fig_height, reason=str(e))
         chart_logger.info(f"Chart {chart_name} created successfully for {symbol}."); return fig
 
-    def create_key_levels_visualization(self, key_levels_data: Dict[str, List[Dict]], symbol: str="N/A", current_price: Optional[float]=None, fetch_timestamp: Optional[str]=None, **kwargs) -> go.Figure:
+    def create_key_levels_visualization(self, key_levels_data: Dict[str, List[Dict]], symbol: str="N/A", current_price: Optional[float]=None, fetch_timestamp: Optional[str]=None, lod_viewport: Optional[Tuple[float, float]]=None, **kwargs) -> go.Figure:
         chart_name="Key Levels"; chart_title=f"<b>{symbol.upper()}</b> - {chart_name}";
         chart_logger = logging.getLogger(__name__ + "." + chart_name); chart_logger.info(f"Creating {chart_title}...")
         fig_height = self.config.get("chart_specific_params",{}).get("key_levels_height",600)
@@ -1481,13 +1598,16 @@ class MSPIVisualizerV2:
                 min_denom_local = self.config.get("min_normalization_denominator", 1e-9)
                 sizes=min_sz+((subset['mspi_abs']/(max_abs if pd.notna(max_abs) and max_abs>min_denom_local else 1))*(max_sz-min_sz))
                 sizes=pd.to_numeric(sizes,errors='coerce').fillna(min_sz).clip(lower=min_sz,upper=max_sz)
-                hovers=[self._create_hover_text(r_dict, chart_type="key_levels") for r_dict in subset.to_dict('records')]
+                # No LOD here: every row is an identified level, so dropping any would hide a level marker
+                hovers=self._create_hover_texts(subset, chart_type="key_levels")
                 fig.add_trace(go.Scatter( x=subset[self.col_strike], y=subset['level_category'], mode='markers', name=style['name'], marker=dict(symbol=style['symbol'], color=style['color'], size=sizes, opacity=0.85, line=dict(width=1, color='rgba(255,255,255,0.6)')), hovertext=hovers, hoverinfo='text'))
             if not plotted: return self._create_empty_figure(f"{symbol}-{chart_name}: No Levels Plotted", height=fig_height, reason="No levels to plot after filtering")
             final_y_cats = [cat for cat in ordered_cats_to_plot if cat in y_cats_plotted]
             legend_cfg=self.config.get("legend_settings",{});
             fig.update_layout( title=chart_title, xaxis_title="Strike", yaxis_title="Level Type", yaxis=dict(type='category', categoryorder='array', categoryarray=final_y_cats), template=self.config.get("plotly_template","plotly_dark"), height=fig_height, legend_title="Level Types", legend=dict(orientation=legend_cfg.get("orientation","v"),yanchor=legend_cfg.get("y_anchor","top"),y=legend_cfg.get("y_pos",1),xanchor=legend_cfg.get("x_anchor","left"),x=legend_cfg.get("x_pos",1.02)), hovermode='closest')
-            fig.update_xaxes(tickformat=".2f"); fig=self._add_price_line(fig, current_price, orientation='vertical'); fig=self._add_timestamp_annotation(fig, fetch_timestamp); self._save_figure(fig, chart_name, symbol)
+            fig.update_xaxes(tickformat=".2f")
+            if lod_viewport is not None: fig.update_xaxes(range=[min(lod_viewport), max(lod_viewport)])
+            fig=self._add_price_line(fig, current_price, orientation='vertical'); fig=self._add_timestamp_annotation(fig, fetch_timestamp); self._save_figure(fig, chart_name, symbol)
         except Exception as e: chart_logger.error(f"{chart_name} Error: {e}", exc_info=True); return self._create_empty_figure(f"{symbol}-{chart_name}: Plot Error", height=fig_height, reason=str(e))
         chart_logger.info(f"{chart_name} OK: {symbol}"); return fig
 
@@ -1522,13 +1642,14 @@ class MSPIVisualizerV2:
 
                     # Use conviction_stars from signal payload for size/opacity if available
                     if 'conviction_stars' in df_sub.columns:
-                        sizes = df_sub['conviction_stars'].apply(lambda x: 10 + x * 2 if isinstance(x, (int, float)) and pd.notna(x) else 10).fillna(10).clip(lower=8, upper=25)
-                        opacities = df_sub['conviction_stars'].apply(lambda x: 0.6 + x * 0.08 if isinstance(x, (int, float)) and pd.notna(x) else 0.6).fillna(0.6).clip(lower=0.5, upper=1.0)
+                        stars_num = pd.to_numeric(df_sub['conviction_stars'], errors='coerce')
+                        sizes = (10 + stars_num * 2).fillna(10).clip(lower=8, upper=25)
+                        opacities = (0.6 + stars_num * 0.08).fillna(0.6).clip(lower=0.5, upper=1.0)
                     else: # Fallback if no conviction_stars in payload
-                        sizes = pd.Series([12] * len(df_sub))
-                        opacities = pd.Series([0.75] * len(df_sub))
+                        sizes = pd.Series(np.full(len(df_sub), 12))
+                        opacities = pd.Series(np.full(len(df_sub), 0.75))
 
-                    hovers=[self._create_hover_text(r_dict,chart_type="trading_signals",extra_context={'Signal Type':sig_type.replace('_',' ').title()}) for r_dict in df_sub.to_dict('records')]
+                    hovers=self._create_hover_texts(df_sub,chart_type="trading_signals",extra_context={'Signal Type':sig_type.replace('_',' ').title()})
                     fig.add_trace(go.Scatter( x=df_sub[self.col_strike], y=[y_lbl]*len(df_sub), mode='markers', name=y_lbl, marker=dict(size=sizes,color=style.get('color','grey'),symbol=style.get('symbol','circle'),opacity=opacities,line=dict(width=1,color='rgba(255,255,255,0.6)')), hovertext=hovers, hoverinfo='text'))
             if not plotted: return self._create_empty_figure(f"{symbol}-{chart_name}: No Signals Plotted", height=fig_height, reason="No signals to plot after filtering")
             legend_cfg=self.config.get("legend_settings",{});
@@ -1587,14 +1708,19 @@ class MSPIVisualizerV2:
 
             df_display = recommendations_df[actual_cols_to_display].copy()
 
+            n_rows = len(df_display)
             if "strike" in df_display.columns:
-                 df_display["strike"] = pd.to_numeric(df_display["strike"], errors='coerce').apply(lambda x: f"{x:.2f}" if pd.notna(x) and isinstance(x, (int,float)) else (str(x) if pd.notna(x) else "N/A"))
+                 df_display["strike"] = self._format_fixed_values(df_display["strike"], 2, "N/A")
             for target_col in ['entry_ideal', 'target_1', 'target_2', 'stop_loss', 'mspi', 'sai', 'ssi', 'arfi', 'raw_conviction_score']:
                 if target_col in df_display.columns:
-                    df_display[target_col] = pd.to_numeric(df_display[target_col], errors='coerce').apply(lambda x: f"{x:.2f}" if pd.notna(x) else "---")
+                    df_display[target_col] = self._format_fixed_values(df_display[target_col], 2, "---")
 
+            star_counts = None
             if "conviction_stars" in df_display.columns:
-                df_display["conviction_stars"] = pd.to_numeric(df_display["conviction_stars"], errors='coerce').fillna(0).astype(int).apply(lambda x: "★" * x + "☆" * (5 - x) if 0 <= x <= 5 else "N/A")
+                star_counts = pd.to_numeric(df_display["conviction_stars"], errors='coerce').fillna(0).astype(int).to_numpy()
+                in_range = (star_counts >= 0) & (star_counts <= 5)
+                star_counts = np.where(in_range, star_counts, 0) # Out-of-range ratings display "N/A" and colour as zero stars
+                df_display["conviction_stars"] = np.where(in_range, np.asarray(STAR_RATING_STRINGS, dtype=object)[star_counts], "N/A")
 
             for col in ['type', 'direction_label', 'Category', 'status', 'exit_reason', 'rationale', 'target_rationale', 'strategy']:
                 if col in df_display.columns:
@@ -1602,81 +1728,46 @@ class MSPIVisualizerV2:
 
             for ts_col in ['issued_ts', 'last_adjusted_ts']: # Original timestamp in 'timestamp'
                 if ts_col == 'issued_ts' and 'timestamp' in recommendations_df.columns: # Use original timestamp for issued_ts
-                     df_display[ts_col] = recommendations_df['timestamp'].apply(lambda x: datetime.fromisoformat(x).strftime('%H:%M:%S') if pd.notna(x) and isinstance(x, str) and x else "N/A")
+                     df_display[ts_col] = self._format_iso_times(recommendations_df['timestamp'])
                 elif ts_col in df_display.columns: # For 'last_adjusted_ts' or if 'timestamp' is missing
-                     df_display[ts_col] = df_display[ts_col].apply(lambda x: datetime.fromisoformat(x).strftime('%H:%M:%S') if pd.notna(x) and isinstance(x, str) and x else "N/A")
+                     df_display[ts_col] = self._format_iso_times(df_display[ts_col])
 
 
             table_header_values = [default_display_map.get(col, col.replace('_',' ').title()) for col in actual_cols_to_display]
             table_cells_values = [df_display[col_name].tolist() for col_name in actual_cols_to_display]
 
-            font_colors = [(['#EAEAEA'] * len(df_display)) for _ in actual_cols_to_display]
+            font_colors: List[Union[str, List[str]]] = [TABLE_DEFAULT_FONT_COLOR for _ in actual_cols_to_display] # Scalar = whole column (avoids per-cell validation)
 
-            # Color 'direction_label'
+            # Color 'direction_label' (first matching keyword wins)
             if 'direction_label' in actual_cols_to_display:
-                dir_label_idx = actual_cols_to_display.index('direction_label')
-                colors_for_dir_label_col = []
-                for label_val_str in df_display['direction_label'].tolist():
-                    label_val = str(label_val_str).lower()
-                    color = '#EAEAEA' # Default
-                    if 'bullish' in label_val: color = 'lime'
-                    elif 'bearish' in label_val: color = 'red'
-                    elif 'expansion' in label_val: color = 'cyan'
-                    elif 'contraction' in label_val: color = '#DA70D6'
-                    elif 'caution' in label_val: color = 'orange'
-                    elif 'pin risk' in label_val: color = 'yellow'
-                    elif 'neutral' in label_val: color = 'lightgrey'
-                    colors_for_dir_label_col.append(color)
-                font_colors[dir_label_idx] = colors_for_dir_label_col
+                labels_lower = df_display['direction_label'].astype(str).str.lower()
+                font_colors[actual_cols_to_display.index('direction_label')] = np.select(
+                    [labels_lower.str.contains(keyword, regex=False).to_numpy() for keyword, _ in DIRECTION_LABEL_COLORS],
+                    [color for _, color in DIRECTION_LABEL_COLORS], default=TABLE_DEFAULT_FONT_COLOR).tolist()
 
             # Color 'conviction_stars'
-            if 'conviction_stars' in actual_cols_to_display:
-                conv_col_idx = actual_cols_to_display.index('conviction_stars')
-                colors_for_conv_col = []
-                for star_str in df_display['conviction_stars'].tolist():
-                    num_stars = star_str.count("★")
-                    if num_stars == 5: colors_for_conv_col.append('gold')
-                    elif num_stars == 4: colors_for_conv_col.append('#FFD700')
-                    elif num_stars == 3: colors_for_conv_col.append('lightskyblue')
-                    elif num_stars == 2: colors_for_conv_col.append('lightgreen')
-                    else: colors_for_conv_col.append('darkgrey')
-                font_colors[conv_col_idx] = colors_for_conv_col
-
-            # Color 'status'
+            if 'conviction_stars' in actual_cols_to_display and star_counts is not None:
+                font_colors[actual_cols_to_display.index('conviction_stars')] = np.asarray(STAR_RATING_COLORS, dtype=object)[star_counts].tolist()
+
+            # Color 'status' (adjusted = active recommendation whose last update differs from its issue timestamp)
             if 'status' in actual_cols_to_display:
-                status_col_idx = actual_cols_to_display.index('status')
-                colors_for_status_col = []
-
-                # Iterate through the original recommendation dictionaries to get 'timestamp' and 'last_updated_ts'
-                for rec_dict in recommendations_df.to_dict('records'):
-                    status_val = str(rec_dict.get('status', '')).upper()
-                    issued_ts_str = rec_dict.get('timestamp') # Original timestamp when rec was first generated
-                    last_updated_ts_str = rec_dict.get('last_updated_ts') # Timestamp of last parameter adjustment
-
-                    color = '#EAEAEA' # Default
-                    if 'ACTIVE_NEW' in status_val or 'NEW' in status_val :
-                        color = 'lightgreen'
-                    elif 'ACTIVE' in status_val :
-                         # Check if it was adjusted
-                        if issued_ts_str and last_updated_ts_str and last_updated_ts_str != issued_ts_str:
-                            color = 'skyblue' # Adjusted active
-                        else:
-                            color = '#66FF99' # Standard active
-                    elif 'EXITED' in status_val:
-                        color = 'orangered'
-                    elif 'ADJUSTED' in status_val: # Explicit 'ADJUSTED' status
-                        color = 'skyblue'
-                    elif 'NOTE' in status_val:
-                        color = 'lightgrey'
-                    colors_for_status_col.append(color)
-                font_colors[status_col_idx] = colors_for_status_col
-
-
-            table = go.Table(
+                status_upper = recommendations_df['status'].astype(str).str.upper()
+                issued_ts_col = recommendations_df['timestamp'] if 'timestamp' in recommendations_df.columns else pd.Series([None] * n_rows, index=recommendations_df.index)
+                updated_ts_col = recommendations_df['last_updated_ts'] if 'last_updated_ts' in recommendations_df.columns else pd.Series([None] * n_rows, index=recommendations_df.index)
+                was_adjusted = (issued_ts_col.notna() & (issued_ts_col.astype(str) != '') & updated_ts_col.notna() & (updated_ts_col.astype(str) != '') & (updated_ts_col.astype(str) != issued_ts_col.astype(str))).to_numpy()
+                is_new = status_upper.str.contains('NEW', regex=False).to_numpy() # Also covers 'ACTIVE_NEW'
+                is_active = status_upper.str.contains('ACTIVE', regex=False).to_numpy()
+                font_colors[actual_cols_to_display.index('status')] = np.select(
+                    [is_new, is_active & was_adjusted, is_active, status_upper.str.contains('EXITED', regex=False).to_numpy(), status_upper.str.contains('ADJUSTED', regex=False).to_numpy(), status_upper.str.contains('NOTE', regex=False).to_numpy()],
+                    ['lightgreen', 'skyblue', '#66FF99', 'orangered', 'skyblue', 'lightgrey'], default=TABLE_DEFAULT_FONT_COLOR).tolist()
+
+
+            table = dict(
+                type='table',
                 header=dict(values=table_header_values, fill_color='rgb(30, 30, 30)', align='left', font=dict(color='white', size=13, family="Arial Black, sans-serif"), line_color='rgb(60,60,60)', height=40),
                 cells=dict(values=table_cells_values, fill_color='rgb(45, 45, 45)', align='left', font=dict(color=font_colors, size=12, family="Arial, sans-serif"), line_color='rgb(60,60,60)', height=30)
             )
-            fig = go.Figure(data=[table])
+            fig = go.Figure(data=[table]) # Plain dict: the trace is validated once, by the figure
             fig.update_layout(title=chart_title, template=self.config.get("plotly_template","plotly_dark"), height=fig_height, margin=dict(l=15,r=15,t=70,b=20))
             self._save_figure(fig, chart_name, symbol) # Usually not saved for dashboard use
         except Exception as e:
@@ -222,7 +222,7 @@ dashboard_app_logger.info(f"Dash application initialized. App Title: '{app_title
 
 # --- Global Server-Side Caches (shared across callbacks) ---
 SERVER_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {} # Stores [timestamp, data_bundle]
-COMPONENT_HISTORY_CACHE: Dict[str, Deque[Tuple[float, Any]]] = {} # Stores {symbol: deque([(ts, df_slice), ...])}
+COMPONENT_HISTORY_CACHE: Dict[str, Any] = {} # Stores {symbol: ComponentHistoryIndex of strike-aggregated (ts, df_slice) snapshots}
 dashboard_app_logger.info("Global server-side caches (SERVER_CACHE for main data, COMPONENT_HISTORY_CACHE for volval) created.")
 
 # --- Instantiate Backend Components ---
@@ -11,9 +11,12 @@ Connects user interface components (layout.py) to backend logic
 import logging
 import time as pytime
 import re
+import json
+import hashlib
+import threading
 from datetime import datetime, time, date, timedelta
 from typing import Dict, Any, Optional, Tuple, List, Union, Deque, Callable
-from collections import deque
+from collections import deque, OrderedDict
 import inspect
 import copy
 
@@ -69,7 +72,7 @@ def _fallback_format_status_message_impl_cb(message: str, is_error: bool = False
 def _fallback_generate_cache_key_impl_cb(symbol: str, dte_str: str, range_pct: Optional[Union[int, float]]) -> str:
     logger.error(f"FALLBACK (callbacks.py): generate_cache_key for {symbol}"); ts = datetime.now().strftime('%Y%m%d%H%M'); range_val = int(range_pct) if isinstance(range_pct, (int,float)) else 0; return f"fbk_{symbol}_{dte_str}_{range_val}_{ts}"
 
-def _fallback_get_data_from_server_cache_impl_cb(cache_key: Optional[str], server_cache_ref: Dict) -> Optional[Dict[str, Any]]:
+def _fallback_get_data_from_server_cache_impl_cb(cache_key: Optional[str], server_cache_ref: Dict, deep_copy: bool = True) -> Optional[Dict[str, Any]]:
     logger.error(f"FALLBACK (callbacks.py): get_data_from_server_cache for key: {cache_key}")
     if cache_key and isinstance(cache_key, str) and cache_key in server_cache_ref:
         entry = server_cache_ref.get(cache_key)
@@ -80,7 +83,7 @@ def _fallback_get_data_from_server_cache_impl_cb(cache_key: Optional[str], serve
                 logger.warning(f"FALLBACK CACHE: Key '{cache_key}' expired. Returning None.")
                 server_cache_ref.pop(cache_key, None)
                 return None
-            return copy.deepcopy(stored_bundle)
+            return copy.deepcopy(stored_bundle) if deep_copy else stored_bundle
     return None
 
 def _fallback_store_data_in_server_cache_impl_cb(cache_key: Optional[str], data_bundle: Dict[str, Any], server_cache_ref: Dict) -> None:
@@ -133,7 +136,8 @@ try:
     from elite_options_system.services.tradier_fetcher import TradierDataFetcher
     from elite_options_system.core.data_processing import EnhancedDataProcessor
     from elite_options_system.core.strategies import IntegratedTradingSystem
-    from elite_options_system.core.visualizer import MSPIVisualizerV2
+    from elite_options_system.core.visualizer import MSPIVisualizerV2, LOD_STRIKE_AXIS_BY_METHOD
+    from elite_options_system.utils.component_history import ComponentHistoryIndex
     _backend_modules_imported_fully_cb = True
     logger.info("CALLBACKS.PY: Backend module classes imported successfully for type hinting and instance checks.")
 except ImportError as _backend_module_import_error_cb_final:
@@ -143,6 +147,14 @@ except ImportError as _backend_module_import_error_cb_final:
     class EnhancedDataProcessor: pass
     class IntegratedTradingSystem: pass
     class MSPIVisualizerV2: pass
+    LOD_STRIKE_AXIS_BY_METHOD: Dict[str, str] = {}
+    class ComponentHistoryIndex:
+        def __init__(self, maxlen: int = 10, **kwargs): self._entries: Deque[Tuple[float, Any]] = deque(maxlen=maxlen)
+        def add(self, ts: float, frame: Any) -> bool: self._entries.appendleft((ts, frame)); return True
+        def __len__(self) -> int: return len(self._entries)
+        def __iter__(self): return iter(self._entries)
+        @property
+        def latest_ts(self) -> Optional[float]: return self._entries[0][0] if self._entries else None
 
 _layout_ids_imported_successfully_cb = False
 CHART_IDS_CB: List[str] = []
@@ -198,6 +210,64 @@ CHARTS_NEEDING_FIGURE_STATE_CB: List[str] = get_config_value_cb(
     ["mspi_components", "net_volval_comp", "combined_rolling_flow_chart", "sdag_multiplicative",
      "sdag_directional", "sdag_weighted", "sdag_volatility_focused", "volatility_regime", "time_decay"]
 )
+# Chart ID (or MSPI card view) -> visualizer method name. Resolved into dispatchers once at registration.
+VIZ_METHOD_MAP_CB: Dict[str, str] = {
+    "mspi_heatmap": "create_mspi_heatmap",
+    "net_volume_pressure_heatmap": "create_net_volume_pressure_heatmap",
+    "net_value_heatmap": "create_net_value_heatmap",
+    "mspi_components": "create_elite_impact_score_chart", "net_volval_comp": "create_volval_comparison",
+    "combined_rolling_flow_chart": "create_combined_rolling_flow_chart",
+    ID_NET_GREEK_FLOW_HEATMAP_CHART_CB: "create_net_greek_flow_heatmap",
+    "volatility_regime": "create_volatility_regime_visualization", "time_decay": "create_time_decay_visualization",
+    "sdag_multiplicative": "plot_sdag_multiplicative", "sdag_directional": "plot_sdag_directional",
+    "sdag_weighted": "plot_sdag_weighted", "sdag_volatility_focused": "plot_sdag_volatility_focused",
+    "key_levels": "create_key_levels_visualization", "trading_signals": "create_trading_signals_visualization",
+    "recommendations_table": "create_strategy_recommendations_table"
+}
+MSPI_CARD_VIEWS_CB: List[str] = ["mspi_heatmap", "net_volume_pressure_heatmap"]
+
+def _compile_viz_dispatcher_cb(viz_method: Callable[..., Any]) -> Callable[[Dict[str, Any]], Any]:
+    """ Resolves the method's named parameters once and returns a closure passing only those arguments. """
+    accepted_params = frozenset(name for name, param in inspect.signature(viz_method).parameters.items() if param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD))
+    def dispatch(args_for_viz_method: Dict[str, Any]) -> Any:
+        return viz_method(**{k: v for k, v in args_for_viz_method.items() if k in accepted_params})
+    return dispatch
+
+# Chart views re-rendered via dash.Patch (changed trace arrays / layout keys only). The patch is diffed against the
+# figure the browser holds (the graph's 'figure' State), so only charts in CHARTS_NEEDING_FIGURE_STATE_CB qualify.
+INCREMENTAL_UPDATE_VIEWS_CB: List[str] = get_config_value_cb(
+    ["visualization_settings", "mspi_visualizer", "incremental_update_chart_views"],
+    ["combined_rolling_flow_chart"]
+)
+
+def _build_figure_patch_cb(figure_update: Dict[str, Any]) -> Any:
+    """ Converts a visualizer figure diff into a dash.Patch (or no_update when nothing changed). """
+    data_changes = figure_update.get("data") or {}; layout_changes = figure_update.get("layout") or {}
+    if not data_changes and not layout_changes: return no_update
+    patched_figure = dash.Patch()
+    for trace_idx, trace_changes in data_changes.items():
+        for attr_name, attr_value in trace_changes.items():
+            if attr_value is None: del patched_figure["data"][trace_idx][attr_name]
+            else: patched_figure["data"][trace_idx][attr_name] = attr_value
+    for layout_key, layout_value in layout_changes.items():
+        if layout_value is None: del patched_figure["layout"][layout_key]
+        else: patched_figure["layout"][layout_key] = layout_value
+    return patched_figure
+
+FIGURE_CACHE_MAX_ENTRIES_CB: int = int(get_config_value_cb(["system_settings", "dashboard_figure_cache_max_entries"], 128))
+
+def _compute_config_hash_cb(*config_objs: Any) -> str:
+    """ Stable short hash of one or more config dicts (used in figure cache keys). """
+    try: return hashlib.sha1(json.dumps(config_objs, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    except Exception as e_cfg_hash:
+        logger.warning(f"Could not hash config for figure cache key: {e_cfg_hash}. Caching keyed without config hash.")
+        return "unhashable"
+
+def _freeze_ui_state_cb(ui_value: Any) -> str:
+    """ Canonical string form of a UI input/state value so it can be part of a hashable cache key. """
+    try: return json.dumps(ui_value, sort_keys=True, default=str)
+    except Exception: return repr(ui_value)
+
 
 def register_callbacks(
     app: dash.Dash,
@@ -207,7 +277,7 @@ def register_callbacks(
     its_instance: Optional[IntegratedTradingSystem],
     visualizer_instance: Optional[MSPIVisualizerV2],
     server_cache_ref: Dict[str, Tuple[float, Dict[str, Any]]],
-    component_history_ref: Dict[str, Deque[Tuple[float, Any]]]
+    component_history_ref: Dict[str, "ComponentHistoryIndex"]
 ) -> None:
     """ Registers all callbacks for the dashboard application (V2.4.5 - MSPI Card Toggle). """
 
@@ -218,6 +288,23 @@ def register_callbacks(
 
     logger.info("Registering dashboard callbacks (V2.4.5 - MSPI Card Toggle)...")
 
+    # --- Figure memoization (shared by all chart callbacks) ---
+    # Key: (cache key, snapshot store time, chart id, selected view, range, config hash, trace visibility, history marker).
+    # Values are serialized figure JSON, so a hit skips the bundle deep copy, the visualizer and plotly validation.
+    # Hits always return the figure: the server cannot know what each browser/tab currently shows.
+    figure_cache: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+    figure_cache_lock = threading.Lock()
+    config_hash_memo: Dict[str, Any] = {"source_ids": None, "hash": ""}
+
+    def _get_visualizer_config_hash() -> str:
+        compiled_hash = getattr(visualizer_instance, "config_hash", None) # Computed once when the visualizer compiles its config
+        if isinstance(compiled_hash, str): return compiled_hash
+        full_cfg = getattr(visualizer_instance, "full_app_config", None); viz_cfg = getattr(visualizer_instance, "config", None)
+        source_ids = (id(full_cfg), id(viz_cfg))
+        if config_hash_memo["source_ids"] != source_ids:
+            config_hash_memo["hash"] = _compute_config_hash_cb(full_cfg, viz_cfg); config_hash_memo["source_ids"] = source_ids
+        return config_hash_memo["hash"]
+
     @app.callback(
         Output(ID_INTERVAL_TIMER_CB, "interval"),
         Output(ID_INTERVAL_TIMER_CB, "disabled"),
@@ -363,15 +450,17 @@ def register_callbacks(
 
         if not has_critical_error_flag and isinstance(data_bundle_for_cache.get("final_metric_rich_df_obj"), pd.DataFrame) and not data_bundle_for_cache.get("final_metric_rich_df_obj").empty:
             metric_df_for_hist_main = data_bundle_for_cache["final_metric_rich_df_obj"]
+            hist_net_vol_col = get_config_value_cb(["visualization_settings","mspi_visualizer","column_names","net_volume_pressure"],"net_volume_pressure")
+            hist_net_val_col = get_config_value_cb(["visualization_settings","mspi_visualizer","column_names","net_value_pressure"],"net_value_pressure")
             if symbol_main_cb not in component_history_ref:
-                hist_maxlen_main = get_config_value_cb(["system_settings","df_history_maxlen"],10); component_history_ref[symbol_main_cb] = deque(maxlen=int(hist_maxlen_main))
-            hist_cols_main = ['strike', get_config_value_cb(["visualization_settings","mspi_visualizer","column_names","net_volume_pressure"],"net_volume_pressure"), get_config_value_cb(["visualization_settings","mspi_visualizer","column_names","net_value_pressure"],"net_value_pressure")] + [c for c in metric_df_for_hist_main.columns if 'volmbs_' in c or 'valuebs_' in c]
+                hist_maxlen_main = get_config_value_cb(["system_settings","df_history_maxlen"],10); component_history_ref[symbol_main_cb] = ComponentHistoryIndex(maxlen=int(hist_maxlen_main), strike_col='strike', net_vol_col=hist_net_vol_col, net_val_col=hist_net_val_col)
+            hist_cols_main = ['strike', hist_net_vol_col, hist_net_val_col] + [c for c in metric_df_for_hist_main.columns if 'volmbs_' in c or 'valuebs_' in c]
             avail_hist_cols_main = [c for c in hist_cols_main if c in metric_df_for_hist_main.columns]
             if avail_hist_cols_main:
                 hist_slice_main = metric_df_for_hist_main[avail_hist_cols_main].copy()
                 for col_h_main in hist_slice_main.columns:
                     if col_h_main != 'strike': hist_slice_main[col_h_main] = pd.to_numeric(hist_slice_main[col_h_main], errors='coerce').fillna(0.0)
-                component_history_ref[symbol_main_cb].appendleft((pytime.time(), hist_slice_main))
+                component_history_ref[symbol_main_cb].add(pytime.time(), hist_slice_main) # Aggregated by strike once, here
                 main_data_cb_logger.debug(f"Added data to component history for '{symbol_main_cb}'. Size: {len(component_history_ref[symbol_main_cb])}")
 
         final_status_message_text = f"✓ Data for {symbol_main_cb} ({dte_str_main_cb}) loaded." if not status_messages_overall else f"⚠ Issues for {symbol_main_cb}: {'; '.join(s for s in status_messages_overall if s)}"
@@ -404,11 +493,31 @@ def register_callbacks(
         elif chart_id_cb_factory == "mspi_heatmap": # The dcc.Graph for MSPI view
              callback_inputs_list.append(Input(ID_MSPI_CHART_TOGGLE_SELECTOR_CB, "value"))
 
+        # Level-of-detail charts re-render on zoom (relayoutData) to refine the strike window.
+        is_lod_chart = VIZ_METHOD_MAP_CB.get(chart_id_cb_factory) in LOD_STRIKE_AXIS_BY_METHOD
+        if is_lod_chart:
+            callback_inputs_list.append(Input(chart_id_cb_factory, "relayoutData"))
+
         if is_fig_state_needed:
             callback_states_list.append(State(chart_id_cb_factory, "figure"))
-
-        @app.callback(callback_outputs_list, callback_inputs_list, callback_states_list, prevent_initial_call=True)
-        def generated_chart_update_callback(cached_data_key_chart: Optional[str], *dynamic_args: Any) -> go.Figure:
+        incremental_views = [view for view in (MSPI_CARD_VIEWS_CB if chart_id_cb_factory == "mspi_heatmap" else [chart_id_cb_factory]) if view in INCREMENTAL_UPDATE_VIEWS_CB]
+        if incremental_views and not is_fig_state_needed:
+            chart_factory_instance_logger.warning(f"Incremental updates configured for {incremental_views} but chart '{chart_id_cb_factory}' has no figure State. Sending full figures.")
+            incremental_views = []
+
+        # Resolve visualizer methods and their signatures once, at registration time.
+        chart_views = MSPI_CARD_VIEWS_CB if chart_id_cb_factory == "mspi_heatmap" else [chart_id_cb_factory]
+        compiled_dispatchers: Dict[str, Tuple[str, Optional[Callable[[Dict[str, Any]], Any]]]] = {}
+        for chart_view in chart_views:
+            view_method_name = VIZ_METHOD_MAP_CB.get(chart_view)
+            if not view_method_name: continue
+            view_method = getattr(visualizer_instance, view_method_name, None) if isinstance(visualizer_instance, MSPIVisualizerV2) else None
+            compiled_dispatchers[chart_view] = (view_method_name, _compile_viz_dispatcher_cb(view_method) if callable(view_method) else None)
+
+        # The initial call is kept so a chart mounted by a tab switch renders the current snapshot on first view.
+        # (Only the active tab's charts are mounted, and Dash only runs callbacks for mounted components.)
+        @app.callback(callback_outputs_list, callback_inputs_list, callback_states_list, prevent_initial_call=False)
+        def generated_chart_update_callback(cached_data_key_chart: Optional[str], *dynamic_args: Any) -> Union[go.Figure, Dict[str, Any], dash.Patch]:
             chart_update_cb_start_time = pytime.time()
             selected_metric_dropdown_value: Optional[str] = None # For Greek heatmap or MSPI toggle
             current_range_slider_val_chart: Optional[Union[int, float]] = None
@@ -435,6 +544,11 @@ def register_callbacks(
                     selected_metric_dropdown_value = default_val
                     chart_factory_instance_logger.warning(f"Missing expected arg for dropdown (Input) for chart {chart_id_cb_factory}. Using default: {default_val}")
 
+            relayout_data_chart: Optional[Dict[str, Any]] = None
+            if is_lod_chart:
+                if len(dynamic_args) > current_dynamic_arg_index: relayout_data_chart = dynamic_args[current_dynamic_arg_index]
+                current_dynamic_arg_index += 1
+
             if len(dynamic_args) > current_dynamic_arg_index:
                 current_range_slider_val_chart = dynamic_args[current_dynamic_arg_index]
                 current_dynamic_arg_index += 1
@@ -445,6 +559,16 @@ def register_callbacks(
             if is_fig_state_needed:
                 if len(dynamic_args) > current_dynamic_arg_index:
                     previous_fig_state_chart = dynamic_args[current_dynamic_arg_index]
+                current_dynamic_arg_index += 1
+
+            trace_visibility_state: Dict[str,Any] = {}
+            if is_fig_state_needed and isinstance(previous_fig_state_chart,dict) and isinstance(previous_fig_state_chart.get('data'),list):
+                for trace_data_item in previous_fig_state_chart['data']:
+                    if isinstance(trace_data_item,dict) and 'name' in trace_data_item: trace_visibility_state[trace_data_item['name']] = trace_data_item.get('visible', True)
+
+            lod_viewport_chart: Optional[Tuple[float, float]] = None
+            if is_lod_chart and isinstance(visualizer_instance, MSPIVisualizerV2):
+                lod_viewport_chart = visualizer_instance.lod_viewport_from_relayout(VIZ_METHOD_MAP_CB[chart_id_cb_factory], relayout_data_chart, previous_fig_state_chart)
 
             chart_factory_instance_logger.info(
                 f"Chart Update START for '{chart_id_cb_factory}'. Key: '{cached_data_key_chart}'. "
@@ -453,19 +577,39 @@ def register_callbacks(
             )
 
             if not cached_data_key_chart: return create_empty_figure_cb(title=f"{chart_display_title_default} - Waiting for Initial Data")
-            data_bundle_chart = get_data_from_server_cache_cb(cached_data_key_chart, server_cache_ref)
+
+            # Memoization: peek at the snapshot's store time without deep-copying the bundle.
+            figure_cache_key: Optional[Tuple[Any, ...]] = None
+            cache_entry_peek = server_cache_ref.get(cached_data_key_chart)
+            if isinstance(cache_entry_peek, tuple) and len(cache_entry_peek) == 2:
+                snapshot_stored_ts = cache_entry_peek[0]
+                snapshot_timeout = get_config_value_cb(["system_settings", "dashboard_cache_timeout_seconds"], 300)
+                history_marker: Any = None
+                if chart_id_cb_factory == "net_volval_comp" and isinstance(cache_entry_peek[1], dict):
+                    symbol_history = component_history_ref.get(cache_entry_peek[1].get("symbol"))
+                    history_marker = (len(symbol_history), symbol_history.latest_ts) if symbol_history else 0
+                figure_cache_key = (
+                    cached_data_key_chart, snapshot_stored_ts, chart_id_cb_factory, selected_metric_dropdown_value,
+                    _freeze_ui_state_cb(current_range_slider_val_chart), _get_visualizer_config_hash(),
+                    _freeze_ui_state_cb(trace_visibility_state), history_marker, lod_viewport_chart
+                )
+                if isinstance(snapshot_timeout, (int, float)) and (pytime.time() - snapshot_stored_ts) <= snapshot_timeout:
+                    with figure_cache_lock:
+                        cached_figure_json = figure_cache.get(figure_cache_key)
+                        if cached_figure_json is not None: figure_cache.move_to_end(figure_cache_key)
+                    if cached_figure_json is not None:
+                        chart_factory_instance_logger.info(f"Chart Update END for '{chart_id_cb_factory}' (figure cache hit). Duration: {pytime.time() - chart_update_cb_start_time:.3f}s.")
+                        return json.loads(cached_figure_json)
+
+            data_bundle_chart = get_data_from_server_cache_cb(cached_data_key_chart, server_cache_ref, deep_copy=False)
             if data_bundle_chart is None: return create_empty_figure_cb(title=f"{chart_display_title_default} - Data Expired/Not Found in Cache")
 
             error_in_bundle_chart = data_bundle_chart.get("error"); symbol_chart = data_bundle_chart.get("symbol", "N/A")
             if error_in_bundle_chart: return create_empty_figure_cb(title=f"{symbol_chart} - {chart_display_title_default}: Data Error", reason=str(error_in_bundle_chart)[:100])
 
+            # The processor's canonical DataFrame is always stored in the bundle; it is used as-is (no JSON-chain rebuild).
             options_df_plot_chart = data_bundle_chart.get("final_metric_rich_df_obj")
-            if not isinstance(options_df_plot_chart, pd.DataFrame) or options_df_plot_chart.empty:
-                options_list_plot_chart = data_bundle_chart.get("processed_data", {}).get("options_chain", [])
-                if isinstance(options_list_plot_chart, list) and options_list_plot_chart:
-                    try: options_df_plot_chart = pd.DataFrame.from_records(options_list_plot_chart)
-                    except Exception as e_df_rec_chart: chart_factory_instance_logger.error(f"DF reconstruct error for '{chart_id_cb_factory}': {e_df_rec_chart}", exc_info=True); options_df_plot_chart = pd.DataFrame()
-                else: options_df_plot_chart = pd.DataFrame()
+            if not isinstance(options_df_plot_chart, pd.DataFrame): options_df_plot_chart = pd.DataFrame()
 
             if options_df_plot_chart.empty and chart_id_cb_factory != "recommendations_table": return create_empty_figure_cb(f"{symbol_chart} - {chart_display_title_default}: No Chart Data")
 
@@ -473,38 +617,17 @@ def register_callbacks(
                 chart_factory_instance_logger.error(f"Visualizer instance is not a valid MSPIVisualizerV2 object for chart {chart_id_cb_factory}.")
                 return create_empty_figure_cb(f"{chart_display_title_default} - Visualizer Error (Instance Invalid)")
 
-            viz_method_map_final: Dict[str, str] = {
-                "mspi_heatmap": "create_mspi_heatmap",
-                "net_volume_pressure_heatmap": "create_net_volume_pressure_heatmap",
-                "net_value_heatmap": "create_net_value_heatmap",
-                "mspi_components": "create_elite_impact_score_chart", "net_volval_comp": "create_volval_comparison",
-                "combined_rolling_flow_chart": "create_combined_rolling_flow_chart",
-                ID_NET_GREEK_FLOW_HEATMAP_CHART_CB: "create_net_greek_flow_heatmap",
-                "volatility_regime": "create_volatility_regime_visualization", "time_decay": "create_time_decay_visualization",
-                "sdag_multiplicative": "plot_sdag_multiplicative", "sdag_directional": "plot_sdag_directional",
-                "sdag_weighted": "plot_sdag_weighted", "sdag_volatility_focused": "plot_sdag_volatility_focused",
-                "key_levels": "create_key_levels_visualization", "trading_signals": "create_trading_signals_visualization",
-                "recommendations_table": "create_strategy_recommendations_table"
-            }
+            chart_view_key = chart_id_cb_factory
+            if chart_id_cb_factory == "mspi_heatmap" and selected_metric_dropdown_value in compiled_dispatchers: chart_view_key = selected_metric_dropdown_value
+            elif chart_id_cb_factory == "mspi_heatmap" and selected_metric_dropdown_value != "mspi_heatmap":
+                chart_factory_instance_logger.warning(f"Unknown view '{selected_metric_dropdown_value}' for MSPI card toggle. Defaulting to MSPI heatmap.")
 
-            target_method_name_chart: Optional[str] = None
-            if chart_id_cb_factory == "mspi_heatmap":
-                if selected_metric_dropdown_value == "mspi_heatmap":
-                    target_method_name_chart = viz_method_map_final["mspi_heatmap"]
-                elif selected_metric_dropdown_value == "net_volume_pressure_heatmap":
-                    target_method_name_chart = viz_method_map_final["net_volume_pressure_heatmap"]
-                else:
-                    chart_factory_instance_logger.warning(f"Unknown view '{selected_metric_dropdown_value}' for MSPI card toggle. Defaulting to MSPI heatmap.")
-                    target_method_name_chart = viz_method_map_final["mspi_heatmap"]
-            else:
-                target_method_name_chart = viz_method_map_final.get(chart_id_cb_factory)
-
-            if not target_method_name_chart:
+            if chart_view_key not in compiled_dispatchers:
                 chart_factory_instance_logger.error(f"No visualizer method mapped for chart ID '{chart_id_cb_factory}' or selected view '{selected_metric_dropdown_value}'.")
                 return create_empty_figure_cb(f"{chart_display_title_default} - Plot Method Not Mapped")
 
-            viz_method_to_call = getattr(visualizer_instance, target_method_name_chart, None)
-            if not callable(viz_method_to_call):
+            target_method_name_chart, viz_dispatcher = compiled_dispatchers[chart_view_key]
+            if viz_dispatcher is None:
                 chart_factory_instance_logger.error(f"Visualizer method '{target_method_name_chart}' not found or not callable for chart ID '{chart_id_cb_factory}'.")
                 return create_empty_figure_cb(f"{chart_display_title_default} - Plot Logic Missing ({target_method_name_chart})")
 
@@ -541,18 +664,13 @@ def register_callbacks(
             elif chart_id_cb_factory == "key_levels": args_for_viz_method["key_levels_data"] = data_bundle_chart.get("key_levels", {})
             elif chart_id_cb_factory == "trading_signals": args_for_viz_method["trading_signals_data"] = data_bundle_chart.get("trading_signals", {})
             elif chart_id_cb_factory == "net_volval_comp": args_for_viz_method["component_history"] = component_history_ref.get(symbol_chart)
+            if is_lod_chart:
+                args_for_viz_method["lod_viewport"] = lod_viewport_chart
+                args_for_viz_method["lod_keep_strikes"] = [lvl.get("strike") for lvl_list in (data_bundle_chart.get("key_levels") or {}).values() if isinstance(lvl_list, list) for lvl in lvl_list if isinstance(lvl, dict)]
 
-            if is_fig_state_needed and previous_fig_state_chart:
-                trace_visibility_state: Dict[str,Any] = {}
-                if isinstance(previous_fig_state_chart,dict) and isinstance(previous_fig_state_chart.get('data'),list):
-                    for trace_data_item in previous_fig_state_chart['data']:
-                        if isinstance(trace_data_item,dict) and 'name' in trace_data_item: trace_visibility_state[trace_data_item['name']] = trace_data_item.get('visible', True)
-                if trace_visibility_state: args_for_viz_method["trace_visibility"] = trace_visibility_state
+            if trace_visibility_state: args_for_viz_method["trace_visibility"] = trace_visibility_state
 
-            method_signature_params_final = inspect.signature(viz_method_to_call).parameters
-            final_args_to_pass_to_viz = {k:v for k,v in args_for_viz_method.items() if k in method_signature_params_final}
-
-            try: generated_figure_obj = viz_method_to_call(**final_args_to_pass_to_viz)
+            try: generated_figure_obj = viz_dispatcher(args_for_viz_method)
             except Exception as e_viz_call_final:
                 chart_factory_instance_logger.error(f"Visualizer method '{target_method_name_chart}' failed for {symbol_chart} on chart '{chart_id_cb_factory}': {e_viz_call_final}", exc_info=True)
                 return create_empty_figure_cb(f"{symbol_chart} - {chart_display_title_default}: Plot Gen Error", reason=str(e_viz_call_final)[:150])
@@ -561,6 +679,26 @@ def register_callbacks(
                 chart_factory_instance_logger.error(f"Visualizer method '{target_method_name_chart}' for chart '{chart_id_cb_factory}' returned type {type(generated_figure_obj)}, expected go.Figure.")
                 return create_empty_figure_cb(f"{chart_display_title_default} - Invalid Plot Output", reason=f"Expected Figure, got {type(generated_figure_obj)}")
 
+            if figure_cache_key is not None:
+                figure_json: Optional[str] = None
+                try:
+                    figure_json = generated_figure_obj.to_json()
+                    with figure_cache_lock:
+                        figure_cache[figure_cache_key] = figure_json; figure_cache.move_to_end(figure_cache_key)
+                        while len(figure_cache) > FIGURE_CACHE_MAX_ENTRIES_CB: figure_cache.popitem(last=False)
+                except Exception as e_fig_cache:
+                    chart_factory_instance_logger.warning(f"Could not memoize figure for '{chart_id_cb_factory}': {e_fig_cache}")
+
+                # Incremental mode: diff against the figure this browser actually holds (its State), so send only what changed.
+                if chart_view_key in incremental_views and figure_json is not None and isinstance(previous_fig_state_chart, dict) and previous_fig_state_chart.get("data"):
+                    try:
+                        figure_update = visualizer_instance.compute_figure_update(previous_fig_state_chart, json.loads(figure_json))
+                        if figure_update is not None:
+                            chart_factory_instance_logger.info(f"Chart Update END for '{chart_id_cb_factory}' (patch: {len(figure_update['data'])} traces, {len(figure_update['layout'])} layout keys). Duration: {pytime.time() - chart_update_cb_start_time:.3f}s.")
+                            return _build_figure_patch_cb(figure_update)
+                    except Exception as e_fig_patch:
+                        chart_factory_instance_logger.warning(f"Incremental update failed for '{chart_id_cb_factory}', sending full figure: {e_fig_patch}")
+
             chart_factory_instance_logger.info(f"Chart Update END for '{chart_id_cb_factory}'. Duration: {pytime.time() - chart_update_cb_start_time:.3f}s.")
             return generated_figure_obj
         return generated_chart_update_callback
@@ -193,10 +193,11 @@ def generate_cache_key(symbol: str, dte_str: str, range_pct: Optional[Union[int,
     logger.debug(f"UTILS: Generated cache key: '{cache_key_generated}'")
     return cache_key_generated
 
-def get_data_from_server_cache(cache_key: Optional[str], server_cache_ref: Dict[str, Tuple[float, Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+def get_data_from_server_cache(cache_key: Optional[str], server_cache_ref: Dict[str, Tuple[float, Dict[str, Any]]], deep_copy: bool = True) -> Optional[Dict[str, Any]]:
     """
     Retrieves data from the main server-side cache if the key exists and data hasn't expired.
-    Returns a deep copy of the cached bundle to prevent mutation issues.
+    Returns a deep copy of the cached bundle to prevent mutation issues, unless deep_copy=False
+    (read-only consumers such as chart callbacks, whose visualizer methods copy before mutating).
     Expects the cached data bundle to have 'options_chain' as a list-of-dicts.
     """
     cache_get_logger = logger.getChild("CacheGet")
@@ -228,6 +229,7 @@ def get_data_from_server_cache(cache_key: Optional[str], server_cache_ref: Dict[
         cache_get_logger.warning(f"Cache data for key '{cache_key}': 'options_chain' is not a list (Type: {type(options_chain_in_bundle)}). Plotting might fail if expecting list of records.")
 
     cache_get_logger.debug(f"Retrieved valid (non-expired) data bundle for key: '{cache_key}'. Age: {age_seconds:.1f}s.")
+    if not deep_copy: return stored_data_bundle
     try:
         return copy.deepcopy(stored_data_bundle)
     except Exception as e_deepcopy:
@@ -0,0 +1,133 @@
+# test_async_database.py
+"""Binary COPY decoding and the row-wise fallback of the async access layer (no server needed)."""
+import asyncio
+import logging
+import struct
+from collections import namedtuple
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("psycopg")
+pytest.importorskip("psycopg_pool")
+
+from elite_options_system.utils import async_database
+from elite_options_system.utils.async_database import AsyncDatabase, PGCOPY_SIGNATURE, PGCOPY_TRAILER, decode_binary_copy, _rows_to_frame
+
+logging.disable(logging.CRITICAL)
+
+_WIRE_FORMATS = {"int8": ">q", "int4": ">i", "float8": ">d", "float4": ">f", "bool": ">?"}
+Column = namedtuple("Column", ["name", "type_code"])
+
+
+def _binary_copy(rows, types) -> bytes:
+    """A binary COPY stream as the server sends it (NULL fields are written as length -1)."""
+    out = [PGCOPY_SIGNATURE, struct.pack(">ii", 0, 0)]
+    for row in rows:
+        out.append(struct.pack(">h", len(row)))
+        for value, pg_type in zip(row, types):
+            if value is None: out.append(struct.pack(">i", -1)); continue
+            data = struct.pack(_WIRE_FORMATS[pg_type], value)
+            out.append(struct.pack(">i", len(data)) + data)
+    out.append(PGCOPY_TRAILER)
+    return b"".join(out)
+
+
+def test_decode_binary_copy_matches_the_rows():
+    rng = np.random.default_rng(3)
+    dates = np.arange(20240101, 20240101 + 500, dtype=np.int64); values = rng.normal(size=500)
+    payload = _binary_copy(list(zip(dates.tolist(), values.tolist())), ["int8", "float8"])
+    frame = decode_binary_copy(payload, [("date", "int8"), ("value", "float8")])
+    assert list(frame.columns) == ["date", "value"] and frame["date"].dtype == np.int64 and frame["value"].dtype == np.float64
+    np.testing.assert_array_equal(frame["date"].to_numpy(), dates); np.testing.assert_array_equal(frame["value"].to_numpy(), values)
+
+
+def test_decode_binary_copy_mixed_widths_and_nan():
+    payload = _binary_copy([(1, 2.5, True, float("nan")), (2, -1.0, False, 7.0)], ["int4", "float4", "bool", "float8"])
+    frame = decode_binary_copy(payload, [("a", "int4"), ("b", "float4"), ("c", "bool"), ("d", "float8")])
+    assert frame["a"].tolist() == [1, 2] and frame["b"].tolist() == [2.5, -1.0] and frame["c"].tolist() == [True, False]
+    assert np.isnan(frame["d"].iloc[0]) and frame["d"].iloc[1] == 7.0
+
+
+def test_decode_binary_copy_empty_stream():
+    frame = decode_binary_copy(_binary_copy([], ["int8"]), [("date", "int8")])
+    assert frame.empty and list(frame.columns) == ["date"]
+
+
+def test_decode_binary_copy_rejects_variable_layouts():
+    columns = [("date", "int8"), ("value", "float8")]
+    assert decode_binary_copy(_binary_copy([(20240101, None), (20240102, 1.0)], ["int8", "float8"]), columns) is None # NULL field
+    assert decode_binary_copy(_binary_copy([(20240101, 1.0)], ["int8", "float8"]), [("date", "int8"), ("value", "float4")]) is None # Wrong width
+    assert decode_binary_copy(_binary_copy([(20240101, 1.0)], ["int8", "float8"]), [("date", "int8"), ("value", "numeric")]) is None # Not fixed-width
+    assert decode_binary_copy(b"not a copy stream", columns) is None
+
+
+def test_rows_to_frame_types_columns():
+    description = [Column("date", 20), Column("price", 1700), Column("volume", 20), Column("flag", 16), Column("symbol", 25)]
+    rows = [(20240101, Decimal("1.5"), 10, True, "SPY"), (20240102, None, None, False, "SPY")]
+    frame = _rows_to_frame(rows, description)
+    assert frame["date"].dtype == np.int64 and frame["flag"].dtype == bool and frame["symbol"].dtype == object
+    assert frame["price"].dtype == np.float64 and frame["price"].iloc[0] == 1.5 and np.isnan(frame["price"].iloc[1])
+    assert frame["volume"].dtype == np.float64 and np.isnan(frame["volume"].iloc[1]) # Nullable ints widen to float
+
+
+# --- copy_frame against a fake pool ---
+
+class _FakeCopy:
+    def __init__(self, payload): self.blocks = [payload[i:i + 64] for i in range(0, len(payload), 64)]
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc_info): return False
+    def __aiter__(self): return self._iterate()
+    async def _iterate(self):
+        for block in self.blocks: yield memoryview(block)
+
+
+class _FakeCursor:
+    def __init__(self, pool): self.pool = pool
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc_info): return False
+    def copy(self, statement, params=None): self.pool.statements.append(statement); return _FakeCopy(self.pool.payload)
+
+
+class _FakeConnection:
+    def __init__(self, pool): self.pool = pool
+    async def __aenter__(self): return self
+    async def __aexit__(self, *exc_info): return False
+    def cursor(self, binary=False): return _FakeCursor(self.pool)
+
+
+class _FakePool:
+    def __init__(self, payload): self.payload = payload; self.statements = []
+    def connection(self): return _FakeConnection(self)
+
+
+def _fake_database(payload) -> AsyncDatabase:
+    db = AsyncDatabase.__new__(AsyncDatabase)
+    db.instance_logger = async_database.logger; db.pool = _FakePool(payload)
+    return db
+
+
+def test_get_metric_histories_decodes_each_copy_stream():
+    db = _fake_database(_binary_copy([(20240101, 1.0), (20240102, 2.0)], ["int8", "float8"]))
+    histories = asyncio.run(db.get_metric_histories("SPY", ["a_mspi_und_avg", "hp_eod_und", "not_a_metric"], 30))
+    assert set(histories) == {"a_mspi_und_avg", "hp_eod_und"}
+    assert histories["hp_eod_und"]["value"].tolist() == [1.0, 2.0] and histories["hp_eod_und"]["date"].dtype == np.int64
+    assert all(stmt.startswith("COPY (") and stmt.endswith("TO STDOUT (FORMAT BINARY)") for stmt in db.pool.statements)
+
+
+def test_copy_frame_falls_back_to_a_row_fetch(monkeypatch):
+    db = _fake_database(_binary_copy([(20240101, None)], ["int8", "float8"]))
+    fallback = pd.DataFrame({"date": [20240101], "value": [np.nan]})
+    async def fake_fetch_frame(sql, params=None): return fallback
+    monkeypatch.setattr(db, "fetch_frame", fake_fetch_frame)
+    frame = asyncio.run(db.copy_frame("SELECT 1", None, [("date", "int8"), ("value", "float8")]))
+    assert frame is fallback
+
+
+def test_get_ohlcv_frame_restores_the_column_layout():
+    db = _fake_database(_binary_copy([(20240101, 1.0, 2.0, 0.5, 1.5, float("nan"))], ["int8"] + ["float8"] * 5))
+    frame = asyncio.run(db.get_ohlcv_frame("SPY", 20240101, 20240102))
+    assert list(frame.columns) == ["symbol", "date", "open", "high", "low", "close", "volume"]
+    assert frame["symbol"].tolist() == ["SPY"] and np.isnan(frame["volume"].iloc[0])
@@ -0,0 +1,131 @@
+# test_bulk_loaders.py
+"""
+COPY bulk loaders: the CSV payload and merge SQL against a recording connection, plus an optional benchmark
+against a real server (set PG_DSN, e.g. "dbname=postgres user=postgres host=localhost", to run it).
+"""
+import io
+import logging
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import psycopg2
+import pytest
+
+from elite_options_system.utils.database import (
+    DAILY_OHLCV_COLUMNS, bulk_load_daily_eots_metrics_pg, bulk_load_daily_ohlcv_pg, create_tables, store_daily_ohlcv_batch_pg
+)
+
+logging.disable(logging.CRITICAL)
+
+
+class RecordingCursor:
+    def __init__(self, conn): self.conn = conn; self.rowcount = -1
+    def __enter__(self): return self
+    def __exit__(self, *exc_info): return False
+    def execute(self, sql, params=None):
+        self.conn.statements.append(" ".join(sql.split()))
+        if "INSERT INTO" in sql: self.rowcount = self.conn.merged_rows
+    def copy_expert(self, sql, buffer): self.conn.copies.append((" ".join(sql.split()), buffer.read()))
+
+
+class RecordingConnection:
+    def __init__(self, merged_rows: int = 0):
+        self.statements = []; self.copies = []; self.commits = 0; self.rollbacks = 0; self.merged_rows = merged_rows
+    def cursor(self, *args, **kwargs): return RecordingCursor(self)
+    def commit(self): self.commits += 1
+    def rollback(self): self.rollbacks += 1
+
+
+def _ohlcv_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "symbol": ["SPY", "SPY", "QQQ", "SPY"], "date": [20240102.0, 20240103.0, 20240102.0, 20240102.0],
+        "open": [1.0, 2.0, 3.0, 9.0], "high": [1.5, 2.5, np.nan, 9.5], "low": [0.5, 1.5, 2.5, 8.5], "close": [1.2, 2.2, 3.2, 9.2],
+        "volume": [1000.0, np.nan, 3000.0, 9000.0],
+    })
+
+
+def _parse_payload(payload: str, columns) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(payload), header=None, names=list(columns) + ["load_seq"], keep_default_na=False, na_values=[""])
+
+
+def test_copy_payload_renders_bigints_nulls_and_load_order():
+    conn = RecordingConnection(merged_rows=3)
+    assert bulk_load_daily_ohlcv_pg(conn, _ohlcv_frame()) == 3 and conn.commits == 1
+    (copy_sql, payload), = conn.copies
+    assert copy_sql == f"COPY tmp_bulk_daily_ohlcv_data ({', '.join(DAILY_OHLCV_COLUMNS)}, load_seq) FROM STDIN WITH (FORMAT csv, NULL '')"
+    lines = payload.splitlines()
+    assert lines[0] == "SPY,20240102,1.0,1.5,0.5,1.2,1000,0" # BIGINT columns are rendered without a decimal point
+    assert lines[1] == "SPY,20240103,2.0,2.5,1.5,2.2,,1" and lines[2] == "QQQ,20240102,3.0,,2.5,3.2,3000,2" # NULLs are empty fields
+    assert [line.rsplit(",", 1)[1] for line in lines] == ["0", "1", "2", "3"]
+
+
+def test_merge_sql_keeps_the_last_duplicate_key():
+    conn = RecordingConnection()
+    bulk_load_daily_ohlcv_pg(conn, _ohlcv_frame())
+    create_sql, alter_sql, merge_sql = conn.statements
+    assert create_sql.startswith("CREATE TEMP TABLE tmp_bulk_daily_ohlcv_data ON COMMIT DROP") and "load_seq BIGINT NOT NULL" in alter_sql
+    assert "SELECT DISTINCT ON (symbol, date)" in merge_sql and "ORDER BY symbol, date, load_seq DESC" in merge_sql
+    assert merge_sql.endswith("ON CONFLICT (symbol, date) DO NOTHING;")
+    # DISTINCT ON semantics applied to the streamed rows: first row per key in (symbol, date, load_seq DESC) order
+    staged = _parse_payload(conn.copies[0][1], DAILY_OHLCV_COLUMNS)
+    merged = staged.sort_values(["symbol", "date", "load_seq"], ascending=[True, True, False]).drop_duplicates(["symbol", "date"])
+    spy_0102 = merged[(merged["symbol"] == "SPY") & (merged["date"] == 20240102)]
+    assert len(merged) == 3 and spy_0102["open"].tolist() == [9.0] # The later input row wins
+
+
+def test_update_existing_sets_every_non_key_column():
+    conn = RecordingConnection()
+    bulk_load_daily_eots_metrics_pg(conn, pd.DataFrame({"symbol": ["SPY"], "date": [20240102], "a_mspi_und_avg": [0.5]}), update_existing=True)
+    merge_sql = conn.statements[-1]
+    assert "DO UPDATE SET gib_oi_based_und = EXCLUDED.gib_oi_based_und" in merge_sql and "underlying_atr_daily = EXCLUDED.underlying_atr_daily;" in merge_sql
+    assert "symbol = EXCLUDED.symbol" not in merge_sql and "date = EXCLUDED.date" not in merge_sql
+
+
+def test_loader_rejects_frames_without_keys():
+    conn = RecordingConnection()
+    assert bulk_load_daily_ohlcv_pg(conn, pd.DataFrame({"symbol": ["SPY"], "open": [1.0]})) is None
+    assert bulk_load_daily_ohlcv_pg(conn, pd.DataFrame()) == 0 and not conn.copies
+
+
+# --- Benchmark against a real server (PG_DSN) ---
+
+@pytest.fixture
+def pg_schema():
+    dsn = os.environ.get("PG_DSN")
+    if not dsn: pytest.skip("PG_DSN not set")
+    conn = psycopg2.connect(dsn)
+    schema = f"bench_{uuid.uuid4().hex[:8]}"
+    with conn.cursor() as cur: cur.execute(f"CREATE SCHEMA {schema}; SET search_path TO {schema};")
+    conn.commit()
+    create_tables(conn)
+    yield conn
+    conn.rollback()
+    with conn.cursor() as cur: cur.execute(f"DROP SCHEMA {schema} CASCADE;")
+    conn.commit(); conn.close()
+
+
+def test_benchmark_copy_loader_against_execute_batch(pg_schema):
+    n_rows = int(os.environ.get("PG_BENCH_ROWS", "50000"))
+    rng = np.random.default_rng(5)
+    days = pd.date_range("2000-01-01", periods=n_rows // 2).strftime("%Y%m%d").astype(int)
+    frame = pd.DataFrame({"symbol": np.repeat(["SPY", "QQQ"], len(days)), "date": np.tile(days, 2)})
+    for col in ("open", "high", "low", "close"): frame[col] = rng.uniform(100, 500, len(frame))
+    frame["volume"] = rng.integers(100_000, 100_000_000, len(frame))
+
+    start = time.perf_counter()
+    assert bulk_load_daily_ohlcv_pg(pg_schema, frame) == len(frame)
+    copy_sec = time.perf_counter() - start
+    with pg_schema.cursor() as cur:
+        cur.execute("SELECT count(*), sum(volume) FROM Daily_OHLCV_Data"); count, volume = cur.fetchone()
+        cur.execute("TRUNCATE Daily_OHLCV_Data")
+    pg_schema.commit()
+    assert count == len(frame) and volume == int(frame["volume"].sum())
+
+    start = time.perf_counter()
+    store_daily_ohlcv_batch_pg(pg_schema, frame.astype(object).to_dict("records")) # Python scalars for psycopg2
+    batch_sec = time.perf_counter() - start
+    print(f"\n{len(frame)} OHLCV rows: COPY merge {copy_sec:.3f}s ({len(frame) / copy_sec:,.0f} rows/s), execute_batch {batch_sec:.3f}s ({len(frame) / batch_sec:,.0f} rows/s)")
+    assert copy_sec < batch_sec
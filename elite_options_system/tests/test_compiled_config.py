@@ -0,0 +1,58 @@
+# test_compiled_config.py
+"""CompiledConfig lookups vs the frozen settings view: both follow the config-over-defaults rule."""
+import logging
+
+import pytest
+
+from elite_options_system.core.strategies import DEFAULT_CONFIG, IntegratedTradingSystem
+from elite_options_system.utils.compiled_config import CompiledConfig, FrozenSettings
+
+logging.disable(logging.CRITICAL)
+
+DEFAULTS = {"a": {"x": 1, "y": {"deep": 2}, "z": 3}, "b": [1, 2], "only_default": {"k": "v"}}
+CONFIG = {"a": {"x": 10, "y": None, "extra": 4}, "b": [5], "only_config": True}
+
+
+def _leaves(node, path=()):
+    """(path, value) for every non-section node of a settings tree."""
+    if isinstance(node, FrozenSettings):
+        for key, value in node.items(): yield from _leaves(value, path + (key,))
+    else:
+        yield path, node
+
+
+def _thaw(value):
+    if isinstance(value, FrozenSettings): return {key: _thaw(v) for key, v in value.items()}
+    if isinstance(value, tuple): return [_thaw(v) for v in value]
+    return value
+
+
+def test_settings_merge_defaults_under_the_config():
+    compiled = CompiledConfig(CONFIG, DEFAULTS)
+    settings = compiled.settings
+    assert settings.a.x == 10 and settings.a.z == 3 and settings.a.extra == 4 # Config wins, defaults fill the gaps
+    assert settings.a.y.deep == 2 # None in the config falls back to the default section
+    assert settings.b == (5,) and settings.only_default.k == "v" and settings.only_config is True
+    assert CONFIG == {"a": {"x": 10, "y": None, "extra": 4}, "b": [5], "only_config": True} # Inputs are not modified
+
+
+def test_every_settings_leaf_matches_the_lookup():
+    compiled = CompiledConfig(CONFIG, DEFAULTS)
+    leaves = dict(_leaves(compiled.settings))
+    assert set(leaves) == {("a", "x"), ("a", "y", "deep"), ("a", "z"), ("a", "extra"), ("b",), ("only_default", "k"), ("only_config",)}
+    for path, value in leaves.items(): assert _thaw(value) == compiled.get(path), path
+
+
+def test_settings_without_defaults_is_the_config():
+    settings = CompiledConfig(CONFIG).settings
+    assert "z" not in settings.a and settings.a.y is None
+    with pytest.raises(AttributeError): settings.a.x = 1
+
+
+def test_its_settings_agree_with_get_config_value():
+    its = IntegratedTradingSystem()
+    leaves = dict(_leaves(its.settings))
+    for path, _ in _leaves(CompiledConfig(DEFAULT_CONFIG).settings): # Default-only entries are merged in (unless the config replaced a whole section by a value)
+        assert path in leaves or any(path[:i] in leaves for i in range(1, len(path))), path
+    sentinel = object()
+    for path, value in leaves.items(): assert _thaw(value) == its._get_config_value(list(path), sentinel), path
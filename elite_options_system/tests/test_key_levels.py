@@ -0,0 +1,66 @@
+# test_key_levels.py
+"""KeyLevelTracker input memoization (content digests only) and the strike-axis helpers of key_levels."""
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elite_options_system.core.key_levels import KeyLevelTracker, StrikeLevelIndex, frame_digest, local_extrema_mask
+
+logging.disable(logging.CRITICAL)
+
+COLUMNS = ("strike", "mspi", "sai")
+
+
+class CountingAggregate:
+    """'aggregate' callback that returns the input frame as already aggregated and counts its calls."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df; self.calls = 0
+
+    def __call__(self) -> pd.DataFrame:
+        self.calls += 1
+        return self.df.copy()
+
+
+def _levels(n: int = 50, seed: int = 2) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"strike": 400.0 + np.arange(n), "mspi": rng.normal(size=n), "sai": rng.uniform(-1, 1, n)})
+
+
+def test_same_content_is_aggregated_once():
+    tracker = KeyLevelTracker(); df = _levels(); aggregate = CountingAggregate(df)
+    first = tracker.index_for("SPY", df, aggregate, COLUMNS)
+    assert tracker.index_for("SPY", df, aggregate, COLUMNS) is first and tracker.index_for("SPY", df.copy(), aggregate, COLUMNS) is first
+    assert aggregate.calls == 1 and len(first) == 50
+
+
+def test_in_place_edit_of_an_inner_row_is_a_new_snapshot():
+    tracker = KeyLevelTracker(); df = _levels(); aggregate = CountingAggregate(df)
+    first = tracker.index_for("SPY", df, aggregate, COLUMNS)
+    df.loc[25, "mspi"] = 99.0 # Same object, shape, columns and first/last rows
+    second = tracker.index_for("SPY", df, aggregate, COLUMNS)
+    assert second is not first and aggregate.calls == 2
+    assert second.values("mspi")[25] == 99.0 and tracker.previous_for("SPY", second) is first
+    df.loc[25, "sai"] = 0.5 # Later aggregated columns count too
+    assert tracker.index_for("SPY", df, aggregate, COLUMNS) is not second
+
+
+def test_digest_ignores_columns_outside_the_aggregation():
+    df = _levels()
+    digest = frame_digest(df, COLUMNS)
+    assert frame_digest(df.assign(note="x"), COLUMNS) == digest and frame_digest(df.iloc[:-1], COLUMNS) != digest
+
+
+def test_index_sorts_strikes_and_aligns_the_previous_snapshot():
+    previous = StrikeLevelIndex(b"p", pd.DataFrame({"strike": [401.0, 400.0, 402.0], "mspi": [2.0, 1.0, 3.0]}))
+    current = StrikeLevelIndex(b"c", pd.DataFrame({"strike": [400.0, 402.0, 403.0], "mspi": [0.0, 0.0, 0.0]}))
+    np.testing.assert_array_equal(previous.strikes, [400.0, 401.0, 402.0])
+    np.testing.assert_array_equal(current.align_previous(previous, "mspi"), [1.0, 3.0, np.nan])
+    np.testing.assert_array_equal(current.lookup("mspi", np.array([402.0, 405.0]), -1.0), [0.0, -1.0])
+
+
+@pytest.mark.parametrize("find,expected", [("max", [False, False, True, False, False, True]), ("min", [True, False, False, False, True, False])])
+def test_local_extrema_mark_the_last_strike_of_a_plateau(find, expected):
+    np.testing.assert_array_equal(local_extrema_mask(np.array([0.0, 1.0, 1.0, 0.5, 0.0, 2.0]), find), expected)
@@ -0,0 +1,107 @@
+# test_metric_distribution.py
+"""MetricDistributionService percentiles against np.percentile, incremental refresh, and the 'historical_percentile' threshold type."""
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from elite_options_system.core.strategies import IntegratedTradingSystem
+from elite_options_system.utils import metric_distribution
+from elite_options_system.utils.metric_distribution import MetricDistributionService
+
+logging.disable(logging.CRITICAL)
+
+METRIC = "a_mspi_und_avg"
+
+
+def _date_keys(n: int):
+    today = datetime.now(timezone.utc)
+    return [int((today - timedelta(days=n - i)).strftime("%Y%m%d")) for i in range(n)]
+
+
+class FakeHistory:
+    """Stands in for get_metric_history_pg: serves (date_key, value) rows newer than 'after_date_key' and records the calls."""
+
+    def __init__(self, rows):
+        self.rows = list(rows); self.calls = []
+
+    def __call__(self, conn, symbol, metric_name, lookback_days, after_date_key=None):
+        self.calls.append((symbol, metric_name, after_date_key))
+        return [(d, v) for d, v in self.rows if after_date_key is None or d > after_date_key]
+
+
+@pytest.fixture
+def history(monkeypatch) -> FakeHistory:
+    rng = np.random.default_rng(11)
+    fake = FakeHistory(zip(_date_keys(250), rng.normal(size=250).tolist()))
+    monkeypatch.setattr(metric_distribution, "get_metric_history_pg", fake)
+    return fake
+
+
+def _service(refresh_interval_sec: float = 3600.0) -> MetricDistributionService:
+    return MetricDistributionService(lambda: object(), lookback_days=365, refresh_interval_sec=refresh_interval_sec)
+
+
+@pytest.mark.parametrize("pct", [0, 1, 12.5, 50, 80, 99, 100])
+def test_percentile_matches_numpy(history, pct):
+    service = _service()
+    values = np.array([v for _, v in history.rows])
+    assert service.percentile("spy", METRIC, pct) == pytest.approx(np.percentile(values, pct))
+    assert service.rank("SPY", METRIC, float(np.median(values))) == pytest.approx(50.0)
+
+
+def test_refresh_is_incremental(history):
+    service = _service(refresh_interval_sec=0.0)
+    assert service.size("SPY", METRIC) == 0 and service.refresh("SPY", METRIC) == 250
+    last_key = history.rows[-1][0]
+    tomorrow = int((datetime.strptime(str(last_key), "%Y%m%d") + timedelta(days=1)).strftime("%Y%m%d"))
+    history.rows.append((tomorrow, 42.0))
+    service.percentile("SPY", METRIC, 50) # Stale (interval 0) -> refresh fetches only the new row
+    assert history.calls[-1] == ("SPY", METRIC, last_key) and service.size("SPY", METRIC) == 251
+    values = np.array([v for _, v in history.rows])
+    assert service.percentile("SPY", METRIC, 90) == pytest.approx(np.percentile(values, 90))
+
+
+def test_ingested_daily_rows_extend_loaded_distributions_only(history):
+    service = _service()
+    service.refresh("SPY", METRIC)
+    new_key = int((datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y%m%d"))
+    added = service.ingest_daily_rows([{"symbol": "SPY", "date": new_key, METRIC: 5.0, "hp_eod_und": 1.0}, {"symbol": "QQQ", "date": new_key, METRIC: 1.0}])
+    assert added == 1 and len(history.calls) == 1 # Only the loaded SPY/a_mspi_und_avg distribution; no DB round-trip
+    values = np.array([v for _, v in history.rows] + [5.0])
+    assert service.percentile("SPY", METRIC, 75) == pytest.approx(np.percentile(values, 75))
+    # The unloaded distributions were not seeded, so their first refresh still loads the full history
+    assert service.refresh("SPY", "hp_eod_und") == 250 and history.calls[-1][2] is None
+
+
+def test_observations_outside_the_window_expire(history):
+    service = MetricDistributionService(lambda: object(), lookback_days=100, refresh_interval_sec=3600.0)
+    service.refresh("SPY", METRIC)
+    window_values = np.array([v for d, v in history.rows if d >= service._window_start_key()])
+    assert service.size("SPY", METRIC) == len(window_values)
+    assert service.percentile("SPY", METRIC, 30) == pytest.approx(np.percentile(window_values, 30))
+
+
+# --- ITS 'historical_percentile' thresholds ---
+
+@pytest.fixture
+def its(history) -> IntegratedTradingSystem:
+    system = IntegratedTradingSystem()
+    system.metric_distributions = _service()
+    system.threshold_symbol = "SPY"
+    return system
+
+
+def test_historical_percentile_threshold_asks_the_service(its, history):
+    values = np.array([v for _, v in history.rows])
+    threshold = its._calculate_dynamic_threshold({"type": "historical_percentile", "metric": METRIC, "percentile": 80}, None)
+    assert threshold == pytest.approx(np.percentile(values, 80))
+    tiers = its._calculate_dynamic_threshold({"type": "historical_percentile", "metric": METRIC, "percentiles": [50, 75, 90]}, None)
+    np.testing.assert_allclose(tiers, np.percentile(values, [50, 75, 90]))
+
+
+def test_historical_percentile_threshold_falls_back_without_history(its, monkeypatch):
+    monkeypatch.setattr(its, "_get_config_value", lambda path, default=None: {"type": "historical_percentile", "metric": METRIC, "percentile": 80, "fallback_value": 0.3} if path[:2] == ["strategy_settings", "thresholds"] else default)
+    its.metric_distributions = None
+    assert its._calculate_dynamic_threshold_wrapper(["key_level_mspi"], None) == 0.3
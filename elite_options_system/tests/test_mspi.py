@@ -0,0 +1,161 @@
+# test_mspi.py
+"""MSPI component formulas (TDPI, VRI) and the MSPI / SAI / SSI / CFI combination, checked against values worked out by hand on tiny chains."""
+import logging
+import time
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elite_options_system.core.strategies import IntegratedTradingSystem
+from elite_options_system.tests.test_recommendation_book import _synthetic_chain
+
+logging.disable(logging.CRITICAL)
+
+# Config values the hand computations below assume, pinned so config.json tuning cannot move them
+PINNED_CONFIG = {
+    ("data_processor_settings", "coefficients", "tdpi_beta"): 0.3,
+    ("data_processor_settings", "coefficients", "vri_gamma"): 0.3,
+    ("data_processor_settings", "factors", "tdpi_gaussian_width"): -0.5,
+    ("data_processor_settings", "factors", "vri_vol_trend_fallback_factor"): 0.95,
+    ("data_processor_settings", "weights", "time_based_definitions"): {"market_open": "09:30:00", "market_close": "16:00:00"},
+}
+
+
+def _pin_config(its: IntegratedTradingSystem, monkeypatch, overrides=None) -> None:
+    pinned = {**PINNED_CONFIG, **(overrides or {})}
+    get_config_value = its._get_config_value
+    monkeypatch.setattr(its, "_get_config_value", lambda path, default=None: pinned[tuple(path)] if tuple(path) in pinned else get_config_value(path, default))
+
+
+@pytest.fixture
+def its(monkeypatch) -> IntegratedTradingSystem:
+    system = IntegratedTradingSystem()
+    _pin_config(system, monkeypatch)
+    monkeypatch.setattr(system, "_get_atr", lambda symbol, price, history_df=None: 2.0)
+    return system
+
+
+# --- TDPI ---
+# Row 0: charmxoi 10, txoi -5, charm flow 2, theta flow 5 - 1 = 4, strike at the price.
+# Row 1: charmxoi -4, txoi 3, charm flow 4, theta flow 1 - 3 = -2, strike one ATR (2.0) above the price.
+# Normalized theta flow [1, -0.5]; charm terms 1 + 0.3 * 2/10 = 1.06 and 1 + 0.3 * 4/-4 = 0.7; 12:45 is half the
+# session, so the time weight is 1.5; proximity exp(-0.5 * 0^2) = 1 and exp(-0.5 * 1^2).
+
+def _tdpi_chain() -> pd.DataFrame:
+    return pd.DataFrame({"strike": [100.0, 102.0], "underlying_symbol": "SPY", "charmxoi": [10.0, -4.0], "txoi": [-5.0, 3.0],
+                         "charmxvolm": [2.0, 4.0], "thetas_buy": [1.0, 3.0], "thetas_sell": [5.0, 1.0]})
+
+
+def test_tdpi_matches_the_hand_computed_chain(its):
+    df = its.calculate_tdpi(_tdpi_chain(), current_time=dtime(12, 45), underlying_price=100.0)
+    expected_tdpi = [10.0 * -1.0 * 1.06 * 1.0 * 1.5 * 1.0, -4.0 * 1.0 * 0.7 * -0.5 * 1.5 * np.exp(-0.5)]
+    np.testing.assert_allclose(df["tdpi"], expected_tdpi)
+    np.testing.assert_allclose(df["ctr"], [2.0 / 4.0, 4.0 / 2.0])
+    np.testing.assert_allclose(df["tdfi"], [1.0 / 1.0, 0.5 / 0.6]) # |theta flow| / max = [1, 0.5], |txoi| / max = [1, 0.6]
+
+
+def test_tdpi_is_zero_without_charm_flow(its):
+    df = its.calculate_tdpi(_tdpi_chain().drop(columns="charmxvolm"), current_time=dtime(12, 45), underlying_price=100.0)
+    assert (df[["tdpi", "ctr", "tdfi"]].to_numpy() == 0.0).all()
+
+
+# --- VRI ---
+# Row 0: vannaxoi 5, vxoi 8, vanna flow -5, vomma flow 3. Row 1: vannaxoi -2, vxoi -4, vanna flow 1, vomma flow -6.
+# Normalized vomma flow [0.5, -1]; vanna terms 1 + 0.3 * -5/5 = 0.7 and 1 + 0.3 * 1/-2 = 0.85;
+# skew 1 + (10 - 30) / 40 = 0.5; volatility trend 0.24 / 0.20 = 1.2.
+
+def _vri_chain() -> pd.DataFrame:
+    return pd.DataFrame({"strike": [100.0, 102.0], "vannaxoi": [5.0, -2.0], "vxoi": [8.0, -4.0], "vannaxvolm": [-5.0, 1.0],
+                         "vommaxvolm": [3.0, -6.0], "call_vxoi": 30.0, "put_vxoi": 10.0})
+
+
+def test_vri_matches_the_hand_computed_chain(its):
+    df = its.calculate_vri(_vri_chain(), current_iv=0.24, avg_iv_5day=0.20)
+    np.testing.assert_allclose(df["vri"], [5.0 * 1.0 * 0.7 * 0.5 * 0.5 * 1.2, -2.0 * -1.0 * 0.85 * -1.0 * 0.5 * 1.2])
+    np.testing.assert_allclose(df["vvr"], [5.0 / 3.0, 1.0 / 6.0])
+    np.testing.assert_allclose(df["vfi"], [0.5 / 1.0, 1.0 / 0.5]) # |vomma flow| / max = [0.5, 1], |vxoi| / max = [1, 0.5]
+
+
+def test_vri_uses_the_fallback_trend_without_iv(its):
+    df = its.calculate_vri(_vri_chain())
+    np.testing.assert_allclose(df["vri"], np.array([5.0 * 0.7 * 0.5, 2.0 * 0.85 * -1.0]) * 0.5 * 0.95)
+
+
+# --- Coefficients ---
+
+def test_legacy_coefficient_dicts_migrate_to_aligned_minus_neutral(its, monkeypatch):
+    _pin_config(its, monkeypatch, {("data_processor_settings", "coefficients", "tdpi_beta"): {"aligned": 1.3, "opposed": 0.7, "neutral": 1.0},
+                                   ("data_processor_settings", "coefficients", "vri_gamma"): {"aligned": 1.5, "opposed": 0.5}})
+    assert its._flow_coefficient("tdpi_beta") == pytest.approx(0.3) and its._flow_coefficient("vri_gamma") == pytest.approx(0.5)
+    assert its.migrated_flow_coefficients == {"tdpi_beta": pytest.approx(0.3), "vri_gamma": pytest.approx(0.5)}
+    # The legacy 1.3 / 1.0 pair gives exactly the scalar-config TDPI
+    df = its.calculate_tdpi(_tdpi_chain(), current_time=dtime(12, 45), underlying_price=100.0)
+    np.testing.assert_allclose(df["tdpi"], [-15.9, 2.1 * np.exp(-0.5)])
+
+
+def test_invalid_coefficient_uses_the_default(its, monkeypatch):
+    _pin_config(its, monkeypatch, {("data_processor_settings", "coefficients", "tdpi_beta"): "high"})
+    assert its._flow_coefficient("tdpi_beta") == 0.3 and not its.migrated_flow_coefficients
+
+
+# --- MSPI combination ---
+# Components a / b / c weighted 0.5 / 0.3 / 0.2 over two strikes: a = [2, 1], b = [1, 2], c = [-4, 2].
+# Chain-normalized: a [1, 0.5], b [0.5, 1], c [-1, 0.5] -> mspi [0.5 + 0.15 - 0.2, 0.25 + 0.3 + 0.1].
+# Weighted strike components [0.5, 0.15, -0.2] (signs + + -: pairs +1 -1 -1) and [0.25, 0.3, 0.1] (all agree).
+
+WEIGHTS = {"a": 0.5, "b": 0.3, "c": 0.2}
+
+
+def test_mspi_sai_ssi_match_the_hand_computed_strikes(its):
+    cols = its._combine_mspi_components(pd.DataFrame({"strike": [100.0, 101.0], "a": [2.0, 1.0], "b": [1.0, 2.0], "c": [-4.0, 2.0]}), WEIGHTS)
+    np.testing.assert_allclose(cols["a_norm"], [1.0, 0.5]); np.testing.assert_allclose(cols["c_norm"], [-1.0, 0.5])
+    np.testing.assert_allclose(cols["mspi"], [0.45, 0.65])
+    np.testing.assert_allclose(cols["sai"], [-1.0 / 3.0, 1.0])
+    std_scale = np.sqrt(np.mean([0.25, 0.09, 0.04])) # Largest std components in [-|w|, |w|] can reach
+    np.testing.assert_allclose(cols["ssi"], [1.0 - np.std([0.5, 0.15, -0.2]) / std_scale, 1.0 - np.std([0.25, 0.3, 0.1]) / std_scale])
+    np.testing.assert_array_equal(cols["cfi"], [0.0, 0.0]) # No flow / exposure columns
+
+
+def test_components_passed_in_take_precedence_over_frame_columns(its):
+    frame = pd.DataFrame({"strike": [100.0, 101.0], "a": [0.0, 0.0], "b": [1.0, 2.0], "c": [-4.0, 2.0]})
+    cols = its._combine_mspi_components(frame, WEIGHTS, {"a": np.array([2.0, 1.0])})
+    np.testing.assert_allclose(cols["mspi"], [0.45, 0.65])
+
+
+@pytest.mark.parametrize("weights", [{"a": 1.0}, {"a": 0.6, "b": 0.0, "c": 0.0}, {}])
+def test_sai_ssi_neutral_with_fewer_than_two_components(its, weights):
+    cols = its._combine_mspi_components(pd.DataFrame({"strike": [100.0, 101.0, 101.0], "a": [2.0, -1.0, 3.0], "b": 1.0, "c": -1.0}), weights)
+    np.testing.assert_array_equal(cols["sai"], [0.0, 0.0, 0.0]); np.testing.assert_array_equal(cols["ssi"], [0.5, 0.5, 0.5])
+
+
+def test_cfi_averages_relative_flow_intensity_over_greeks(its):
+    # Theta: strike sums |flow| / |txoi| = [4/4, 3/1] = [1, 3], mean 2 -> [0.5, 1.5]. Charm: [2/2, 2/2] -> [1, 1].
+    frame = pd.DataFrame({"strike": [100.0, 100.0, 101.0], "a": [1.0, 2.0, 3.0], "txoi": [2.0, 2.0, 1.0], "txvolm": [1.0, 3.0, 3.0],
+                          "charmxoi": [1.0, -3.0, 2.0], "charmxvolm": [2.0, 0.0, 2.0]})
+    np.testing.assert_allclose(its._combine_mspi_components(frame, {"a": 1.0})["cfi"], [0.75, 0.75, 1.25])
+
+
+def test_calculate_mspi_ranges_on_a_full_chain(its):
+    chain = _synthetic_chain()
+    df = its.calculate_mspi(chain, current_time=dtime(10, 0), current_iv=0.2, avg_iv_5day=0.18, underlying_price=500.0)
+    assert "mspi" not in chain.columns and len(df) == len(chain) # Input untouched
+    weights = its.get_weights(dtime(10, 0))
+    assert np.abs(df["mspi"]).max() <= sum(abs(w) for w in weights.values()) + 1e-9 and np.abs(df["mspi"]).max() > 0
+    assert df["sai"].between(-1.0, 1.0).all() and df["ssi"].between(0.0, 1.0).all() and (df["cfi"] >= 0.0).all()
+    assert df["cfi"].mean() > 0 and np.isfinite(df[["mspi", "sai", "ssi", "cfi"]].to_numpy()).all()
+    per_strike = df.groupby("strike")[["sai", "ssi", "cfi"]].nunique()
+    assert (per_strike == 1).all().all() # Strike-level values broadcast to every contract of the strike
+    # The public calculators write the same component values in place
+    np.testing.assert_allclose(its.calculate_tdpi(chain.copy(), dtime(10, 0), None, 500.0)["tdpi"], df["tdpi"])
+
+
+def test_calculate_mspi_benchmark(its):
+    chain = _synthetic_chain(n_strikes=50, n_exp=4) # 400 contracts
+    its.calculate_mspi(chain, current_time=dtime(10, 0), underlying_price=500.0)
+    timings = []
+    for _ in range(15):
+        start = time.perf_counter(); its.calculate_mspi(chain, current_time=dtime(10, 0), underlying_price=500.0); timings.append(time.perf_counter() - start)
+    print(f"\nMSPI for {len(chain)} contracts: best {min(timings) * 1000:.2f} ms, median {np.median(timings) * 1000:.2f} ms")
+    assert min(timings) < 0.010
@@ -0,0 +1,161 @@
+# test_recommendation_book.py
+"""Behavioural tests for the struct-of-arrays recommendation book and its management pass in the ITS."""
+import logging
+from datetime import time as dtime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from elite_options_system.core.recommendation_book import (
+    RecommendationBook, STATUS_ACTIVE, STATUS_EXITED, exit_reasons, max_stars_at, recommendation_keys, snapshot_id, trail_targets
+)
+from elite_options_system.core.strategies import IntegratedTradingSystem
+
+logging.disable(logging.CRITICAL)
+
+NOW = np.datetime64("2026-01-05T10:00:00", "us")
+NO_EXITS = {"mspi_flip_threshold": 0.7, "contradiction_stars_threshold": 4, "ssi_exit_stars_threshold": 3, "arfi_exit_stars_threshold": 4}
+
+
+def _append(book: RecommendationBook, strikes, directions, symbol: str = "SPY", status=STATUS_ACTIVE, updated_at=NOW) -> np.ndarray:
+    n = len(strikes)
+    return book.append({
+        "symbol_code": np.full(n, book.symbol_code(symbol)), "strike": np.asarray(strikes, dtype=float), "direction": np.asarray(directions),
+        "status": np.full(n, status), "entry": np.full(n, 500.0), "stop": np.full(n, 495.0), "target_1": np.full(n, 505.0), "target_2": np.full(n, 510.0),
+        "atr": np.full(n, 2.0), "issued_at": np.full(n, NOW), "updated_at": np.full(n, updated_at), "rationale": np.full(n, "test", dtype=object)
+    })
+
+
+def _synthetic_chain(n_strikes: int = 120, n_exp: int = 4, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    strikes = np.arange(n_strikes) * 1.0 + 440.0; rows = n_strikes * n_exp * 2
+    df = pd.DataFrame({"strike": np.tile(np.repeat(strikes, 2), n_exp), "opt_kind": np.tile(["call", "put"], n_strikes * n_exp),
+                       "expiration_date": np.repeat(np.arange(n_exp), n_strikes * 2), "price": 500.0, "underlying_symbol": "SPY"})
+    for col in ["gxoi", "dxoi", "vxoi", "txoi", "charmxoi", "vannaxoi", "vommaxoi", "dxvolm", "gxvolm", "vxvolm", "txvolm",
+                "charmxvolm", "vannaxvolm", "vommaxvolm", "volatility", "oi", "volm"]:
+        df[col] = rng.normal(size=rows) * 1000
+    return df
+
+
+@pytest.fixture
+def its() -> IntegratedTradingSystem:
+    system = IntegratedTradingSystem()
+    system.recommendation_checkpoint_path = None
+    system.recommendation_book = RecommendationBook()
+    return system
+
+
+# --- Pure book operations ---
+
+def test_checkpoint_round_trip(tmp_path):
+    book = RecommendationBook()
+    _append(book, [500.0, 505.0], [1, -1]); _append(book, [100.0], [1], symbol="QQQ")
+    book.columns["exit_reason"][1] = "Stop loss hit"
+    path = str(tmp_path / "book.npz")
+    book.save(path)
+    restored = RecommendationBook.load(path)
+    assert len(restored) == 3 and restored.symbols == ["SPY", "QQQ"] and restored.next_id == book.next_id
+    for name, values in book.columns.items():
+        np.testing.assert_array_equal(restored.columns[name], values)
+    assert restored.columns["exit_reason"][1] == "Stop loss hit"
+    assert restored.symbol_code("QQQ") == 1
+
+
+def test_checkpoint_without_issued_snapshot_column_loads(tmp_path):
+    book = RecommendationBook(); _append(book, [500.0], [1])
+    path = str(tmp_path / "old.npz")
+    book.save(path)
+    with np.load(path) as data: payload = {k: data[k] for k in data.files if k != "n_issued_snapshot"}
+    np.savez_compressed(path, **payload)
+    restored = RecommendationBook.load(path)
+    np.testing.assert_array_equal(restored.columns["issued_snapshot"], [0])
+
+
+def test_find_and_reissue_window_then_compact():
+    book = RecommendationBook()
+    _append(book, [500.0], [1], status=STATUS_EXITED, updated_at=NOW)
+    keys = recommendation_keys(np.array([0, 0]), np.array([1, -1]), np.array([500.0, 500.0]))
+    np.testing.assert_array_equal(book.find(keys), [0, -1]) # Exited key still blocks a reissue, the other direction does not
+    assert book.compact(NOW + np.timedelta64(299, "s"), 300) == 0
+    assert book.compact(NOW + np.timedelta64(300, "s"), 300) == 1
+    assert len(book) == 0 and (book.find(keys) == -1).all()
+
+
+def test_compact_keeps_active_rows():
+    book = RecommendationBook(); _append(book, [500.0], [1], updated_at=NOW - np.timedelta64(1, "D"))
+    assert book.compact(NOW, 300) == 0 and len(book) == 1
+
+
+def test_max_stars_at_only_matches_exact_strikes():
+    stars = max_stars_at(np.array([500.0, 501.0, 502.0]), np.array([502.0, 500.0, 500.0]), np.array([2, 4, 3]))
+    np.testing.assert_array_equal(stars, [4, 0, 2])
+
+
+def test_trail_targets_moves_stop_to_break_even_after_target_1():
+    direction = np.array([1.0, -1.0, 1.0])
+    entry = np.array([500.0, 500.0, 500.0]); stop = np.array([495.0, 505.0, 495.0])
+    t1 = np.array([505.0, 495.0, 505.0]); t2 = np.array([510.0, 490.0, 510.0])
+    new_stop, new_t1, new_t2, adjusted = trail_targets(direction, entry, stop, t1, t2, 505.0, np.full(3, 2.0), {"target_atr_target2_multiplier_from_t1": 2.0})
+    np.testing.assert_array_equal(adjusted, [True, False, True])
+    np.testing.assert_allclose(new_stop, [500.0, 505.0, 500.0]); np.testing.assert_allclose(new_t1, [510.0, 495.0, 510.0]); np.testing.assert_allclose(new_t2, [514.0, 490.0, 514.0])
+
+
+def test_exit_reasons_precedence():
+    n = 7
+    direction = np.ones(n); stop = np.full(n, 495.0); target_2 = np.full(n, 510.0)
+    mspi = np.zeros(n); contradiction = np.zeros(n, dtype=int); structure = np.zeros(n, dtype=int); flow = np.zeros(n, dtype=int)
+    stop[0] = 501.0; target_2[0] = 499.0                        # stop and target 2 both hit -> stop wins
+    target_2[1] = 499.0; mspi[1] = -1.0                         # target 2 beats an MSPI flip
+    mspi[2] = -1.0; contradiction[2] = 5                        # MSPI flip beats a contradicting signal
+    contradiction[3] = 4; structure[3] = 3                      # contradiction beats structure change
+    structure[4] = 3; flow[4] = 4                               # structure change beats flow divergence
+    flow[5] = 4
+    contradiction[6] = 3; structure[6] = 2; flow[6] = 3         # all below their thresholds -> hold
+    reasons = exit_reasons(direction, stop, target_2, 500.0, mspi, contradiction, structure, flow, NO_EXITS)
+    assert list(reasons[:5]) == ["Stop loss hit", "Target 2 reached", "MSPI flipped against position (|MSPI| >= 0.7)", "Contradicting signal", "Structure change at strike"]
+    assert reasons[5] == "Flow divergence at strike" and reasons[6] == ""
+
+
+def test_snapshot_id_is_nonzero_for_a_digest():
+    assert snapshot_id(None) == 0 and snapshot_id(b"") == 0
+    assert snapshot_id(b"\x00" * 16) != 0 and snapshot_id(b"\x01" * 16) == snapshot_id(b"\x01" * 16)
+
+
+# --- Management pass ---
+
+def _signal(strike: float, stars: int) -> dict:
+    return {"strike": strike, "conviction_stars": stars, "raw_conviction_score": float(stars)}
+
+
+def test_contradicting_signal_only_counts_at_the_position_strike(its):
+    book = RecommendationBook()
+    issued = its._manage_recommendations(book, "SPY", None, {"directional": {"bullish": [_signal(500.0, 4)], "bearish": [_signal(480.0, 4)]}}, 500.0, 2.0, NOW)
+    assert sorted((r["direction_label"], r["strike"]) for r in issued if r["Category"] == "Directional Trades") == [("Bearish", 480.0), ("Bullish", 500.0)]
+    # Same signals a minute later: each side has an opposite 4-star signal elsewhere in the chain, but not at its strike
+    held = its._manage_recommendations(book, "SPY", None, {"directional": {"bullish": [_signal(500.0, 4)], "bearish": [_signal(480.0, 4)]}}, 500.0, 2.0, NOW + np.timedelta64(60, "s"))
+    assert {r["status"] for r in held if r["Category"] == "Directional Trades"} == {"ACTIVE"}
+    # A bearish 4-star signal on the bullish position's own strike exits it
+    flipped = its._manage_recommendations(book, "SPY", None, {"directional": {"bearish": [_signal(500.0, 4)]}}, 500.0, 2.0, NOW + np.timedelta64(120, "s"))
+    exited = {r["strike"]: r["exit_reason"] for r in flipped if r["status"] == "EXITED"}
+    assert exited == {500.0: "Contradicting signal"}
+
+
+def test_same_snapshot_twice_holds_positions(its):
+    mspi_df = its.calculate_mspi(_synthetic_chain(), current_time=dtime(10, 0), underlying_price=500.0)
+    first = [r for r in its.update_active_recommendations_and_manage_state("SPY", mspi_df, 500.0, 2.0, current_time=dtime(10, 0)) if r["Category"] == "Directional Trades"]
+    assert first and {r["status"] for r in first} == {"ACTIVE_NEW"}
+    second = [r for r in its.update_active_recommendations_and_manage_state("SPY", mspi_df, 500.0, 2.0, current_time=dtime(10, 1)) if r["Category"] == "Directional Trades"]
+    assert sorted(r["id"] for r in second) == sorted(r["id"] for r in first)
+    assert {r["status"] for r in second} == {"ACTIVE"}
+
+
+def test_stop_loss_exit_on_a_later_snapshot(its):
+    book = RecommendationBook()
+    its._manage_recommendations(book, "SPY", None, {"directional": {"bullish": [_signal(500.0, 4)]}}, 500.0, 2.0, NOW)
+    stop = float(book.columns["stop"][0])
+    later = its._manage_recommendations(book, "SPY", None, {}, stop - 0.01, 2.0, NOW + np.timedelta64(60, "s"))
+    assert [(r["status"], r["exit_reason"]) for r in later if r["Category"] == "Directional Trades"] == [("EXITED", "Stop loss hit")]
+    # Still inside the reissue window: the same signal does not reopen the key
+    reissued = its._manage_recommendations(book, "SPY", None, {"directional": {"bullish": [_signal(500.0, 4)]}}, 500.0, 2.0, NOW + np.timedelta64(120, "s"))
+    assert not [r for r in reissued if r["status"] == "ACTIVE_NEW"]
@@ -0,0 +1,159 @@
+# test_trade_log_writer.py
+"""Write-behind trade logger against an in-memory stand-in for the two batch writers (flush, spill, replay, dead letter)."""
+import json
+import logging
+import time
+
+import numpy as np
+import psycopg2
+import pytest
+
+from elite_options_system.core.recommendation_book import RecommendationBook
+from elite_options_system.core.strategies import IntegratedTradingSystem
+from elite_options_system.utils import trade_log_writer
+from elite_options_system.utils.trade_log_writer import WriteBehindTradeLogger, outcome_log_row, recommendation_log_row
+
+logging.disable(logging.CRITICAL)
+
+NOW = np.datetime64("2026-01-05T10:00:00", "us")
+
+
+class FakeTradeDatabase:
+    """Records committed rows in write order; 'up' toggles connection failures, ids in 'bad_ids' are rejected."""
+
+    def __init__(self):
+        self.up = True; self.bad_ids = set(); self.rows = []; self.batches = []
+
+    def connect(self, connection_details):
+        return self if self.up else None
+
+    def close(self):
+        pass
+
+    def writer(self, table):
+        def write(conn, rows, raise_on_error=False):
+            if not self.up: raise psycopg2.OperationalError("server closed the connection")
+            if any(row.get("recommendation_id") in self.bad_ids for row in rows): raise psycopg2.IntegrityError("violates constraint")
+            self.batches.append((table, len(rows))); self.rows.extend((table, row["recommendation_id"]) for row in rows)
+            return True
+        return write
+
+
+@pytest.fixture
+def db(monkeypatch) -> FakeTradeDatabase:
+    fake = FakeTradeDatabase()
+    monkeypatch.setattr(trade_log_writer, "get_db_connection", fake.connect)
+    monkeypatch.setattr(trade_log_writer, "log_trade_recommendations_batch_pg", fake.writer("recommendations"))
+    monkeypatch.setattr(trade_log_writer, "log_trade_outcomes_batch_pg", fake.writer("outcomes"))
+    return fake
+
+
+def _writer(tmp_path, **kwargs) -> WriteBehindTradeLogger:
+    return WriteBehindTradeLogger({}, spill_file_path=str(tmp_path / "spill.jsonl"), dead_letter_file_path=str(tmp_path / "dead.jsonl"), reconnect_interval_sec=0.0, **kwargs)
+
+
+def _wait_for(condition, timeout: float = 3.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition(): return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_worker_flushes_when_the_batch_is_full(db, tmp_path):
+    writer = _writer(tmp_path, max_batch_size=3, flush_interval_sec=30.0)
+    writer.start()
+    try:
+        for i in range(3): writer.enqueue_recommendation({"recommendation_id": f"R{i}"})
+        assert _wait_for(lambda: len(db.rows) == 3) # Long before the 30s interval
+        assert db.batches == [("recommendations", 3)]
+    finally:
+        writer.stop()
+    assert writer.get_metrics()["records_flushed"] == 3
+
+
+def test_stop_drains_a_partial_batch(db, tmp_path):
+    writer = _writer(tmp_path, max_batch_size=50, flush_interval_sec=30.0)
+    writer.start()
+    writer.enqueue_recommendation({"recommendation_id": "R0"}); writer.enqueue_outcome({"recommendation_id": "R0"})
+    writer.stop()
+    assert db.rows == [("recommendations", "R0"), ("outcomes", "R0")]
+
+
+def test_outage_spills_then_replays_in_enqueue_order(db, tmp_path):
+    writer = _writer(tmp_path, max_batch_size=10)
+    db.up = False
+    writer.enqueue_recommendation({"recommendation_id": "R0"}); writer.enqueue_recommendation({"recommendation_id": "R1"})
+    writer._flush(writer._take_pending([])[0]) # Worker-equivalent flush while the database is down
+    with open(writer.spill_file_path, encoding="utf-8") as fh: spilled = [json.loads(line) for line in fh]
+    assert [entry["record"]["recommendation_id"] for entry in spilled] == ["R0", "R1"] and not db.rows
+    # Recovery: records queued after the outage sort behind the spilled ones
+    writer.enqueue_outcome({"recommendation_id": "R0"})
+    db.up = True
+    writer._flush([])
+    assert db.rows == [("recommendations", "R0"), ("recommendations", "R1"), ("outcomes", "R0")]
+    metrics = writer.get_metrics()
+    assert metrics["records_replayed"] == 2 and not metrics["spill_file_pending"]
+
+
+def test_queue_overflow_keeps_order_on_replay(db, tmp_path):
+    writer = _writer(tmp_path, max_queue_size=1)
+    for i in range(3): writer.enqueue_recommendation({"recommendation_id": f"R{i}"})
+    assert writer.get_metrics()["records_spilled"] == 2 and writer._queue.qsize() == 1
+    writer._flush([])
+    assert [rec_id for _, rec_id in db.rows] == ["R0", "R1", "R2"]
+
+
+def test_rejected_rows_are_dead_lettered_not_replayed(db, tmp_path):
+    writer = _writer(tmp_path)
+    db.bad_ids = {"BAD"}
+    batch = [(i + 1, trade_log_writer.RECORD_KIND_RECOMMENDATION, {"recommendation_id": rec_id}) for i, rec_id in enumerate(["R0", "BAD", "R2"])]
+    writer._flush(batch)
+    assert db.rows == [("recommendations", "R0"), ("recommendations", "R2")]
+    with open(writer.dead_letter_file_path, encoding="utf-8") as fh: dead = [json.loads(line) for line in fh]
+    assert [entry["record"]["recommendation_id"] for entry in dead] == ["BAD"] and "IntegrityError" in dead[0]["error"]
+    assert not writer.get_metrics()["spill_file_pending"] and writer.get_metrics()["records_dead_lettered"] == 1
+
+
+# --- Book records -> log rows ---
+
+def test_log_rows_from_book_records():
+    record = {"id": "DREC_SPY_1", "symbol": "SPY", "Category": "Directional Trades", "direction_label": "Bearish", "strike": 500.0,
+              "strategy": "Consider Shorts near 500.00", "conviction_stars": 3, "raw_conviction_score": 3.5, "status": "EXITED",
+              "entry_ideal": 500.0, "stop_loss": 505.0, "target_1": 495.0, "target_2": 490.0, "target_rationale": "ATR",
+              "issued_ts": "2026-01-05T10:00:00", "last_updated_ts": "2026-01-05T10:05:00", "exit_reason": "Target 2 reached", "mspi": -0.5, "sai": 0.1, "ssi": 0.4}
+    rec_row = recommendation_log_row(record)
+    assert rec_row["recommendation_id"] == "DREC_SPY_1" and rec_row["atif_conviction_level"] == "3" and rec_row["initial_stop_loss_price"] == 505.0
+    out_row = outcome_log_row(record, 490.0)
+    assert out_row["profit_loss_absolute"] == pytest.approx(10.0) and out_row["profit_loss_percentage"] == pytest.approx(2.0)
+    assert out_row["trade_duration_seconds"] == 300 and out_row["exit_reason"] == "Target 2 reached"
+
+
+class _CollectingLogger:
+    def __init__(self):
+        self.recommendations = []; self.outcomes = []; self.stopped = False
+
+    def enqueue_recommendation(self, row): self.recommendations.append(row); return True
+
+    def enqueue_outcome(self, row): self.outcomes.append(row); return True
+
+    def stop(self, timeout=None): self.stopped = True
+
+
+def test_its_routes_new_and_exited_recommendations_to_the_trade_logger():
+    its = IntegratedTradingSystem()
+    its.recommendation_checkpoint_path = None; its.recommendation_book = RecommendationBook()
+    assert its.start_trade_logging() is False # Disabled in the default config
+    its.trade_logger = _CollectingLogger()
+    signals = {"directional": {"bullish": [{"strike": 500.0, "conviction_stars": 4, "raw_conviction_score": 4.0}]}}
+    records = its._manage_recommendations(its.recommendation_book, "SPY", None, signals, 500.0, 2.0, NOW)
+    its._log_trade_records(records, 500.0)
+    assert [row["recommendation_id"] for row in its.trade_logger.recommendations] == ["DREC_SPY_1"] and not its.trade_logger.outcomes
+    stop = float(its.recommendation_book.columns["stop"][0])
+    records = its._manage_recommendations(its.recommendation_book, "SPY", None, {}, stop - 0.01, 2.0, NOW + np.timedelta64(60, "s"))
+    its._log_trade_records(records, stop - 0.01)
+    assert len(its.trade_logger.recommendations) == 1
+    assert [(row["recommendation_id"], row["exit_reason"]) for row in its.trade_logger.outcomes] == [("DREC_SPY_1", "Stop loss hit")]
+    collecting = its.trade_logger
+    its.stop_trade_logging()
+    assert collecting.stopped and its.trade_logger is None
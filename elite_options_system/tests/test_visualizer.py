@@ -0,0 +1,96 @@
+# test_visualizer.py
+"""Visualizer behaviour on large chains: level-of-detail selection, key-level markers and column-wise hover texts."""
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("plotly")
+
+from elite_options_system.core.visualizer import LOD_STRIKE_AXIS_BY_METHOD, MSPIVisualizerV2
+
+logging.disable(logging.CRITICAL)
+
+SMALL_LOD_BUDGET = {"chart_specific_params": {"lod_settings": {"assumed_plot_width_px": 100, "min_px_per_strike": 4}}}
+
+
+@pytest.fixture(scope="module")
+def viz() -> MSPIVisualizerV2:
+    return MSPIVisualizerV2(config_data=SMALL_LOD_BUDGET)
+
+
+def test_select_lod_indices_keeps_peaks_and_keep_strikes(viz):
+    strikes = np.arange(2000) * 0.5 + 100.0
+    values = np.zeros(2000); values[1234] = 50.0; values[321] = -40.0
+    idx = viz._select_lod_indices(strikes, [values], 100, None, [strikes[777] + 0.1])
+    assert len(idx) < 2000 and {1234, 321, 777} <= set(idx.tolist())
+    np.testing.assert_array_equal(viz._select_lod_indices(strikes[:50], [values[:50]], 100), np.arange(50))
+
+
+def test_key_levels_plot_every_level_marker(viz):
+    assert viz._lod_max_points() < 1500 # The chain below is far over the LOD budget
+    strikes = np.arange(1500) * 0.5 + 100.0
+    levels = {"support": [{"strike": float(s), "mspi": float(np.sin(s))} for s in strikes[::2]],
+              "resistance": [{"strike": float(s), "mspi": -1.0} for s in strikes[1::2]]}
+    fig = viz.create_key_levels_visualization(levels, symbol="SPY", current_price=400.0)
+    plotted = {trace.name: sorted(trace.x) for trace in fig.data if trace.name in ("Support", "Resistance")}
+    assert plotted["Support"] == sorted(strikes[::2].tolist()) and plotted["Resistance"] == sorted(strikes[1::2].tolist())
+    assert "create_key_levels_visualization" not in LOD_STRIKE_AXIS_BY_METHOD # Zooming needs no LOD re-render
+
+
+# --- Hover text: column-wise builder vs the per-row one ---
+
+def _hover_chain(n_strikes: int = 600, seed: int = 4) -> pd.DataFrame:
+    """Wide per-strike frame covering every hover section: magnitudes from 1e-4 to 1e10, NaNs, None cells and raw strikes."""
+    rng = np.random.default_rng(seed)
+    strikes = 300.0 + np.arange(n_strikes) * 0.5; strikes[::7] += 0.125 # Off-grid strikes get the 'Raw:' note
+    magnitude = 10.0 ** rng.uniform(-4, 10, n_strikes) * rng.choice([-1.0, 1.0], n_strikes)
+    df = pd.DataFrame({"strike": strikes})
+    for col in ("mspi", "sai", "ssi", "cfi", "ctr", "tdfi", "vvr", "vfi", "prediction_confidence", "signal_strength"): df[col] = rng.normal(size=n_strikes)
+    for col in ("dag_custom", "tdpi", "vri", "sdag_multiplicative", "net_volume_pressure", "net_value_pressure", "elite_impact_score",
+                "call_dxoi", "put_dxoi", "call_gxoi", "put_gxoi", "net_gamma_flow_at_strike", "true_net_value_flow"):
+        df[col] = rng.permutation(magnitude)
+    for col in ("mspi", "dag_custom", "call_gxoi", "net_value_pressure"): df.loc[rng.choice(n_strikes, 40, replace=False), col] = np.nan
+    df.loc[rng.choice(n_strikes, 30, replace=False), "put_gxoi"] = np.inf
+    df["level_category"] = pd.Series(rng.choice(["Support", "Resistance", None, ""], n_strikes), dtype=object)
+    df["conviction"] = pd.Series(rng.choice(["high", "low", None], n_strikes), dtype=object)
+    df["rationale"] = "MSPI " + pd.Series(rng.integers(0, 5, n_strikes)).astype(str)
+    return df
+
+
+HOVER_CASES = [
+    ("default", None), ("mspi_heatmap", None), ("net_value_heatmap", None), ("mspi_components", None), ("tdpi", None), ("vri", None),
+    ("key_levels", None), ("trading_signals", None), ("sdag", {"SDAG Method": "SDAG (M)", "sdag_col_name": "sdag_multiplicative", "Option Type": "call"}),
+    ("net_greek_flow_heatmap", {"metric_label": "Net Γ Flow", "metric_col_name": "net_gamma_flow_at_strike", "precision": 1, "is_currency": True}),
+]
+
+
+@pytest.mark.parametrize("chart_type,extra_context", HOVER_CASES)
+def test_hover_texts_match_per_row_hover_text(viz, chart_type, extra_context):
+    chain = _hover_chain()
+    batch = viz._create_hover_texts(chain, chart_type=chart_type, extra_context=extra_context)
+    # Every row for the widest layout; a fixed sample elsewhere keeps the per-row reference affordable
+    rows = np.arange(len(chain)) if chart_type == "mspi_components" else np.arange(0, len(chain), 6)
+    per_row = [viz._create_hover_text(chain.iloc[i], chart_type=chart_type, extra_context=extra_context) for i in rows]
+    assert len(batch) == len(chain) >= 500
+    assert list(batch[rows]) == per_row
+
+
+def test_format_hover_values_match_the_scalar_formatter(viz):
+    values = [0.0, 0.001234, -7.5, 9.999, 10.0, 999.5, -1000.0, 123456.0, 999999.0, 1_000_000.0, -2.5e9, 1e12, np.nan, np.inf, None, "", "n/a"]
+    for precision, is_currency in ((0, False), (3, False), (0, True), (2, True)):
+        expected = [viz._format_hover_value(v, precision, is_currency) for v in values]
+        assert list(viz._format_hover_values(pd.Series(values, dtype=object), precision, is_currency)) == expected
+
+
+def test_hover_texts_benchmark(viz):
+    chain = _hover_chain(n_strikes=2000)
+    start = time.perf_counter(); viz._create_hover_texts(chain, chart_type="mspi_components"); batch_sec = time.perf_counter() - start
+    rows = chain.iloc[:100]
+    start = time.perf_counter()
+    for _, row in rows.iterrows(): viz._create_hover_text(row, chart_type="mspi_components")
+    per_row_sec = (time.perf_counter() - start) * len(chain) / len(rows) # Extrapolated to the full chain
+    print(f"\nHover texts for {len(chain)} strikes: column-wise {batch_sec * 1000:.1f} ms, per-row ~{per_row_sec * 1000:.0f} ms ({per_row_sec / batch_sec:.0f}x)")
+    assert batch_sec * 5 < per_row_sec
@@ -0,0 +1,252 @@
+# async_database.py
+"""
+Asynchronous PostgreSQL access layer (psycopg 3) for the EOTS v2.5 system.
+
+Complements the blocking psycopg2 helpers in utils/database.py:
+- a shared AsyncConnectionPool;
+- historical reads as binary COPY streams of fixed-width columns, viewed directly as
+  numpy structured arrays (no per-value Python decoding);
+- pipelined batches (several statements per network round-trip).
+
+Historical reads and trade-log writes can then be awaited concurrently with fetch and
+compute work (e.g. via asyncio.gather). The dashboard refresh cycle is synchronous
+today, so nothing in it awaits this layer yet; it is opt-in for async callers.
+"""
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import psycopg
+    from psycopg_pool import AsyncConnectionPool
+    psycopg3_available = True
+except ImportError:
+    psycopg = None # type: ignore
+    AsyncConnectionPool = None # type: ignore
+    psycopg3_available = False
+
+from elite_options_system.utils.database import (
+    DAILY_OHLCV_COLUMNS,
+    TRADE_OUTCOME_COLUMNS,
+    TRADE_OUTCOME_JSON_FIELDS,
+    TRADE_RECOMMENDATION_COLUMNS,
+    TRADE_RECOMMENDATION_JSON_FIELDS,
+    VALID_DISTRIBUTION_METRIC_COLS,
+    _date_window_bounds,
+    _normalize_trade_log_rows,
+)
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+if not psycopg3_available:
+    logger.warning("psycopg 3 / psycopg_pool not installed. AsyncDatabase will be unavailable.")
+
+# PostgreSQL type OIDs -> numpy dtypes for the row-wise fallback decoding (others stay object)
+_PG_FLOAT_OIDS = {700, 701, 1700} # float4, float8, numeric
+_PG_INT_OIDS = {20, 21, 23} # int8, int2, int4
+_PG_BOOL_OID = 16
+
+# Binary COPY stream framing and the fixed-width field types it is decoded from: pg type -> (wire dtype, native dtype)
+PGCOPY_SIGNATURE: bytes = b"PGCOPY\n\xff\r\n\x00"
+PGCOPY_TRAILER: bytes = b"\xff\xff"
+_COPY_FIXED_TYPES: Dict[str, Tuple[str, Any]] = {
+    "int2": (">i2", np.int16), "int4": (">i4", np.int32), "int8": (">i8", np.int64),
+    "float4": (">f4", np.float32), "float8": (">f8", np.float64), "bool": ("?", np.bool_),
+}
+# Date keys are normalized to YYYYMMDD server-side (the daily tables hold either epoch seconds or YYYYMMDD ints)
+_DATE_KEY_SQL = "(CASE WHEN date BETWEEN 19000101 AND 99991231 THEN date ELSE to_char(to_timestamp(date) AT TIME ZONE 'UTC', 'YYYYMMDD')::int8 END)"
+
+
+def _nan_float8(column: str) -> str:
+    """float8 select expression with NULL as NaN, so the column stays fixed-width in a binary COPY."""
+    return f"COALESCE({column}::float8, 'NaN'::float8) AS {column}"
+
+
+def decode_binary_copy(payload: bytes, columns: Sequence[Tuple[str, str]]) -> Optional[pd.DataFrame]:
+    """
+    Column-wise decoding of a binary COPY stream whose fields are all fixed-width and non-NULL. Every tuple then has
+    the same byte layout, so the body is viewed as one big-endian structured array: no per-row or per-value Python work.
+    Returns None if the stream does not have that layout (unknown type, a NULL field, malformed framing).
+    """
+    if len(payload) < 21 or payload[:11] != PGCOPY_SIGNATURE or payload[-2:] != PGCOPY_TRAILER: return None
+    body_start = 19 + int.from_bytes(payload[15:19], "big")
+    if any(pg_type not in _COPY_FIXED_TYPES for _, pg_type in columns): return None
+    wire_fields: List[Tuple[str, str]] = [("n_fields", ">i2")]
+    for i, (_, pg_type) in enumerate(columns): wire_fields += [(f"len_{i}", ">i4"), (f"val_{i}", _COPY_FIXED_TYPES[pg_type][0])]
+    record = np.dtype(wire_fields) # Packed, like the wire format
+    body = memoryview(payload)[body_start:len(payload) - 2]
+    if len(body) % record.itemsize: return None
+    tuples = np.frombuffer(body, dtype=record)
+    if (tuples["n_fields"] != len(columns)).any(): return None
+    for i, (_, pg_type) in enumerate(columns):
+        if (tuples[f"len_{i}"] != np.dtype(_COPY_FIXED_TYPES[pg_type][0]).itemsize).any(): return None
+    return pd.DataFrame({name: tuples[f"val_{i}"].astype(_COPY_FIXED_TYPES[pg_type][1]) for i, (name, pg_type) in enumerate(columns)}, columns=[name for name, _ in columns])
+
+
+def _rows_to_frame(rows: Sequence[Tuple], description: Optional[Sequence[Any]]) -> pd.DataFrame:
+    """Transposes decoded result rows into typed numpy columns (numpy converts each column in C; NULL floats become NaN)."""
+    if not description: return pd.DataFrame()
+    names = [col.name for col in description]
+    if not rows: return pd.DataFrame(columns=names)
+    columns: Dict[str, np.ndarray] = {}
+    for name, col_desc, values in zip(names, description, zip(*rows)):
+        oid = col_desc.type_code
+        has_null = None in values
+        if oid in _PG_FLOAT_OIDS or (oid in _PG_INT_OIDS and has_null): columns[name] = np.array(values, dtype=np.float64)
+        elif oid in _PG_INT_OIDS: columns[name] = np.array(values, dtype=np.int64)
+        elif oid == _PG_BOOL_OID and not has_null: columns[name] = np.array(values, dtype=bool)
+        else: columns[name] = np.array(values, dtype=object)
+    return pd.DataFrame(columns, columns=names)
+
+
+class AsyncDatabase:
+    """Pool-backed async access to the EOTS tables. Call 'await open()' before use and 'await close()' on shutdown."""
+
+    def __init__(self, connection_details: Dict[str, str], min_size: int = 1, max_size: int = 8, timeout_sec: float = 10.0):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        if not psycopg3_available:
+            raise ImportError("psycopg 3 and psycopg_pool are required for AsyncDatabase.")
+        conninfo = psycopg.conninfo.make_conninfo(
+            host=connection_details.get("host"), dbname=connection_details.get("dbname"),
+            user=connection_details.get("user"), password=connection_details.get("password"),
+            port=connection_details.get("port")
+        )
+        self.pool = AsyncConnectionPool(conninfo, min_size=min_size, max_size=max_size, timeout=timeout_sec, open=False)
+        self._host = connection_details.get("host")
+
+    async def open(self) -> None:
+        await self.pool.open()
+        self.instance_logger.info(f"Async connection pool opened for host: {self._host} (max_size={self.pool.max_size})")
+
+    async def close(self) -> None:
+        await self.pool.close()
+        self.instance_logger.info("Async connection pool closed.")
+
+    async def __aenter__(self) -> "AsyncDatabase":
+        await self.open(); return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    # --- Generic Query Helpers ---
+
+    async def fetch_frame(self, sql: str, params: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+        """Runs one query with binary result transfer and returns it as a typed DataFrame (empty on error)."""
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor(binary=True) as cur:
+                    await cur.execute(sql, params)
+                    rows = await cur.fetchall()
+                    return _rows_to_frame(rows, cur.description)
+        except psycopg.Error as e:
+            self.instance_logger.error(f"Async query failed: {e}", exc_info=True)
+            return pd.DataFrame()
+
+    async def fetch_frames_pipelined(self, queries: List[Tuple[str, Optional[Sequence[Any]]]]) -> List[pd.DataFrame]:
+        """Sends all queries in one pipeline on a single connection and returns one DataFrame per query."""
+        if not queries: return []
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.pipeline():
+                    cursors = []
+                    for sql, params in queries:
+                        cur = conn.cursor(binary=True)
+                        await cur.execute(sql, params)
+                        cursors.append(cur)
+                frames = []
+                for cur in cursors:
+                    frames.append(_rows_to_frame(await cur.fetchall(), cur.description))
+                    await cur.close()
+                return frames
+        except psycopg.Error as e:
+            self.instance_logger.error(f"Pipelined query batch ({len(queries)} statements) failed: {e}", exc_info=True)
+            return [pd.DataFrame() for _ in queries]
+
+    async def copy_frame(self, select_sql: str, params: Optional[Sequence[Any]], columns: Sequence[Tuple[str, str]]) -> pd.DataFrame:
+        """
+        Runs 'select_sql' as a binary COPY TO STDOUT and decodes it column-wise (decode_binary_copy). 'columns' gives
+        the (name, pg type) of each selected column, which must be fixed-width and non-NULL (see _nan_float8).
+        Falls back to fetch_frame if the stream cannot be decoded that way. Empty DataFrame on error.
+        """
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    async with cur.copy(f"COPY ({select_sql}) TO STDOUT (FORMAT BINARY)", params) as copy:
+                        payload = b"".join([bytes(block) async for block in copy])
+        except psycopg.Error as e:
+            self.instance_logger.error(f"Binary COPY query failed: {e}", exc_info=True)
+            return pd.DataFrame()
+        frame = decode_binary_copy(payload, columns)
+        if frame is not None: return frame
+        self.instance_logger.warning("Binary COPY stream has variable-width fields; falling back to a row-wise fetch.")
+        return await self.fetch_frame(select_sql, params)
+
+    async def execute_many_pipelined(self, sql: str, params_seq: Sequence[Any]) -> bool:
+        """Executes one statement for each parameter set in a single pipelined transaction."""
+        if not params_seq: return True
+        try:
+            async with self.pool.connection() as conn:
+                async with conn.transaction():
+                    async with conn.cursor() as cur:
+                        await cur.executemany(sql, params_seq) # psycopg 3 pipelines executemany automatically
+            return True
+        except psycopg.Error as e:
+            self.instance_logger.error(f"Pipelined executemany ({len(params_seq)} rows) failed: {e}", exc_info=True)
+            return False
+
+    # --- Historical Market & System Data ---
+
+    async def get_ohlcv_frame(self, symbol: str, start_date_val: int, end_date_val: int) -> pd.DataFrame:
+        """Daily OHLCV rows for a symbol via binary COPY ('date' as stored, prices and volume as float64 with NaN for NULL)."""
+        sql = f"""
+        SELECT date::int8 AS date, {', '.join(_nan_float8(col) for col in ('open', 'high', 'low', 'close', 'volume'))} FROM Daily_OHLCV_Data
+        WHERE symbol = %s AND date >= %s AND date <= %s
+        ORDER BY date ASC
+        """
+        frame = await self.copy_frame(sql, (symbol, start_date_val, end_date_val), [("date", "int8")] + [(col, "float8") for col in ("open", "high", "low", "close", "volume")])
+        if frame.empty: return frame
+        frame.insert(0, "symbol", symbol)
+        return frame[DAILY_OHLCV_COLUMNS]
+
+    def _metric_history_query(self, symbol: str, metric_name: str, lookback_days: int) -> Tuple[str, Tuple]:
+        ymd_start, ymd_end, epoch_start, epoch_end = _date_window_bounds(lookback_days)
+        sql = f"""
+        SELECT {_DATE_KEY_SQL} AS date, {metric_name}::float8 AS value FROM Daily_EOTS_Metrics_Aggregates
+        WHERE symbol = %s AND {metric_name} IS NOT NULL
+          AND ((date >= %s AND date <= %s) OR (date >= %s AND date <= %s))
+        ORDER BY 1 ASC
+        """
+        return sql, (symbol, ymd_start, ymd_end, epoch_start, epoch_end)
+
+    async def get_metric_histories(self, symbol: str, metric_names: List[str], lookback_days: int) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches several EOTS aggregate metric histories for a symbol concurrently, one binary COPY per metric on
+        its own pooled connection (COPY cannot run inside a pipeline). Each frame has 'date' (YYYYMMDD int64)
+        and 'value' (float64) columns, sorted by date.
+        """
+        valid_metrics = [m for m in metric_names if m in VALID_DISTRIBUTION_METRIC_COLS]
+        for bad_metric in set(metric_names) - set(valid_metrics):
+            self.instance_logger.error(f"Invalid metric_name '{bad_metric}' for get_metric_histories.")
+        queries = [self._metric_history_query(symbol, m, lookback_days) for m in valid_metrics]
+        frames = await asyncio.gather(*(self.copy_frame(sql, params, [("date", "int8"), ("value", "float8")]) for sql, params in queries))
+        return dict(zip(valid_metrics, frames))
+
+    # --- Performance Tracking Data ---
+
+    async def log_trade_recommendations(self, rec_data_list: List[Dict[str, Any]]) -> bool:
+        sql = f"""
+        INSERT INTO Trade_Recommendations_Log ({', '.join(TRADE_RECOMMENDATION_COLUMNS)})
+        VALUES ({', '.join(f'%({c})s' for c in TRADE_RECOMMENDATION_COLUMNS)})
+        ON CONFLICT (recommendation_id) DO NOTHING
+        """
+        return await self.execute_many_pipelined(sql, _normalize_trade_log_rows(rec_data_list, TRADE_RECOMMENDATION_COLUMNS, TRADE_RECOMMENDATION_JSON_FIELDS))
+
+    async def log_trade_outcomes(self, outcome_data_list: List[Dict[str, Any]]) -> bool:
+        sql = f"""
+        INSERT INTO Trade_Outcomes_Log ({', '.join(TRADE_OUTCOME_COLUMNS)})
+        VALUES ({', '.join(f'%({c})s' for c in TRADE_OUTCOME_COLUMNS)})
+        """
+        return await self.execute_many_pipelined(sql, _normalize_trade_log_rows(outcome_data_list, TRADE_OUTCOME_COLUMNS, TRADE_OUTCOME_JSON_FIELDS))
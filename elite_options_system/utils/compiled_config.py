@@ -0,0 +1,140 @@
+# compiled_config.py
+"""
+Load-time compiled view of the nested JSON configuration.
+
+CompiledConfig flattens the config once into a {path tuple: value} table, so a lookup of any
+path is a single dict probe instead of a nested walk per call. It also exposes the same data as
+frozen FrozenSettings objects (attribute access, read-only) and carries a stable content hash
+plus per-section hashes, which lets a hot reload tell exactly which top-level sections changed
+and invalidate only the caches that depend on them.
+"""
+import hashlib
+import json
+import logging
+from typing import Callable, Dict, Iterator, List, Any, Optional, Sequence, Set, Tuple
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+CONFIG_HASH_LENGTH: int = 16
+
+
+def stable_config_hash(config_obj: Any) -> str:
+    """Order-independent short hash of a JSON-like config object."""
+    try: return hashlib.sha1(json.dumps(config_obj, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:CONFIG_HASH_LENGTH]
+    except (TypeError, ValueError) as e_hash:
+        logger.warning(f"Could not hash config object: {e_hash}. Using 'unhashable'.")
+        return "unhashable"
+
+
+class FrozenSettings:
+    """Read-only settings node: sub-sections and values by attribute (cfg.strategy_settings.thresholds) or by key."""
+    __slots__ = ("_path", "_values")
+
+    def __init__(self, path: Tuple[str, ...], values: Dict[str, Any]):
+        object.__setattr__(self, "_path", path); object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name: str) -> Any:
+        try: return self._values[name]
+        except KeyError: raise AttributeError(f"No setting '{'.'.join(self._path + (name,))}'") from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Settings are frozen (attempted to set '{'.'.join(self._path + (name,))}').")
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return f"FrozenSettings({'.'.join(self._path) or '<root>'}, keys={list(self._values)})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._values.get(key, default)
+
+    def keys(self):
+        return self._values.keys()
+
+    def items(self):
+        return self._values.items()
+
+
+def _merge_defaults(defaults: Any, config: Any) -> Any:
+    """Config tree with absent / None entries filled from defaults, recursively (the lookup rule applied to whole sections)."""
+    if config is None: return defaults
+    if isinstance(config, dict) and isinstance(defaults, dict):
+        merged = dict(defaults); merged.update({k: _merge_defaults(defaults.get(k), v) for k, v in config.items()})
+        return merged
+    return config
+
+
+def _freeze(value: Any, path: Tuple[str, ...]) -> Any:
+    if isinstance(value, dict): return FrozenSettings(path, {str(k): _freeze(v, path + (str(k),)) for k, v in value.items()})
+    if isinstance(value, list): return tuple(_freeze(v, path) for v in value)
+    return value
+
+
+class CompiledConfig:
+    """
+    Flattened lookup table over a config dict, optionally backed by a defaults dict.
+
+    A path resolves to the config value unless it is absent or None there, in which case the
+    defaults value is used (the rule the nested-walk accessors applied). Values are the original
+    objects, so callers that expect plain dicts/lists keep working; 'settings' is the frozen view of
+    the defaults-plus-config tree built with the same rule, so every leaf it holds equals get(path).
+    """
+
+    def __init__(self, config: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None):
+        self.config = config if isinstance(config, dict) else {}
+        self._lookup: Dict[Tuple[str, ...], Any] = {}
+        if isinstance(defaults, dict): self._flatten(defaults, (), override_with_none=True)
+        self._flatten(self.config, (), override_with_none=False)
+        self.config_hash: str = stable_config_hash(self.config)
+        self.section_hashes: Dict[str, str] = {str(k): stable_config_hash(v) for k, v in self.config.items()}
+        self.settings: FrozenSettings = _freeze(_merge_defaults(defaults if isinstance(defaults, dict) else None, self.config), ())
+
+    def _flatten(self, node: Any, path: Tuple[str, ...], override_with_none: bool) -> None:
+        if node is not None or override_with_none or path not in self._lookup: self._lookup[path] = node
+        if isinstance(node, dict):
+            for key, value in node.items(): self._flatten(value, path + (key,), override_with_none)
+
+    def get(self, path: Sequence[str], default: Any = None) -> Any:
+        return self._lookup.get(tuple(path), default)
+
+    def __len__(self) -> int:
+        return len(self._lookup)
+
+    def changed_sections(self, other: "CompiledConfig") -> Set[str]:
+        """Top-level sections whose content differs between this and another compiled config."""
+        if other.config_hash == self.config_hash: return set()
+        all_sections = set(self.section_hashes) | set(other.section_hashes)
+        return {s for s in all_sections if self.section_hashes.get(s) != other.section_hashes.get(s)}
+
+
+class ConfigDependencyRegistry:
+    """Maps top-level config sections to the invalidation callbacks of caches derived from them."""
+
+    def __init__(self):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self._callbacks: Dict[str, List[Callable[[], None]]] = {}
+
+    def register(self, section: str, callback: Callable[[], None]) -> None:
+        self._callbacks.setdefault(section, []).append(callback)
+
+    def invalidate(self, changed_sections: Set[str]) -> int:
+        """Runs the callbacks registered for each changed section (each callback at most once). Returns the number run."""
+        seen: List[Callable[[], None]] = []
+        for section in sorted(changed_sections):
+            for callback in self._callbacks.get(section, []):
+                if callback in seen: continue
+                seen.append(callback)
+                try: callback()
+                except Exception as e_cb: self.instance_logger.error(f"Config invalidation callback for section '{section}' failed: {e_cb}", exc_info=True)
+        return len(seen)
@@ -0,0 +1,124 @@
+# component_history.py
+"""
+Per-symbol history of strike-aggregated net pressure snapshots.
+
+Each snapshot is aggregated by strike once, when it is stored, into sorted numpy vectors
+(strike, net volume pressure, net value pressure). A parallel ascending timestamp list lets
+lookback queries (e.g. "closest snapshot to 15 minutes ago") be answered by binary search
+instead of scanning and re-grouping every historical DataFrame on each chart render.
+"""
+import bisect
+import logging
+from typing import Iterable, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRIKE_COL: str = "strike"
+DEFAULT_NET_VOL_COL: str = "net_volume_pressure"
+DEFAULT_NET_VAL_COL: str = "net_value_pressure"
+
+
+class ComponentSnapshot:
+    """One stored snapshot: timestamp, the raw slice, and its strike-aggregated vectors (sorted by strike)."""
+    __slots__ = ("ts", "frame", "strikes", "net_vol", "net_val")
+
+    def __init__(self, ts: float, frame: pd.DataFrame, strikes: np.ndarray, net_vol: np.ndarray, net_val: np.ndarray):
+        self.ts = ts; self.frame = frame; self.strikes = strikes; self.net_vol = net_vol; self.net_val = net_val
+
+    def aligned_to(self, strikes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Net vol/val values at the given strikes (0.0 where this snapshot has no such strike)."""
+        strikes = np.asarray(strikes, dtype=float)
+        vol_out = np.zeros(len(strikes)); val_out = np.zeros(len(strikes))
+        if len(self.strikes) == 0 or len(strikes) == 0: return vol_out, val_out
+        pos = np.minimum(np.searchsorted(self.strikes, strikes), len(self.strikes) - 1)
+        hit = self.strikes[pos] == strikes
+        vol_out[hit] = self.net_vol[pos[hit]]; val_out[hit] = self.net_val[pos[hit]]
+        return vol_out, val_out
+
+
+class ComponentHistoryIndex:
+    """
+    Bounded, timestamp-indexed store of ComponentSnapshots for one symbol.
+
+    Iteration yields (ts, frame) tuples newest first and len() gives the snapshot count, so existing
+    consumers of the former deque-of-tuples history keep working.
+    """
+
+    def __init__(self, maxlen: int = 10, strike_col: str = DEFAULT_STRIKE_COL, net_vol_col: str = DEFAULT_NET_VOL_COL, net_val_col: str = DEFAULT_NET_VAL_COL):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.maxlen = max(1, int(maxlen))
+        self.strike_col, self.net_vol_col, self.net_val_col = strike_col, net_vol_col, net_val_col
+        self._timestamps: List[float] = [] # Ascending
+        self._snapshots: List[ComponentSnapshot] = [] # Parallel to _timestamps
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Tuple[float, pd.DataFrame]], strike_col: str = DEFAULT_STRIKE_COL, net_vol_col: str = DEFAULT_NET_VOL_COL, net_val_col: str = DEFAULT_NET_VAL_COL) -> "ComponentHistoryIndex":
+        """Builds an index from any iterable of (ts, DataFrame) entries (invalid entries are skipped)."""
+        entry_list = list(entries) if entries is not None else []
+        index = cls(maxlen=max(1, len(entry_list)), strike_col=strike_col, net_vol_col=net_vol_col, net_val_col=net_val_col)
+        for entry in entry_list:
+            if isinstance(entry, tuple) and len(entry) == 2: index.add(entry[0], entry[1])
+        return index
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    def __iter__(self):
+        for snap in reversed(self._snapshots): yield (snap.ts, snap.frame)
+
+    @property
+    def latest_ts(self) -> Optional[float]:
+        return self._timestamps[-1] if self._timestamps else None
+
+    def add(self, ts: float, frame: pd.DataFrame) -> bool:
+        """Aggregates and stores one snapshot. Returns False if the frame lacks the required columns."""
+        if not isinstance(frame, pd.DataFrame) or not all(c in frame.columns for c in (self.strike_col, self.net_vol_col, self.net_val_col)):
+            self.instance_logger.debug("Skipping history snapshot without strike/net pressure columns.")
+            return False
+        agg = frame.groupby(self.strike_col, as_index=False).agg({self.net_vol_col: 'first', self.net_val_col: 'first'})
+        agg[self.strike_col] = pd.to_numeric(agg[self.strike_col], errors='coerce')
+        agg = agg.dropna(subset=[self.strike_col]).sort_values(self.strike_col, kind="stable")
+        snap = ComponentSnapshot(
+            float(ts), frame, agg[self.strike_col].to_numpy(dtype=float),
+            pd.to_numeric(agg[self.net_vol_col], errors='coerce').fillna(0.0).to_numpy(dtype=float),
+            pd.to_numeric(agg[self.net_val_col], errors='coerce').fillna(0.0).to_numpy(dtype=float)
+        )
+        pos = bisect.bisect_right(self._timestamps, snap.ts)
+        self._timestamps.insert(pos, snap.ts); self._snapshots.insert(pos, snap)
+        while len(self._snapshots) > self.maxlen:
+            self._timestamps.pop(0); self._snapshots.pop(0)
+        return True
+
+    def nearest(self, target_ts: float, tolerance_sec: float) -> Tuple[Optional[int], float]:
+        """
+        Position (in ascending order) of the snapshot closest to target_ts within tolerance and its distance.
+        Ties go to the newer snapshot. Returns (None, inf) when nothing is within tolerance.
+        """
+        if not self._timestamps: return None, float('inf')
+        pos = bisect.bisect_left(self._timestamps, target_ts); best_pos, best_diff = None, float('inf')
+        for cand in (pos, pos - 1): # Newer candidate first so it wins ties
+            if 0 <= cand < len(self._timestamps):
+                diff = abs(self._timestamps[cand] - target_ts)
+                if diff < best_diff: best_pos, best_diff = cand, diff
+        while best_pos is not None and best_pos + 1 < len(self._timestamps) and self._timestamps[best_pos + 1] == self._timestamps[best_pos]:
+            best_pos += 1 # Equal timestamps: prefer the most recently stored
+        return (best_pos, best_diff) if best_diff < tolerance_sec else (None, float('inf'))
+
+    def snapshot_at(self, position: int) -> ComponentSnapshot:
+        return self._snapshots[position]
+
+    def match_lookbacks(self, targets: List[Tuple[str, float, float]]) -> List[Tuple[str, ComponentSnapshot]]:
+        """
+        Resolves (label, target_ts, tolerance_sec) lookbacks to snapshots, in the given label order.
+        A snapshot is assigned to at most one label (the first that claims it).
+        """
+        used_positions = set(); matches: List[Tuple[str, ComponentSnapshot]] = []
+        for label, target_ts, tolerance_sec in targets:
+            pos, _ = self.nearest(target_ts, tolerance_sec)
+            if pos is None or pos in used_positions: continue
+            used_positions.add(pos); matches.append((label, self._snapshots[pos]))
+        return matches
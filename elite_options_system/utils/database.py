@@ -8,13 +8,30 @@ import psycopg2.extras # For DictCursor
 import json
 import logging
 from typing import Dict, List, Any, Optional, Tuple, Union
-from datetime import datetime, timedelta # Added timedelta for example
+from datetime import datetime, timedelta, date, timezone # Added timedelta for example
 import pandas as pd # Moved import pandas as pd to the top
 import os # Added for environment variables in example
+import io # For streaming DataFrames through COPY
+import time
 
 # Module-level logger
 logger = logging.getLogger(__name__)
 
+# Column layouts used by the COPY-based bulk loaders (surrogate keys excluded)
+DAILY_OHLCV_COLUMNS: List[str] = ["symbol", "date", "open", "high", "low", "close", "volume"]
+INTRADAY_SNAPSHOT_TABLE: str = "Intraday_Strike_Snapshots"
+INTRADAY_SNAPSHOT_COLUMNS: List[str] = [
+    "snapshot_ts", "symbol", "strike", "expiry", "opt_kind", "mspi", "sai", "ssi", "cfi",
+    "dag_custom", "tdpi", "vri", "sdag_consensus", "net_volume_pressure", "net_value_pressure",
+    "underlying_price"
+]
+DAILY_EOTS_METRICS_COLUMNS: List[str] = [
+    "symbol", "date", "gib_oi_based_und", "td_gib_dollar_und", "hp_eod_und",
+    "vapi_fa_z_score_und", "dwfd_z_score_und", "tw_laf_z_score_und",
+    "a_mspi_und_avg", "a_sai_und_avg", "a_ssi_und_avg", "vri_2_0_und_aggregate",
+    "market_regime_v2_5_daily_summary", "underlying_closing_price", "underlying_atr_daily"
+]
+
 # Database connection parameters will be passed to connect_db function
 # Example structure for connection_details:
 # {
@@ -133,6 +150,40 @@ def create_tables(conn: psycopg2.extensions.connection):
             underlying_atr_daily REAL,
             UNIQUE (symbol, date)
         )
+        """,
+        # --- Intraday Per-Strike Snapshot Tables (range partitioned by day) ---
+        """
+        CREATE TABLE IF NOT EXISTS Intraday_Strike_Snapshots (
+            snapshot_ts TIMESTAMPTZ NOT NULL, -- Fetch timestamp of the processed snapshot
+            symbol TEXT NOT NULL,
+            strike DOUBLE PRECISION NOT NULL,
+            expiry DATE, -- NULL when the snapshot mixes expirations
+            opt_kind TEXT,
+            mspi REAL,
+            sai REAL,
+            ssi REAL,
+            cfi REAL,
+            dag_custom REAL,
+            tdpi REAL,
+            vri REAL,
+            sdag_consensus REAL,
+            net_volume_pressure REAL,
+            net_value_pressure REAL,
+            underlying_price REAL
+        ) PARTITION BY RANGE (snapshot_ts)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Intraday_Strike_Snapshots_default
+            PARTITION OF Intraday_Strike_Snapshots DEFAULT
+        """,
+        # Indexes on the partitioned parent cascade to every (existing and future) day partition.
+        """
+        CREATE INDEX IF NOT EXISTS idx_intraday_strike_snapshots_ts_brin
+            ON Intraday_Strike_Snapshots USING BRIN (snapshot_ts)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_intraday_strike_snapshots_sym_strike_exp
+            ON Intraday_Strike_Snapshots (symbol, strike, expiry, snapshot_ts)
         """
     )
     try:
@@ -259,6 +310,108 @@ def get_trade_outcomes_for_symbol_pg(conn: psycopg2.extensions.connection, symbo
         logger.error(f"Error fetching trade outcomes for symbol {symbol} from PostgreSQL: {e}", exc_info=True)
         return []
 
+# Column layouts and JSON fields for the batched trade-log writers (used by the write-behind logger)
+TRADE_RECOMMENDATION_COLUMNS: List[str] = [
+    "recommendation_id", "timestamp_issued_utc", "symbol", "market_regime_at_issuance",
+    "ticker_context_at_issuance_json", "triggering_signals_json", "atif_situational_assessment_json",
+    "atif_final_conviction_score", "atif_conviction_level", "selected_strategy_type",
+    "target_dte_min", "target_dte_max", "target_delta_long_leg_min", "target_delta_long_leg_max",
+    "target_delta_short_leg_min", "target_delta_short_leg_max", "recommended_options_json",
+    "calculated_entry_price", "initial_stop_loss_price", "initial_target_1_price",
+    "initial_target_2_price", "initial_target_3_price", "tpo_rationale", "current_status",
+    "last_status_update_utc"
+]
+TRADE_RECOMMENDATION_JSON_FIELDS: List[str] = ["ticker_context_at_issuance_json", "triggering_signals_json", "atif_situational_assessment_json", "recommended_options_json"]
+TRADE_OUTCOME_COLUMNS: List[str] = [
+    "recommendation_id", "entry_timestamp_utc", "actual_entry_price", "contracts_traded_json",
+    "exit_timestamp_utc", "actual_exit_price", "exit_reason", "profit_loss_absolute",
+    "profit_loss_percentage", "mae_during_trade", "mfe_during_trade", "trade_duration_seconds",
+    "commissions_fees", "notes", "metrics_at_entry_json", "metrics_at_exit_json"
+]
+TRADE_OUTCOME_JSON_FIELDS: List[str] = ["contracts_traded_json", "metrics_at_entry_json", "metrics_at_exit_json"]
+
+
+def _normalize_trade_log_rows(rows: List[Dict[str, Any]], columns: List[str], json_fields: List[str]) -> List[Dict[str, Any]]:
+    """Projects rows onto 'columns' (missing keys -> NULL) and serializes JSON fields like the single-row loggers."""
+    normalized = []
+    for row in rows:
+        out = {col: row.get(col) for col in columns}
+        for json_field in json_fields:
+            val = out.get(json_field)
+            if isinstance(val, (dict, list)): out[json_field] = json.dumps(val, default=str)
+            elif val is not None and not isinstance(val, str): out[json_field] = str(val)
+        normalized.append(out)
+    return normalized
+
+
+def _rollback_quietly(conn: psycopg2.extensions.connection) -> None:
+    """Rolls back, ignoring errors from an already broken connection."""
+    try: conn.rollback()
+    except psycopg2.Error as e_rollback: logger.debug(f"Rollback failed (connection likely closed): {e_rollback}")
+
+
+def log_trade_recommendations_batch_pg(conn: psycopg2.extensions.connection, rec_data_list: List[Dict[str, Any]], raise_on_error: bool = False) -> bool:
+    """
+    Logs a batch of trade recommendations in one transaction. Uses ON CONFLICT DO NOTHING. Returns True on commit.
+    With raise_on_error the transaction is rolled back and the error re-raised, so callers can tell
+    connection failures from rejected rows.
+    """
+    if not conn: return False
+    if not rec_data_list: return True
+    sql = f"""
+    INSERT INTO Trade_Recommendations_Log ({', '.join(TRADE_RECOMMENDATION_COLUMNS)})
+    VALUES ({', '.join(f'%({c})s' for c in TRADE_RECOMMENDATION_COLUMNS)})
+    ON CONFLICT (recommendation_id) DO NOTHING;
+    """
+    try:
+        rows = _normalize_trade_log_rows(rec_data_list, TRADE_RECOMMENDATION_COLUMNS, TRADE_RECOMMENDATION_JSON_FIELDS)
+        with conn.cursor() as cur:
+            psycopg2.extras.execute_batch(cur, sql, rows)
+        conn.commit()
+        logger.debug(f"Logged/ignored batch of {len(rows)} trade recommendations.")
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Error logging trade recommendation batch to PostgreSQL: {e}", exc_info=True)
+        _rollback_quietly(conn)
+        if raise_on_error: raise
+        return False
+    except Exception as e_gen:
+        logger.error(f"Generic error logging trade recommendation batch: {e_gen}", exc_info=True)
+        _rollback_quietly(conn)
+        if raise_on_error: raise
+        return False
+
+
+def log_trade_outcomes_batch_pg(conn: psycopg2.extensions.connection, outcome_data_list: List[Dict[str, Any]], raise_on_error: bool = False) -> bool:
+    """
+    Logs a batch of trade outcomes in one transaction. Returns True on commit.
+    With raise_on_error the transaction is rolled back and the error re-raised, so callers can tell
+    connection failures from rejected rows.
+    """
+    if not conn: return False
+    if not outcome_data_list: return True
+    sql = f"""
+    INSERT INTO Trade_Outcomes_Log ({', '.join(TRADE_OUTCOME_COLUMNS)})
+    VALUES ({', '.join(f'%({c})s' for c in TRADE_OUTCOME_COLUMNS)});
+    """
+    try:
+        rows = _normalize_trade_log_rows(outcome_data_list, TRADE_OUTCOME_COLUMNS, TRADE_OUTCOME_JSON_FIELDS)
+        with conn.cursor() as cur:
+            psycopg2.extras.execute_batch(cur, sql, rows)
+        conn.commit()
+        logger.debug(f"Logged batch of {len(rows)} trade outcomes.")
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Error logging trade outcome batch to PostgreSQL: {e}", exc_info=True)
+        _rollback_quietly(conn)
+        if raise_on_error: raise
+        return False
+    except Exception as e_gen:
+        logger.error(f"Generic error logging trade outcome batch: {e_gen}", exc_info=True)
+        _rollback_quietly(conn)
+        if raise_on_error: raise
+        return False
+
 # --- Functions for Historical Market & System Data ---
 
 def store_daily_ohlcv_batch_pg(conn: psycopg2.extensions.connection, ohlcv_data_list: List[Dict[str, Any]]):
@@ -311,6 +464,100 @@ def store_daily_eots_metrics_batch_pg(conn: psycopg2.extensions.connection, metr
         conn.rollback()
 
 
+# --- Bulk Loaders (COPY FROM STDIN + single merge statement) ---
+
+def _copy_dataframe_merge_pg(
+    conn: psycopg2.extensions.connection,
+    df: pd.DataFrame,
+    target_table: str,
+    columns: List[str],
+    bigint_columns: List[str],
+    update_existing: bool = False
+) -> Optional[int]:
+    """
+    Streams 'df' into an ON COMMIT DROP temp table via COPY FROM STDIN (CSV) and merges it
+    into 'target_table' with one INSERT ... SELECT ... ON CONFLICT (symbol, date) statement.
+    When the frame repeats a (symbol, date) key, its last occurrence wins.
+    Returns the number of rows inserted/updated, or None on failure.
+    """
+    if not conn: return None
+    if not isinstance(df, pd.DataFrame) or df.empty: return 0
+    missing_cols = [c for c in ("symbol", "date") if c not in df.columns]
+    if missing_cols:
+        logger.error(f"Bulk load into {target_table} aborted: missing key columns {missing_cols}.")
+        return None
+
+    start_time = time.perf_counter()
+    try:
+        # Align to the table layout; absent optional columns load as NULL.
+        load_df = df.reindex(columns=columns)
+        for col in bigint_columns:
+            # BIGINT columns must not be rendered as floats ("20240102.0") in the CSV stream.
+            load_df[col] = pd.to_numeric(load_df[col], errors='coerce').round().astype('Int64')
+        load_df = load_df.dropna(subset=["symbol", "date"])
+        if load_df.empty: return 0
+        load_df["load_seq"] = range(len(load_df)) # Input order (last column), the DISTINCT ON tiebreaker
+
+        buffer = io.StringIO()
+        load_df.to_csv(buffer, index=False, header=False, na_rep='')
+        buffer.seek(0)
+
+        col_list = ", ".join(columns)
+        tmp_table = f"tmp_bulk_{target_table.lower()}"
+        if update_existing:
+            update_set = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in ("symbol", "date"))
+            conflict_action = f"DO UPDATE SET {update_set}"
+        else:
+            conflict_action = "DO NOTHING"
+        # DISTINCT ON keeps the merge valid when the frame itself holds duplicate (symbol, date) keys;
+        # load_seq DESC makes it keep the last input occurrence.
+        merge_sql = f"""
+        INSERT INTO {target_table} ({col_list})
+        SELECT DISTINCT ON (symbol, date) {col_list} FROM {tmp_table}
+        ORDER BY symbol, date, load_seq DESC
+        ON CONFLICT (symbol, date) {conflict_action};
+        """
+
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TEMP TABLE {tmp_table} ON COMMIT DROP AS SELECT {col_list} FROM {target_table} WITH NO DATA;")
+            cur.execute(f"ALTER TABLE {tmp_table} ADD COLUMN load_seq BIGINT NOT NULL;")
+            cur.copy_expert(f"COPY {tmp_table} ({col_list}, load_seq) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+            cur.execute(merge_sql)
+            merged_rows = cur.rowcount
+        conn.commit()
+
+        elapsed = time.perf_counter() - start_time
+        rows_per_sec = len(load_df) / elapsed if elapsed > 0 else float('inf')
+        logger.info(f"Bulk loaded {len(load_df)} rows into {target_table} ({merged_rows} merged) in {elapsed:.3f}s ({rows_per_sec:,.0f} rows/s).")
+        return merged_rows
+    except psycopg2.Error as e:
+        logger.error(f"Error bulk loading into {target_table} via COPY: {e}", exc_info=True)
+        conn.rollback()
+        return None
+    except Exception as e_gen:
+        logger.error(f"Generic error bulk loading into {target_table}: {e_gen}", exc_info=True)
+        conn.rollback()
+        return None
+
+
+def bulk_load_daily_ohlcv_pg(conn: psycopg2.extensions.connection, ohlcv_df: pd.DataFrame, update_existing: bool = False) -> Optional[int]:
+    """
+    Backfill path for Daily_OHLCV_Data. Streams the DataFrame with COPY and merges in one statement.
+    Existing (symbol, date) rows are kept unless 'update_existing' is True.
+    """
+    return _copy_dataframe_merge_pg(conn, ohlcv_df, "Daily_OHLCV_Data", DAILY_OHLCV_COLUMNS,
+                                    bigint_columns=["date", "volume"], update_existing=update_existing)
+
+
+def bulk_load_daily_eots_metrics_pg(conn: psycopg2.extensions.connection, metrics_df: pd.DataFrame, update_existing: bool = False) -> Optional[int]:
+    """
+    Backfill path for Daily_EOTS_Metrics_Aggregates. Streams the DataFrame with COPY and merges in one statement.
+    Existing (symbol, date) rows are kept unless 'update_existing' is True.
+    """
+    return _copy_dataframe_merge_pg(conn, metrics_df, "Daily_EOTS_Metrics_Aggregates", DAILY_EOTS_METRICS_COLUMNS,
+                                    bigint_columns=["date"], update_existing=update_existing)
+
+
 def get_ohlcv_for_symbol_daterange_pg(conn: psycopg2.extensions.connection, symbol: str, start_date_val: Union[int, float], end_date_val: Union[int, float]) -> List[Dict]:
     """Retrieves OHLCV data for a symbol within a date range from PostgreSQL."""
     if not conn: return []
@@ -328,49 +575,190 @@ def get_ohlcv_for_symbol_daterange_pg(conn: psycopg2.extensions.connection, symb
         logger.error(f"Error fetching OHLCV for {symbol} ({start_date_val}-{end_date_val}) from PostgreSQL: {e}", exc_info=True)
         return []
 
+def to_yyyymmdd_date_key(date_val: Union[int, float]) -> Optional[int]:
+    """
+    Normalizes a stored 'date' value to a YYYYMMDD int. The daily tables hold either Unix epoch
+    seconds (start of day UTC) or YYYYMMDD ints; the two ranges never overlap (~2e7 vs ~1e9).
+    """
+    if date_val is None or pd.isna(date_val): return None
+    date_int = int(date_val)
+    if 19000101 <= date_int <= 99991231: return date_int
+    return int(datetime.fromtimestamp(date_int, tz=timezone.utc).strftime("%Y%m%d"))
+
+
+def _date_window_bounds(lookback_days: int, end_dt: Optional[datetime] = None) -> Tuple[int, int, int, int]:
+    """Returns (yyyymmdd_start, yyyymmdd_end, epoch_start, epoch_end) for a lookback ending at 'end_dt' (UTC now by default)."""
+    end_dt = end_dt or datetime.now(timezone.utc)
+    start_dt = end_dt - timedelta(days=lookback_days)
+    return (int(start_dt.strftime("%Y%m%d")), int(end_dt.strftime("%Y%m%d")), int(start_dt.timestamp()), int(end_dt.timestamp()))
+
+
+VALID_DISTRIBUTION_METRIC_COLS: List[str] = [
+    "gib_oi_based_und", "td_gib_dollar_und", "hp_eod_und", "vapi_fa_z_score_und",
+    "dwfd_z_score_und", "tw_laf_z_score_und", "a_mspi_und_avg", "a_sai_und_avg",
+    "a_ssi_und_avg", "vri_2_0_und_aggregate", "underlying_closing_price", "underlying_atr_daily"
+]
+
+
+def get_metric_history_pg(conn: psycopg2.extensions.connection, symbol: str, metric_name: str, lookback_days: int, after_date_key: Optional[int] = None) -> Optional[List[Tuple[int, float]]]:
+    """
+    Retrieves (date_key, value) pairs of an EOTS aggregate metric for a symbol, ordered by date.
+    date_key is normalized to YYYYMMDD regardless of the stored encoding. The lookback window is matched
+    against both encodings. If 'after_date_key' (YYYYMMDD) is given, only newer rows are returned, which
+    makes incremental refreshes cheap.
+    """
+    if not conn: return None
+    if metric_name not in VALID_DISTRIBUTION_METRIC_COLS:
+        logger.error(f"Invalid metric_name '{metric_name}' for get_metric_history_pg.")
+        return None
+    try:
+        ymd_start, ymd_end, epoch_start, epoch_end = _date_window_bounds(lookback_days)
+        if after_date_key is not None:
+            after_dt = datetime.strptime(str(int(after_date_key)), "%Y%m%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+            ymd_start = max(ymd_start, int(after_dt.strftime("%Y%m%d"))); epoch_start = max(epoch_start, int(after_dt.timestamp()))
+    except Exception:
+        logger.error("Date conversion for metric history window failed.", exc_info=True)
+        return None
+
+    sql = f"""
+    SELECT date, {metric_name} FROM Daily_EOTS_Metrics_Aggregates
+    WHERE symbol = %s AND {metric_name} IS NOT NULL
+      AND ((date >= %s AND date <= %s) OR (date >= %s AND date <= %s))
+    ORDER BY date ASC
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, (symbol, ymd_start, ymd_end, epoch_start, epoch_end))
+            rows = cur.fetchall()
+        history = [(to_yyyymmdd_date_key(row[0]), float(row[1])) for row in rows]
+        history.sort(key=lambda pair: pair[0]) # Mixed encodings sort differently in SQL
+        return history
+    except psycopg2.Error as e:
+        logger.error(f"Error fetching metric history '{metric_name}' for {symbol} from PostgreSQL: {e}", exc_info=True)
+        return None
+
+
 def get_historical_metric_distribution_pg(conn: psycopg2.extensions.connection, symbol: str, metric_name: str, lookback_days: int) -> Optional[pd.Series]:
     """
     Retrieves a series of a specific EOTS aggregate metric for a symbol from PostgreSQL.
     'metric_name' must be a valid column name in Daily_EOTS_Metrics_Aggregates.
-    Assumes 'date' column is stored as Unix epoch timestamp (seconds) for timedelta.
+    The 'date' column may hold Unix epoch seconds or YYYYMMDD ints; both encodings are matched.
+    For repeated percentile/rank lookups prefer utils.metric_distribution.MetricDistributionService.
+    """
+    history = get_metric_history_pg(conn, symbol, metric_name, lookback_days)
+    if history is None: return None
+    if not history: return pd.Series(dtype=float)
+    return pd.Series([val for _, val in history], dtype=float).dropna()
+
+
+# --- Functions for Intraday Per-Strike Snapshots ---
+
+_ensured_intraday_partitions: set = set() # Days whose partition this process has already created/verified
+
+def _intraday_partition_name(day: date) -> str:
+    return f"{INTRADAY_SNAPSHOT_TABLE.lower()}_{day.strftime('%Y%m%d')}"
+
+
+def ensure_intraday_snapshot_partition_pg(conn: psycopg2.extensions.connection, day: Union[date, datetime]) -> bool:
+    """
+    Creates the [day 00:00 UTC, day+1 00:00 UTC) partition of Intraday_Strike_Snapshots if missing.
+    Rows already sitting in the DEFAULT partition for that day must be moved out before attaching,
+    so callers should create partitions ahead of the session (e.g. at startup for today and tomorrow).
+    """
+    if not conn: return False
+    if isinstance(day, datetime): day = day.astimezone(timezone.utc).date() if day.tzinfo else day.date()
+    if day in _ensured_intraday_partitions: return True
+    lower = datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+    upper = lower + timedelta(days=1)
+    sql = f"""
+    CREATE TABLE IF NOT EXISTS {_intraday_partition_name(day)}
+        PARTITION OF {INTRADAY_SNAPSHOT_TABLE}
+        FOR VALUES FROM (%s) TO (%s);
+    """
+    try:
+        with conn.cursor() as cur:
+            cur.execute(sql, (lower, upper))
+        conn.commit()
+        _ensured_intraday_partitions.add(day)
+        logger.debug(f"Intraday snapshot partition ensured for {day.isoformat()}.")
+        return True
+    except psycopg2.Error as e:
+        logger.error(f"Error creating intraday snapshot partition for {day}: {e}", exc_info=True)
+        conn.rollback()
+        return False
+
+
+def store_intraday_strike_snapshot_pg(conn: psycopg2.extensions.connection, snapshot_df: pd.DataFrame, snapshot_ts: Union[str, datetime], symbol: Optional[str] = None) -> Optional[int]:
+    """
+    Appends one processed per-strike snapshot to Intraday_Strike_Snapshots via COPY.
+    'snapshot_ts' is the fetch timestamp (ISO string or datetime; naive values are treated as UTC).
+    Returns the number of rows written, or None on failure.
     """
     if not conn: return None
+    if not isinstance(snapshot_df, pd.DataFrame) or snapshot_df.empty: return 0
     try:
-        # Import datetime, timedelta here if not globally available in this module's context when called
-        # from datetime import datetime, timedelta # Already imported at module level
-        current_timestamp = int(datetime.now().timestamp())
-        start_timestamp = current_timestamp - (lookback_days * 24 * 60 * 60)
+        ts = pd.Timestamp(snapshot_ts)
+        ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
     except Exception:
-        logger.error("Date conversion for metric distribution failed, query might be incorrect.", exc_info=True)
+        logger.error(f"Invalid snapshot_ts '{snapshot_ts}' for intraday snapshot store.", exc_info=True)
         return None
 
-    valid_metric_cols = [
-        "gib_oi_based_und", "td_gib_dollar_und", "hp_eod_und", "vapi_fa_z_score_und",
-        "dwfd_z_score_und", "tw_laf_z_score_und", "a_mspi_und_avg", "a_sai_und_avg",
-        "a_ssi_und_avg", "vri_2_0_und_aggregate", "underlying_closing_price", "underlying_atr_daily"
-    ]
-    if metric_name not in valid_metric_cols:
-        logger.error(f"Invalid metric_name '{metric_name}' for get_historical_metric_distribution_pg.")
+    load_df = snapshot_df.rename(columns={"expiration_date": "expiry", "price": "underlying_price"}).reindex(columns=INTRADAY_SNAPSHOT_COLUMNS)
+    load_df["snapshot_ts"] = ts.isoformat()
+    if symbol is not None: load_df["symbol"] = symbol
+    elif "underlying_symbol" in snapshot_df.columns: load_df["symbol"] = snapshot_df["underlying_symbol"].values
+    load_df["strike"] = pd.to_numeric(load_df["strike"], errors='coerce')
+    load_df["expiry"] = pd.to_datetime(load_df["expiry"], errors='coerce').dt.strftime("%Y-%m-%d")
+    load_df = load_df.dropna(subset=["symbol", "strike"])
+    if load_df.empty: return 0
+
+    if not ensure_intraday_snapshot_partition_pg(conn, ts.to_pydatetime()): return None
+    buffer = io.StringIO()
+    load_df.to_csv(buffer, index=False, header=False, na_rep='')
+    buffer.seek(0)
+    try:
+        with conn.cursor() as cur:
+            cur.copy_expert(f"COPY {INTRADAY_SNAPSHOT_TABLE} ({', '.join(INTRADAY_SNAPSHOT_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '')", buffer)
+        conn.commit()
+        logger.info(f"Stored {len(load_df)} intraday strike rows for {load_df['symbol'].iloc[0]} @ {ts.isoformat()}.")
+        return len(load_df)
+    except psycopg2.Error as e:
+        logger.error(f"Error storing intraday strike snapshot to PostgreSQL: {e}", exc_info=True)
+        conn.rollback()
         return None
 
+
+def get_intraday_strike_history_pg(
+    conn: psycopg2.extensions.connection,
+    symbol: str,
+    start_ts: Union[str, datetime],
+    end_ts: Union[str, datetime],
+    strike: Optional[float] = None,
+    expiry: Optional[Union[str, date]] = None
+) -> pd.DataFrame:
+    """
+    Retrieves strike-level snapshot history for a symbol over [start_ts, end_ts).
+    The time predicate prunes to the matching day partitions; the (symbol, strike, expiry, snapshot_ts)
+    B-tree serves per-strike lookups and the BRIN index serves wide time scans.
+    """
+    if not conn: return pd.DataFrame()
+    clauses = ["symbol = %s", "snapshot_ts >= %s", "snapshot_ts < %s"]
+    params: List[Any] = [symbol, start_ts, end_ts]
+    if strike is not None: clauses.append("strike = %s"); params.append(float(strike))
+    if expiry is not None: clauses.append("expiry = %s"); params.append(expiry)
     sql = f"""
-    SELECT {metric_name} FROM Daily_EOTS_Metrics_Aggregates
-    WHERE symbol = %s AND date >= %s AND date <= %s
-    ORDER BY date ASC
+    SELECT {', '.join(INTRADAY_SNAPSHOT_COLUMNS)} FROM {INTRADAY_SNAPSHOT_TABLE}
+    WHERE {' AND '.join(clauses)}
+    ORDER BY snapshot_ts ASC, strike ASC
     """
-
     try:
         with conn.cursor() as cur:
-            cur.execute(sql, (symbol, start_timestamp, current_timestamp))
+            cur.execute(sql, params)
             rows = cur.fetchall()
-        if not rows: return pd.Series(dtype=float)
-
-        metric_series = pd.Series([row[0] for row in rows if row[0] is not None])
-        return metric_series.dropna()
+        return pd.DataFrame(rows, columns=INTRADAY_SNAPSHOT_COLUMNS)
     except psycopg2.Error as e:
-        logger.error(f"Error fetching historical metric '{metric_name}' for {symbol} from PostgreSQL: {e}", exc_info=True)
-        return None
-    # Removed ImportError for pd as it's now at module level
+        logger.error(f"Error fetching intraday strike history for {symbol} ({start_ts} - {end_ts}) from PostgreSQL: {e}", exc_info=True)
+        return pd.DataFrame()
 
 
 # --- Example Usage & Setup ---
@@ -452,6 +840,21 @@ if __name__ == '__main__':
         }]
         store_daily_eots_metrics_batch_pg(db_connection_pg, sample_eots_metrics_pg)
 
+        # Bulk backfill example: one year of synthetic daily bars through the COPY path
+        backfill_dates = pd.date_range(end=datetime.utcnow().date(), periods=365, freq='D')
+        backfill_df = pd.DataFrame({
+            'symbol': 'TSLA', 'date': backfill_dates.strftime("%Y%m%d").astype(int),
+            'open': 180.0, 'high': 182.5, 'low': 179.5, 'close': 182.0, 'volume': 75000000
+        })
+        bulk_rows = bulk_load_daily_ohlcv_pg(db_connection_pg, backfill_df)
+        dbm_logger.info(f"Bulk OHLCV backfill merged rows: {bulk_rows}")
+
+        ensure_intraday_snapshot_partition_pg(db_connection_pg, datetime.now(timezone.utc) + timedelta(days=1))
+        sample_snapshot_df = pd.DataFrame({'strike': [180.0, 185.0], 'opt_kind': ['call', 'put'], 'mspi': [0.42, -0.31], 'net_value_pressure': [1.2e6, -8.5e5]})
+        store_intraday_strike_snapshot_pg(db_connection_pg, sample_snapshot_df, datetime.now(timezone.utc), symbol='TSLA')
+        tsla_intraday_pg = get_intraday_strike_history_pg(db_connection_pg, 'TSLA', datetime.now(timezone.utc) - timedelta(hours=1), datetime.now(timezone.utc) + timedelta(minutes=1))
+        dbm_logger.info(f"TSLA intraday strike rows (last hour): {len(tsla_intraday_pg)}")
+
         tsla_outcomes_pg = get_trade_outcomes_for_symbol_pg(db_connection_pg, 'TSLA')
         dbm_logger.info(f"TSLA Trade Outcomes (PG): {tsla_outcomes_pg}")
 
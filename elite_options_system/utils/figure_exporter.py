@@ -0,0 +1,147 @@
+# figure_exporter.py
+"""
+Background export of rendered Plotly figures to HTML / PNG files.
+
+Figures are serialized once on the caller's thread (cheap compared to kaleido rendering) and
+written by a small worker pool, so chart rendering never waits on disk or image export.
+Identical figures (same content hash) are exported only once, and the output directory is
+trimmed to the configured file-count / age retention limits after each write. Retention only
+touches files named like the visualizer's exports ('<symbol>_<chart>_<YYYYmmdd_HHMMSS>.html|png'),
+so anything else stored in the same directory is left alone.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# '<symbol>_<chart>_<YYYYmmdd_HHMMSS>.<ext>' as produced by MSPIVisualizerV2._save_figure
+EXPORT_FILENAME_PATTERN = re.compile(r"^[A-Za-z0-9_]+_\d{8}_\d{6}\.(?:html|png)$")
+MAX_REMEMBERED_HASHES: int = 1024
+
+
+class AsyncFigureExporter:
+    """
+    Non-blocking figure export queue.
+
+    submit() hashes and serializes the figure, then hands it to the worker pool. When
+    'max_pending' exports are already queued, new submissions are dropped (with a warning)
+    instead of blocking the caller.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        max_workers: int = 2,
+        max_pending: int = 64,
+        retention_max_files: Optional[int] = 500,
+        retention_max_age_hours: Optional[float] = 72.0,
+        filename_pattern: "re.Pattern[str]" = EXPORT_FILENAME_PATTERN
+    ):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.output_dir = output_dir
+        self.max_pending = max(1, int(max_pending))
+        self.retention_max_files = int(retention_max_files) if retention_max_files else None
+        self.retention_max_age_sec = float(retention_max_age_hours) * 3600.0 if retention_max_age_hours else None
+        self.filename_pattern = filename_pattern
+        self._executor = ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="FigureExport")
+        self._lock = threading.Lock()
+        self._retention_lock = threading.Lock()
+        self._pending = 0
+        self._exported_hashes: "OrderedDict[str, str]" = OrderedDict() # content hash -> base filename
+        self._metrics: Dict[str, Any] = {"submitted": 0, "deduplicated": 0, "dropped": 0, "written_files": 0, "failed": 0, "deleted_files": 0, "last_export_ms": None}
+        self.instance_logger.info(f"AsyncFigureExporter configured (dir='{output_dir}', workers={max_workers}, max_pending={self.max_pending}).")
+
+    def submit(self, fig: go.Figure, base_filename: str, save_html: bool, save_png: bool) -> bool:
+        """Queues an export. Returns False when it was skipped (duplicate content, nothing to save, or queue full)."""
+        if not (save_html or save_png): return False
+        try:
+            fig_json = fig.to_json()
+        except Exception as e_ser:
+            self.instance_logger.error(f"Could not serialize figure '{base_filename}' for export: {e_ser}", exc_info=True)
+            return False
+        content_hash = hashlib.sha1(f"{int(save_html)}{int(save_png)}".encode("utf-8") + fig_json.encode("utf-8")).hexdigest()
+        with self._lock:
+            self._metrics["submitted"] += 1
+            if content_hash in self._exported_hashes:
+                self._metrics["deduplicated"] += 1
+                self.instance_logger.debug(f"Skipping export of '{base_filename}': identical to '{self._exported_hashes[content_hash]}'.")
+                return False
+            if self._pending >= self.max_pending:
+                self._metrics["dropped"] += 1
+                self.instance_logger.warning(f"Figure export queue full ({self._pending} pending). Dropping export of '{base_filename}'.")
+                return False
+            self._exported_hashes[content_hash] = base_filename
+            while len(self._exported_hashes) > MAX_REMEMBERED_HASHES: self._exported_hashes.popitem(last=False)
+            self._pending += 1
+        self._executor.submit(self._export, fig_json, base_filename, save_html, save_png, content_hash)
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self._metrics); snapshot["pending"] = self._pending
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        self.instance_logger.info("AsyncFigureExporter shut down.")
+
+    # --- Worker ---
+
+    def _export(self, fig_json: str, base_filename: str, save_html: bool, save_png: bool, content_hash: str) -> None:
+        export_logger = self.instance_logger.getChild("Export")
+        start = time.perf_counter(); written = 0; failed = False
+        try:
+            fig_dict = json.loads(fig_json) # Plain dict: plotly.io writers accept it without re-validating the figure
+            if save_html:
+                html_file_path = os.path.join(self.output_dir, f"{base_filename}.html")
+                try: pio.write_html(fig_dict, html_file_path, full_html=False, include_plotlyjs='cdn'); written += 1; export_logger.info(f"Chart saved as HTML: {html_file_path}")
+                except Exception as e_html_save: failed = True; export_logger.error(f"Failed to save chart as HTML to '{html_file_path}': {e_html_save}", exc_info=True)
+            if save_png:
+                png_file_path = os.path.join(self.output_dir, f"{base_filename}.png")
+                try: pio.write_image(fig_dict, png_file_path, scale=2); written += 1; export_logger.info(f"Chart saved as PNG: {png_file_path}")
+                except ValueError as ve_png:
+                    failed = True
+                    if "kaleido" in str(ve_png).lower() or "orca" in str(ve_png).lower(): export_logger.error(f"PNG save failed for '{png_file_path}': Plotly image export engine (Kaleido/Orca) is missing. Please install 'kaleido'. Error: {ve_png}")
+                    else: export_logger.error(f"PNG save failed for '{png_file_path}' with ValueError: {ve_png}", exc_info=True)
+                except Exception as e_png_save: failed = True; export_logger.error(f"Failed to save chart as PNG to '{png_file_path}': {e_png_save}", exc_info=True)
+            if written: self._apply_retention()
+        except Exception as e_export:
+            failed = True; export_logger.error(f"Unexpected error exporting '{base_filename}': {e_export}", exc_info=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._metrics["written_files"] += written; self._metrics["last_export_ms"] = (time.perf_counter() - start) * 1000.0
+                if failed:
+                    self._metrics["failed"] += 1
+                    self._exported_hashes.pop(content_hash, None) # Allow a retry on the next identical submission
+
+    def _apply_retention(self) -> None:
+        """Deletes exported files older than the age limit, then the oldest beyond the count limit. Only files matching filename_pattern are considered."""
+        if self.retention_max_files is None and self.retention_max_age_sec is None: return
+        with self._retention_lock:
+            try:
+                entries: List[os.DirEntry] = [e for e in os.scandir(self.output_dir) if e.is_file() and self.filename_pattern.match(e.name)]
+            except OSError as e_scan:
+                self.instance_logger.warning(f"Retention scan of '{self.output_dir}' failed: {e_scan}"); return
+            entries.sort(key=lambda e: e.stat().st_mtime, reverse=True) # Newest first
+            cutoff = time.time() - self.retention_max_age_sec if self.retention_max_age_sec is not None else None
+            to_delete = [e for i, e in enumerate(entries) if (self.retention_max_files is not None and i >= self.retention_max_files) or (cutoff is not None and e.stat().st_mtime < cutoff)]
+            deleted = 0
+            for entry in to_delete:
+                try: os.remove(entry.path); deleted += 1
+                except OSError as e_rm: self.instance_logger.warning(f"Could not delete expired export '{entry.path}': {e_rm}")
+            if deleted:
+                with self._lock: self._metrics["deleted_files"] += deleted
+                self.instance_logger.debug(f"Retention removed {deleted} exported chart files from '{self.output_dir}'.")
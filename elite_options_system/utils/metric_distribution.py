@@ -0,0 +1,159 @@
+# metric_distribution.py
+"""
+In-memory historical distributions for the daily EOTS aggregate metrics.
+
+Keeps one sorted value array per (symbol, metric) over a rolling lookback window so
+percentile and rank queries are answered by binary search instead of a table scan.
+Arrays are refreshed incrementally: only rows newer than the last loaded date are fetched.
+"""
+import bisect
+import logging
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Deque, Dict, Iterable, List, Any, Optional, Tuple, Union
+
+from elite_options_system.utils.database import VALID_DISTRIBUTION_METRIC_COLS, get_metric_history_pg, to_yyyymmdd_date_key
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOOKBACK_DAYS: int = 365
+DEFAULT_REFRESH_INTERVAL_SEC: float = 3600.0
+
+
+class _MetricDistribution:
+    """Sorted values plus a date-ordered deque used to expire observations outside the window."""
+    __slots__ = ("sorted_values", "by_date", "last_date_key", "last_refresh_monotonic")
+
+    def __init__(self):
+        self.sorted_values: List[float] = []
+        self.by_date: Deque[Tuple[int, float]] = deque()
+        self.last_date_key: Optional[int] = None
+        self.last_refresh_monotonic: float = 0.0
+
+    def add(self, date_key: int, value: float) -> None:
+        if self.last_date_key is not None and date_key <= self.last_date_key: return # Already loaded
+        bisect.insort(self.sorted_values, value)
+        self.by_date.append((date_key, value))
+        self.last_date_key = date_key
+
+    def expire_before(self, min_date_key: int) -> None:
+        while self.by_date and self.by_date[0][0] < min_date_key:
+            _, old_val = self.by_date.popleft()
+            idx = bisect.bisect_left(self.sorted_values, old_val)
+            if idx < len(self.sorted_values) and self.sorted_values[idx] == old_val: del self.sorted_values[idx]
+
+
+class MetricDistributionService:
+    """
+    Per-(symbol, metric) distribution cache over Daily_EOTS_Metrics_Aggregates.
+
+    'connection_provider' returns an open psycopg2 connection (or None); it is only called when
+    a distribution is stale. New daily rows can also be pushed directly with add_observation().
+    """
+
+    def __init__(self, connection_provider: Callable[[], Any], lookback_days: int = DEFAULT_LOOKBACK_DAYS, refresh_interval_sec: float = DEFAULT_REFRESH_INTERVAL_SEC):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.connection_provider = connection_provider
+        self.lookback_days = int(lookback_days)
+        self.refresh_interval_sec = float(refresh_interval_sec)
+        self._distributions: Dict[Tuple[str, str], _MetricDistribution] = {}
+        self._lock = threading.RLock()
+
+    def _window_start_key(self) -> int:
+        return int((datetime.now(timezone.utc) - timedelta(days=self.lookback_days)).strftime("%Y%m%d"))
+
+    def _get(self, symbol: str, metric_name: str, refresh: bool = True) -> _MetricDistribution:
+        key = (symbol.upper(), metric_name)
+        with self._lock:
+            dist = self._distributions.get(key)
+            if dist is None: dist = self._distributions[key] = _MetricDistribution()
+            if refresh and (time.monotonic() - dist.last_refresh_monotonic) >= self.refresh_interval_sec:
+                self._refresh_locked(key, dist)
+            return dist
+
+    def _refresh_locked(self, key: Tuple[str, str], dist: _MetricDistribution) -> None:
+        refresh_logger = self.instance_logger.getChild("Refresh")
+        symbol, metric_name = key
+        conn = self.connection_provider() if self.connection_provider else None
+        history = get_metric_history_pg(conn, symbol, metric_name, self.lookback_days, after_date_key=dist.last_date_key) if conn else None
+        dist.last_refresh_monotonic = time.monotonic() # Also throttles retries when the DB is unavailable
+        if history is None:
+            refresh_logger.warning(f"Could not refresh distribution for {symbol}/{metric_name}; serving {len(dist.sorted_values)} cached values.")
+            return
+        for date_key, value in history: dist.add(date_key, value)
+        dist.expire_before(self._window_start_key())
+        refresh_logger.debug(f"{symbol}/{metric_name}: +{len(history)} rows, {len(dist.sorted_values)} values in window.")
+
+    # --- Updates ---
+
+    def refresh(self, symbol: str, metric_name: str) -> int:
+        """Forces an incremental refresh. Returns the number of values now held."""
+        key = (symbol.upper(), metric_name)
+        with self._lock:
+            dist = self._distributions.setdefault(key, _MetricDistribution())
+            self._refresh_locked(key, dist)
+            return len(dist.sorted_values)
+
+    def add_observation(self, symbol: str, metric_name: str, date_val: Union[int, float], value: Optional[float]) -> bool:
+        """
+        Pushes a freshly stored daily row without a database round-trip (date as YYYYMMDD or epoch). Only distributions
+        that have already been loaded are extended: seeding an unloaded one would make its first refresh skip the history
+        before this date. Returns True if the value was added.
+        """
+        date_key = to_yyyymmdd_date_key(date_val)
+        if date_key is None or value is None or not math.isfinite(float(value)): return False
+        with self._lock:
+            dist = self._distributions.get((symbol.upper(), metric_name))
+            if dist is None or dist.last_refresh_monotonic == 0.0: return False
+            if dist.last_date_key is not None and date_key <= dist.last_date_key: return False
+            dist.add(date_key, float(value))
+            dist.expire_before(self._window_start_key())
+            return True
+
+    def ingest_daily_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Incremental update from Daily_EOTS_Metrics_Aggregates rows that were just stored (the dicts passed to
+        store_daily_eots_metrics_batch_pg / the bulk loader). Returns the number of values added.
+        """
+        added = 0
+        for row in rows:
+            symbol = row.get("symbol"); date_val = row.get("date")
+            if not symbol or date_val is None: continue
+            for metric_name in VALID_DISTRIBUTION_METRIC_COLS:
+                if row.get(metric_name) is not None and self.add_observation(str(symbol), metric_name, date_val, float(row[metric_name])): added += 1
+        return added
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        with self._lock:
+            if symbol is None: self._distributions.clear()
+            else:
+                for key in [k for k in self._distributions if k[0] == symbol.upper()]: del self._distributions[key]
+
+    # --- Queries ---
+
+    def percentile(self, symbol: str, metric_name: str, pct: float) -> Optional[float]:
+        """Linear-interpolated percentile (same convention as np.percentile), pct in [0, 100]."""
+        with self._lock:
+            values = self._get(symbol, metric_name).sorted_values
+            n = len(values)
+            if n == 0: return None
+            pos = (max(0.0, min(100.0, float(pct))) / 100.0) * (n - 1)
+            lo = int(pos); hi = min(lo + 1, n - 1); frac = pos - lo
+            return values[lo] + (values[hi] - values[lo]) * frac
+
+    def percentiles(self, symbol: str, metric_name: str, pcts: List[float]) -> List[Optional[float]]:
+        return [self.percentile(symbol, metric_name, p) for p in pcts]
+
+    def rank(self, symbol: str, metric_name: str, value: float) -> Optional[float]:
+        """Percentile rank of 'value' in [0, 100] (fraction of historical values <= value)."""
+        with self._lock:
+            values = self._get(symbol, metric_name).sorted_values
+            if not values: return None
+            return 100.0 * bisect.bisect_right(values, float(value)) / len(values)
+
+    def size(self, symbol: str, metric_name: str) -> int:
+        with self._lock: return len(self._get(symbol, metric_name, refresh=False).sorted_values)
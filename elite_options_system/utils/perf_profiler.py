@@ -0,0 +1,72 @@
+# perf_profiler.py
+"""
+Lightweight section timing recorder.
+
+Code paths report named sections (e.g. 'signals.directional') either through the section()
+context manager or by passing an already measured duration to record(). Per section the
+profiler keeps the call count, total / last / max time and an EWM of the duration, which is
+what the dashboards and logs need without keeping per-call history. Thread-safe.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Any, Optional
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_EWM_ALPHA: float = 0.2
+
+
+class _SectionStats:
+    """Running statistics of one section (durations in seconds)."""
+    __slots__ = ("count", "total", "last", "max", "ewm")
+
+    def __init__(self):
+        self.count: int = 0; self.total: float = 0.0; self.last: float = 0.0; self.max: float = 0.0
+        self.ewm: Optional[float] = None
+
+    def add(self, seconds: float, alpha: float) -> None:
+        self.count += 1; self.total += seconds; self.last = seconds; self.max = max(self.max, seconds)
+        self.ewm = seconds if self.ewm is None else (1.0 - alpha) * self.ewm + alpha * seconds
+
+
+class SectionProfiler:
+    """Named section timings (count, total, last, max, EWM) shared by the components of one process."""
+
+    def __init__(self, ewm_alpha: float = DEFAULT_EWM_ALPHA, enabled: bool = True):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.ewm_alpha = float(ewm_alpha); self.enabled = bool(enabled)
+        self._sections: Dict[str, _SectionStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, section: str, seconds: float) -> None:
+        """Adds one measured duration (seconds) to a section."""
+        if not self.enabled: return
+        with self._lock:
+            stats = self._sections.get(section)
+            if stats is None: stats = self._sections[section] = _SectionStats()
+            stats.add(float(seconds), self.ewm_alpha)
+
+    @contextmanager
+    def section(self, section: str) -> Iterator[None]:
+        """Times the enclosed block into 'section' (also when it raises)."""
+        if not self.enabled:
+            yield; return
+        start = time.perf_counter()
+        try: yield
+        finally: self.record(section, time.perf_counter() - start)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+        """Per-section statistics in milliseconds, optionally restricted to sections starting with 'prefix'."""
+        with self._lock:
+            return {
+                name: {"count": s.count, "total_ms": s.total * 1000.0, "last_ms": s.last * 1000.0, "max_ms": s.max * 1000.0,
+                       "mean_ms": (s.total / s.count) * 1000.0 if s.count else 0.0, "ewm_ms": (s.ewm or 0.0) * 1000.0}
+                for name, s in self._sections.items() if name.startswith(prefix)
+            }
+
+    def reset(self, prefix: str = "") -> None:
+        with self._lock:
+            for name in [n for n in self._sections if n.startswith(prefix)]: del self._sections[name]
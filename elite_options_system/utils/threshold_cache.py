@@ -0,0 +1,128 @@
+# threshold_cache.py
+"""
+Per-snapshot cache for relative (data-driven) thresholds.
+
+A metric series is cleaned (numeric, finite) once per distinct content and kept as a
+SeriesStats entry. Percentiles are answered by order-statistic selection: the first request
+uses np.partition on just the needed ranks; once a second distinct percentile is requested
+the values are sorted once and every further percentile is O(1). Means are computed once.
+Final threshold values are memoized by (threshold path, comparison mode, series digest) until
+the snapshot changes (invalidate()) or the threshold config is reloaded.
+"""
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SERIES: int = 64
+DEFAULT_MAX_RESULTS: int = 512
+_MISSING = object()
+
+
+def series_digest(data_series: Optional[pd.Series]) -> Optional[bytes]:
+    """Content digest of a series (None for None/empty). Object-dtype series are coerced to numeric first."""
+    if data_series is None or len(data_series) == 0: return None
+    values = data_series.to_numpy()
+    if values.dtype.kind not in "fiub": values = pd.to_numeric(data_series, errors='coerce').to_numpy(dtype=float)
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(values.dtype).encode("utf-8")); hasher.update(np.ascontiguousarray(values).tobytes())
+    return hasher.digest()
+
+
+class SeriesStats:
+    """Cleaned finite values of one metric series with lazily computed order statistics and means."""
+    __slots__ = ("digest", "values", "_sorted", "_selected", "_mean", "_abs_mean")
+
+    def __init__(self, digest: bytes, values: np.ndarray):
+        self.digest = digest; self.values = values
+        self._sorted: Optional[np.ndarray] = None
+        self._selected: Dict[int, float] = {} # rank -> value, from np.partition before a full sort is worthwhile
+        self._mean: Optional[float] = None; self._abs_mean: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def mean(self) -> float:
+        if self._mean is None: self._mean = float(self.values.mean())
+        return self._mean
+
+    @property
+    def abs_mean(self) -> float:
+        if self._abs_mean is None: self._abs_mean = float(np.abs(self.values).mean())
+        return self._abs_mean
+
+    def _order_stats(self, ranks: Tuple[int, ...]) -> Dict[int, float]:
+        missing = [r for r in ranks if r not in self._selected]
+        if missing and self._sorted is None:
+            if self._selected: # Second distinct request on this series: sort once, then every rank is O(1)
+                self._sorted = np.sort(self.values)
+            else:
+                partitioned = np.partition(self.values, missing)
+                for r in missing: self._selected[r] = float(partitioned[r])
+        if self._sorted is not None:
+            for r in missing: self._selected[r] = float(self._sorted[r])
+        return {r: self._selected[r] for r in ranks}
+
+    def percentile(self, pct: float) -> float:
+        """Linear-interpolated percentile (np.percentile's default method), pct clamped to [0, 100]."""
+        pos = (max(0.0, min(100.0, float(pct))) / 100.0) * (len(self.values) - 1)
+        lo = int(np.floor(pos)); hi = min(lo + 1, len(self.values) - 1); frac = pos - lo
+        stats = self._order_stats((lo, hi))
+        return stats[lo] + (stats[hi] - stats[lo]) * frac
+
+
+class SnapshotThresholdCache:
+    """Series statistics and final threshold values for the current snapshot (bounded LRU, thread-safe)."""
+
+    def __init__(self, max_series: int = DEFAULT_MAX_SERIES, max_results: int = DEFAULT_MAX_RESULTS):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.max_series, self.max_results = int(max_series), int(max_results)
+        self._series: "OrderedDict[bytes, SeriesStats]" = OrderedDict()
+        self._results: "OrderedDict[Tuple[Any, ...], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics: Dict[str, int] = {"series_prepared": 0, "result_hits": 0, "result_misses": 0}
+
+    def invalidate(self) -> None:
+        """Drops everything (call when a new snapshot starts or the threshold config changes)."""
+        with self._lock:
+            self._series.clear(); self._results.clear()
+
+    def series_stats(self, data_series: Optional[pd.Series], digest: Optional[bytes] = None) -> Optional[SeriesStats]:
+        """Cleaned statistics for a series, prepared once per distinct content. None if nothing finite remains."""
+        digest = digest if digest is not None else series_digest(data_series)
+        if digest is None: return None
+        with self._lock:
+            stats = self._series.get(digest)
+            if stats is not None:
+                self._series.move_to_end(digest); return stats if len(stats) else None
+        values = pd.to_numeric(data_series, errors='coerce').to_numpy(dtype=float)
+        stats = SeriesStats(digest, values[np.isfinite(values)])
+        with self._lock:
+            self._series[digest] = stats; self.metrics["series_prepared"] += 1
+            while len(self._series) > self.max_series: self._series.popitem(last=False)
+        return stats if len(stats) else None
+
+    def get_result(self, key: Tuple[Any, ...]) -> Any:
+        """Memoized threshold value for key, or the module sentinel _MISSING."""
+        with self._lock:
+            value = self._results.get(key, _MISSING)
+            if value is _MISSING: self.metrics["result_misses"] += 1
+            else: self._results.move_to_end(key); self.metrics["result_hits"] += 1
+            return value
+
+    def store_result(self, key: Tuple[Any, ...], value: Any) -> None:
+        with self._lock:
+            self._results[key] = value
+            while len(self._results) > self.max_results: self._results.popitem(last=False)
+
+    @staticmethod
+    def is_missing(value: Any) -> bool:
+        return value is _MISSING
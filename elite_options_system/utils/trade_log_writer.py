@@ -0,0 +1,333 @@
+# trade_log_writer.py
+"""
+Write-behind logger for the trade performance tables.
+
+Recommendation/outcome records are queued in memory and flushed to PostgreSQL in
+batches by a background thread (size or time trigger), so the recommendation path
+never blocks on a database round-trip. When the database is unreachable (connection-level
+errors), batches are spilled to a local JSON-lines file and replayed once it recovers.
+
+Every record carries an arrival sequence number. Whenever spilled records exist, a flush
+takes the spill file, the current batch and everything still queued, and writes them merged
+in sequence order, so queue overflow and outages never reorder records (an outcome is never
+written before its recommendation). Rows the database rejects (integrity / data errors) are
+isolated by retrying the batch row by row and moved to a dead-letter file instead of being
+replayed.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+import psycopg2
+
+from elite_options_system.utils.database import (
+    get_db_connection,
+    log_trade_recommendations_batch_pg,
+    log_trade_outcomes_batch_pg,
+)
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RECORD_KIND_RECOMMENDATION: str = "recommendation"
+RECORD_KIND_OUTCOME: str = "outcome"
+DEFAULT_SPILL_FILE_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "trade_log_spill.jsonl")
+DEFAULT_DEAD_LETTER_FILE_PATH: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "trade_log_dead_letter.jsonl")
+# Errors caused by the rows themselves: retrying later cannot help, so the offending rows are dead-lettered
+REJECTED_ROW_ERRORS: Tuple[type, ...] = (psycopg2.IntegrityError, psycopg2.DataError, TypeError, ValueError)
+FLUSH_LATENCY_EWMA_ALPHA: float = 0.2
+
+
+class WriteBehindTradeLogger:
+    """
+    Asynchronous, batching writer for Trade_Recommendations_Log / Trade_Outcomes_Log.
+
+    enqueue_* calls only touch an in-memory queue (or, if that queue is full, the spill file).
+    A daemon worker drains the queue, flushing when 'max_batch_size' records are pending or
+    'flush_interval_sec' has elapsed since the first pending record. Queue items are
+    (sequence, kind, record) tuples.
+    """
+
+    def __init__(
+        self,
+        connection_details: Dict[str, str],
+        spill_file_path: Optional[str] = None,
+        dead_letter_file_path: Optional[str] = None,
+        max_batch_size: int = 200,
+        flush_interval_sec: float = 2.0,
+        max_queue_size: int = 10000,
+        reconnect_interval_sec: float = 15.0
+    ):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.connection_details = connection_details
+        self.spill_file_path = os.path.abspath(spill_file_path or DEFAULT_SPILL_FILE_PATH)
+        self.dead_letter_file_path = os.path.abspath(dead_letter_file_path or DEFAULT_DEAD_LETTER_FILE_PATH)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.flush_interval_sec = max(0.05, float(flush_interval_sec))
+        self.reconnect_interval_sec = max(0.0, float(reconnect_interval_sec))
+
+        self._queue: "queue.Queue[Tuple[int, str, Dict[str, Any]]]" = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        # Sequence numbers are assigned and placed (queue or spill) under one lock; wall-clock based so they keep
+        # increasing across restarts and records spilled by a previous run sort first.
+        self._enqueue_lock = threading.Lock()
+        self._last_seq: int = 0
+        self._stop_event = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._conn = None
+        self._last_connect_attempt: float = 0.0
+        self._spill_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            "records_enqueued": 0, "records_flushed": 0, "records_spilled": 0, "records_replayed": 0, "records_dead_lettered": 0,
+            "flushes": 0, "failed_flushes": 0, "last_flush_latency_ms": None,
+            "avg_flush_latency_ms": None, "max_flush_latency_ms": 0.0, "last_flush_ts": None,
+        }
+        self.instance_logger.info(f"WriteBehindTradeLogger configured (batch={self.max_batch_size}, interval={self.flush_interval_sec}s, spill='{self.spill_file_path}').")
+
+    # --- Lifecycle ---
+
+    def start(self) -> None:
+        if self._worker is not None and self._worker.is_alive(): return
+        self._stop_event.clear()
+        self._worker = threading.Thread(target=self._run, name="TradeLogWriter", daemon=True)
+        self._worker.start()
+        self.instance_logger.info("Write-behind trade logger worker started.")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Signals the worker to drain the queue, performs a final flush and closes the connection."""
+        if self._worker is None: return
+        self._stop_event.set()
+        self._worker.join(timeout=timeout)
+        if self._worker.is_alive():
+            self.instance_logger.warning(f"Trade logger worker did not stop within {timeout}s; pending records remain queued.")
+        self._worker = None
+        self._close_connection()
+        self.instance_logger.info("Write-behind trade logger stopped.")
+
+    # --- Producer API (non-blocking) ---
+
+    def enqueue_recommendation(self, rec_data: Dict[str, Any]) -> bool:
+        return self._enqueue(RECORD_KIND_RECOMMENDATION, rec_data)
+
+    def enqueue_outcome(self, outcome_data: Dict[str, Any]) -> bool:
+        return self._enqueue(RECORD_KIND_OUTCOME, outcome_data)
+
+    def _enqueue(self, kind: str, record: Dict[str, Any]) -> bool:
+        if not isinstance(record, dict):
+            self.instance_logger.warning(f"Ignoring non-dict {kind} record of type {type(record).__name__}.")
+            return False
+        with self._enqueue_lock:
+            self._last_seq = max(self._last_seq + 1, time.time_ns())
+            item = (self._last_seq, kind, dict(record))
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                # Never block the caller: overflow goes to the spill file; its sequence number keeps it behind the queued records.
+                self.instance_logger.warning("Trade log queue full; spilling record to disk.")
+                self._spill([item])
+        with self._metrics_lock: self._metrics["records_enqueued"] += 1
+        return True
+
+    # --- Metrics ---
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock: snapshot = dict(self._metrics)
+        snapshot["queue_depth"] = self._queue.qsize()
+        snapshot["spill_file_pending"] = os.path.exists(self.spill_file_path)
+        snapshot["dead_letter_file_present"] = os.path.exists(self.dead_letter_file_path)
+        snapshot["db_connected"] = self._conn is not None
+        return snapshot
+
+    # --- Worker ---
+
+    def _run(self) -> None:
+        batch: List[Tuple[int, str, Dict[str, Any]]] = []
+        batch_started: Optional[float] = None
+        while True:
+            stopping = self._stop_event.is_set()
+            try:
+                if stopping: item = self._queue.get_nowait()
+                else:
+                    wait = self.flush_interval_sec if batch_started is None else self.flush_interval_sec - (time.monotonic() - batch_started)
+                    item = self._queue.get(timeout=max(0.01, wait))
+                batch.append(item)
+                if batch_started is None: batch_started = time.monotonic()
+            except queue.Empty:
+                pass
+            interval_elapsed = batch_started is not None and (time.monotonic() - batch_started) >= self.flush_interval_sec
+            if batch and (len(batch) >= self.max_batch_size or interval_elapsed or stopping):
+                self._flush(batch)
+                batch, batch_started = [], None
+            elif not batch and os.path.exists(self.spill_file_path):
+                self._flush([])
+            if stopping and not batch and self._queue.empty(): break
+
+    def _flush(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> None:
+        flush_logger = self.instance_logger.getChild("Flush")
+        pending, spilled_seqs = batch, set()
+        if os.path.exists(self.spill_file_path) and self._get_connection() is not None:
+            pending, spilled_seqs = self._take_pending(batch)
+        if not pending: return
+        start = time.perf_counter()
+        unwritten, rejected = self._write_records(pending)
+        latency_ms = (time.perf_counter() - start) * 1000.0
+        unwritten_seqs = {item[0] for item in unwritten}; rejected_seqs = {item[0] for item, _ in rejected}
+        written = len(pending) - len(unwritten) - len(rejected)
+        replayed = sum(1 for seq in spilled_seqs if seq not in unwritten_seqs and seq not in rejected_seqs)
+        with self._metrics_lock:
+            m = self._metrics
+            m["flushes"] += 1; m["last_flush_latency_ms"] = latency_ms; m["last_flush_ts"] = time.time()
+            m["max_flush_latency_ms"] = max(m["max_flush_latency_ms"], latency_ms)
+            m["avg_flush_latency_ms"] = latency_ms if m["avg_flush_latency_ms"] is None else (FLUSH_LATENCY_EWMA_ALPHA * latency_ms + (1 - FLUSH_LATENCY_EWMA_ALPHA) * m["avg_flush_latency_ms"])
+            m["records_flushed"] += written; m["records_replayed"] += replayed
+            if unwritten or rejected: m["failed_flushes"] += 1
+        if rejected: self._dead_letter(rejected)
+        if not unwritten: flush_logger.debug(f"Flushed {written}/{len(pending)} trade log records ({replayed} replayed, {len(rejected)} rejected) in {latency_ms:.1f}ms.")
+        else:
+            flush_logger.warning(f"Flush wrote {written}/{len(pending)} trade log records; spilling {len(unwritten)} to disk.")
+            self._spill(unwritten)
+
+    def _take_pending(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], Set[int]]:
+        """
+        Takes the spill file and everything queued, merged with 'batch' in sequence order. Holding the enqueue lock
+        makes this a consistent cut: every record enqueued afterwards has a higher sequence number.
+        """
+        replay_logger = self.instance_logger.getChild("Replay")
+        with self._enqueue_lock, self._spill_lock:
+            try:
+                with open(self.spill_file_path, "r", encoding="utf-8") as fh: lines = fh.readlines()
+                os.remove(self.spill_file_path)
+            except FileNotFoundError:
+                lines = []
+            queued: List[Tuple[int, str, Dict[str, Any]]] = []
+            while True:
+                try: queued.append(self._queue.get_nowait())
+                except queue.Empty: break
+        spilled: List[Tuple[int, str, Dict[str, Any]]] = []
+        for line in lines:
+            try: entry = json.loads(line); spilled.append((int(entry.get("seq", -1)), entry["kind"], entry["record"]))
+            except Exception: replay_logger.warning(f"Skipping corrupt spill line: {line[:120]!r}")
+        if spilled: replay_logger.info(f"Replaying {len(spilled)} spilled trade log records (with {len(batch) + len(queued)} batched/queued).")
+        # Stable sort: spill lines from before sequence numbers existed (-1) keep their file order ahead of everything else
+        return sorted(spilled + batch + queued, key=lambda item: item[0]), {item[0] for item in spilled}
+
+    def _write_records(self, items: List[Tuple[int, str, Dict[str, Any]]]) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], List[Tuple[Tuple[int, str, Dict[str, Any]], str]]]:
+        """Writes items in order in chunks of max_batch_size. Returns (unwritten remainder, rejected rows with their error)."""
+        rejected: List[Tuple[Tuple[int, str, Dict[str, Any]], str]] = []
+        for i in range(0, len(items), self.max_batch_size):
+            unwritten, chunk_rejected = self._write_batch(items[i:i + self.max_batch_size])
+            rejected.extend(chunk_rejected)
+            if unwritten: return unwritten + items[i + self.max_batch_size:], rejected
+        return [], rejected
+
+    def _write_batch(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], List[Tuple[Tuple[int, str, Dict[str, Any]], str]]]:
+        """
+        Writes one batch. Returns (records to retry later, rejected rows with their error). Connection-level errors
+        leave the remaining records for a retry; rejected-row errors retry the group row by row to isolate the bad rows.
+        """
+        conn = self._get_connection()
+        if conn is None: return batch, []
+        recs = [item for item in batch if item[1] == RECORD_KIND_RECOMMENDATION]
+        outcomes = [item for item in batch if item[1] == RECORD_KIND_OUTCOME]
+        rejected: List[Tuple[Tuple[int, str, Dict[str, Any]], str]] = []
+        # Recommendations are committed before outcomes to satisfy the FK on Trade_Outcomes_Log.
+        for group, write_fn, later in ((recs, log_trade_recommendations_batch_pg, outcomes), (outcomes, log_trade_outcomes_batch_pg, [])):
+            if not group: continue
+            try:
+                write_fn(conn, [rec for _, _, rec in group], raise_on_error=True); continue
+            except REJECTED_ROW_ERRORS as e_rows:
+                self.instance_logger.warning(f"{len(group)} {group[0][1]} records rejected as a batch ({type(e_rows).__name__}); retrying row by row.")
+            except Exception as e_conn:
+                self.instance_logger.warning(f"Trade log write failed ({type(e_conn).__name__}); will retry later.")
+                self._close_connection(); return group + later, rejected
+            for pos, item in enumerate(group):
+                try: write_fn(conn, [item[2]], raise_on_error=True)
+                except REJECTED_ROW_ERRORS as e_row: rejected.append((item, f"{type(e_row).__name__}: {e_row}"))
+                except Exception:
+                    self._close_connection(); return group[pos:] + later, rejected
+        return [], rejected
+
+    # --- Spill / Dead Letter ---
+
+    def _append_lines(self, path: str, entries: List[Dict[str, Any]]) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fh:
+            for entry in entries: fh.write(json.dumps(entry, default=str) + "\n")
+
+    def _spill(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> None:
+        try:
+            with self._spill_lock: self._append_lines(self.spill_file_path, [{"seq": seq, "kind": kind, "record": rec} for seq, kind, rec in batch])
+            with self._metrics_lock: self._metrics["records_spilled"] += len(batch)
+        except Exception as e:
+            self.instance_logger.error(f"Failed to spill {len(batch)} trade log records to '{self.spill_file_path}': {e}", exc_info=True)
+
+    def _dead_letter(self, rejected: List[Tuple[Tuple[int, str, Dict[str, Any]], str]]) -> None:
+        """Moves rows the database rejected out of the write path (never replayed automatically)."""
+        try:
+            with self._spill_lock: self._append_lines(self.dead_letter_file_path, [{"seq": seq, "kind": kind, "record": rec, "error": error} for (seq, kind, rec), error in rejected])
+            with self._metrics_lock: self._metrics["records_dead_lettered"] += len(rejected)
+            self.instance_logger.error(f"Moved {len(rejected)} rejected trade log records to '{self.dead_letter_file_path}' (first error: {rejected[0][1]}).")
+        except Exception as e:
+            self.instance_logger.error(f"Failed to dead-letter {len(rejected)} trade log records to '{self.dead_letter_file_path}': {e}", exc_info=True)
+
+    # --- Connection Handling ---
+
+    def _get_connection(self):
+        if self._conn is not None: return self._conn
+        now = time.monotonic()
+        if self._last_connect_attempt and (now - self._last_connect_attempt) < self.reconnect_interval_sec: return None
+        self._last_connect_attempt = now
+        self._conn = get_db_connection(self.connection_details)
+        return self._conn
+
+    def _close_connection(self) -> None:
+        if self._conn is None: return
+        try: self._conn.close()
+        except Exception: pass
+        self._conn = None
+
+
+# --- Recommendation Book Records -> Trade Log Rows ---
+
+def _epoch_seconds(iso_ts: Any) -> Optional[int]:
+    """Unix seconds for a book timestamp ('YYYY-MM-DDTHH:MM:SS', local time); None if missing or unparseable."""
+    if not iso_ts: return None
+    try: return int(datetime.fromisoformat(str(iso_ts)).timestamp())
+    except ValueError: return None
+
+
+def recommendation_log_row(record: Dict[str, Any], market_regime: str = "UNKNOWN") -> Dict[str, Any]:
+    """Trade_Recommendations_Log row for a directional book record (as returned by RecommendationBook.to_records)."""
+    issued = _epoch_seconds(record.get("issued_ts"))
+    return {
+        "recommendation_id": record.get("id"), "timestamp_issued_utc": issued, "symbol": record.get("symbol"),
+        "market_regime_at_issuance": market_regime,
+        "triggering_signals_json": {key: record.get(key) for key in ("type", "strike", "direction_label", "rationale", "mspi", "sai", "ssi")},
+        "atif_final_conviction_score": record.get("raw_conviction_score"), "atif_conviction_level": None if record.get("conviction_stars") is None else str(record.get("conviction_stars")),
+        "selected_strategy_type": record.get("strategy") or record.get("type") or "directional",
+        "calculated_entry_price": record.get("entry_ideal"), "initial_stop_loss_price": record.get("stop_loss"),
+        "initial_target_1_price": record.get("target_1"), "initial_target_2_price": record.get("target_2"),
+        "tpo_rationale": record.get("target_rationale"), "current_status": record.get("status"),
+        "last_status_update_utc": _epoch_seconds(record.get("last_updated_ts")) or issued,
+    }
+
+
+def outcome_log_row(record: Dict[str, Any], exit_price: float) -> Dict[str, Any]:
+    """Trade_Outcomes_Log row for a book record exited at 'exit_price' (P/L in underlying points, signed by direction)."""
+    entry = record.get("entry_ideal")
+    entered = _epoch_seconds(record.get("issued_ts")); exited = _epoch_seconds(record.get("last_updated_ts"))
+    direction = -1.0 if "bear" in str(record.get("direction_label", "")).lower() else 1.0
+    pnl = direction * (float(exit_price) - float(entry)) if entry is not None and exit_price is not None else None
+    return {
+        "recommendation_id": record.get("id"), "entry_timestamp_utc": entered, "actual_entry_price": entry,
+        "exit_timestamp_utc": exited, "actual_exit_price": exit_price, "exit_reason": record.get("exit_reason"),
+        "profit_loss_absolute": pnl, "profit_loss_percentage": (pnl / float(entry) * 100.0) if pnl is not None and entry else None,
+        "trade_duration_seconds": (exited - entered) if entered is not None and exited is not None else None,
+        "metrics_at_exit_json": {key: record.get(key) for key in ("mspi", "sai", "ssi")},
+    }
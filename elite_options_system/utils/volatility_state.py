@@ -0,0 +1,210 @@
+# volatility_state.py
+"""
+Per-symbol incremental ATR and historical-volatility state.
+
+Each SymbolVolatilityState keeps the accumulators behind the two daily volatility measures used
+across the system, so a new bar (or an intraday price) updates them in O(1) instead of
+recomputing from the full OHLC history on every refresh:
+- ATR: EWM of the true range (span=period, adjust=False, min_periods=period), matching the
+  previous pandas computation in IntegratedTradingSystem._get_atr;
+- historical vol: rolling std (ddof=1) of close-to-close returns over 'hv_window' bars x sqrt(252),
+  matching the series the data processor built for the elite calculator's regime detection.
+
+History frames are synced incrementally: only rows dated after the last committed bar are fed in;
+a row for the last committed date replaces that bar (intraday revisions of today's candle).
+"""
+import logging
+import math
+import threading
+from collections import deque
+from typing import Deque, Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Module-level logger
+logger = logging.getLogger(__name__)
+
+DEFAULT_ATR_PERIOD: int = 14
+DEFAULT_HV_WINDOW: int = 20
+DEFAULT_MAX_BARS: int = 512
+TRADING_DAYS_PER_YEAR: int = 252
+OHLC_COLUMNS: Tuple[str, str, str, str] = ("date", "high", "low", "close")
+
+
+class _Accumulators:
+    """The O(1)-updatable part of the state (copied once per bar so the last bar can be revised)."""
+    __slots__ = ("last_close", "tr_count", "atr_ewm", "returns", "ret_sum", "ret_sumsq")
+
+    def __init__(self, hv_window: int):
+        self.last_close: Optional[float] = None
+        self.tr_count: int = 0
+        self.atr_ewm: Optional[float] = None
+        self.returns: Deque[float] = deque(maxlen=hv_window)
+        self.ret_sum: float = 0.0
+        self.ret_sumsq: float = 0.0
+
+    def copy(self) -> "_Accumulators":
+        clone = _Accumulators(self.returns.maxlen)
+        clone.last_close, clone.tr_count, clone.atr_ewm = self.last_close, self.tr_count, self.atr_ewm
+        clone.returns.extend(self.returns); clone.ret_sum, clone.ret_sumsq = self.ret_sum, self.ret_sumsq
+        return clone
+
+    def apply_bar(self, high: float, low: float, close: float, atr_alpha: float) -> None:
+        true_range = high - low
+        if self.last_close is not None:
+            true_range = max(true_range, abs(high - self.last_close), abs(low - self.last_close))
+            if self.last_close != 0:
+                ret = close / self.last_close - 1.0
+                if len(self.returns) == self.returns.maxlen:
+                    old = self.returns[0]; self.ret_sum -= old; self.ret_sumsq -= old * old
+                self.returns.append(ret); self.ret_sum += ret; self.ret_sumsq += ret * ret
+        self.atr_ewm = true_range if self.atr_ewm is None else (1.0 - atr_alpha) * self.atr_ewm + atr_alpha * true_range
+        self.tr_count += 1
+        self.last_close = close
+
+    def annualized_vol(self) -> Optional[float]:
+        n = len(self.returns)
+        if n < self.returns.maxlen or n < 2: return None
+        variance = max(0.0, (self.ret_sumsq - self.ret_sum * self.ret_sum / n) / (n - 1))
+        return math.sqrt(variance) * math.sqrt(TRADING_DAYS_PER_YEAR)
+
+
+class SymbolVolatilityState:
+    """Incremental ATR / historical vol for one symbol (daily bars plus an optional provisional intraday bar)."""
+
+    def __init__(self, symbol: str, atr_period: int = DEFAULT_ATR_PERIOD, hv_window: int = DEFAULT_HV_WINDOW, max_bars: int = DEFAULT_MAX_BARS):
+        self.symbol = symbol
+        self.atr_period = int(atr_period); self.hv_window = int(hv_window)
+        self._atr_alpha = 2.0 / (self.atr_period + 1.0)
+        self._before_last = _Accumulators(self.hv_window) # State through the bar before the last committed one
+        self._committed = _Accumulators(self.hv_window)
+        self.last_bar_date: Optional[pd.Timestamp] = None
+        self._last_bar: Optional[Tuple[float, float, float]] = None # (high, low, close) of the last committed bar
+        self.bar_count: int = 0
+        self._closes: Deque[float] = deque(maxlen=max_bars) # Served to consumers that want the series
+        self._hv_series: Deque[float] = deque(maxlen=max_bars)
+        self._intraday: Optional[_Accumulators] = None
+        self._intraday_bar: Optional[Tuple[float, float, float]] = None # (high, low, last)
+        self.version: int = 0
+        self._synced_fingerprint: Optional[Tuple[Any, ...]] = None # (rows, last raw row) of the last synced frame
+        self._market_frame_cache: Tuple[int, Optional[pd.DataFrame]] = (-1, None)
+
+    # --- Updates ---
+
+    def add_bar(self, bar_date: Any, high: float, low: float, close: float) -> bool:
+        """Commits one daily bar in O(1). A bar for the last committed date replaces it; older dates are ignored."""
+        bar_ts = pd.Timestamp(bar_date)
+        if self.last_bar_date is not None and bar_ts < self.last_bar_date: return False
+        if self.last_bar_date is not None and bar_ts == self.last_bar_date:
+            self._committed = self._before_last.copy()
+            if self._closes: self._closes.pop(); self._hv_series.pop()
+            self.bar_count -= 1
+        else:
+            self._before_last = self._committed.copy()
+        self._committed.apply_bar(float(high), float(low), float(close), self._atr_alpha)
+        self.last_bar_date = bar_ts; self._last_bar = (float(high), float(low), float(close)); self.bar_count += 1
+        hv = self._committed.annualized_vol()
+        self._closes.append(float(close)); self._hv_series.append(np.nan if hv is None else hv)
+        self._intraday = None; self._intraday_bar = None
+        self.version += 1
+        return True
+
+    def update_price(self, price: Optional[float]) -> None:
+        """Folds an intraday price into a provisional bar on top of the committed state (O(1); nothing is committed)."""
+        if price is None or not np.isfinite(price) or price <= 0 or self._committed.last_close is None: return
+        price = float(price)
+        high, low = (max(self._intraday_bar[0], price), min(self._intraday_bar[1], price)) if self._intraday_bar else (price, price)
+        self._intraday_bar = (high, low, price)
+        self._intraday = self._committed.copy()
+        self._intraday.apply_bar(high, low, price, self._atr_alpha)
+
+    def sync_history(self, history_df: pd.DataFrame) -> int:
+        """Feeds the rows of an OHLC frame that are newer than (or revise) the last committed bar. Returns rows applied."""
+        if not isinstance(history_df, pd.DataFrame) or history_df.empty or not all(c in history_df.columns for c in OHLC_COLUMNS): return 0
+        fingerprint = (len(history_df),) + tuple(history_df[c].iat[-1] for c in OHLC_COLUMNS)
+        if fingerprint == self._synced_fingerprint: return 0 # Same frame as last refresh: skip parsing entirely
+        self._synced_fingerprint = fingerprint
+        dates = pd.to_datetime(history_df["date"], errors='coerce').to_numpy()
+        new_mask = ~np.isnat(dates) if self.last_bar_date is None else (dates >= self.last_bar_date.to_datetime64())
+        if not new_mask.any(): return 0
+        new_dates = dates[new_mask]
+        ohlc = [pd.to_numeric(history_df[c].to_numpy()[new_mask], errors='coerce').astype(float) for c in ("high", "low", "close")]
+        valid = ~(np.isnan(ohlc[0]) | np.isnan(ohlc[1]) | np.isnan(ohlc[2]))
+        order = np.flatnonzero(valid)[np.argsort(new_dates[valid], kind="stable")]
+        if self.last_bar_date is not None and len(order) and new_dates[order[0]] == self.last_bar_date.to_datetime64():
+            same_day = order[new_dates[order] == new_dates[order[0]]]
+            # An unchanged copy of the last committed bar is not a revision
+            if (ohlc[0][same_day[-1]], ohlc[1][same_day[-1]], ohlc[2][same_day[-1]]) == self._last_bar: order = order[len(same_day):]
+        applied = 0
+        for i in order:
+            applied += int(self.add_bar(new_dates[i], ohlc[0][i], ohlc[1][i], ohlc[2][i]))
+        return applied
+
+    # --- Queries ---
+
+    @property
+    def atr(self) -> Optional[float]:
+        """ATR over committed daily bars (None until 'atr_period' true ranges are available)."""
+        return self._committed.atr_ewm if self._committed.tr_count >= self.atr_period else None
+
+    @property
+    def historical_vol(self) -> Optional[float]:
+        return self._committed.annualized_vol()
+
+    @property
+    def intraday_atr(self) -> Optional[float]:
+        """ATR including the provisional intraday bar (falls back to the committed ATR)."""
+        if self._intraday is not None and self._intraday.tr_count >= self.atr_period: return self._intraday.atr_ewm
+        return self.atr
+
+    @property
+    def intraday_historical_vol(self) -> Optional[float]:
+        return self._intraday.annualized_vol() if self._intraday is not None else self.historical_vol
+
+    def market_frame(self) -> Optional[pd.DataFrame]:
+        """
+        'price' / 'volatility' frame of the retained bars (volatility back/forward-filled), as the elite regime
+        detector expects. Built once per state version; None while no historical vol is available.
+        """
+        cached_version, cached_frame = self._market_frame_cache
+        if cached_version == self.version: return cached_frame
+        frame: Optional[pd.DataFrame] = None
+        if self._closes:
+            frame = pd.DataFrame({"price": np.fromiter(self._closes, dtype=float), "volatility": np.fromiter(self._hv_series, dtype=float)})
+            frame = frame.bfill().ffill().dropna()
+            if frame.empty: frame = None
+        self._market_frame_cache = (self.version, frame)
+        return frame
+
+
+class VolatilityStateRegistry:
+    """Thread-safe symbol -> SymbolVolatilityState map shared by the strategy layer and the data processor."""
+
+    def __init__(self, atr_period: int = DEFAULT_ATR_PERIOD, hv_window: int = DEFAULT_HV_WINDOW, max_bars: int = DEFAULT_MAX_BARS):
+        self.instance_logger = logger.getChild(self.__class__.__name__)
+        self.atr_period, self.hv_window, self.max_bars = int(atr_period), int(hv_window), int(max_bars)
+        self._states: Dict[str, SymbolVolatilityState] = {}
+        self._lock = threading.RLock()
+
+    def get(self, symbol: str, create: bool = True) -> Optional[SymbolVolatilityState]:
+        key = str(symbol).upper()
+        with self._lock:
+            state = self._states.get(key)
+            if state is None and create:
+                state = self._states[key] = SymbolVolatilityState(key, self.atr_period, self.hv_window, self.max_bars)
+            return state
+
+    def sync(self, symbol: str, history_df: Optional[pd.DataFrame], price: Optional[float] = None) -> SymbolVolatilityState:
+        """Brings a symbol's state up to date with an OHLC frame (new rows only) and an optional intraday price."""
+        with self._lock:
+            state = self.get(symbol)
+            if history_df is not None:
+                applied = state.sync_history(history_df)
+                if applied: self.instance_logger.debug(f"{state.symbol}: applied {applied} new bars (total {state.bar_count}).")
+            if price is not None: state.update_price(price)
+            return state
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {sym: {"atr": s.atr, "historical_vol": s.historical_vol, "bars": s.bar_count, "last_bar_date": s.last_bar_date} for sym, s in self._states.items()}